@@ -1,4 +1,4 @@
-from cloud_cli.utils.console_utils import safe_print
+from cloud_cli.utils.console_utils import safe_print, print_resource_event
 """
 Deploy Command
 
@@ -12,14 +12,28 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from pathlib import Path
 
-from cloud_core.deployment import DeploymentManager, StateManager, ConfigGenerator, StackStatus
-from cloud_core.orchestrator import Orchestrator
-from cloud_core.pulumi import PulumiWrapper, StackOperations
+from cloud_core.build import StackPreparer
+from cloud_core.deployment import (
+    DeploymentManager,
+    StateManager,
+    ConfigGenerator,
+    StackStatus,
+    CheckpointStore,
+    capture_checkpoint,
+    find_stale_stacks,
+    recover_stale_locks,
+)
+from cloud_core.orchestrator import Orchestrator, ResourceBudget
+from cloud_core.pulumi import PulumiWrapper, StackOperations, ParallelismTuner, PulumiHomes
+from cloud_core.runtime import create_stack_config_resolver
 from cloud_core.validation import ManifestValidator, DependencyValidator
 from cloud_core.validation.stack_code_validator import StackCodeValidator
+from cloud_core.utils.fingerprint import fingerprint_code
 from cloud_core.utils.logger import get_logger
+from cloud_core.utils.serialization import read_yaml
 from cloud_core.utils.output_formatter import OutputFormatter, OutputLevel
-from cloud_core.utils import AWSErrorHandler
+from cloud_core.utils import AWSErrorHandler, stack_log_name
+from cloud_cli.commands.preview_cmd import run_previews, print_preview_summary
 
 app = typer.Typer()
 console = Console()
@@ -47,6 +61,19 @@ def deploy_command(
     yes: bool = typer.Option(
         False, "--yes", "-y", help="Skip confirmation prompt"
     ),
+    precompile: bool = typer.Option(
+        True, "--precompile/--no-precompile", help="Run stacks from JavaScript compiled ahead of time"
+    ),
+    resource_budget: int = typer.Option(
+        64, "--resource-budget", help="Maximum resource operations in flight across all stacks"
+    ),
+    isolated_homes: bool = typer.Option(
+        True, "--isolated-homes/--shared-pulumi-home",
+        help="Give each Pulumi worker its own PULUMI_HOME with a shared plugin cache",
+    ),
+    recover_locks: bool = typer.Option(
+        False, "--recover-locks", help="Cancel updates left locked by an interrupted run"
+    ),
     quiet: bool = typer.Option(False, "--quiet", "-q", help="Minimal output (only critical messages)"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Detailed output"),
 ) -> None:
@@ -71,7 +98,7 @@ def deploy_command(
             output.error(f"Deployment {deployment_id} not found")
             raise typer.Exit(1)
 
-        manifest = deployment_manager.load_manifest(deployment_id)
+        manifest = deployment_manager.get_manifest(deployment_id)
 
         # Validate environment
         if environment not in manifest.get("environments", {}):
@@ -157,6 +184,10 @@ def deploy_command(
 
         if preview:
             output.warning("Preview mode - no changes will be made")
+            results = run_previews(deployment_id, manifest, environment, deployment_dir, parallel)
+            print_preview_summary(results)
+            if not all(result.get("success") for result in results.values()):
+                raise typer.Exit(1)
             return
 
         # Confirm deployment
@@ -166,16 +197,27 @@ def deploy_command(
 
         # Initialize state manager
         state_manager = StateManager(deployment_dir)
-        state_manager.start_operation("deploy", {"environment": environment})
 
-        # Execute deployment (sync wrapper for async execution)
-        asyncio.run(_execute_deployment(
-            deployment_id, manifest, environment, deployment_dir, orchestrator, plan, state_manager
-        ))
+        # No other process may change this deployment while it deploys
+        with state_manager.acquire_deployment_lease("deploy") as lease:
+            # Stacks stop starting once another process takes the lease over
+            orchestrator.lease = lease
+
+            check_stale_locks(state_manager, manifest, deployment_dir, deployment_id, recover_locks)
+            operation_id = state_manager.start_operation("deploy", {"environment": environment})
+
+            # Execute deployment (sync wrapper for async execution)
+            asyncio.run(_execute_deployment(
+                deployment_id, manifest, environment, deployment_dir, orchestrator, plan, state_manager,
+                precompile=precompile, operation_id=operation_id, resource_budget=resource_budget,
+                isolated_homes=isolated_homes,
+            ))
 
         output.info("")
         output.success("Deployment completed successfully")
 
+    except typer.Exit:
+        raise
     except Exception as e:
         error_message = str(e)
 
@@ -201,8 +243,40 @@ def deploy_command(
         raise typer.Exit(1)
 
 
+def check_stale_locks(state_manager, manifest, deployment_dir, deployment_id, recover=False):
+    """
+    Report (and with recover, release) stacks left locked by an interrupted run
+
+    Must run before the next operation starts, which replaces the
+    interrupted operation's record. Without recover the command stops
+    (typer.Exit(1)) so that record is kept for a rerun with --recover-locks.
+    """
+    stale = find_stale_stacks(state_manager)
+    if not stale:
+        return
+
+    names = ", ".join(entry["stack_name"] for entry in stale)
+
+    if not recover:
+        console.print(
+            f"[red]Error:[/red] A previous run was interrupted while updating: {names}. "
+            "These stacks may still be locked; rerun with --recover-locks to cancel their updates."
+        )
+        raise typer.Exit(1)
+
+    console.print(f"Recovering stacks left locked by an interrupted run: {names}")
+    pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+    result = recover_stale_locks(state_manager, pulumi_wrapper) or {"recovered": [], "failed": {}}
+
+    for stack_name in result["recovered"]:
+        console.print(f"  [green]✓[/green] Released lock of {stack_name}")
+    for stack_name in result["failed"]:
+        console.print(f"  [yellow]![/yellow] Could not cancel update of {stack_name} (see logs)")
+
+
 async def _execute_deployment(
-    deployment_id, manifest, environment, deployment_dir, orchestrator, plan, state_manager
+    deployment_id, manifest, environment, deployment_dir, orchestrator, plan, state_manager,
+    precompile=True, operation_id=None, resource_budget=None, isolated_homes=True,
 ):
     """Execute deployment asynchronously"""
 
@@ -211,17 +285,47 @@ async def _execute_deployment(
     stacks_root = cloud_root / "stacks"
 
     # Initialize Pulumi
-    # Use pulumiOrg (Pulumi Cloud organization), NOT organization (deployment org)
-    pulumi_org = manifest.get("pulumiOrg", manifest.get("organization", ""))
-
-    # Build composite project name: DeploymentID-Organization-Project
-    deployment_id_str = manifest.get("deployment_id", deployment_id)
-    organization = manifest.get("organization", "")
-    project = manifest.get("project", "")
-    composite_project = f"{deployment_id_str}-{organization}-{project}"
-
-    pulumi_wrapper = PulumiWrapper(organization=pulumi_org, project=composite_project)
-    stack_ops = StackOperations(pulumi_wrapper)
+    # Composite project name and state backend (Pulumi Cloud or local) come from the manifest
+    pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+    if isolated_homes:
+        # Workers never share ~/.pulumi; plugins are installed once into a cache
+        # shared by all deployments (see StackPreparer) and linked into each home
+        pulumi_wrapper.homes = PulumiHomes(deployment_dir / ".pulumi-homes", cloud_root / ".pulumi-plugins")
+    # Per-stack --parallel from the manifest or earlier runs, within a global budget
+    stack_ops = StackOperations(pulumi_wrapper, parallelism=ParallelismTuner(deployment_dir))
+    if resource_budget:
+        orchestrator.resource_budget = ResourceBudget(resource_budget)
+
+    # Live per-resource progress from the Pulumi engine event stream
+    orchestrator.on_resource_event = lambda stack, event: print_resource_event(console, stack, event)
+
+    # Full Pulumi output of each stack goes to deploy/<id>/logs
+    orchestrator.log_dir = deployment_dir / "logs"
+
+    # Stacks in flight are recorded so an interrupted run can be recovered
+    orchestrator.state_manager = state_manager
+    orchestrator.environment = environment
+
+    all_stacks = [stack for layer in plan.layers for stack in layer]
+
+    # Checkpoint current Pulumi state so `cloud rollback --to <operation>` can restore it
+    checkpoint_store = CheckpointStore(deployment_dir)
+    if operation_id:
+        checkpoint = capture_checkpoint(
+            checkpoint_store, pulumi_wrapper, operation_id, "deploy", environment, all_stacks
+        )
+        if checkpoint["stacks"]:
+            console.print(f"  Checkpointed {len(checkpoint['stacks'])} stack(s) ({operation_id})")
+
+    # Create missing Pulumi stacks up front so each stack only selects and deploys
+    created = stack_ops.provision_stacks(all_stacks, environment)
+    if created:
+        console.print(f"  Created {len(created)} Pulumi stack(s)")
+
+    # Install dependencies and plugins and compile every stack in the background;
+    # each stack's deploy waits only for its own prepare step
+    preparer = StackPreparer(stacks_root, pulumi_wrapper, precompile=precompile)
+    orchestrator.start_prepare(plan, preparer.prepare, max_workers=max(4, orchestrator.max_parallel))
 
     # Config generator
     config_gen = ConfigGenerator(deployment_dir)
@@ -237,31 +341,70 @@ async def _execute_deployment(
             if not stack_dir.exists():
                 return False, f"Stack directory not found: {stack_dir}"
 
-            # Generate config
-            config_file = config_gen.generate_stack_config(stack_name, manifest, environment)
-            config = config_gen.load_stack_config(stack_name, environment)
-
-            # Get Pulumi config values
-            pulumi_config = config_gen.generate_pulumi_config_values(stack_name, environment)
-
-            # Use deployment context for Pulumi.yaml management
-            with pulumi_wrapper.deployment_context(stack_dir, manifest, deployment_dir):
-                # Deploy stack within context
-                success, error = stack_ops.deploy_stack(
-                    deployment_id=deployment_id,
-                    stack_name=stack_name,
-                    environment=environment,
-                    stack_dir=stack_dir,
-                    config=pulumi_config,
-                    preview_only=False,
-                    config_file=config_file,
+            def prepare() -> tuple:
+                # Generate config; ${stack.*} references read upstream outputs through Pulumi
+                resolver = create_stack_config_resolver(
+                    manifest, environment, manifest["stacks"][stack_name].get("config", {}),
+                    pulumi_wrapper,
+                )
+                config_file = config_gen.generate_stack_config(
+                    stack_name, manifest, environment, resolver=resolver
                 )
-            # Pulumi.yaml automatically restored here
+
+                # Get Pulumi config values
+                pulumi_config = config_gen.generate_pulumi_config_values(stack_name, environment)
+                secret_keys = config_gen.get_secret_keys(stack_name)
+                return config_file, pulumi_config, secret_keys, fingerprint_code(stack_dir)
+
+            # Config generation and hashing block too, so they run in a worker thread as well
+            config_file, pulumi_config, secret_keys, code = await asyncio.to_thread(prepare)
+
+            requested_parallel = stack_ops.choose_parallelism(
+                stack_name, environment, manifest["stacks"][stack_name].get("parallel")
+            )
+
+            # Run Pulumi in an isolated workspace with the deployment's Pulumi.yaml
+            log_name = stack_log_name(deployment_id, stack_name, environment, "deploy")
+            with orchestrator.open_stack_log(stack_name, log_name) as stack_log:
+
+                def deploy(parallel: Optional[int]) -> tuple:
+                    with pulumi_wrapper.deployment_context(
+                        stack_dir, manifest, deployment_dir, environment, precompiled=precompile
+                    ) as workspace_dir:
+                        # Deploy stack within context
+                        success, error = stack_ops.deploy_stack(
+                            deployment_id=deployment_id,
+                            stack_name=stack_name,
+                            environment=environment,
+                            stack_dir=workspace_dir,
+                            config=pulumi_config,
+                            preview_only=False,
+                            config_file=config_file,
+                            on_event=orchestrator.resource_event_handler(stack_name),
+                            on_output=stack_log.write,
+                            parallel=parallel,
+                            secret_keys=secret_keys,
+                        )
+
+                    if success:
+                        # Rollback needs the code and config each checkpointed state came from
+                        checkpoint_store.record_deployment(
+                            stack_name, environment, code,
+                            read_yaml(config_file, default={}), secret_keys,
+                        )
+                    return success, error
+
+                # Pulumi blocks, so it runs in a worker thread; the event loop stays free
+                # to start other stacks while this one holds its share of the budget
+                async with orchestrator.reserve_resources(requested_parallel) as parallel:
+                    success, error = await asyncio.to_thread(deploy, parallel)
 
             if success:
                 state_manager.set_stack_status(stack_name, StackStatus.DEPLOYED, environment)
             else:
                 state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+                if stack_log.path:
+                    console.print(f"  [dim]{stack_name} output: {stack_log.path}[/dim]")
 
             return success, error
 
@@ -284,6 +427,10 @@ async def _execute_deployment(
     # Execute orchestrated deployment
     result = await orchestrator.execute_plan(plan, stack_executor, stop_on_error=True)
 
+    # The operation belongs to whoever took the lease over; don't close it for them
+    if orchestrator.lease:
+        orchestrator.lease.check()
+
     # Record completion
     state_manager.complete_operation(result.success, {
         "successful_stacks": result.successful_stacks,
@@ -9,10 +9,17 @@ from typing import Optional
 from rich.console import Console
 from pathlib import Path
 
-from cloud_core.deployment import DeploymentManager, StateManager, ConfigGenerator, StackStatus
+from cloud_core.deployment import (
+    DeploymentManager,
+    StateManager,
+    ConfigGenerator,
+    StackStatus,
+    CheckpointStore,
+)
 from cloud_core.orchestrator import DependencyResolver
 from cloud_core.pulumi import PulumiWrapper, StackOperations
 from cloud_core.validation import ManifestValidator
+from cloud_core.utils.fingerprint import fingerprint_code
 from cloud_core.utils.logger import get_logger
 from cloud_cli.utils.path_utils import get_stacks_dir
 from cloud_cli.utils.console_utils import safe_print
@@ -35,6 +42,9 @@ def deploy_stack_command(
     preview: bool = typer.Option(
         False, "--preview", help="Preview changes without deploying"
     ),
+    precompile: bool = typer.Option(
+        True, "--precompile/--no-precompile", help="Run stacks from JavaScript compiled ahead of time"
+    ),
 ) -> None:
     """Deploy a single stack"""
 
@@ -98,58 +108,68 @@ def deploy_stack_command(
         console.print(f"\n[bold]Deploying stack {stack_name} ({environment})...[/bold]")
 
         state_manager = StateManager(deployment_dir)
-        state_manager.set_stack_status(stack_name, StackStatus.DEPLOYING, environment)
-
-        # Get Pulumi organization and project from manifest
-        pulumi_org = manifest.get("pulumiOrg", manifest.get("organization", ""))
-        project = manifest.get("project", deployment_id)  # Use deployment project name
-
-        pulumi_wrapper = PulumiWrapper(organization=pulumi_org, project=project)
-        stack_ops = StackOperations(pulumi_wrapper)
-
-        try:
-            # Get stack directory
-            stack_dir = get_stacks_dir() / stack_name
-
-            # Get stack config and convert all values to strings
-            stack_custom_config = stack_config.get("config", {})
-
-            # Build complete config with required deployment metadata
-            config = {
-                "project": manifest.get("project", ""),
-                "environment": environment,
-                "deploymentId": deployment_id,
-                "pulumiOrg": manifest.get("pulumiOrg", manifest.get("organization", "")),
-                "region": manifest.get("environments", {}).get(environment, {}).get("region", "us-east-1"),
-            }
-
-            # Add stack-specific config (all values as strings)
-            config.update({k: str(v) for k, v in stack_custom_config.items()})
-
-            # Use deployment context for Pulumi.yaml management
-            with pulumi_wrapper.deployment_context(stack_dir, stack_name):
-                # Deploy within context
-                success, error = stack_ops.deploy_stack(
-                    deployment_id=deployment_id,
-                    stack_name=stack_name,
-                    environment=environment,
-                    stack_dir=stack_dir,
-                    config=config,
-                    preview_only=preview,
-                )
-            # Pulumi.yaml automatically restored here
-
-            if success:
-                state_manager.set_stack_status(stack_name, StackStatus.DEPLOYED, environment)
-                safe_print(console, f"\n[green]✓[/green] Stack {stack_name} deployed successfully")
-            else:
-                state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
-                safe_print(console, f"\n[red]✗[/red] Stack deployment failed: {error}")
-                raise typer.Exit(1)
 
-        except Exception as e:
-            state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
-            raise e
+        # Other processes may change other stacks meanwhile, but not this one
+        with state_manager.acquire_stack_lease(stack_name, environment, "deploy-stack"):
+            state_manager.set_stack_status(stack_name, StackStatus.DEPLOYING, environment)
+
+            # Composite project name and state backend (Pulumi Cloud or local) come from the manifest
+            pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+            stack_ops = StackOperations(pulumi_wrapper)
+
+            try:
+                # Get stack directory
+                stack_dir = get_stacks_dir() / stack_name
+
+                # Get stack config and convert all values to strings
+                stack_custom_config = stack_config.get("config", {})
+
+                # Build complete config with required deployment metadata
+                config = {
+                    "project": manifest.get("project", ""),
+                    "environment": environment,
+                    "deploymentId": deployment_id,
+                    "pulumiOrg": manifest.get("pulumiOrg", manifest.get("organization", "")),
+                    "region": manifest.get("environments", {}).get(environment, {}).get("region", "us-east-1"),
+                }
+
+                # Add stack-specific config (all values as strings)
+                config.update({k: str(v) for k, v in stack_custom_config.items()})
+
+                code = fingerprint_code(stack_dir)
+                secret_keys = ConfigGenerator(deployment_dir).get_secret_keys(stack_name)
+
+                # Run Pulumi in an isolated workspace with the deployment's Pulumi.yaml
+                with pulumi_wrapper.deployment_context(
+                    stack_dir, manifest, deployment_dir, environment, precompiled=precompile
+                ) as workspace_dir:
+                    # Deploy within context
+                    success, error = stack_ops.deploy_stack(
+                        deployment_id=deployment_id,
+                        stack_name=stack_name,
+                        environment=environment,
+                        stack_dir=workspace_dir,
+                        config=config,
+                        preview_only=preview,
+                        secret_keys=secret_keys,
+                    )
+
+                if success:
+                    state_manager.set_stack_status(stack_name, StackStatus.DEPLOYED, environment)
+                    if not preview:
+                        # Rollback needs the code and config each checkpointed state came from
+                        CheckpointStore(deployment_dir).record_deployment(
+                            stack_name, environment, code, config, secret_keys
+                        )
+                    safe_print(console, f"\n[green]✓[/green] Stack {stack_name} deployed successfully")
+                else:
+                    state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+                    safe_print(console, f"\n[red]✗[/red] Stack deployment failed: {error}")
+                    raise typer.Exit(1)
+
+            except Exception as e:
+                state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+                raise e
 
     except Exception as e:
         console.print(f"[red]Error:[/red] {e}")
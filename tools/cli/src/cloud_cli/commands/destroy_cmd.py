@@ -1,4 +1,4 @@
-from cloud_cli.utils.console_utils import safe_print
+from cloud_cli.utils.console_utils import safe_print, print_resource_event
 """
 Destroy Command
 
@@ -12,13 +12,20 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from pathlib import Path
 
-from cloud_core.deployment import DeploymentManager, StateManager, StackStatus
+from cloud_core.deployment import (
+    DeploymentManager,
+    StateManager,
+    StackStatus,
+    CheckpointStore,
+    capture_checkpoint,
+)
 from cloud_core.orchestrator import Orchestrator
 from cloud_core.pulumi import PulumiWrapper, StackOperations
 from cloud_core.validation import ManifestValidator
 from cloud_core.utils.logger import get_logger
 from cloud_core.utils.output_formatter import OutputFormatter, OutputLevel
-from cloud_core.utils import AWSErrorHandler
+from cloud_core.utils import AWSErrorHandler, stack_log_name
+from cloud_cli.commands.deploy_cmd import check_stale_locks
 
 app = typer.Typer()
 console = Console()
@@ -37,6 +44,9 @@ def destroy_command(
     dry_run: bool = typer.Option(
         False, "--dry-run", help="Show what would be destroyed without destroying"
     ),
+    recover_locks: bool = typer.Option(
+        False, "--recover-locks", help="Cancel updates left locked by an interrupted run"
+    ),
     quiet: bool = typer.Option(False, "--quiet", "-q", help="Minimal output (only critical messages)"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Detailed output"),
 ) -> None:
@@ -124,115 +134,139 @@ def destroy_command(
         output.section("Destroying stacks...")
 
         state_manager = StateManager(deployment_dir)
-        state_manager.start_operation("destroy", {"environment": environment})
-
-        # Initialize PulumiWrapper with required parameters
-        # Use pulumiOrg (Pulumi Cloud organization), NOT organization (deployment org)
-        pulumi_org = manifest.get("pulumiOrg", manifest.get("organization", ""))
-
-        # Build composite project name: DeploymentID-Organization-Project
-        deployment_id_str = manifest.get("deployment_id", deployment_id)
-        organization = manifest.get("organization", "")
-        project = manifest.get("project", "")
-        composite_project = f"{deployment_id_str}-{organization}-{project}"
-
-        pulumi_wrapper = PulumiWrapper(organization=pulumi_org, project=composite_project)
-        stack_ops = StackOperations(pulumi_wrapper)
-
-        # Get stack dir (assuming stacks are in cloud/stacks/)
-        cloud_root = Path(__file__).parent.parent.parent.parent.parent.parent  # Go to cloud root
-        stacks_root = cloud_root / "stacks"
-
-        async def run_destroy():
-            try:
-                # Stack destroyer function
-                async def stack_destroyer(stack_name: str):
-                    try:
-                        console.print(f"  Destroying stack: [cyan]{stack_name}[/cyan]")
-
-                        # Get stack directory
-                        stack_dir = stacks_root / stack_name
-
-                        if not stack_dir.exists():
-                            return False, f"Stack directory not found: {stack_dir}"
-
-                        # Use deployment context for Pulumi.yaml management
-                        with pulumi_wrapper.deployment_context(stack_dir, manifest, deployment_dir):
-                            # Destroy stack within context
-                            success, error = stack_ops.destroy_stack(
-                                deployment_id=deployment_id,
-                                stack_name=stack_name,
-                                environment=environment,
-                                stack_dir=stack_dir,
-                            )
-                        # Pulumi.yaml automatically restored here
 
-                        if success:
-                            state_manager.set_stack_status(stack_name, StackStatus.NOT_DEPLOYED, environment)
-                        else:
-                            state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+        # No other process may change this deployment while it is destroyed
+        with state_manager.acquire_deployment_lease("destroy") as lease:
+            check_stale_locks(state_manager, manifest, deployment_dir, deployment_id, recover_locks)
+            operation_id = state_manager.start_operation("destroy", {"environment": environment})
 
-                        return success, error
+            # Composite project name and state backend (Pulumi Cloud or local) come from the manifest
+            pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+            stack_ops = StackOperations(pulumi_wrapper)
 
-                    except Exception as e:
-                        error_message = str(e)
-                        logger.error(f"Error destroying stack {stack_name}: {e}")
+            # Checkpoint current Pulumi state so `cloud rollback --to <operation>` can restore it
+            capture_checkpoint(
+                CheckpointStore(deployment_dir), pulumi_wrapper, operation_id, "destroy", environment,
+                [stack for layer in destroy_layers for stack in layer],
+            )
 
-                        # Log stack-specific error to deployment directory
-                        AWSErrorHandler.log_error_to_deployment(
-                            error_message,
-                            deployment_dir,
-                            deployment_id,
-                            stack_name=stack_name,
-                            environment=environment,
-                            operation="destroy"
-                        )
+            # Live per-resource progress from the Pulumi engine event stream
+            orchestrator.on_resource_event = lambda stack, event: print_resource_event(console, stack, event)
+
+            # Full Pulumi output of each stack goes to deploy/<id>/logs
+            orchestrator.log_dir = deployment_dir / "logs"
+
+            # Stacks in flight are recorded so an interrupted run can be recovered
+            orchestrator.state_manager = state_manager
+            orchestrator.environment = environment
+
+            # Stacks stop starting once another process takes the lease over
+            orchestrator.lease = lease
+
+            # Get stack dir (assuming stacks are in cloud/stacks/)
+            cloud_root = Path(__file__).parent.parent.parent.parent.parent.parent  # Go to cloud root
+            stacks_root = cloud_root / "stacks"
+
+            async def run_destroy():
+                try:
+                    # Stack destroyer function
+                    async def stack_destroyer(stack_name: str):
+                        try:
+                            console.print(f"  Destroying stack: [cyan]{stack_name}[/cyan]")
+
+                            # Get stack directory
+                            stack_dir = stacks_root / stack_name
+
+                            if not stack_dir.exists():
+                                return False, f"Stack directory not found: {stack_dir}"
+
+                            # Run Pulumi in an isolated workspace with the deployment's Pulumi.yaml
+                            log_name = stack_log_name(deployment_id, stack_name, environment, "destroy")
+                            with orchestrator.open_stack_log(stack_name, log_name) as stack_log, \
+                                    pulumi_wrapper.deployment_context(stack_dir, manifest, deployment_dir, environment) as workspace_dir:
+                                # Destroy stack within context
+                                success, error = stack_ops.destroy_stack(
+                                    deployment_id=deployment_id,
+                                    stack_name=stack_name,
+                                    environment=environment,
+                                    stack_dir=workspace_dir,
+                                    on_event=orchestrator.resource_event_handler(stack_name),
+                                    on_output=stack_log.write,
+                                )
+
+                            if success:
+                                state_manager.set_stack_status(stack_name, StackStatus.NOT_DEPLOYED, environment)
+                            else:
+                                state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+                                if stack_log.path:
+                                    console.print(f"  [dim]{stack_name} output: {stack_log.path}[/dim]")
+
+                            return success, error
+
+                        except Exception as e:
+                            error_message = str(e)
+                            logger.error(f"Error destroying stack {stack_name}: {e}")
+
+                            # Log stack-specific error to deployment directory
+                            AWSErrorHandler.log_error_to_deployment(
+                                error_message,
+                                deployment_dir,
+                                deployment_id,
+                                stack_name=stack_name,
+                                environment=environment,
+                                operation="destroy"
+                            )
 
-                        return False, error_message
+                            return False, error_message
 
-                # Create an OrchestrationPlan-like object that execute_plan expects
-                from cloud_core.orchestrator import OrchestrationPlan, DependencyResolver, LayerCalculator
+                    # Create an OrchestrationPlan-like object that execute_plan expects
+                    from cloud_core.orchestrator import OrchestrationPlan, DependencyResolver, LayerCalculator
 
-                # Build minimal dependency resolver and layer calculator
-                dep_resolver = DependencyResolver()
-                dep_resolver.build_graph(stacks_config)
-                layer_calc = LayerCalculator(dep_resolver)
+                    # Build minimal dependency resolver and layer calculator
+                    dep_resolver = DependencyResolver()
+                    dep_resolver.build_graph(stacks_config)
+                    layer_calc = LayerCalculator(dep_resolver)
 
-                # Create plan object
-                exec_plan = OrchestrationPlan(destroy_layers, dep_resolver, layer_calc)
+                    # Create plan object
+                    exec_plan = OrchestrationPlan(destroy_layers, dep_resolver, layer_calc)
 
-                # Execute destroy plan
-                result = await orchestrator.execute_plan(
-                    plan=exec_plan,
-                    stack_executor=stack_destroyer,
-                    stop_on_error=True
-                )
+                    # Execute destroy plan
+                    result = await orchestrator.execute_plan(
+                        plan=exec_plan,
+                        stack_executor=stack_destroyer,
+                        stop_on_error=True
+                    )
 
-                return result.success
+                    return result.success
 
-            except Exception as e:
-                logger.error(f"Destroy failed: {e}")
-                return False
+                except Exception as e:
+                    logger.error(f"Destroy failed: {e}")
+                    return False
 
-        success = asyncio.run(run_destroy())
+            success = asyncio.run(run_destroy())
 
-        if success:
-            # Mark deployment as destroyed
-            from cloud_core.deployment import DeploymentStatus
-            state_manager.set_deployment_status(DeploymentStatus.DESTROYED)
-            state_manager.complete_operation(success=True)
+            # The operation belongs to whoever took the lease over; don't close it for them
+            lease.check()
 
-            output.success(f"Deployment {deployment_id} ({environment}) destroyed successfully")
-            output.info("")
-            output.info("Deployment resources have been destroyed.")
-            output.info(f"Deployment history and logs are preserved in: {deployment_dir}")
-            output.info("")
-            output.warning("Note: Do not use Pulumi commands directly. Use 'cloud' CLI commands to manage deployments.")
-        else:
-            state_manager.complete_operation(success=False)
-            output.error("Destroy failed - see logs for details")
-            raise typer.Exit(1)
+            if success:
+                # Mark deployment as destroyed
+                from cloud_core.deployment import DeploymentStatus
+                state_manager.set_deployment_status(DeploymentStatus.DESTROYED)
+                state_manager.complete_operation(success=True)
+
+                output.success(f"Deployment {deployment_id} ({environment}) destroyed successfully")
+                output.info("")
+                output.info("Deployment resources have been destroyed.")
+                output.info(f"Deployment history and logs are preserved in: {deployment_dir}")
+                output.info("")
+                output.warning("Note: Do not use Pulumi commands directly. Use 'cloud' CLI commands to manage deployments.")
+            else:
+                state_manager.complete_operation(success=False)
+                output.error("Destroy failed - see logs for details")
+                raise typer.Exit(1)
 
+    except typer.Exit:
+        raise
     except Exception as e:
         error_message = str(e)
 
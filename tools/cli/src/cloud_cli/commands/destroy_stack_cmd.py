@@ -88,43 +88,40 @@ def destroy_stack_command(
         console.print(f"\n[bold]Destroying stack {stack_name} ({environment})...[/bold]")
 
         state_manager = StateManager(deployment_dir)
-        state_manager.set_stack_status(stack_name, StackStatus.DESTROYING, environment)
-
-        # Get Pulumi organization (NOT deployment organization) and project from manifest
-        # pulumiOrg is the Pulumi Cloud organization (e.g., "andre-2112")
-        # project is the deployment project name per v4.1 architecture
-        pulumi_org = manifest.get("pulumiOrg", manifest.get("organization", ""))
-        project = manifest.get("project", deployment_id)  # Use deployment project name
-
-        pulumi_wrapper = PulumiWrapper(organization=pulumi_org, project=project)
-        stack_ops = StackOperations(pulumi_wrapper)
-
-        try:
-            # Get stack directory
-            stack_dir = get_stacks_dir() / stack_name
-
-            # Use deployment context for Pulumi.yaml management
-            with pulumi_wrapper.deployment_context(stack_dir, stack_name):
-                # Destroy within context
-                success, error = stack_ops.destroy_stack(
-                    deployment_id=deployment_id,
-                    stack_name=stack_name,
-                    environment=environment,
-                    stack_dir=stack_dir,
-                )
-            # Pulumi.yaml automatically restored here
-
-            if success:
-                state_manager.set_stack_status(stack_name, StackStatus.DESTROYED, environment)
-                safe_print(console, f"\n[green]✓[/green] Stack {stack_name} destroyed successfully")
-            else:
-                state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
-                safe_print(console, f"\n[red]✗[/red] Stack destruction failed: {error}")
-                raise typer.Exit(1)
 
-        except Exception as e:
-            state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
-            raise e
+        # Other processes may change other stacks meanwhile, but not this one
+        with state_manager.acquire_stack_lease(stack_name, environment, "destroy-stack"):
+            state_manager.set_stack_status(stack_name, StackStatus.DESTROYING, environment)
+
+            # Composite project name and state backend (Pulumi Cloud or local) come from the manifest
+            pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+            stack_ops = StackOperations(pulumi_wrapper)
+
+            try:
+                # Get stack directory
+                stack_dir = get_stacks_dir() / stack_name
+
+                # Run Pulumi in an isolated workspace with the deployment's Pulumi.yaml
+                with pulumi_wrapper.deployment_context(stack_dir, manifest, deployment_dir, environment) as workspace_dir:
+                    # Destroy within context
+                    success, error = stack_ops.destroy_stack(
+                        deployment_id=deployment_id,
+                        stack_name=stack_name,
+                        environment=environment,
+                        stack_dir=workspace_dir,
+                    )
+
+                if success:
+                    state_manager.set_stack_status(stack_name, StackStatus.DESTROYED, environment)
+                    safe_print(console, f"\n[green]✓[/green] Stack {stack_name} destroyed successfully")
+                else:
+                    state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+                    safe_print(console, f"\n[red]✗[/red] Stack destruction failed: {error}")
+                    raise typer.Exit(1)
+
+            except Exception as e:
+                state_manager.set_stack_status(stack_name, StackStatus.FAILED, environment)
+                raise e
 
     except Exception as e:
         console.print(f"[red]Error:[/red] {e}")
@@ -0,0 +1,196 @@
+"""
+Drift Command
+
+Detect drift between Pulumi state and the cloud for all deployed stacks,
+checking stacks concurrently.
+"""
+
+import typer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+from rich.console import Console
+from rich.table import Table
+
+from cloud_core.deployment import DeploymentManager, StateManager, StackStatus
+from cloud_core.pulumi import PulumiWrapper, StackOperations
+from cloud_core.utils.logger import get_logger
+from cloud_cli.utils.console_utils import safe_print
+
+app = typer.Typer()
+console = Console()
+logger = get_logger(__name__)
+
+# Exit code when drift was found and --fail-on-drift is set
+DRIFT_EXIT_CODE = 2
+
+
+@app.command(name="drift")
+def drift_command(
+    deployment_id: str = typer.Argument(..., help="Deployment ID"),
+    environment: str = typer.Option(
+        "dev", "--environment", "-e", help="Environment (dev/stage/prod)"
+    ),
+    parallel: int = typer.Option(
+        8, "--parallel", "-p", help="Maximum concurrent stack checks"
+    ),
+    fail_on_drift: bool = typer.Option(
+        False, "--fail-on-drift", help=f"Exit with code {DRIFT_EXIT_CODE} if any stack drifted"
+    ),
+) -> None:
+    """Detect drift for all deployed stacks"""
+
+    try:
+        deployment_manager = DeploymentManager()
+        deployment_dir = deployment_manager.get_deployment_dir(deployment_id)
+
+        if not deployment_dir:
+            console.print(f"[red]Error:[/red] Deployment {deployment_id} not found")
+            raise typer.Exit(1)
+
+        manifest = deployment_manager.get_manifest(deployment_id)
+
+        statuses = StateManager(deployment_dir).get_all_stack_statuses(environment)
+        stack_names = [
+            name for name in manifest.get("stacks", {})
+            if statuses.get(name) == StackStatus.DEPLOYED
+        ]
+
+        if not stack_names:
+            console.print(f"No deployed stacks in {deployment_id} ({environment})")
+            return
+
+        results = run_drift_checks(
+            deployment_id, manifest, environment, deployment_dir, stack_names, parallel
+        )
+
+        print_drift_summary(results)
+
+        if not all(result.get("success") for result in results.values()):
+            raise typer.Exit(1)
+
+        if fail_on_drift and any(result.get("drifted") for result in results.values()):
+            raise typer.Exit(DRIFT_EXIT_CODE)
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {e}")
+        logger.error(f"Drift command failed: {e}", exc_info=True)
+        raise typer.Exit(1)
+
+
+def run_drift_checks(
+    deployment_id: str,
+    manifest: Dict[str, Any],
+    environment: str,
+    deployment_dir: Path,
+    stack_names: List[str],
+    parallel: int = 8,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Check stacks for drift concurrently, printing each result as it arrives
+
+    Uses `pulumi refresh --preview-only`, so Pulumi state is never changed.
+
+    Args:
+        deployment_id: Deployment ID
+        manifest: Deployment manifest
+        environment: Environment
+        deployment_dir: Path to deployment directory
+        stack_names: Stacks to check
+        parallel: Maximum concurrent checks
+
+    Returns:
+        Dictionary of stack name -> drift result
+    """
+    cloud_root = Path(__file__).parent.parent.parent.parent.parent.parent  # Go to cloud root
+    stacks_root = cloud_root / "stacks"
+
+    pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+    stack_ops = StackOperations(pulumi_wrapper)
+
+    def check_one(stack_name: str) -> Dict[str, Any]:
+        stack_dir = stacks_root / stack_name
+        if not stack_dir.exists():
+            return {"success": False, "drifted": [], "changes": {}, "error": f"Stack directory not found: {stack_dir}"}
+
+        # Refresh does not run the program, so no need to compile it
+        with pulumi_wrapper.deployment_context(
+            stack_dir, manifest, deployment_dir, environment
+        ) as workspace_dir:
+            return stack_ops.detect_drift(stack_name, environment, workspace_dir)
+
+    console.print(
+        f"Checking {len(stack_names)} stack(s) of {deployment_id} ({environment}) for drift..."
+    )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(stack_names)))) as pool:
+        futures = {pool.submit(check_one, name): name for name in stack_names}
+        for future in as_completed(futures):
+            stack_name = futures[future]
+            try:
+                results[stack_name] = future.result()
+            except Exception as e:
+                logger.error(f"Error checking drift of stack {stack_name}: {e}")
+                results[stack_name] = {"success": False, "drifted": [], "changes": {}, "error": str(e)}
+
+            result = results[stack_name]
+            if not result["success"]:
+                console.print(f"  {stack_name}: [red]failed[/red]")
+            elif result["drifted"]:
+                console.print(f"  {stack_name}: [yellow]{len(result['drifted'])} drifted[/yellow]")
+            else:
+                console.print(f"  {stack_name}: [green]in sync[/green]")
+
+    # Keep manifest order for display
+    return {name: results[name] for name in stack_names}
+
+
+def print_drift_summary(results: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Print drifted resources per stack
+
+    Args:
+        results: Dictionary of stack name -> drift result
+    """
+    table = Table(title="Drift")
+    table.add_column("Stack", style="cyan")
+    table.add_column("Drifted", justify="right")
+    table.add_column("Status")
+
+    errors: List[str] = []
+    total = 0
+
+    for stack_name, result in results.items():
+        drifted = result.get("drifted", [])
+        total += len(drifted)
+
+        if not result.get("success"):
+            status = "[red]failed[/red]"
+            errors.append(f"{stack_name}: {result.get('error')}")
+        elif drifted:
+            status = "[yellow]drifted[/yellow]"
+        else:
+            status = "[green]in sync[/green]"
+
+        table.add_row(stack_name, str(len(drifted)), status)
+
+    table.add_row("[bold]Total[/bold]", f"[bold]{total}[/bold]", "")
+
+    console.print()
+    console.print(table)
+
+    for stack_name, result in results.items():
+        drifted = result.get("drifted", [])
+        if not drifted:
+            continue
+
+        console.print(f"\n[bold]{stack_name}[/bold]")
+        for resource in drifted:
+            name = resource["urn"].split("::")[-1]
+            console.print(f"  [yellow]{resource['op']}[/yellow] {resource['type']} {name}")
+
+    for error in errors:
+        safe_print(console, f"[red]✗[/red] {error}")
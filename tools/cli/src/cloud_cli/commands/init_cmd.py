@@ -32,6 +32,9 @@ def init(
     project: str = typer.Option("Test Project", "--project", "-p", help="Project name"),
     domain: str = typer.Option("genesis3d.com", "--domain", "-d", help="Primary domain"),
     pulumi_org: str = typer.Option("andre-2112", "--pulumi-org", help="Pulumi organization"),
+    local_backend: bool = typer.Option(
+        False, "--local-backend", help="Keep Pulumi state in a local file backend inside the deployment"
+    ),
     template: str = typer.Option(
         "default", "--template", "-t", help="Template name"
     ),
@@ -149,6 +152,8 @@ def init(
         output.detail("Deployment ID", f"[cyan]{deployment_id}[/cyan]")
         output.detail("Organization", org_sanitized)
         output.detail("Pulumi Org", pulumi_org)
+        if local_backend:
+            output.detail("Pulumi Backend", "local (file)")
         output.detail("Project", project_sanitized)
         output.detail("Domain", domain)
         output.detail("Template", template)
@@ -166,6 +171,7 @@ def init(
             region=region,
             accounts=accounts,
             deployment_id=deployment_id,
+            overrides={"pulumiBackend": "local"} if local_backend else None,
         )
 
         output.success(f"Deployment created successfully at:")
@@ -22,26 +22,33 @@ logger = get_logger(__name__)
 @app.command(name="list")
 def list_command(
     rich: bool = typer.Option(False, "--rich", help="Interactive mode with actions"),
-    all: bool = typer.Option(False, "--all", help="Show all deployments including destroyed ones")
+    all: bool = typer.Option(False, "--all", help="Show all deployments including destroyed ones"),
+    status: str = typer.Option(None, "--status", help="Only deployments with this status"),
+    organization: str = typer.Option(None, "--org", help="Only deployments of this organization"),
+    rebuild_index: bool = typer.Option(
+        False, "--rebuild-index", help="Re-create the deployment catalog from disk first"
+    ),
 ) -> None:
     """List all deployments"""
 
     try:
         deployment_manager = DeploymentManager()
-        all_deployments = deployment_manager.list_deployments()
 
-        if not all_deployments:
-            console.print("[yellow]No deployments found[/yellow]")
-            return
+        if rebuild_index:
+            count = deployment_manager.rebuild_catalog()
+            console.print(f"[dim]Re-indexed {count} deployment(s)[/dim]")
 
-        # Filter deployments if not showing all
-        if not all:
-            deployments = [d for d in all_deployments if d.get("status", "").lower() != "destroyed"]
-        else:
-            deployments = all_deployments
+        deployments = deployment_manager.list_deployments(
+            status=status,
+            organization=organization,
+            include_destroyed=all or status is not None,
+        )
 
         if not deployments:
-            console.print("[yellow]No active deployments found. Use --all to see destroyed deployments.[/yellow]")
+            if all or status or organization or not deployment_manager.get_status_counts():
+                console.print("[yellow]No deployments found[/yellow]")
+            else:
+                console.print("[yellow]No active deployments found. Use --all to see destroyed deployments.[/yellow]")
             return
 
         if rich:
@@ -259,7 +266,7 @@ def _show_deployment_status(deployment_id: str, deployment_manager: DeploymentMa
             console.print(f"[red]Error:[/red] Deployment {deployment_id} not found")
             return
 
-        manifest = deployment_manager.load_manifest(deployment_id)
+        manifest = deployment_manager.get_manifest(deployment_id)
         metadata = deployment_manager.get_deployment_metadata(deployment_dir)
 
         # Print deployment info
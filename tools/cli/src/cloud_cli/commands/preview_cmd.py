@@ -0,0 +1,242 @@
+"""
+Preview Command
+
+Preview all stacks of a deployment concurrently and summarize the changes.
+"""
+
+import typer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List
+from rich.console import Console
+from rich.table import Table
+
+from cloud_core.deployment import DeploymentManager, ConfigGenerator
+from cloud_core.pulumi import (
+    PulumiWrapper,
+    PulumiError,
+    StackOperations,
+    PreviewCache,
+    compute_preview_key,
+)
+from cloud_core.runtime import create_stack_config_resolver
+from cloud_core.utils.fingerprint import fingerprint_code
+from cloud_core.utils.logger import get_logger
+from cloud_core.utils.serialization import read_yaml
+from cloud_cli.utils.console_utils import safe_print
+
+app = typer.Typer()
+console = Console()
+logger = get_logger(__name__)
+
+# Change columns shown in the summary table, in display order
+CHANGE_COLUMNS = ["create", "update", "replace", "delete", "same"]
+
+
+@app.command(name="preview")
+def preview_command(
+    deployment_id: str = typer.Argument(..., help="Deployment ID"),
+    environment: str = typer.Option(
+        "dev", "--environment", "-e", help="Environment (dev/stage/prod)"
+    ),
+    parallel: int = typer.Option(
+        4, "--parallel", "-p", help="Maximum concurrent stack previews"
+    ),
+    use_cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse previews of unchanged stacks"
+    ),
+) -> None:
+    """Preview changes for all enabled stacks"""
+
+    try:
+        deployment_manager = DeploymentManager()
+        deployment_dir = deployment_manager.get_deployment_dir(deployment_id)
+
+        if not deployment_dir:
+            console.print(f"[red]Error:[/red] Deployment {deployment_id} not found")
+            raise typer.Exit(1)
+
+        manifest = deployment_manager.get_manifest(deployment_id)
+
+        if environment not in manifest.get("environments", {}):
+            console.print(f"[red]Error:[/red] Environment '{environment}' not found in manifest")
+            raise typer.Exit(1)
+
+        results = run_previews(
+            deployment_id, manifest, environment, deployment_dir, parallel, use_cache
+        )
+
+        print_preview_summary(results)
+
+        if not all(result.get("success") for result in results.values()):
+            raise typer.Exit(1)
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {e}")
+        logger.error(f"Preview command failed: {e}", exc_info=True)
+        raise typer.Exit(1)
+
+
+def run_previews(
+    deployment_id: str,
+    manifest: Dict[str, Any],
+    environment: str,
+    deployment_dir: Path,
+    parallel: int = 4,
+    use_cache: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Preview all enabled stacks of a deployment concurrently
+
+    Each result is cached by (code fingerprint, config hash, state versions of
+    the stack and its upstream stacks), so unchanged stacks skip Pulumi.
+
+    Args:
+        deployment_id: Deployment ID
+        manifest: Deployment manifest
+        environment: Environment
+        deployment_dir: Path to deployment directory
+        parallel: Maximum concurrent previews
+        use_cache: Reuse and store cached previews
+
+    Returns:
+        Dictionary of stack name -> preview result
+    """
+    cloud_root = Path(__file__).parent.parent.parent.parent.parent.parent  # Go to cloud root
+    stacks_root = cloud_root / "stacks"
+
+    stacks_config = manifest.get("stacks", {})
+    stack_names = [
+        name for name, config in stacks_config.items() if config.get("enabled", True)
+    ]
+
+    if not stack_names:
+        return {}
+
+    pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+    stack_ops = StackOperations(pulumi_wrapper)
+    config_gen = ConfigGenerator(deployment_dir)
+    cache = PreviewCache(deployment_dir) if use_cache else None
+
+    # One stack listing gives the state version of every stack
+    try:
+        state_versions = pulumi_wrapper.get_stack_versions(refresh=True)
+    except PulumiError as e:
+        logger.warning(f"Could not read stack versions, previews will not be cached: {e}")
+        state_versions = None
+
+    def preview_one(stack_name: str) -> Dict[str, Any]:
+        stack_dir = stacks_root / stack_name
+        if not stack_dir.exists():
+            return {"success": False, "changes": {}, "error": f"Stack directory not found: {stack_dir}"}
+
+        # Resolve ${stack.*} references from upstream outputs, as deploy does
+        resolver = create_stack_config_resolver(
+            manifest, environment, stacks_config[stack_name].get("config", {}), pulumi_wrapper
+        )
+        config_file = config_gen.generate_stack_config(
+            stack_name, manifest, environment, resolver=resolver
+        )
+        config = read_yaml(config_file, default={})
+
+        key = None
+        if cache and state_versions is not None:
+            related = [stack_name] + list(stacks_config[stack_name].get("dependencies", []))
+            key = compute_preview_key(
+                fingerprint_code(stack_dir),
+                config,
+                {name: state_versions.get(f"{name}-{environment}") for name in related},
+            )
+            cached = cache.get(stack_name, environment, key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        with pulumi_wrapper.deployment_context(
+            stack_dir, manifest, deployment_dir, environment, precompiled=True
+        ) as workspace_dir:
+            result = stack_ops.preview_stack(
+                stack_name, environment, workspace_dir, config,
+                secret_keys=config_gen.get_secret_keys(stack_name),
+            )
+
+        if key and result.get("success") and result.get("deployed", True):
+            cache.put(stack_name, environment, key, result)
+
+        return {**result, "cached": False}
+
+    console.print(
+        f"Previewing {len(stack_names)} stack(s) of {deployment_id} ({environment})..."
+    )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(stack_names)))) as pool:
+        futures = {pool.submit(preview_one, name): name for name in stack_names}
+        for future in as_completed(futures):
+            stack_name = futures[future]
+            try:
+                results[stack_name] = future.result()
+            except Exception as e:
+                logger.error(f"Error previewing stack {stack_name}: {e}")
+                results[stack_name] = {"success": False, "changes": {}, "error": str(e)}
+
+            if not results[stack_name]["success"]:
+                status = "[red]failed[/red]"
+            elif results[stack_name].get("deployed", True):
+                status = "[green]done[/green]"
+            else:
+                status = "[yellow]not yet deployed[/yellow]"
+            cached = " (cached)" if results[stack_name].get("cached") else ""
+            console.print(f"  {stack_name}: {status}{cached}")
+
+    # Keep manifest order for display
+    return {name: results[name] for name in stack_names}
+
+
+def print_preview_summary(results: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Print aggregated per-stack preview changes
+
+    Args:
+        results: Dictionary of stack name -> preview result
+    """
+    table = Table(title="Preview")
+    table.add_column("Stack", style="cyan")
+    for column in CHANGE_COLUMNS:
+        table.add_column(column.capitalize(), justify="right")
+    table.add_column("Status")
+
+    totals: Dict[str, int] = {}
+    errors: List[str] = []
+
+    for stack_name, result in results.items():
+        changes = result.get("changes", {})
+        for op, count in changes.items():
+            totals[op] = totals.get(op, 0) + count
+
+        if result.get("success") and not result.get("deployed", True):
+            status = "[yellow]not yet deployed[/yellow]"
+        elif result.get("success"):
+            status = "[dim]cached[/dim]" if result.get("cached") else "[green]ok[/green]"
+        else:
+            status = "[red]failed[/red]"
+            errors.append(f"{stack_name}: {result.get('error')}")
+
+        table.add_row(
+            stack_name,
+            *[str(changes.get(column, 0)) for column in CHANGE_COLUMNS],
+            status,
+        )
+
+    table.add_row(
+        "[bold]Total[/bold]",
+        *[f"[bold]{totals.get(column, 0)}[/bold]" for column in CHANGE_COLUMNS],
+        "",
+    )
+
+    console.print()
+    console.print(table)
+
+    for error in errors:
+        safe_print(console, f"[red]✗[/red] {error}")
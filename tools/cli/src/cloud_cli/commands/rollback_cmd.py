@@ -5,12 +5,26 @@ Rollback a deployment to a previous state.
 """
 
 import typer
+import asyncio
+from pathlib import Path
 from typing import Optional
 from rich.console import Console
 from rich.table import Table
 
-from cloud_core.deployment import DeploymentManager, StateManager
+from cloud_core.deployment import (
+    DeploymentManager,
+    StateManager,
+    StackStatus,
+    CheckpointStore,
+    capture_checkpoint,
+    check_checkpoint_code,
+)
+from cloud_core.orchestrator import Orchestrator
+from cloud_core.pulumi import PulumiWrapper, StackOperations
+from cloud_core.validation import ManifestValidator
+from cloud_core.utils import stack_log_name
 from cloud_core.utils.logger import get_logger
+from cloud_cli.utils.console_utils import print_resource_event
 
 app = typer.Typer()
 console = Console()
@@ -29,6 +43,12 @@ def rollback_command(
     list_operations: bool = typer.Option(
         False, "--list", help="List available operations"
     ),
+    parallel: int = typer.Option(
+        3, "--parallel", "-p", help="Maximum parallel stack rollbacks"
+    ),
+    yes: bool = typer.Option(
+        False, "--yes", "-y", help="Skip confirmation prompt"
+    ),
 ) -> None:
     """Rollback deployment to a previous state"""
 
@@ -42,32 +62,44 @@ def rollback_command(
             raise typer.Exit(1)
 
         state_manager = StateManager(deployment_dir)
+        checkpoint_store = CheckpointStore(deployment_dir)
 
         # List operations if requested
         if list_operations:
-            operations = state_manager.get_operation_history(environment)
+            checkpoints = checkpoint_store.list_checkpoints(environment)
 
-            if not operations:
+            if not checkpoints:
                 console.print(f"[yellow]No operations found for {environment}[/yellow]")
                 return
 
+            # Latest recorded status of each operation (history is most recent first);
+            # nothing older than the oldest checkpoint is needed
+            statuses = {}
+            for record in state_manager.get_operation_history(
+                limit=None, since=checkpoints[-1].get("created_at")
+            ):
+                if record.get("id"):
+                    statuses.setdefault(record["id"], record.get("status"))
+
             table = Table(title=f"Operations for {deployment_id} ({environment})")
             table.add_column("Operation ID", style="cyan")
             table.add_column("Type", style="green")
             table.add_column("Status", style="yellow")
             table.add_column("Timestamp")
-            table.add_column("Duration")
+            table.add_column("Stacks", justify="right")
 
-            for op in operations:
+            for checkpoint in checkpoints:
+                operation_id = checkpoint["operation_id"]
                 table.add_row(
-                    op.get("id", "N/A"),
-                    op.get("type", "N/A"),
-                    op.get("status", "N/A"),
-                    op.get("timestamp", "N/A"),
-                    op.get("duration", "N/A"),
+                    operation_id,
+                    checkpoint.get("operation", "N/A"),
+                    statuses.get(operation_id, "N/A"),
+                    checkpoint.get("created_at", "N/A"),
+                    str(len(checkpoint.get("stacks", {}))),
                 )
 
             console.print(table)
+            console.print("\n[dim]Rolling back to an operation restores the state from before it ran[/dim]")
             return
 
         # Rollback to specific operation
@@ -75,15 +107,168 @@ def rollback_command(
             console.print("[red]Error:[/red] Please specify --to operation_id or use --list to see available operations")
             raise typer.Exit(1)
 
-        console.print(f"[yellow]Rollback functionality not yet fully implemented[/yellow]")
-        console.print(f"Would rollback {deployment_id} ({environment}) to operation: {to_operation}")
-        console.print()
-        console.print("Rollback strategy:")
-        console.print("  1. Get state snapshot from operation")
-        console.print("  2. Compare current state with target state")
-        console.print("  3. Generate rollback plan (destroy new resources, recreate deleted ones)")
-        console.print("  4. Execute rollback plan")
+        checkpoint = checkpoint_store.get_checkpoint(to_operation)
+
+        if not checkpoint:
+            console.print(f"[red]Error:[/red] No checkpoint found for operation {to_operation}")
+            raise typer.Exit(1)
+
+        if checkpoint.get("environment") != environment:
+            console.print(
+                f"[red]Error:[/red] Operation {to_operation} ran in environment "
+                f"'{checkpoint.get('environment')}', not '{environment}'"
+            )
+            raise typer.Exit(1)
+
+        snapshots = checkpoint.get("stacks", {})
+        if not snapshots:
+            console.print(f"[yellow]Checkpoint {to_operation} has no stack state to restore[/yellow]")
+            return
+
+        # Load manifest
+        manifest_path = deployment_dir / "deployment-manifest.yaml"
+        validator = ManifestValidator()
+
+        if not validator.validate(str(manifest_path)):
+            console.print("[red]Error:[/red] Invalid deployment manifest")
+            for error in validator.errors:
+                console.print(f"  - {error}")
+            raise typer.Exit(1)
+
+        manifest = validator.manifest
+
+        # Dependents are rolled back before their dependencies, like destroy
+        stacks_config = {
+            name: {
+                **config,
+                "enabled": True,
+                "dependencies": [d for d in config.get("dependencies", []) if d in snapshots],
+            }
+            for name, config in manifest.get("stacks", {}).items()
+            if name in snapshots
+        }
+
+        cloud_root = Path(__file__).parent.parent.parent.parent.parent.parent  # Go to cloud root
+        stacks_root = cloud_root / "stacks"
+
+        # Pulumi restores resources by running the program, so it must be the
+        # one the checkpointed state came from; its config is recorded with the
+        # checkpoint and reapplied
+        code = check_checkpoint_code({**checkpoint, "stacks": stacks_config}, stacks_root)
+        if code["changed"]:
+            console.print(
+                f"[red]Error:[/red] Stack code changed since the state before {to_operation} "
+                f"was deployed: {', '.join(code['changed'])}"
+            )
+            console.print("  Check out the stacks as they were then and run the rollback again")
+            raise typer.Exit(1)
+        if code["unknown"]:
+            console.print(
+                f"[yellow]Warning:[/yellow] No code or config was recorded for "
+                f"{', '.join(code['unknown'])}; resources the current code and config "
+                "don't match will be reported as not restored"
+            )
+
+        orchestrator = Orchestrator(max_parallel=parallel)
+        plan = orchestrator.create_plan(stacks_config, validate_manifest=False)
+        plan.layers = list(reversed(plan.layers))
+
+        console.print(f"Rollback plan for {deployment_id} ({environment}) to before {to_operation}:")
+        for i, layer in enumerate(plan.layers, 1):
+            console.print(f"  Layer {i}: {', '.join(layer)}")
+
+        if not yes and not typer.confirm("Proceed with rollback?"):
+            console.print("Rollback cancelled")
+            return
+
+        # No other process may change this deployment while it rolls back
+        with state_manager.acquire_deployment_lease("rollback") as lease:
+            operation_id = state_manager.start_operation(
+                "rollback", {"environment": environment, "to": to_operation}
+            )
+
+            pulumi_wrapper = PulumiWrapper.for_deployment(manifest, deployment_dir, deployment_id)
+            stack_ops = StackOperations(pulumi_wrapper)
+
+            # The rollback itself can be undone like any other operation
+            capture_checkpoint(
+                checkpoint_store, pulumi_wrapper, operation_id, "rollback", environment, stacks_config
+            )
+
+            orchestrator.on_resource_event = lambda stack, event: print_resource_event(console, stack, event)
+            orchestrator.log_dir = deployment_dir / "logs"
+            orchestrator.state_manager = state_manager
+            orchestrator.environment = environment
+
+            # Stacks stop starting once another process takes the lease over
+            orchestrator.lease = lease
+
+            async def stack_rollback(stack_name: str):
+                try:
+                    console.print(f"  Rolling back stack: [cyan]{stack_name}[/cyan]")
+
+                    stack_dir = stacks_root / stack_name
+                    if not stack_dir.exists():
+                        return False, f"Stack directory not found: {stack_dir}"
+
+                    snapshot = checkpoint_store.get_snapshot(snapshots[stack_name])
+                    # Without a recorded config the workspace's current config is used
+                    recorded_config = checkpoint.get("config", {}).get(stack_name) or {}
+
+                    log_name = stack_log_name(deployment_id, stack_name, environment, "rollback")
+
+                    def rollback() -> tuple:
+                        with orchestrator.open_stack_log(stack_name, log_name) as stack_log, \
+                                pulumi_wrapper.deployment_context(
+                                    stack_dir, manifest, deployment_dir, environment, precompiled=True
+                                ) as workspace_dir:
+                            return stack_ops.rollback_stack(
+                                stack_name,
+                                environment,
+                                workspace_dir,
+                                snapshot,
+                                config=recorded_config.get("values"),
+                                secret_keys=recorded_config.get("secret_keys"),
+                                on_event=orchestrator.resource_event_handler(stack_name),
+                                on_output=stack_log.write,
+                            )
+
+                    # Pulumi blocks, so it runs in a worker thread to let other stacks proceed
+                    success, error = await asyncio.to_thread(rollback)
+
+                    status = StackStatus.DEPLOYED if success else StackStatus.FAILED
+                    state_manager.set_stack_status(stack_name, status, environment)
+                    if success and stack_name in checkpoint.get("code", {}) and recorded_config:
+                        checkpoint_store.record_deployment(
+                            stack_name, environment, checkpoint["code"][stack_name],
+                            recorded_config["values"], recorded_config["secret_keys"],
+                        )
+
+                    return success, error
+
+                except Exception as e:
+                    logger.error(f"Error rolling back stack {stack_name}: {e}")
+                    return False, str(e)
+
+            result = asyncio.run(orchestrator.execute_plan(plan, stack_rollback, stop_on_error=True))
+
+            # The operation belongs to whoever took the lease over; don't close it for them
+            lease.check()
+
+            state_manager.complete_operation(result.success, {
+                "to": to_operation,
+                "successful_stacks": result.successful_stacks,
+                "failed_stacks": result.failed_stacks,
+            })
+
+            if not result.success:
+                console.print(f"[red]Rollback failed:[/red] {result.error_message}")
+                raise typer.Exit(1)
+
+            console.print(f"[green]Rolled back {deployment_id} ({environment}) to before {to_operation}[/green]")
 
+    except typer.Exit:
+        raise
     except Exception as e:
         console.print(f"[red]Error:[/red] {e}")
         logger.error(f"Rollback command failed: {e}", exc_info=True)
@@ -34,7 +34,7 @@ def status(
             console.print(f"[red]Error:[/red] Deployment {deployment_id} not found")
             raise typer.Exit(1)
 
-        manifest = deployment_manager.load_manifest(deployment_id)
+        manifest = deployment_manager.get_manifest(deployment_id)
         metadata = deployment_manager.get_deployment_metadata(deployment_dir)
 
         # Print deployment info
@@ -18,6 +18,8 @@ from .commands import (
     init_cmd,
     deploy_cmd,
     deploy_stack_cmd,
+    preview_cmd,
+    drift_cmd,
     destroy_cmd,
     destroy_stack_cmd,
     rollback_cmd,
@@ -87,6 +89,8 @@ def version() -> None:
 app.add_typer(init_cmd.app, help="Initialize a new deployment")
 app.add_typer(deploy_cmd.app, help="Deploy all stacks")
 app.add_typer(deploy_stack_cmd.app, help="Deploy a single stack")
+app.add_typer(preview_cmd.app, help="Preview changes for all stacks")
+app.add_typer(drift_cmd.app, help="Detect drift for all deployed stacks")
 app.add_typer(destroy_cmd.app, help="Destroy all stacks")
 app.add_typer(destroy_stack_cmd.app, help="Destroy a single stack")
 app.add_typer(rollback_cmd.app, help="Rollback deployment")
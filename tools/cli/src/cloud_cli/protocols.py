@@ -260,6 +260,21 @@ class DeploymentManagerProtocol(Protocol):
         """
         ...
 
+    def get_manifest(self, deployment_id: str) -> Dict[str, Any]:
+        """
+        Get a read-only view of the deployment manifest.
+
+        Same content as load_manifest, parsed once per process and shared
+        by every reader; mutating it raises TypeError.
+
+        Args:
+            deployment_id: Deployment identifier
+
+        Returns:
+            Read-only manifest dictionary in v4.1 format
+        """
+        ...
+
     def create_deployment(
         self,
         deployment_id: str,
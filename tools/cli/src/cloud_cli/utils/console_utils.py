@@ -60,3 +60,29 @@ def safe_console_output(func):
             # Function will be retried, console.print inside will handle the conversion
             pass
     return wrapper
+
+
+def print_resource_event(console: Console, stack_name: str, event: Any) -> None:
+    """
+    Print a live resource progress line for a stack.
+
+    Unchanged resources and start notifications are skipped so a stack with
+    thousands of resources only prints what actually changes.
+
+    Args:
+        console: Rich Console instance
+        stack_name: Stack the event belongs to
+        event: ResourceEvent from the Pulumi engine event stream
+    """
+    if event.kind == "completed" and event.op != "same":
+        console.print(
+            f"    [dim]{stack_name}[/dim] {event.op} {event.resource_type} {event.resource_name}",
+            highlight=False,
+        )
+    elif event.kind == "failed":
+        console.print(
+            f"    [red]{stack_name}[/red] {event.op} failed: {event.resource_type} {event.resource_name}",
+            highlight=False,
+        )
+    elif event.kind == "diagnostic" and event.message:
+        safe_print(console, f"    [red]{stack_name}[/red] error: {event.message}", highlight=False)
@@ -0,0 +1,44 @@
+"""Tests for deploy command helpers"""
+
+import subprocess
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+import typer
+
+from cloud_core.deployment.state_manager import StateManager
+from cloud_core.pulumi.pulumi_wrapper import PulumiWrapper
+from cloud_cli.commands.deploy_cmd import check_stale_locks
+
+
+def _interrupt(state_manager):
+    """Make the current operation look like its process died"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+
+    state = state_manager.load_state()
+    state["current_operation"]["owner"]["pid"] = process.pid
+    state_manager.save_state(state)
+
+
+def test_stale_locks_stop_run_until_recovered(tmp_path):
+    """Test a run without --recover-locks keeps the interrupted stacks for a later recovery"""
+    state_manager = StateManager(tmp_path)
+    state_manager.start_operation("deploy", {"environment": "dev"})
+    state_manager.mark_in_flight("network", "dev")
+    _interrupt(state_manager)
+
+    # A deploy without the flag stops before starting its own operation
+    with pytest.raises(typer.Exit) as exc_info:
+        check_stale_locks(state_manager, {}, tmp_path, "D1TEST1")
+    assert exc_info.value.exit_code == 1
+    assert state_manager.get_current_operation()["in_flight"][0]["stack_name"] == "network"
+
+    # A deploy with the flag still finds and releases the stack
+    pulumi_wrapper = Mock(spec=PulumiWrapper)
+    with patch("cloud_cli.commands.deploy_cmd.PulumiWrapper.for_deployment", return_value=pulumi_wrapper):
+        check_stale_locks(state_manager, {}, tmp_path, "D1TEST1", recover=True)
+
+    pulumi_wrapper.cancel_update.assert_called_once_with("network-dev")
+    assert state_manager.get_current_operation() is None
@@ -15,6 +15,7 @@ from . import runtime
 from . import pulumi
 from . import validation
 from . import utils
+from . import build
 
 __all__ = [
     "orchestrator",
@@ -24,4 +25,5 @@ __all__ = [
     "pulumi",
     "validation",
     "utils",
+    "build",
 ]
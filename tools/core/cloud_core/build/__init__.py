@@ -0,0 +1,18 @@
+"""Stack build pipeline"""
+
+from .node_store import NodeModulesStore, BuildError, install_key
+from .stack_builder import StackBuilder, BuildResult, compile_stack, source_hash
+from .stack_preparer import StackPreparer, PrepareResult, find_required_plugins
+
+__all__ = [
+    "NodeModulesStore",
+    "BuildError",
+    "install_key",
+    "StackBuilder",
+    "BuildResult",
+    "compile_stack",
+    "source_hash",
+    "StackPreparer",
+    "PrepareResult",
+    "find_required_plugins",
+]
@@ -0,0 +1,291 @@
+"""
+Node Modules Store
+
+Shared, content-addressed store of installed node_modules trees.
+
+Each distinct lockfile is installed once into the store. Every installed
+file is moved into an object directory keyed by its content hash, so
+identical files across installs exist on disk only once. Stacks get their
+node_modules as a tree of hardlinks into the store instead of a full copy.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BuildError(Exception):
+    """Raised when installing or building a stack fails"""
+
+    pass
+
+
+def install_key(package_dir: Path) -> str:
+    """
+    Compute the install key of a package
+
+    The key is the hash of package-lock.json when present, otherwise of the
+    dependency sections of package.json.
+
+    Args:
+        package_dir: Directory containing package.json
+
+    Returns:
+        SHA-256 hex digest identifying the installed dependency tree
+
+    Raises:
+        BuildError: If package.json is missing or invalid
+    """
+    package_dir = Path(package_dir)
+    lock_file = package_dir / "package-lock.json"
+
+    if lock_file.exists():
+        return "lock-" + _hash_file(lock_file)
+
+    try:
+        with open(package_dir / "package.json", "r", encoding="utf-8") as f:
+            package = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise BuildError(f"Cannot read package.json in {package_dir}: {e}")
+
+    dependencies = {
+        section: package.get(section, {})
+        for section in ("dependencies", "devDependencies", "optionalDependencies")
+    }
+    payload = json.dumps(dependencies, sort_keys=True).encode("utf-8")
+    return "pkg-" + hashlib.sha256(payload).hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    """Get the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_tree(source: Path, destination: Path) -> None:
+    """
+    Recreate a directory tree using hardlinks for files
+
+    Symlinks are recreated as symlinks. Files fall back to copies when
+    hardlinks are not possible (e.g. across filesystems).
+
+    Args:
+        source: Source directory
+        destination: Destination directory (must not exist)
+    """
+    source = Path(source)
+    destination = Path(destination)
+    destination.mkdir(parents=True)
+
+    for root, dirs, files in os.walk(source):
+        relative = Path(root).relative_to(source)
+        target_root = destination / relative
+
+        for name in list(dirs):
+            src = Path(root) / name
+            if src.is_symlink():
+                # os.walk does not descend into symlinked dirs; keep the link
+                os.symlink(os.readlink(src), target_root / name)
+                dirs.remove(name)
+            else:
+                (target_root / name).mkdir()
+
+        for name in files:
+            src = Path(root) / name
+            dst = target_root / name
+            if src.is_symlink():
+                os.symlink(os.readlink(src), dst)
+                continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+
+class NodeModulesStore:
+    """Content-addressed store of node_modules trees shared by all stacks"""
+
+    # Written into each linked node_modules to record which install it holds
+    MARKER = ".install-key"
+
+    def __init__(self, root: Path):
+        """
+        Initialize store
+
+        Args:
+            root: Store root directory (created on demand)
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.installs_dir = self.root / "installs"
+
+    def install_path(self, key: str) -> Path:
+        """Get the node_modules directory of an install"""
+        return self.installs_dir / key / "node_modules"
+
+    def has_install(self, key: str) -> bool:
+        """Check whether an install is already in the store"""
+        return self.install_path(key).is_dir()
+
+    def install(
+        self,
+        key: str,
+        package_dir: Path,
+        npm_command: Sequence[str] = ("npm",),
+        timeout: int = 600,
+    ) -> Path:
+        """
+        Install a package's dependencies into the store (once per key)
+
+        Safe to call concurrently from several processes: the install runs in
+        a private staging directory and is published with an atomic rename.
+
+        Args:
+            key: Install key (see install_key)
+            package_dir: Directory containing package.json and lockfile
+            npm_command: npm executable (and leading arguments)
+            timeout: Install timeout in seconds
+
+        Returns:
+            Path to the installed node_modules directory
+
+        Raises:
+            BuildError: If the install fails
+        """
+        if self.has_install(key):
+            return self.install_path(key)
+
+        package_dir = Path(package_dir)
+        self.installs_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{key[:16]}-", dir=self.installs_dir))
+
+        try:
+            shutil.copy2(package_dir / "package.json", staging / "package.json")
+            has_lock = (package_dir / "package-lock.json").exists()
+            if has_lock:
+                shutil.copy2(package_dir / "package-lock.json", staging / "package-lock.json")
+
+            cmd = list(npm_command) + ["ci" if has_lock else "install", "--no-audit", "--no-fund"]
+            logger.info(f"Installing dependencies for {package_dir.name} ({key[:16]})")
+
+            try:
+                result = subprocess.run(
+                    cmd, cwd=staging, capture_output=True, text=True, timeout=timeout
+                )
+            except (OSError, subprocess.TimeoutExpired) as e:
+                raise BuildError(f"npm install failed: {e}")
+
+            if result.returncode != 0:
+                raise BuildError(f"npm install failed: {result.stderr.strip()[-2000:]}")
+
+            self._ingest(staging / "node_modules")
+
+            try:
+                os.rename(staging, self.installs_dir / key)
+                staging = None
+            except OSError:
+                # Another process published the same install first
+                logger.debug(f"Install {key[:16]} already published")
+
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        return self.install_path(key)
+
+    def _ingest(self, tree: Path) -> None:
+        """
+        Move every file of a tree into the object store, leaving hardlinks
+
+        Args:
+            tree: Directory to ingest
+        """
+        if not tree.is_dir():
+            return
+
+        for root, _, files in os.walk(tree):
+            for name in files:
+                path = Path(root) / name
+                if path.is_symlink():
+                    continue
+
+                digest = _hash_file(path)
+                obj = self.objects_dir / digest[:2] / digest
+                obj.parent.mkdir(parents=True, exist_ok=True)
+
+                try:
+                    os.link(path, obj)
+                except FileExistsError:
+                    # Same content already stored: point this file at it
+                    tmp = path.with_name(f".{name}.link")
+                    os.link(obj, tmp)
+                    os.replace(tmp, path)
+                except OSError:
+                    # Hardlinks unsupported here, keep the file as is
+                    return
+
+    def link(self, key: str, stack_dir: Path) -> bool:
+        """
+        Give a stack the node_modules of an install
+
+        Args:
+            key: Install key
+            stack_dir: Stack directory
+
+        Returns:
+            True if node_modules was (re)linked, False if already current
+
+        Raises:
+            BuildError: If the install is not in the store
+        """
+        if not self.has_install(key):
+            raise BuildError(f"Install {key[:16]} is not in the store")
+
+        stack_dir = Path(stack_dir)
+        destination = stack_dir / "node_modules"
+
+        if self.linked_key(stack_dir) == key:
+            return False
+
+        staging = stack_dir / "node_modules.staging"
+        if staging.exists():
+            shutil.rmtree(staging)
+
+        link_tree(self.install_path(key), staging)
+        (staging / self.MARKER).write_text(key, encoding="utf-8")
+
+        if destination.is_symlink():
+            destination.unlink()
+        elif destination.exists():
+            shutil.rmtree(destination)
+        os.rename(staging, destination)
+
+        return True
+
+    def linked_key(self, stack_dir: Path) -> Optional[str]:
+        """
+        Get the install key currently linked into a stack
+
+        Args:
+            stack_dir: Stack directory
+
+        Returns:
+            Install key, or None if node_modules is missing or not from the store
+        """
+        marker = Path(stack_dir) / "node_modules" / self.MARKER
+        try:
+            return marker.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
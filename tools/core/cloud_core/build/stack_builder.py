@@ -0,0 +1,313 @@
+"""
+Stack Builder
+
+Builds Pulumi TypeScript stacks in parallel.
+
+Dependency installs are shared through a NodeModulesStore (one install per
+distinct lockfile), and TypeScript compilation is skipped for stacks whose
+sources have not changed since their last successful build.
+"""
+
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .node_store import BuildError, NodeModulesStore, install_key
+from ..utils.fingerprint import fingerprint_code
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Written into a stack's output directory after a successful build
+SOURCE_MARKER = ".source-hash"
+
+
+@dataclass
+class BuildResult:
+    """Outcome of building one stack"""
+
+    stack: str
+    npm_install: bool = False
+    npm_build: bool = False
+    install_reused: bool = False
+    build_skipped: bool = False
+    errors: List[str] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        """Whether dependencies are installed and the stack compiled"""
+        return self.npm_install and self.npm_build and not self.errors
+
+
+def get_output_dir(stack_dir: Path) -> Path:
+    """
+    Get the TypeScript output directory of a stack
+
+    Args:
+        stack_dir: Stack directory
+
+    Returns:
+        compilerOptions.outDir from tsconfig.json, or stack_dir/bin
+    """
+    stack_dir = Path(stack_dir)
+    try:
+        with open(stack_dir / "tsconfig.json", "r", encoding="utf-8") as f:
+            out_dir = json.load(f).get("compilerOptions", {}).get("outDir")
+    except (OSError, json.JSONDecodeError):
+        out_dir = None
+
+    return stack_dir / (out_dir or "bin")
+
+
+def source_hash(stack_dir: Path) -> str:
+    """
+    Compute the hash of everything that affects a stack's compiled output
+
+    Args:
+        stack_dir: Stack directory
+
+    Returns:
+        SHA-256 hex digest of sources, tsconfig and package files
+    """
+    stack_dir = Path(stack_dir)
+    out_dir = get_output_dir(stack_dir)
+    return fingerprint_code(stack_dir, ignore={out_dir.name})
+
+
+def is_build_current(stack_dir: Path, digest: Optional[str] = None) -> bool:
+    """
+    Check whether a stack's compiled output matches its sources
+
+    Args:
+        stack_dir: Stack directory
+        digest: Precomputed source hash (computed if None)
+
+    Returns:
+        True if the last successful build used the same sources
+    """
+    marker = get_output_dir(stack_dir) / SOURCE_MARKER
+    try:
+        built = marker.read_text(encoding="utf-8").strip()
+    except OSError:
+        return False
+
+    return built == (digest or source_hash(stack_dir))
+
+
+def _run(cmd: Sequence[str], cwd: Path, timeout: int) -> subprocess.CompletedProcess:
+    """Run a build command, converting launch failures into BuildError"""
+    try:
+        return subprocess.run(list(cmd), cwd=cwd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise BuildError(f"{' '.join(cmd)} failed: {e}")
+
+
+def compile_stack(
+    stack_dir: Path,
+    npm_command: Sequence[str] = ("npm",),
+    force: bool = False,
+    timeout: int = 600,
+) -> bool:
+    """
+    Compile a stack unless its sources are unchanged
+
+    Args:
+        stack_dir: Stack directory (node_modules must be present)
+        npm_command: npm executable (and leading arguments)
+        force: Compile even if the output is current
+        timeout: Compile timeout in seconds
+
+    Returns:
+        True if the stack was compiled, False if skipped
+
+    Raises:
+        BuildError: If compilation fails
+    """
+    stack_dir = Path(stack_dir)
+    digest = source_hash(stack_dir)
+
+    if not force and is_build_current(stack_dir, digest):
+        return False
+
+    result = _run(list(npm_command) + ["run", "build"], stack_dir, timeout)
+
+    if result.returncode != 0:
+        if "Missing script" not in result.stderr + result.stdout:
+            raise BuildError(f"npm run build failed: {result.stderr.strip()[-2000:]}")
+
+        # No build script: compile with the stack's own TypeScript
+        result = _run(["npx", "tsc"], stack_dir, timeout)
+        if result.returncode != 0:
+            raise BuildError(f"TypeScript compilation failed: {result.stderr.strip()[-2000:]}")
+
+    out_dir = get_output_dir(stack_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / SOURCE_MARKER).write_text(digest, encoding="utf-8")
+
+    return True
+
+
+def _install_worker(store_root: str, key: str, package_dir: str, npm_command: List[str]) -> None:
+    """Process pool entry point: install one lockfile into the store"""
+    NodeModulesStore(Path(store_root)).install(key, Path(package_dir), npm_command)
+
+
+def _build_worker(
+    store_root: str,
+    stack_name: str,
+    stack_dir: str,
+    key: str,
+    npm_command: List[str],
+    force: bool,
+) -> BuildResult:
+    """Process pool entry point: link dependencies and compile one stack"""
+    started = time.monotonic()
+    result = BuildResult(stack=stack_name)
+
+    try:
+        NodeModulesStore(Path(store_root)).link(key, Path(stack_dir))
+        result.npm_install = True
+
+        result.build_skipped = not compile_stack(Path(stack_dir), npm_command, force)
+        result.npm_build = True
+
+    except (BuildError, OSError) as e:
+        result.errors.append(str(e))
+
+    result.duration = time.monotonic() - started
+    return result
+
+
+class StackBuilder:
+    """Builds stacks in parallel with shared installs and incremental compiles"""
+
+    def __init__(
+        self,
+        stacks_root: Path,
+        store_root: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        npm_command: Optional[Sequence[str]] = None,
+    ):
+        """
+        Initialize stack builder
+
+        Args:
+            stacks_root: Directory containing one subdirectory per stack
+            store_root: Shared node_modules store (default: <stacks_root>/../.build-cache)
+            max_workers: Worker processes (default: number of CPU cores)
+            npm_command: npm executable (and leading arguments)
+        """
+        self.stacks_root = Path(stacks_root)
+        self.store = NodeModulesStore(store_root or self.stacks_root.parent / ".build-cache")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.npm_command = list(npm_command or ["npm"])
+
+    def _check_stack(self, stack_name: str) -> Optional[str]:
+        """Get the reason a stack cannot be built, if any"""
+        stack_dir = self.stacks_root / stack_name
+
+        if not stack_dir.exists():
+            return "Directory does not exist"
+        if not (stack_dir / "index.ts").exists():
+            return "index.ts not found at root"
+        if not (stack_dir / "package.json").exists():
+            return "package.json not found"
+        return None
+
+    def build(
+        self,
+        stack_names: Sequence[str],
+        force: bool = False,
+        on_result: Optional[Callable[[BuildResult], None]] = None,
+    ) -> List[BuildResult]:
+        """
+        Build stacks in parallel
+
+        Each distinct lockfile is installed once; a stack's link-and-compile
+        step starts as soon as its install is available.
+
+        Args:
+            stack_names: Stacks to build
+            force: Recompile even if sources are unchanged
+            on_result: Callback invoked as each stack finishes
+
+        Returns:
+            Build results in the order of stack_names
+        """
+        results: Dict[str, BuildResult] = {}
+
+        def finish(result: BuildResult) -> None:
+            results[result.stack] = result
+            if on_result:
+                on_result(result)
+
+        # Group buildable stacks by install key
+        by_key: Dict[str, List[str]] = {}
+        for stack_name in stack_names:
+            error = self._check_stack(stack_name)
+            if error is None:
+                try:
+                    by_key.setdefault(install_key(self.stacks_root / stack_name), []).append(stack_name)
+                    continue
+                except BuildError as e:
+                    error = str(e)
+            finish(BuildResult(stack=stack_name, errors=[error]))
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            pending: Dict[Future, tuple] = {}
+
+            def submit_builds(key: str, reused: bool) -> None:
+                for index, stack_name in enumerate(by_key[key]):
+                    future = pool.submit(
+                        _build_worker,
+                        str(self.store.root),
+                        stack_name,
+                        str(self.stacks_root / stack_name),
+                        key,
+                        self.npm_command,
+                        force,
+                    )
+                    # Only the first stack of a fresh install paid for it
+                    pending[future] = ("build", stack_name, reused or index > 0)
+
+            for key, stacks in by_key.items():
+                if self.store.has_install(key):
+                    submit_builds(key, reused=True)
+                else:
+                    future = pool.submit(
+                        _install_worker,
+                        str(self.store.root),
+                        key,
+                        str(self.stacks_root / stacks[0]),
+                        self.npm_command,
+                    )
+                    pending[future] = ("install", key, False)
+
+            while pending:
+                future = next(as_completed(pending))
+                kind, name, reused = pending.pop(future)
+
+                if kind == "install":
+                    try:
+                        future.result()
+                        submit_builds(name, reused=False)
+                    except Exception as e:
+                        for stack_name in by_key[name]:
+                            finish(BuildResult(stack=stack_name, errors=[str(e)]))
+                    continue
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = BuildResult(stack=name, errors=[str(e)])
+                result.install_reused = reused
+                finish(result)
+
+        return [results[name] for name in stack_names if name in results]
+
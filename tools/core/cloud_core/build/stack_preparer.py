@@ -0,0 +1,158 @@
+"""
+Stack Preparer
+
+Prepares a stack for deployment: dependencies, provider plugins and the
+compiled program.
+
+Preparing is independent of Pulumi state, so it can run in the background
+for every stack of a plan while earlier layers are already deploying (see
+Orchestrator.start_prepare).
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from .node_store import NodeModulesStore, install_key
+from ..utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from ..pulumi.pulumi_wrapper import PulumiWrapper
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PrepareResult:
+    """Outcome of preparing one stack"""
+
+    stack: str
+    dependencies_linked: bool = False
+    plugins: List[str] = field(default_factory=list)
+    program_dir: Optional[Path] = None
+    duration: float = 0.0
+
+
+def find_required_plugins(stack_dir: Path) -> List[Tuple[str, str]]:
+    """
+    Find the resource plugins required by a stack's installed packages
+
+    Pulumi provider packages declare their plugin in package.json under
+    "pulumi": {"resource": true, "name": ..., "version": ...}.
+
+    Args:
+        stack_dir: Stack directory (dependencies must be installed)
+
+    Returns:
+        Sorted list of (plugin name, version)
+    """
+    plugins = set()
+
+    for package_file in (Path(stack_dir) / "node_modules" / "@pulumi").glob("*/package.json"):
+        try:
+            with open(package_file, "r", encoding="utf-8") as f:
+                package = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+        plugin = package.get("pulumi")
+        if not isinstance(plugin, dict) or not plugin.get("resource"):
+            continue
+
+        name = plugin.get("name") or package_file.parent.name
+        version = plugin.get("version") or package.get("version")
+        if version:
+            plugins.add((name, str(version).lstrip("v")))
+
+    return sorted(plugins)
+
+
+class StackPreparer:
+    """Installs dependencies and plugins and compiles stacks, once each"""
+
+    def __init__(
+        self,
+        stacks_root: Path,
+        pulumi_wrapper: "PulumiWrapper",
+        store: Optional[NodeModulesStore] = None,
+        npm_command: Optional[Sequence[str]] = None,
+        precompile: bool = True,
+    ):
+        """
+        Initialize stack preparer
+
+        Args:
+            stacks_root: Directory containing one subdirectory per stack
+            pulumi_wrapper: Pulumi wrapper used for plugins and compilation
+            store: Shared node_modules store (default: <stacks_root>/../.build-cache)
+            npm_command: npm executable (and leading arguments)
+            precompile: Compile TypeScript stacks to JavaScript
+        """
+        self.stacks_root = Path(stacks_root)
+        self.pulumi = pulumi_wrapper
+        self.store = store or NodeModulesStore(self.stacks_root.parent / ".build-cache")
+        self.npm_command = list(npm_command or ["npm"])
+        self.precompile = precompile
+
+        # One lock per install key so stacks sharing a lockfile install it once
+        self._install_locks: Dict[str, threading.Lock] = {}
+        self._install_locks_guard = threading.Lock()
+
+    def _install(self, key: str, stack_dir: Path) -> None:
+        """Install a lockfile into the store unless another stack already did"""
+        with self._install_locks_guard:
+            lock = self._install_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if not self.store.has_install(key):
+                self.store.install(key, stack_dir, self.npm_command)
+
+    def prepare(self, stack_name: str) -> PrepareResult:
+        """
+        Prepare one stack for deployment
+
+        Dependencies are linked from the shared store when node_modules is
+        missing or was linked from another install; a node_modules the user
+        installed by hand is left alone. Plugin install failures are logged
+        and left to Pulumi, which downloads missing plugins itself.
+
+        Args:
+            stack_name: Stack name
+
+        Returns:
+            PrepareResult
+
+        Raises:
+            BuildError: If the stack's dependencies cannot be installed
+        """
+        started = time.monotonic()
+        result = PrepareResult(stack=stack_name)
+        stack_dir = self.stacks_root / stack_name
+
+        if not (stack_dir / "package.json").exists():
+            # Not a Node.js stack (or missing); the deploy reports the problem
+            return result
+
+        key = install_key(stack_dir)
+        linked_key = self.store.linked_key(stack_dir)
+
+        if linked_key != key and (linked_key is not None or not (stack_dir / "node_modules").exists()):
+            self._install(key, stack_dir)
+            result.dependencies_linked = self.store.link(key, stack_dir)
+
+        for name, version in find_required_plugins(stack_dir):
+            try:
+                self.pulumi.install_plugin("resource", name, version)
+                result.plugins.append(f"{name}@{version}")
+            except Exception as e:
+                logger.warning(f"Installing plugin {name} v{version} for {stack_name} failed: {e}")
+
+        if self.precompile:
+            result.program_dir = self.pulumi.compile_program(stack_dir)
+
+        result.duration = time.monotonic() - started
+        logger.info(f"Prepared stack {stack_name} in {result.duration:.1f}s")
+        return result
@@ -1,18 +1,51 @@
 """Deployment management"""
 
 from .deployment_manager import DeploymentManager, DeploymentNotFoundError
+from .catalog import DeploymentCatalog
 from .state_manager import (
     StateManager,
     DeploymentStatus,
     StackStatus,
 )
+from .state_backend import (
+    StateBackend,
+    StateBackendError,
+    YamlStateBackend,
+    SqliteStateBackend,
+)
+from .history_log import HistoryLog
+from .lease import Lease, LeaseError, LeaseManager
 from .config_generator import ConfigGenerator
+from .checkpoint_store import (
+    CheckpointStore,
+    CheckpointError,
+    capture_checkpoint,
+    check_checkpoint_code,
+    diff_snapshots,
+)
+from .lock_recovery import find_stale_stacks, recover_stale_locks
 
 __all__ = [
     "DeploymentManager",
     "DeploymentNotFoundError",
+    "DeploymentCatalog",
     "StateManager",
     "DeploymentStatus",
     "StackStatus",
+    "StateBackend",
+    "StateBackendError",
+    "YamlStateBackend",
+    "SqliteStateBackend",
+    "HistoryLog",
+    "Lease",
+    "LeaseError",
+    "LeaseManager",
     "ConfigGenerator",
+    "CheckpointStore",
+    "CheckpointError",
+    "capture_checkpoint",
+    "check_checkpoint_code",
+    "diff_snapshots",
+    "find_stale_stacks",
+    "recover_stale_locks",
 ]
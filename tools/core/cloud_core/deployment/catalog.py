@@ -0,0 +1,339 @@
+"""
+Deployment Catalog
+
+Index of all deployments under a deployments root, kept in
+`.deployment-catalog.db` (SQLite, WAL) next to the deployment directories.
+
+Each deployment has one row with its metadata and status rollup, so
+listing, filtering and counting deployments never opens their files. Rows
+are written when a deployment is created, deleted or has its metadata
+updated, and whenever its StateManager changes a status. Directories added
+or removed behind the catalog's back are picked up by reconcile(), and the
+whole catalog can be rebuilt from disk.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DeploymentCatalog:
+    """SQLite index of the deployments under a deployments root"""
+
+    CATALOG_FILE = ".deployment-catalog.db"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS deployments (
+            dir_name TEXT PRIMARY KEY,
+            deployment_id TEXT,
+            organization TEXT,
+            project TEXT,
+            created_at TEXT,
+            status TEXT,
+            metadata TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS deployments_by_id ON deployments (deployment_id);
+        CREATE INDEX IF NOT EXISTS deployments_by_status ON deployments (status);
+        CREATE INDEX IF NOT EXISTS deployments_by_created ON deployments (created_at);
+    """
+
+    def __init__(self, deployments_root: Path, timeout: float = 30.0):
+        """
+        Initialize deployment catalog
+
+        Args:
+            deployments_root: Directory holding the deployment directories
+            timeout: Seconds to wait for another writer's transaction
+        """
+        self.deployments_root = Path(deployments_root)
+        self.db_path = self.deployments_root / self.CATALOG_FILE
+        self.timeout = timeout
+
+        # sqlite3 connections belong to the thread that opened them
+        self._local = threading.local()
+
+    @classmethod
+    def for_deployment(cls, deployment_dir: Path) -> Optional["DeploymentCatalog"]:
+        """
+        Get the catalog a deployment directory is indexed in
+
+        Args:
+            deployment_dir: Path to deployment directory
+
+        Returns:
+            Catalog of the directory's parent, or None if it has none
+        """
+        root = Path(deployment_dir).parent
+        if not (root / cls.CATALOG_FILE).exists():
+            return None
+        return cls(root)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; write transactions are opened explicitly
+            conn = sqlite3.connect(str(self.db_path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction (taking the write lock up front)"""
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _row(dir_name: str, metadata: Dict[str, Any], status: Optional[str]) -> tuple:
+        return (
+            dir_name,
+            metadata.get("deployment_id"),
+            metadata.get("organization"),
+            metadata.get("project"),
+            metadata.get("created_at"),
+            status,
+            json.dumps(metadata, default=str),
+        )
+
+    @staticmethod
+    def _entry(metadata: str, status: Optional[str], dir_name: str) -> Dict[str, Any]:
+        entry = json.loads(metadata)
+        entry["status"] = status
+        entry["dir_name"] = dir_name
+        return entry
+
+    def upsert(
+        self, deployment_dir: Path, metadata: Dict[str, Any], status: Optional[str] = None
+    ) -> None:
+        """
+        Add or replace a deployment's entry
+
+        Args:
+            deployment_dir: Path to deployment directory
+            metadata: Deployment metadata
+            status: Status rollup (None keeps the indexed status)
+        """
+        dir_name = Path(deployment_dir).name
+        metadata = {key: value for key, value in metadata.items() if key != "status"}
+
+        with self._transaction() as conn:
+            if status is None:
+                row = conn.execute(
+                    "SELECT status FROM deployments WHERE dir_name = ?", (dir_name,)
+                ).fetchone()
+                status = row[0] if row else None
+            conn.execute(
+                "INSERT OR REPLACE INTO deployments "
+                "(dir_name, deployment_id, organization, project, created_at, status, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._row(dir_name, metadata, status),
+            )
+
+    def set_status(self, deployment_dir: Path, status: str) -> None:
+        """
+        Update a deployment's status rollup
+
+        Args:
+            deployment_dir: Path to deployment directory
+            status: Status rollup
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE deployments SET status = ? WHERE dir_name = ?",
+                (status, Path(deployment_dir).name),
+            )
+
+    def remove(self, deployment_dir: Path) -> None:
+        """
+        Remove a deployment's entry
+
+        Args:
+            deployment_dir: Path to deployment directory
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM deployments WHERE dir_name = ?", (Path(deployment_dir).name,))
+
+    def get(self, deployment_dir: Path) -> Optional[Dict[str, Any]]:
+        """
+        Get a deployment's entry
+
+        Args:
+            deployment_dir: Path to deployment directory
+
+        Returns:
+            Metadata with "status" and "dir_name", or None if not indexed
+        """
+        dir_name = Path(deployment_dir).name
+        row = self._connection().execute(
+            "SELECT metadata, status FROM deployments WHERE dir_name = ?", (dir_name,)
+        ).fetchone()
+        return self._entry(row[0], row[1], dir_name) if row else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        organization: Optional[str] = None,
+        project: Optional[str] = None,
+        include_destroyed: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        List deployment entries, newest first
+
+        Args:
+            status: Only deployments with this status
+            organization: Only deployments of this organization
+            project: Only deployments of this project
+            include_destroyed: Include destroyed deployments
+
+        Returns:
+            Metadata dictionaries with "status" and "dir_name"
+        """
+        filters = []
+        params: List[Any] = []
+        columns = {"status": status, "organization": organization, "project": project}
+        for column, value in columns.items():
+            if value is not None:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        if not include_destroyed:
+            filters.append("(status IS NULL OR status != 'destroyed')")
+
+        where = f"WHERE {' AND '.join(filters)} " if filters else ""
+        rows = self._connection().execute(
+            f"SELECT dir_name, metadata, status FROM deployments {where}"
+            "ORDER BY created_at DESC, dir_name",
+            params,
+        )
+        return [
+            self._entry(metadata, row_status, dir_name)
+            for dir_name, metadata, row_status in rows
+        ]
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        Count deployments by status
+
+        Returns:
+            Dictionary of status -> number of deployments
+        """
+        rows = self._connection().execute(
+            "SELECT COALESCE(status, 'unknown'), COUNT(*) FROM deployments GROUP BY 1"
+        )
+        return dict(rows.fetchall())
+
+    def find_dirs(self, deployment_id: str) -> List[str]:
+        """
+        Get the directory names indexed for a deployment ID
+
+        Args:
+            deployment_id: Deployment ID (matched exactly)
+
+        Returns:
+            Directory names, sorted
+        """
+        rows = self._connection().execute(
+            "SELECT dir_name FROM deployments WHERE deployment_id = ? ORDER BY dir_name",
+            (deployment_id,),
+        )
+        return [name for (name,) in rows]
+
+    def indexed_dirs(self) -> List[str]:
+        """
+        Get the directory names of all indexed deployments
+
+        Returns:
+            Directory names
+        """
+        return [name for (name,) in self._connection().execute("SELECT dir_name FROM deployments")]
+
+    def _deployment_dirs(self) -> Dict[str, Path]:
+        """Deployment directories on disk by name (hidden entries skipped)"""
+        return {
+            path.name: path
+            for path in self.deployments_root.iterdir()
+            if path.is_dir() and not path.name.startswith(".")
+        }
+
+    def reconcile(self, describe: Callable[[Path], Optional[Dict[str, Any]]]) -> None:
+        """
+        Index directories the catalog doesn't know and drop vanished ones
+
+        Only the directory listing is read for deployments already indexed.
+
+        Args:
+            describe: Function returning a directory's metadata with its
+                      "status" (None to leave the directory out)
+        """
+        on_disk = self._deployment_dirs()
+        indexed = set(self.indexed_dirs())
+
+        for name in indexed - set(on_disk):
+            logger.debug(f"Dropping vanished deployment {name} from the catalog")
+            self.remove(self.deployments_root / name)
+
+        for name in sorted(set(on_disk) - indexed):
+            self.index_dir(on_disk[name], describe)
+
+    def rebuild(self, describe: Callable[[Path], Optional[Dict[str, Any]]]) -> int:
+        """
+        Re-create the catalog from the deployment directories
+
+        Args:
+            describe: Function returning a directory's metadata with its
+                      "status" (None to leave the directory out)
+
+        Returns:
+            Number of deployments indexed
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM deployments")
+
+        for path in sorted(self._deployment_dirs().values()):
+            self.index_dir(path, describe)
+
+        count = len(self.indexed_dirs())
+        logger.info(f"Rebuilt deployment catalog with {count} deployment(s)")
+        return count
+
+    def index_dir(
+        self, deployment_dir: Path, describe: Callable[[Path], Optional[Dict[str, Any]]]
+    ) -> None:
+        """
+        Index one deployment directory from its files
+
+        Args:
+            deployment_dir: Path to deployment directory
+            describe: Function returning the directory's metadata with its
+                      "status" (None to leave the directory out)
+        """
+        try:
+            metadata = describe(deployment_dir)
+        except Exception as e:
+            logger.warning(f"Error reading deployment {deployment_dir.name}: {e}")
+            return
+        if metadata:
+            self.upsert(deployment_dir, metadata, metadata.get("status"))
+
+    def close(self) -> None:
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,402 @@
+"""
+Checkpoint Store
+
+Pulumi state checkpoints taken before each operation, used for rollback.
+
+Every stack's `pulumi stack export` is stored gzip-compressed under the hash
+of its content, so a stack whose state did not change between operations
+costs no extra space. A small JSON file per operation maps each stack to
+its snapshot.
+
+Pulumi can only bring resources back to a snapshot by running the program
+and configuration that produced it, so the store also remembers the code
+fingerprint and the Pulumi config each stack was last deployed with, and
+every checkpoint records them next to the snapshot.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, TYPE_CHECKING
+
+from ..utils.fingerprint import fingerprint_code
+from ..utils.logger import get_logger
+from ..utils.serialization import match_file_mode
+
+if TYPE_CHECKING:
+    from ..pulumi.pulumi_wrapper import PulumiWrapper
+
+logger = get_logger(__name__)
+
+# Resource types that are never targeted directly during rollback
+UNTARGETED_TYPE_PREFIXES = ("pulumi:pulumi:Stack", "pulumi:providers:")
+
+
+class CheckpointError(Exception):
+    """Raised when a checkpoint cannot be read or written"""
+
+    pass
+
+
+class CheckpointStore:
+    """Compressed, deduplicated stack state snapshots in the deployment directory"""
+
+    CHECKPOINT_DIR = ".checkpoints"
+
+    def __init__(self, deployment_dir: Path):
+        """
+        Initialize checkpoint store
+
+        Args:
+            deployment_dir: Path to deployment directory
+        """
+        self.root = Path(deployment_dir) / self.CHECKPOINT_DIR
+        self.objects_dir = self.root / "objects"
+        self.operations_dir = self.root / "operations"
+        self.deployed_dir = self.root / "deployed"
+
+    def _object_path(self, digest: str) -> Path:
+        """Get the file of a snapshot"""
+        return self.objects_dir / digest[:2] / f"{digest}.json.gz"
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        """Write a file through a temp file and rename"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            match_file_mode(tmp_path, path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def put_snapshot(self, state: str) -> str:
+        """
+        Store a stack state snapshot (once per distinct content)
+
+        Args:
+            state: JSON document from `pulumi stack export`
+
+        Returns:
+            Snapshot digest
+
+        Raises:
+            CheckpointError: If the state is not valid JSON
+        """
+        try:
+            canonical = json.dumps(json.loads(state), sort_keys=True, separators=(",", ":"))
+        except json.JSONDecodeError as e:
+            raise CheckpointError(f"Stack export is not valid JSON: {e}")
+
+        data = canonical.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        if not path.exists():
+            # mtime=0 keeps the compressed bytes deterministic
+            self._write_atomic(path, gzip.compress(data, mtime=0))
+
+        return digest
+
+    def get_snapshot(self, digest: str) -> str:
+        """
+        Read a stack state snapshot
+
+        Args:
+            digest: Snapshot digest
+
+        Returns:
+            JSON document suitable for `pulumi stack import`
+
+        Raises:
+            CheckpointError: If the snapshot is missing or corrupt
+        """
+        try:
+            return gzip.decompress(self._object_path(digest).read_bytes()).decode("utf-8")
+        except (OSError, EOFError) as e:
+            raise CheckpointError(f"Cannot read snapshot {digest[:12]}: {e}")
+
+    def record_deployment(
+        self,
+        stack_name: str,
+        environment: str,
+        code: str,
+        config: Dict[str, Any],
+        secret_keys: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Remember the code and config a stack was deployed with
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            code: fingerprint_code() of the stack's source directory
+            config: Pulumi config values the stack was deployed with
+            secret_keys: Config keys stored as Pulumi secrets
+        """
+        record = {"code": code, "config": config, "secret_keys": sorted(secret_keys or ())}
+        self._write_atomic(
+            self.deployed_dir / f"{stack_name}-{environment}.json",
+            json.dumps(record, indent=2, default=str).encode("utf-8"),
+        )
+
+    def get_deployment(self, stack_name: str, environment: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the code and config a stack was last deployed with
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+
+        Returns:
+            Dictionary with "code", "config" and "secret_keys", or None if no
+            deploy recorded one
+        """
+        try:
+            with open(self.deployed_dir / f"{stack_name}-{environment}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable deploy record of {stack_name}-{environment}: {e}")
+            return None
+
+    def save_checkpoint(
+        self,
+        operation_id: str,
+        operation_type: str,
+        environment: str,
+        snapshots: Dict[str, str],
+        code: Optional[Dict[str, str]] = None,
+        config: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Record the snapshots taken before an operation
+
+        Args:
+            operation_id: Operation ID
+            operation_type: Type of operation (deploy, destroy, etc.)
+            environment: Environment
+            snapshots: Dictionary of stack name -> snapshot digest
+            code: Dictionary of stack name -> fingerprint of the code that
+                  produced the snapshot (stacks without one are left out)
+            config: Dictionary of stack name -> {"values", "secret_keys"} of
+                    the Pulumi config that produced the snapshot
+
+        Returns:
+            Checkpoint record
+        """
+        checkpoint = {
+            "operation_id": operation_id,
+            "operation": operation_type,
+            "environment": environment,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "stacks": snapshots,
+            "code": code or {},
+            "config": config or {},
+        }
+
+        path = self.operations_dir / f"{operation_id}.json"
+        self._write_atomic(path, json.dumps(checkpoint, indent=2).encode("utf-8"))
+
+        return checkpoint
+
+    def get_checkpoint(self, operation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the checkpoint taken before an operation
+
+        Args:
+            operation_id: Operation ID
+
+        Returns:
+            Checkpoint record, or None if there is none
+        """
+        path = self.operations_dir / f"{operation_id}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            raise CheckpointError(f"Cannot read checkpoint {operation_id}: {e}")
+
+    def list_checkpoints(self, environment: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List checkpoints
+
+        Args:
+            environment: Only checkpoints of this environment (all if None)
+
+        Returns:
+            Checkpoint records, most recent first
+        """
+        checkpoints = []
+
+        for path in self.operations_dir.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    checkpoint = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+                continue
+
+            if environment is None or checkpoint.get("environment") == environment:
+                checkpoints.append(checkpoint)
+
+        return sorted(checkpoints, key=lambda c: c.get("created_at", ""), reverse=True)
+
+    def remove_checkpoint(self, operation_id: str) -> None:
+        """
+        Remove a checkpoint and any snapshots no other checkpoint uses
+
+        Args:
+            operation_id: Operation ID
+        """
+        (self.operations_dir / f"{operation_id}.json").unlink(missing_ok=True)
+
+        referenced = {
+            digest
+            for checkpoint in self.list_checkpoints()
+            for digest in checkpoint.get("stacks", {}).values()
+        }
+
+        for path in self.objects_dir.glob("*/*.json.gz"):
+            if path.name[: -len(".json.gz")] not in referenced:
+                path.unlink()
+
+
+def capture_checkpoint(
+    store: CheckpointStore,
+    pulumi_wrapper: "PulumiWrapper",
+    operation_id: str,
+    operation_type: str,
+    environment: str,
+    stack_names: Iterable[str],
+    max_workers: int = 8,
+) -> Dict[str, Any]:
+    """
+    Export the state of stacks concurrently and record it as a checkpoint
+
+    Stacks that cannot be exported (typically because they were never
+    deployed) are left out of the checkpoint. Each snapshot is recorded
+    with the code fingerprint and config its stack was last deployed with,
+    if known.
+
+    Args:
+        store: Checkpoint store
+        pulumi_wrapper: Pulumi wrapper of the deployment
+        operation_id: ID of the operation about to run
+        operation_type: Type of the operation about to run
+        environment: Environment
+        stack_names: Stacks to export
+        max_workers: Maximum concurrent exports
+
+    Returns:
+        Checkpoint record
+    """
+    stack_names = list(stack_names)
+
+    def export(stack_name: str) -> Optional[str]:
+        try:
+            state = pulumi_wrapper.export_stack(f"{stack_name}-{environment}")
+            return store.put_snapshot(state)
+        except Exception as e:
+            logger.debug(f"No checkpoint for {stack_name}: {e}")
+            return None
+
+    snapshots: Dict[str, str] = {}
+    if stack_names:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stack_names)))) as pool:
+            for stack_name, digest in zip(stack_names, pool.map(export, stack_names)):
+                if digest:
+                    snapshots[stack_name] = digest
+
+    code: Dict[str, str] = {}
+    config: Dict[str, Dict[str, Any]] = {}
+    for stack_name in snapshots:
+        deployed = store.get_deployment(stack_name, environment)
+        if deployed:
+            code[stack_name] = deployed["code"]
+            config[stack_name] = {
+                "values": deployed.get("config") or {},
+                "secret_keys": deployed.get("secret_keys") or [],
+            }
+
+    logger.info(f"Checkpointed {len(snapshots)} stack(s) before {operation_type} {operation_id}")
+    return store.save_checkpoint(
+        operation_id, operation_type, environment, snapshots, code, config
+    )
+
+
+def check_checkpoint_code(checkpoint: Dict[str, Any], stacks_root: Path) -> Dict[str, List[str]]:
+    """
+    Compare the code of a checkpoint's stacks with the stack sources on disk
+
+    Args:
+        checkpoint: Checkpoint record
+        stacks_root: Directory holding the stack source directories
+
+    Returns:
+        Dictionary with "changed" (code differs from the code that produced
+        the snapshot) and "unknown" (no fingerprint recorded) stack names
+    """
+    recorded = checkpoint.get("code") or {}
+    result: Dict[str, List[str]] = {"changed": [], "unknown": []}
+
+    for stack_name in checkpoint.get("stacks", {}):
+        if stack_name not in recorded:
+            result["unknown"].append(stack_name)
+        elif fingerprint_code(Path(stacks_root) / stack_name) != recorded[stack_name]:
+            result["changed"].append(stack_name)
+
+    return result
+
+
+def diff_snapshots(current: str, target: str, outputs: bool = True) -> Dict[str, List[str]]:
+    """
+    Compare two stack state snapshots resource by resource
+
+    Args:
+        current: Current state (JSON from `pulumi stack export`)
+        target: State to return to
+        outputs: Also count resources whose outputs alone differ as changed
+
+    Returns:
+        Dictionary with "added" (only in current), "changed" (inputs, or
+        outputs if compared, differ) and "removed" (only in target) resource URNs,
+        excluding the stack and provider resources
+    """
+
+    def resources(state: str) -> Dict[str, Dict[str, Any]]:
+        document = json.loads(state) if state else {}
+        return {
+            resource["urn"]: resource
+            for resource in (document.get("deployment") or {}).get("resources") or []
+            if not resource.get("type", "").startswith(UNTARGETED_TYPE_PREFIXES)
+        }
+
+    current_resources = resources(current)
+    target_resources = resources(target)
+
+    changed = [
+        urn
+        for urn, resource in target_resources.items()
+        if urn in current_resources
+        and (
+            resource.get("inputs") != current_resources[urn].get("inputs")
+            or (outputs and resource.get("outputs") != current_resources[urn].get("outputs"))
+        )
+    ]
+
+    return {
+        "added": [urn for urn in current_resources if urn not in target_resources],
+        "changed": changed,
+        "removed": [urn for urn in target_resources if urn not in current_resources],
+    }
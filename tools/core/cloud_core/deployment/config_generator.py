@@ -6,9 +6,15 @@ Generates stack configuration files from deployment manifest.
 
 from pathlib import Path
 from typing import Dict, Any, Optional, List
-import yaml
 
+from ..runtime.placeholder_resolver import PlaceholderResolver
+from ..templates.stack_template_manager import (
+    StackTemplateManager,
+    StackTemplateNotFoundError,
+)
 from ..utils.logger import get_logger
+from ..utils.manifest_cache import manifest_cache
+from ..utils.serialization import read_yaml
 
 logger = get_logger(__name__)
 
@@ -16,14 +22,19 @@ logger = get_logger(__name__)
 class ConfigGenerator:
     """Generates stack configuration files"""
 
-    def __init__(self, deployment_dir: Path):
+    def __init__(
+        self, deployment_dir: Path, template_manager: Optional[StackTemplateManager] = None
+    ):
         """
         Initialize config generator
 
         Args:
             deployment_dir: Path to deployment directory
+            template_manager: Stack templates declaring which inputs are secret
+                              (default: StackTemplateManager(), created on first use)
         """
         self.deployment_dir = Path(deployment_dir)
+        self._template_manager = template_manager
         self.config_dir = self.deployment_dir / "config"
         self.manifest_path = self.deployment_dir / "deployment-manifest.yaml"
 
@@ -65,6 +76,7 @@ class ConfigGenerator:
         stack_name: str,
         manifest: Optional[Dict[str, Any]] = None,
         environment: str = "dev",
+        resolver: Optional[PlaceholderResolver] = None,
     ) -> Path:
         """
         Generate configuration file for a single stack in Pulumi format
@@ -73,6 +85,8 @@ class ConfigGenerator:
             stack_name: Name of the stack
             manifest: Optional manifest (loads from file if not provided)
             environment: Environment to generate config for
+            resolver: Resolves ${...} placeholders in the stack's config values
+                      (see create_stack_config_resolver)
 
         Returns:
             Path to generated config file
@@ -126,6 +140,8 @@ class ConfigGenerator:
 
             # Write stack-specific configuration
             stack_specific_config = stack_config.get("config", {})
+            if resolver is not None:
+                stack_specific_config = resolver.resolve(stack_specific_config)
             for key, value in stack_specific_config.items():
                 # Format value appropriately
                 if isinstance(value, str):
@@ -163,8 +179,7 @@ class ConfigGenerator:
         if not config_file.exists():
             raise FileNotFoundError(f"Config file not found: {config_file}")
 
-        with open(config_file, "r", encoding="utf-8") as f:
-            pulumi_config = yaml.safe_load(f)
+        pulumi_config = read_yaml(config_file)
 
         # Convert Pulumi format back to nested dictionary
         config = {
@@ -345,15 +360,37 @@ class ConfigGenerator:
         Load deployment manifest
 
         Returns:
-            Manifest dictionary
+            Manifest dictionary (read-only, shared through the manifest cache)
         """
         if not self.manifest_path.exists():
             raise FileNotFoundError(f"Manifest not found: {self.manifest_path}")
 
-        with open(self.manifest_path, "r", encoding="utf-8") as f:
-            manifest = yaml.safe_load(f)
+        return manifest_cache.get(self.manifest_path)
 
-        return manifest
+    def get_secret_keys(self, stack_name: str) -> List[str]:
+        """
+        Get the config keys of a stack that must be stored as Pulumi secrets
+
+        Keys are the stack template's inputs marked `secret: true`.
+
+        Args:
+            stack_name: Name of the stack
+
+        Returns:
+            Config key names (unqualified), empty if the stack has no template
+        """
+        if self._template_manager is None:
+            self._template_manager = StackTemplateManager()
+
+        try:
+            inputs = self._template_manager.get_inputs(stack_name)
+        except StackTemplateNotFoundError:
+            return []
+
+        return sorted(
+            name for name, spec in inputs.items()
+            if isinstance(spec, dict) and spec.get("secret") is True
+        )
 
     def generate_pulumi_config_values(
         self, stack_name: str, environment: str = "dev"
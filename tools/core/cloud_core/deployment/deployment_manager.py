@@ -2,17 +2,24 @@
 Deployment Manager
 
 Manages deployment lifecycle: creation, configuration, deletion, and discovery.
+
+Deployments are listed from a DeploymentCatalog kept in the deployments
+root, which this manager updates on every create, delete and metadata
+change.
 """
 
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import yaml
+from typing import Dict, Iterator, List, Optional, Any
 from datetime import datetime
 
 from ..templates import TemplateManager, ManifestGenerator
 from ..utils.logger import get_logger
 from ..utils.deployment_id import generate_deployment_id, validate_deployment_id
-from .state_manager import StateManager, StackStatus, DeploymentStatus
+from ..utils.manifest_cache import manifest_cache
+from ..utils.serialization import read_yaml, write_yaml
+from .catalog import DeploymentCatalog
+from .state_manager import StateManager
 
 logger = get_logger(__name__)
 
@@ -43,6 +50,10 @@ class DeploymentManager:
             self.deployments_root = cli_root / "deploy"
 
         self.deployments_root.mkdir(parents=True, exist_ok=True)
+        self.catalog = DeploymentCatalog(self.deployments_root)
+
+        # Deployment ID -> directory, checked for existence on each use
+        self._dir_cache: Dict[str, Path] = {}
 
         logger.debug(f"Deployment manager initialized with root: {self.deployments_root}")
 
@@ -129,8 +140,10 @@ class DeploymentManager:
         }
 
         metadata_path = deployment_dir / ".deployment-metadata.yaml"
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(metadata, f)
+        write_yaml(metadata_path, metadata)
+
+        self.catalog.upsert(deployment_dir, metadata, "initializing")
+        self._dir_cache[deployment_id] = deployment_dir
 
         logger.info(f"Deployment {deployment_id} created at {deployment_dir}")
         return deployment_dir
@@ -178,48 +191,114 @@ class DeploymentManager:
         """
         Find deployment directory by ID
 
+        Looks the ID up in memory, then in the catalog, and only then scans
+        the deployments root (indexing what it finds). Cached paths are
+        checked to still exist before use. If several directories carry
+        the ID, the first by name is returned and a warning is logged.
+
         Args:
             deployment_id: Deployment ID
 
         Returns:
             Path to deployment directory, or None if not found
         """
-        # Search for directories starting with deployment ID
-        pattern = f"{deployment_id}-*"
-        matches = list(self.deployments_root.glob(pattern))
+        cached = self._dir_cache.get(deployment_id)
+        if cached is not None:
+            if cached.is_dir():
+                return cached
+            del self._dir_cache[deployment_id]
+
+        candidates = [
+            self.deployments_root / name for name in self.catalog.find_dirs(deployment_id)
+        ]
+        matches = [path for path in candidates if path.is_dir()]
+
+        if len(matches) < len(candidates):
+            # Removed outside this manager
+            for path in candidates:
+                if path not in matches:
+                    self.catalog.remove(path)
 
-        if matches:
-            return matches[0]  # Return first match
+        if not matches:
+            matches = self._scan_deployment_dirs(deployment_id)
 
-        return None
+        if not matches:
+            return None
 
-    def list_deployments(self) -> List[Dict[str, Any]]:
+        if len(matches) > 1:
+            logger.warning(
+                f"Deployment ID {deployment_id} matches {len(matches)} directories "
+                f"({', '.join(path.name for path in matches)}); using {matches[0].name}"
+            )
+
+        self._dir_cache[deployment_id] = matches[0]
+        return matches[0]
+
+    def _scan_deployment_dirs(self, deployment_id: str) -> List[Path]:
         """
-        List all deployments
+        Search the deployments root for a deployment ID and index the matches
+
+        Args:
+            deployment_id: Deployment ID
 
         Returns:
-            List of deployment info dictionaries
+            Matching directories, sorted by name
         """
-        deployments = []
+        prefix = f"{deployment_id}-"
+        matches = sorted(
+            path
+            for path in self.deployments_root.iterdir()
+            if path.is_dir() and path.name.startswith(prefix)
+        )
 
-        for deployment_dir in self.deployments_root.iterdir():
-            if not deployment_dir.is_dir():
-                continue
+        for path in matches:
+            self.catalog.index_dir(path, self.get_deployment_metadata)
 
-            # Skip hidden directories
-            if deployment_dir.name.startswith("."):
-                continue
+        return matches
 
-            try:
-                metadata = self.get_deployment_metadata(deployment_dir)
-                if metadata:
-                    deployments.append(metadata)
-            except Exception as e:
-                logger.warning(
-                    f"Error reading deployment {deployment_dir.name}: {e}"
-                )
+    def list_deployments(
+        self,
+        status: Optional[str] = None,
+        organization: Optional[str] = None,
+        project: Optional[str] = None,
+        include_destroyed: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        List deployments from the catalog
 
-        return sorted(deployments, key=lambda d: d.get("created_at", ""), reverse=True)
+        Directories created or removed outside this manager are reconciled
+        first; deployments already indexed are not read from disk.
+
+        Args:
+            status: Only deployments with this status
+            organization: Only deployments of this organization
+            project: Only deployments of this project
+            include_destroyed: Include destroyed deployments
+
+        Returns:
+            List of deployment info dictionaries (newest first)
+        """
+        self.catalog.reconcile(self.get_deployment_metadata)
+        return self.catalog.list(status, organization, project, include_destroyed)
+
+    def get_status_counts(self) -> Dict[str, int]:
+        """
+        Count deployments by status
+
+        Returns:
+            Dictionary of status -> number of deployments
+        """
+        self.catalog.reconcile(self.get_deployment_metadata)
+        return self.catalog.status_counts()
+
+    def rebuild_catalog(self) -> int:
+        """
+        Re-create the deployment catalog from the deployment directories
+
+        Returns:
+            Number of deployments indexed
+        """
+        return self.catalog.rebuild(self.get_deployment_metadata)
 
     def _calculate_deployment_status(self, deployment_dir: Path, environment: str = "dev") -> str:
         """
@@ -232,37 +311,15 @@ class DeploymentManager:
         Returns:
             Status string: "deployed", "partial", "failed", "destroyed", or "initializing"
         """
-        try:
-            state_manager = StateManager(deployment_dir)
-
-            # First check deployment-level status (e.g., DESTROYED)
-            deployment_status = state_manager.get_deployment_status()
-
-            # If deployment is explicitly marked as DESTROYED, return that
-            if deployment_status == DeploymentStatus.DESTROYED:
-                return "destroyed"
-
-            # Otherwise, calculate from stack statuses
-            stack_statuses = state_manager.get_all_stack_statuses(environment)
-
-            if not stack_statuses:
-                return "initializing"
-
-            # Count statuses
-            deployed_count = sum(1 for status in stack_statuses.values() if status == StackStatus.DEPLOYED)
-            failed_count = sum(1 for status in stack_statuses.values() if status == StackStatus.FAILED)
-            total_count = len(stack_statuses)
-
-            # Determine overall status
-            if deployed_count == total_count:
-                return "deployed"
-            elif deployed_count > 0:
-                return "partial"
-            elif failed_count > 0:
-                return "failed"
-            else:
-                return "initializing"
+        # Opening a StateManager would create state files in a deployment that has none
+        if not any(
+            (deployment_dir / name).exists()
+            for name in (StateManager.STATE_FILE, StateManager.DATABASE_FILE)
+        ):
+            return "initializing"
 
+        try:
+            return StateManager(deployment_dir).get_rollup_status(environment)
         except Exception as e:
             logger.debug(f"Error calculating status for {deployment_dir}: {e}")
             return "initializing"
@@ -284,8 +341,7 @@ class DeploymentManager:
             metadata = self._extract_metadata_from_dir_name(deployment_dir)
         else:
             try:
-                with open(metadata_path, "r", encoding="utf-8") as f:
-                    metadata = yaml.safe_load(f)
+                metadata = read_yaml(metadata_path)
             except Exception as e:
                 logger.error(f"Error reading metadata from {metadata_path}: {e}")
                 return None
@@ -324,18 +380,19 @@ class DeploymentManager:
             "status": "unknown",
         }
 
-    def load_manifest(self, deployment_id: str) -> Dict[str, Any]:
+    def _manifest_path(self, deployment_id: str) -> Path:
         """
-        Load deployment manifest
+        Get the manifest file of a deployment
 
         Args:
             deployment_id: Deployment ID
 
         Returns:
-            Manifest dictionary
+            Path to the manifest
 
         Raises:
             DeploymentNotFoundError: If deployment not found
+            FileNotFoundError: If the deployment has no manifest
         """
         deployment_dir = self._find_deployment_dir(deployment_id)
 
@@ -349,10 +406,57 @@ class DeploymentManager:
                 f"Manifest not found for deployment {deployment_id}"
             )
 
-        with open(manifest_path, "r", encoding="utf-8") as f:
-            manifest = yaml.safe_load(f)
+        return manifest_path
 
-        return manifest
+    def get_manifest(self, deployment_id: str) -> Dict[str, Any]:
+        """
+        Get a read-only view of a deployment manifest
+
+        The manifest is parsed once per process and re-parsed only when the
+        file changes. Use edit_manifest to change it.
+
+        Args:
+            deployment_id: Deployment ID
+
+        Returns:
+            Read-only manifest dictionary
+
+        Raises:
+            DeploymentNotFoundError: If deployment not found
+        """
+        return manifest_cache.get(self._manifest_path(deployment_id))
+
+    def load_manifest(self, deployment_id: str) -> Dict[str, Any]:
+        """
+        Load deployment manifest
+
+        Args:
+            deployment_id: Deployment ID
+
+        Returns:
+            Manifest dictionary (a mutable copy; see get_manifest)
+
+        Raises:
+            DeploymentNotFoundError: If deployment not found
+        """
+        return manifest_cache.load(self._manifest_path(deployment_id))
+
+    @contextmanager
+    def edit_manifest(self, deployment_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Change a deployment manifest, saving it once when the block ends
+
+        Args:
+            deployment_id: Deployment ID
+
+        Yields:
+            Mutable manifest dictionary
+
+        Raises:
+            DeploymentNotFoundError: If deployment not found
+        """
+        with manifest_cache.edit(self._manifest_path(deployment_id)) as manifest:
+            yield manifest
 
     def save_manifest(
         self, deployment_id: str, manifest: Dict[str, Any]
@@ -372,10 +476,7 @@ class DeploymentManager:
         if not deployment_dir:
             raise DeploymentNotFoundError(f"Deployment {deployment_id} not found")
 
-        manifest_path = deployment_dir / "deployment-manifest.yaml"
-
-        with open(manifest_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(manifest, f, default_flow_style=False, sort_keys=False)
+        manifest_cache.write(deployment_dir / "deployment-manifest.yaml", manifest)
 
         logger.info(f"Saved manifest for deployment {deployment_id}")
 
@@ -410,6 +511,8 @@ class DeploymentManager:
         import shutil
 
         shutil.rmtree(deployment_dir)
+        self.catalog.remove(deployment_dir)
+        self._dir_cache.pop(deployment_id, None)
 
         logger.info(f"Deleted deployment {deployment_id}")
         return True
@@ -440,7 +543,7 @@ class DeploymentManager:
         if manifest is None:
             if deployment_id is None:
                 raise ValueError("Must provide either deployment_id or manifest")
-            manifest = self.load_manifest(deployment_id)
+            manifest = self.get_manifest(deployment_id)
         
         enabled_stacks = []
         stacks = manifest.get("stacks", {})
@@ -491,8 +594,7 @@ class DeploymentManager:
         # Load existing metadata
         existing_metadata = {}
         if metadata_path.exists():
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                existing_metadata = yaml.safe_load(f) or {}
+            existing_metadata = read_yaml(metadata_path, default={})
         
         # Update with new metadata
         existing_metadata.update(metadata)
@@ -501,8 +603,9 @@ class DeploymentManager:
         existing_metadata["updated_at"] = datetime.now().isoformat()
         
         # Save
-        with open(metadata_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(existing_metadata, f, default_flow_style=False)
+        write_yaml(metadata_path, existing_metadata)
+
+        self.catalog.upsert(deployment_dir, existing_metadata)
         
         logger.info(f"Updated metadata for deployment {deployment_id}")
 
@@ -519,13 +622,13 @@ class DeploymentManager:
             stack_name: Stack name
             
         Returns:
-            Stack configuration dict
+            Stack configuration dict (read-only)
             
         Raises:
             DeploymentNotFoundError: If deployment not found
             KeyError: If stack not found in manifest
         """
-        manifest = self.load_manifest(deployment_id)
+        manifest = self.get_manifest(deployment_id)
         stacks = manifest.get("stacks", {})
         
         if stack_name not in stacks:
@@ -551,16 +654,12 @@ class DeploymentManager:
             DeploymentNotFoundError: If deployment not found
             KeyError: If stack not found
         """
-        manifest = self.load_manifest(deployment_id)
-        stacks = manifest.get("stacks", {})
-        
-        if stack_name not in stacks:
-            raise KeyError(f"Stack {stack_name} not found in deployment {deployment_id}")
-        
-        # Update stack config
-        stacks[stack_name].update(config)
-        
-        # Save manifest
-        self.save_manifest(deployment_id, manifest)
+        with self.edit_manifest(deployment_id) as manifest:
+            stacks = manifest.get("stacks", {})
+
+            if stack_name not in stacks:
+                raise KeyError(f"Stack {stack_name} not found in deployment {deployment_id}")
+
+            stacks[stack_name].update(config)
         
         logger.info(f"Updated config for stack {stack_name} in deployment {deployment_id}")
@@ -0,0 +1,412 @@
+"""
+History Log
+
+Append-only operation history kept as rotating JSON-lines segments.
+
+New records are appended to the active segment (`.operation-history.jsonl`,
+the original single-file format). Once it grows past `segment_bytes` it is
+renamed, gzip-compressed to `.operation-history.<n>.jsonl.gz` and
+summarized in a small index (`.operation-history.index.json`): per segment
+its record count, first and last timestamp, and the operations and
+statuses it contains.
+
+Reads go from the newest record backwards: the active segment is read in
+blocks from its end, then older segments one at a time, and stop as soon
+as `limit` records matched or a segment predates `since`. Segments the
+index shows can't match the filters are never opened, so the cost of a
+query depends on how far back it looks, not on the size of the history.
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from .lease import LeaseManager
+from ..utils.logger import get_logger
+from ..utils.serialization import match_file_mode
+
+logger = get_logger(__name__)
+
+
+def since_key(since: Union[str, datetime, None]) -> Optional[str]:
+    """
+    Express a `since` bound like the records' timestamps
+
+    Args:
+        since: ISO 8601 string (used as is) or datetime (naive means UTC)
+
+    Returns:
+        ISO 8601 UTC timestamp ending in "Z", or None
+    """
+    if since is None or isinstance(since, str):
+        return since
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since.isoformat() + "Z"
+
+
+def record_matches(
+    record: Dict[str, Any],
+    since: Optional[str] = None,
+    operation: Optional[str] = None,
+    status: Optional[str] = None,
+) -> bool:
+    """
+    Check an operation record against history filters
+
+    Args:
+        record: Operation record
+        since: Only records at or after this timestamp (ISO 8601)
+        operation: Only records of this operation type
+        status: Only records with this status
+
+    Returns:
+        True if the record passes all filters
+    """
+    if since is not None and (record.get("timestamp") or "") < since:
+        return False
+    if operation is not None and record.get("operation") != operation:
+        return False
+    if status is not None and record.get("status") != status:
+        return False
+    return True
+
+
+def _line(record: Dict[str, Any]) -> bytes:
+    """Serialize a record as one compact JSON line"""
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _parse(line: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one history line (None if blank or corrupt)"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        logger.warning(f"Invalid history record: {line[:200]!r}")
+        return None
+
+
+def _reverse_lines(path: Path, block_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield the lines of a file last to first, reading blocks from its end"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        tail = b""
+
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + tail).split(b"\n")
+
+            # The first piece may be the end of a line that starts in the previous block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield line
+
+        yield tail
+
+
+class HistoryLog:
+    """Rotating, compressed operation history with a segment index"""
+
+    # Size at which the active segment is rotated
+    DEFAULT_SEGMENT_BYTES = 1024 * 1024
+
+    INDEX_SUFFIX = ".index.json"
+
+    def __init__(
+        self,
+        history_file: Path,
+        segment_bytes: Optional[int] = None,
+        max_segments: Optional[int] = None,
+    ):
+        """
+        Initialize history log
+
+        Args:
+            history_file: Active segment (`.operation-history.jsonl`)
+            segment_bytes: Size at which the active segment is rotated
+                           (default: DEFAULT_SEGMENT_BYTES)
+            max_segments: Number of compressed segments to keep (all if None)
+        """
+        self.history_file = Path(history_file)
+        self.segment_bytes = segment_bytes or self.DEFAULT_SEGMENT_BYTES
+        self.max_segments = max_segments
+
+        stem = self.history_file.name
+        if stem.endswith(".jsonl"):
+            stem = stem[: -len(".jsonl")]
+        self._stem = stem
+        self._segment_pattern = re.compile(rf"^{re.escape(stem)}\.(\d+)\.jsonl\.gz$")
+        self.index_file = self.history_file.with_name(stem + self.INDEX_SUFFIX)
+
+        self._lock = threading.Lock()
+        self._leases = LeaseManager(self.history_file.parent / ".leases", ttl=30.0)
+
+    # Index
+
+    def _segment_path(self, number: int) -> Path:
+        return self.history_file.with_name(f"{self._stem}.{number:06d}.jsonl.gz")
+
+    def _segment_files(self) -> Dict[int, Path]:
+        """Compressed segments on disk by number"""
+        segments = {}
+        for path in self.history_file.parent.glob(f"{self._stem}.*.jsonl.gz"):
+            match = self._segment_pattern.match(path.name)
+            if match:
+                segments[int(match.group(1))] = path
+        return segments
+
+    @staticmethod
+    def _summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Index entry of a segment's records (oldest first)"""
+        return {
+            "records": len(records),
+            "first": records[0].get("timestamp") if records else None,
+            "last": records[-1].get("timestamp") if records else None,
+            "operations": sorted({str(r.get("operation")) for r in records}),
+            "statuses": sorted({str(r.get("status")) for r in records}),
+        }
+
+    def _read_segment(self, path: Path) -> List[Dict[str, Any]]:
+        """Read a compressed segment (oldest first)"""
+        try:
+            with gzip.open(path, "rb") as f:
+                return [record for record in map(_parse, f) if record is not None]
+        except (OSError, EOFError) as e:
+            logger.warning(f"Cannot read history segment {path.name}: {e}")
+            return []
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{self.index_file.name}-", dir=self.index_file.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            match_file_mode(tmp_path, self.index_file)
+            os.replace(tmp_path, self.index_file)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        """
+        Re-create the segment index from the segments on disk
+
+        Returns:
+            Index ({"segments": {number: entry}})
+        """
+        index = {
+            "segments": {
+                str(number): self._summarize(self._read_segment(path))
+                for number, path in sorted(self._segment_files().items())
+            }
+        }
+        try:
+            self._write_index(index)
+        except OSError as e:
+            logger.warning(f"Could not write history index {self.index_file}: {e}")
+        return index
+
+    def _load_index(self) -> Dict[str, Any]:
+        """Read the segment index, rebuilding it if it's missing or out of date"""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Rebuilding unreadable history index {self.index_file}: {e}")
+            index = None
+
+        on_disk = {str(number) for number in self._segment_files()}
+        if index is None or set(index.get("segments", {})) != on_disk:
+            if index is not None or on_disk:
+                index = self.rebuild_index()
+            else:
+                index = {"segments": {}}
+        return index
+
+    # Writing
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Append an operation record (rotating the active segment when full)
+
+        Args:
+            record: Operation record
+        """
+        self.extend([record])
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append several records at once (rotating the active segment when full)
+
+        Args:
+            records: Records, oldest first
+        """
+        if not records:
+            return
+        data = b"".join(_line(record) for record in records)
+
+        with self._lock:
+            # One write of whole lines to an O_APPEND file, so lines from
+            # several processes never interleave
+            fd = os.open(self.history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+            if size >= self.segment_bytes:
+                self.rotate()
+
+    def rotate(self) -> Optional[Path]:
+        """
+        Compress the active segment into a new numbered segment
+
+        Returns:
+            Path to the new segment, or None if there was nothing to rotate
+            (or another process is rotating)
+        """
+        lease = self._leases.try_acquire("history-rotate", "rotate")
+        if lease is None:
+            return None
+
+        try:
+            if not self.history_file.exists() or self.history_file.stat().st_size == 0:
+                return None
+
+            index = self._load_index()
+            numbers = [int(number) for number in index["segments"]]
+            number = max(numbers, default=0) + 1
+
+            # New appends go to a fresh active segment from here on
+            pending = self.history_file.with_name(f".{self._stem}.{number:06d}.rotating")
+            os.replace(self.history_file, pending)
+
+            with open(pending, "rb") as f:
+                records = [record for record in map(_parse, f) if record is not None]
+
+            segment = self._segment_path(number)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{segment.name}-", dir=segment.parent)
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                    fileobj=raw, mode="wb", mtime=0
+                ) as f:
+                    for record in records:
+                        f.write(_line(record))
+                match_file_mode(tmp_path, pending)
+                os.replace(tmp_path, segment)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                # Put the records back in front of anything appended meanwhile
+                with open(pending, "ab") as f, open(self.history_file, "ab+") as active:
+                    active.seek(0)
+                    f.write(active.read())
+                os.replace(pending, self.history_file)
+                raise
+            pending.unlink()
+
+            index["segments"][str(number)] = self._summarize(records)
+
+            if self.max_segments is not None:
+                for old in sorted(int(n) for n in index["segments"])[: -self.max_segments or None]:
+                    self._segment_path(old).unlink(missing_ok=True)
+                    del index["segments"][str(old)]
+
+            self._write_index(index)
+            logger.debug(f"Rotated {len(records)} history record(s) into {segment.name}")
+            return segment
+        except OSError as e:
+            logger.warning(f"Could not rotate operation history: {e}")
+            return None
+        finally:
+            lease.release()
+
+    # Reading
+
+    def read(
+        self,
+        limit: Optional[int] = None,
+        since: Union[str, datetime, None] = None,
+        operation: Optional[str] = None,
+        status: Optional[str] = None,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Read operation records, newest first
+
+        Args:
+            limit: Maximum number of records (all if None)
+            since: Only records at or after this time (ISO 8601 string or datetime)
+            operation: Only records of this operation type
+            status: Only records with this status
+            where: Only records for which this returns True
+
+        Returns:
+            Matching operation records, most recent first
+        """
+        since = since_key(since)
+        results: List[Dict[str, Any]] = []
+
+        def done() -> bool:
+            return limit is not None and len(results) >= limit
+
+        def matches(record: Dict[str, Any]) -> bool:
+            if not record_matches(record, None, operation, status):
+                return False
+            return where is None or where(record)
+
+        if limit == 0:
+            return results
+
+        # Active segment, from its end
+        for line in _reverse_lines(self.history_file):
+            record = _parse(line)
+            if record is None:
+                continue
+            if since is not None and (record.get("timestamp") or "") < since:
+                return results
+            if matches(record):
+                results.append(record)
+                if done():
+                    return results
+
+        # Compressed segments, newest first
+        segments = self._load_index()["segments"]
+        for number in sorted((int(n) for n in segments), reverse=True):
+            entry = segments[str(number)]
+
+            if since is not None and entry.get("last") is not None and entry["last"] < since:
+                break
+            if operation is not None and operation not in entry.get("operations", [operation]):
+                continue
+            if status is not None and status not in entry.get("statuses", [status]):
+                continue
+
+            for record in reversed(self._read_segment(self._segment_path(number))):
+                if since is not None and (record.get("timestamp") or "") < since:
+                    return results
+                if matches(record):
+                    results.append(record)
+                    if done():
+                        return results
+
+        return results
@@ -0,0 +1,344 @@
+"""
+Leases
+
+Cross-process locks on a deployment, kept as small files in its
+`.leases` directory.
+
+A lease is created atomically (O_EXCL), renewed by a heartbeat thread while
+its holder runs, and released on exit. A lease whose heartbeat is older
+than its time-to-live, or whose holder process is known to be gone, is
+stale and can be taken over by the next process that asks for it.
+"""
+
+import json
+import os
+import secrets
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LeaseError(Exception):
+    """Raised when a lease is held by another process"""
+
+    pass
+
+
+def _owner_gone(record: Dict[str, Any]) -> bool:
+    """Whether the process holding a lease is known to have exited"""
+    if record.get("host") != socket.gethostname():
+        return False
+
+    pid = record.get("pid")
+    if not isinstance(pid, int) or pid <= 0 or pid == os.getpid():
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+
+    return False
+
+
+class Lease:
+    """A held lease, renewed in the background until released"""
+
+    def __init__(self, manager: "LeaseManager", name: str, record: Dict[str, Any]):
+        """
+        Initialize lease (use LeaseManager.acquire)
+
+        Args:
+            manager: Lease manager that granted the lease
+            name: Lease name
+            record: Lease record as written to its file
+        """
+        self.manager = manager
+        self.name = name
+        self.record = record
+        self.lost = False
+
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    @property
+    def token(self) -> str:
+        """Unique token identifying this holder"""
+        return self.record["token"]
+
+    def start_heartbeat(self, interval: float) -> None:
+        """
+        Renew the lease every interval seconds until released
+
+        Args:
+            interval: Seconds between renewals
+        """
+
+        def beat() -> None:
+            while not self._stop.wait(interval):
+                if not self.manager.renew(self):
+                    self.lost = True
+                    logger.error(f"Lease {self.name} was taken over by another process")
+                    return
+
+        self._heartbeat = threading.Thread(target=beat, name=f"lease-{self.name}", daemon=True)
+        self._heartbeat.start()
+
+    def check(self) -> None:
+        """
+        Make sure the lease is still held
+
+        Raises:
+            LeaseError: If another process took the lease over
+        """
+        if self.lost:
+            raise LeaseError(
+                f"Lease {self.name} was taken over by another process; "
+                "stopping so both don't change the deployment"
+            )
+
+    def release(self) -> None:
+        """Stop renewing and remove the lease (if still ours)"""
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join(timeout=5)
+            self._heartbeat = None
+        self.manager.release(self)
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class LeaseManager:
+    """Creates, renews and takes over lease files in a directory"""
+
+    # Seconds without a heartbeat after which a lease is stale
+    DEFAULT_TTL = 60.0
+
+    # Seconds between attempts while waiting for a lease
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, lease_dir: Path, ttl: float = DEFAULT_TTL):
+        """
+        Initialize lease manager
+
+        Args:
+            lease_dir: Directory holding the lease files (created on demand)
+            ttl: Seconds without a heartbeat after which a lease is stale
+        """
+        self.lease_dir = Path(lease_dir)
+        self.ttl = ttl
+
+    def _path(self, name: str) -> Path:
+        return self.lease_dir / f"{name}.lease"
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Read a lease record (None if missing or unreadable)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_stale(self, record: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check whether a lease record no longer protects anything
+
+        Args:
+            record: Lease record
+
+        Returns:
+            True if the heartbeat is older than the TTL or the holder is gone
+        """
+        if not record:
+            return True
+        heartbeat = record.get("heartbeat_at") or 0
+        return time.time() - heartbeat > self.ttl or _owner_gone(record)
+
+    def holder(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the live holder of a lease
+
+        Args:
+            name: Lease name
+
+        Returns:
+            Lease record, or None if the lease is free or stale
+        """
+        record = self._read(self._path(name))
+        return None if self.is_stale(record) else record
+
+    def list_leases(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """
+        List live leases
+
+        Args:
+            prefix: Only leases whose name starts with this
+
+        Returns:
+            Lease records (with "name")
+        """
+        leases = []
+        for path in self.lease_dir.glob(f"{prefix}*.lease"):
+            record = self._read(path)
+            if not self.is_stale(record):
+                leases.append({**record, "name": path.name[: -len(".lease")]})
+        return leases
+
+    def _write_temp(self, path: Path, record: Dict[str, Any]) -> str:
+        """Write a lease record to a temp file next to path"""
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}-", dir=self.lease_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        return tmp_path
+
+    def _try_create(self, path: Path, record: Dict[str, Any]) -> bool:
+        """Create a lease file if it doesn't exist (never visible half-written)"""
+        tmp_path = self._write_temp(path, record)
+        try:
+            os.link(tmp_path, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp_path)
+
+    def _take_over(self, path: Path, stale: Optional[Dict[str, Any]]) -> None:
+        """Remove a stale lease file unless it was renewed meanwhile"""
+        tombstone = path.with_name(f"{path.name}.{secrets.token_hex(4)}.stale")
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return
+
+        # The holder may have renewed between our read and the rename
+        moved = self._read(tombstone)
+        if moved != stale and not self.is_stale(moved):
+            try:
+                os.link(tombstone, path)
+            except OSError:
+                pass
+        else:
+            logger.warning(
+                f"Taking over stale lease {path.stem} "
+                f"(held by pid {(stale or {}).get('pid')} on {(stale or {}).get('host')})"
+            )
+        tombstone.unlink(missing_ok=True)
+
+    def try_acquire(self, name: str, operation: Optional[str] = None) -> Optional[Lease]:
+        """
+        Acquire a lease without waiting (no heartbeat is started)
+
+        Args:
+            name: Lease name
+            operation: Operation the lease protects (informational)
+
+        Returns:
+            Lease, or None if another process holds it
+        """
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+        now = time.time()
+        record = {
+            "token": secrets.token_hex(8),
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "operation": operation,
+            "acquired_at": now,
+            "heartbeat_at": now,
+        }
+
+        for _ in range(2):
+            if self._try_create(path, record):
+                return Lease(self, name, record)
+
+            current = self._read(path)
+            if not self.is_stale(current):
+                return None
+            self._take_over(path, current)
+
+        return None
+
+    def acquire(
+        self,
+        name: str,
+        operation: Optional[str] = None,
+        wait: float = 0,
+        heartbeat: bool = True,
+    ) -> Lease:
+        """
+        Acquire a lease
+
+        Args:
+            name: Lease name
+            operation: Operation the lease protects (informational)
+            wait: Seconds to wait for the current holder to release it
+            heartbeat: Renew the lease in the background (for long operations)
+
+        Returns:
+            Lease (use as a context manager or call release())
+
+        Raises:
+            LeaseError: If the lease is still held after waiting
+        """
+        deadline = time.monotonic() + wait
+
+        while True:
+            lease = self.try_acquire(name, operation)
+            if lease:
+                if heartbeat:
+                    lease.start_heartbeat(self.ttl / 3)
+                return lease
+
+            if time.monotonic() >= deadline:
+                holder = self.holder(name) or {}
+                raise LeaseError(
+                    f"{name} is locked by pid {holder.get('pid')} on {holder.get('host')}"
+                    + (f" ({holder['operation']})" if holder.get("operation") else "")
+                )
+            time.sleep(self.POLL_INTERVAL)
+
+    def renew(self, lease: Lease) -> bool:
+        """
+        Refresh a lease's heartbeat
+
+        Args:
+            lease: Lease to renew
+
+        Returns:
+            False if the lease is no longer ours
+        """
+        path = self._path(lease.name)
+        if (self._read(path) or {}).get("token") != lease.token:
+            return False
+
+        lease.record["heartbeat_at"] = time.time()
+        try:
+            tmp_path = self._write_temp(path, lease.record)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not renew lease {lease.name}: {e}")
+        return True
+
+    def release(self, lease: Lease) -> None:
+        """
+        Remove a lease file if it still belongs to the lease
+
+        Args:
+            lease: Lease to release
+        """
+        path = self._path(lease.name)
+        if (self._read(path) or {}).get("token") == lease.token:
+            path.unlink(missing_ok=True)
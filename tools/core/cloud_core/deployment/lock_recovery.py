@@ -0,0 +1,97 @@
+"""
+Lock Recovery
+
+Recovery of stacks left locked by an interrupted operation.
+
+While an operation runs, StateManager records which stacks have a Pulumi
+process in flight. If the CLI is killed or crashes, those stacks keep
+Pulumi's update lock and the next `pulumi up` on them fails. When the
+process that started the operation is known to be gone, the locks are
+released with `pulumi cancel`, all stacks in parallel.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from .state_manager import StateManager
+from ..utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from ..pulumi.pulumi_wrapper import PulumiWrapper
+
+logger = get_logger(__name__)
+
+
+def find_stale_stacks(state_manager: StateManager) -> List[Dict[str, Any]]:
+    """
+    Get the stacks an interrupted operation left in flight
+
+    Args:
+        state_manager: State manager of the deployment
+
+    Returns:
+        In-flight records ({"stack_name", "environment", "started_at"}),
+        empty if no operation was interrupted
+    """
+    operation = state_manager.get_interrupted_operation()
+    if not operation:
+        return []
+    return list(operation.get("in_flight") or [])
+
+
+def recover_stale_locks(
+    state_manager: StateManager,
+    pulumi_wrapper: "PulumiWrapper",
+    max_workers: int = 8,
+) -> Optional[Dict[str, Any]]:
+    """
+    Release the locks of stacks left in flight by an interrupted operation
+
+    The interrupted operation is then recorded in the history as
+    "interrupted" (with the recovery results) and cleared, so a new
+    operation can start.
+
+    Args:
+        state_manager: State manager of the deployment
+        pulumi_wrapper: Pulumi wrapper of the deployment
+        max_workers: Maximum concurrent `pulumi cancel` calls
+
+    Returns:
+        Dictionary with "operation_id", "recovered" (stack names) and
+        "failed" (stack name -> error), or None if no operation was interrupted
+    """
+    operation = state_manager.get_interrupted_operation()
+    if not operation:
+        return None
+
+    stale = list(operation.get("in_flight") or [])
+    owner = operation.get("owner") or {}
+    logger.warning(
+        f"Operation {operation.get('id')} ({operation.get('type')}) was interrupted "
+        f"(pid {owner.get('pid')} is gone); {len(stale)} stack(s) were in flight"
+    )
+
+    def cancel(entry: Dict[str, Any]) -> Optional[str]:
+        stack_name = f"{entry['stack_name']}-{entry['environment']}"
+        try:
+            pulumi_wrapper.cancel_update(stack_name)
+            logger.info(f"Released update lock of {stack_name}")
+            return None
+        except Exception as e:
+            # Typically the process died before Pulumi took the lock
+            logger.warning(f"Could not cancel update of {stack_name}: {e}")
+            return str(e)
+
+    recovered: List[str] = []
+    failed: Dict[str, str] = {}
+    if stale:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale)))) as pool:
+            for entry, error in zip(stale, pool.map(cancel, stale)):
+                if error:
+                    failed[entry["stack_name"]] = error
+                else:
+                    recovered.append(entry["stack_name"])
+
+    state_manager.close_interrupted_operation({"recovered": recovered, "failed": failed})
+
+    return {"operation_id": operation.get("id"), "recovered": recovered, "failed": failed}
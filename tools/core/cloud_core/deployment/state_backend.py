@@ -0,0 +1,722 @@
+"""
+State Backends
+
+Storage for deployment state (deployment status, stack statuses, current
+operation) and operation history.
+
+- YamlStateBackend: `.deployment-state.yaml` plus `.operation-history.jsonl`
+  (the original format), cached in memory and written behind as a whole.
+  The document is written as JSON (valid YAML, much faster to parse);
+  documents written as YAML by older versions are still read.
+  History and per-stack timelines (`.stack-timelines.jsonl`) rotate into
+  compressed segments (see HistoryLog).
+- SqliteStateBackend: `.deployment-state.db` in WAL mode. Each change
+  updates one row in its own transaction, so concurrent writers never lose
+  each other's updates and readers never block writers.
+"""
+
+import atexit
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .history_log import HistoryLog, since_key
+from .lease import LeaseError, LeaseManager
+from ..utils.logger import get_logger
+from ..utils.serialization import dump_json, match_file_mode, read_document
+
+logger = get_logger(__name__)
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _fsync_dir(path: Path) -> None:
+    """Make a rename in a directory durable (no-op where directories can't be opened)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# Backends that may hold unwritten changes when the process exits
+_unflushed_backends: "weakref.WeakSet[StateBackend]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for backend in list(_unflushed_backends):
+        try:
+            backend.flush()
+        except Exception as e:
+            logger.warning(f"Could not write deployment state at exit: {e}")
+
+
+def initial_state() -> Dict[str, Any]:
+    """Get the state of a new deployment"""
+    return {
+        "deployment_status": "initialized",
+        "last_updated": _now(),
+        "stacks": {},
+        "current_operation": None,
+    }
+
+
+class StateBackendError(Exception):
+    """Raised when deployment state cannot be read or written"""
+
+    pass
+
+
+class StateBackend(ABC):
+    """Storage of a deployment's state and operation history"""
+
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """
+        Load the whole state document
+
+        Returns:
+            State dictionary (deployment_status, last_updated, stacks, current_operation)
+        """
+
+    @abstractmethod
+    def save(self, state: Dict[str, Any]) -> None:
+        """
+        Replace the whole state document
+
+        Args:
+            state: State dictionary
+        """
+
+    @abstractmethod
+    def get_value(self, key: str, default: Any = None) -> Any:
+        """
+        Get a top-level state value (e.g. deployment_status, current_operation)
+
+        Args:
+            key: State key
+            default: Value returned if the key is not set
+
+        Returns:
+            Value
+        """
+
+    @abstractmethod
+    def update_value(self, key: str, update: Callable[[Any], Any]) -> Any:
+        """
+        Atomically replace a top-level state value with a function of itself
+
+        Args:
+            key: State key
+            update: Function receiving the current value (None if unset) and
+                    returning the new one
+
+        Returns:
+            New value
+        """
+
+    def set_value(self, key: str, value: Any) -> None:
+        """
+        Set a top-level state value
+
+        Args:
+            key: State key
+            value: New value
+        """
+        self.update_value(key, lambda _: value)
+
+    @abstractmethod
+    def get_stack(self, stack_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get one stack's record
+
+        Args:
+            stack_key: Stack key (stack-environment)
+
+        Returns:
+            Stack record, or None
+        """
+
+    @abstractmethod
+    def get_stacks(self, environment: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get stack records
+
+        Args:
+            environment: Only stacks of this environment (all if None)
+
+        Returns:
+            Dictionary of stack key -> stack record
+        """
+
+    @abstractmethod
+    def set_stack(self, stack_key: str, record: Dict[str, Any]) -> None:
+        """
+        Set one stack's record
+
+        Args:
+            stack_key: Stack key (stack-environment)
+            record: Stack record
+        """
+
+    @abstractmethod
+    def append_history(self, record: Dict[str, Any]) -> None:
+        """
+        Append an operation record to the history
+
+        Args:
+            record: Operation record
+        """
+
+    @abstractmethod
+    def read_history(
+        self,
+        limit: Optional[int] = None,
+        since: Union[str, datetime, None] = None,
+        operation: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Read operation records
+
+        Args:
+            limit: Maximum number of records (all if None)
+            since: Only records at or after this time (ISO 8601 string or datetime)
+            operation: Only records of this operation type
+            status: Only records with this status
+
+        Returns:
+            Operation records, most recent first
+        """
+
+    @abstractmethod
+    def append_timeline(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Append per-stack timeline entries of an operation
+
+        Args:
+            entries: Timeline entries (with "id", "stack" and "environment")
+        """
+
+    @abstractmethod
+    def read_timeline(
+        self,
+        stack_key: Optional[str] = None,
+        operation_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Read per-stack timeline entries
+
+        Args:
+            stack_key: Only entries of this stack (stack-environment)
+            operation_id: Only entries of this operation
+            limit: Maximum number of entries (all if None)
+
+        Returns:
+            Timeline entries, most recent first
+        """
+
+    def flush(self) -> None:
+        """Make all changes durable (backends that write through need not override)"""
+
+    def close(self) -> None:
+        """Release resources held by the backend"""
+
+
+class YamlStateBackend(StateBackend):
+    """
+    State in a YAML document, history in rotating JSONL segments
+
+    The document is parsed once and kept in memory. Changes are applied in
+    place and written behind: at most once per flush_interval, and whenever
+    flush() is called (StateManager does so at operation boundaries). Each
+    write goes to a temp file that is fsynced and renamed over the document,
+    so a crash leaves either the old or the new state, never a torn file.
+
+    Another process replacing the file is noticed from its inode, mtime and
+    size; the document is then re-read and changes not yet written are
+    applied on top of it. Writes take a short cross-process lease so two
+    processes never interleave re-reading and replacing the file.
+    """
+
+    # Longest time (seconds) a change stays in memory only
+    DEFAULT_FLUSH_INTERVAL = 1.0
+
+    # A writer holding the write lease longer than this is assumed dead
+    WRITE_LEASE_TTL = 10.0
+
+    TIMELINE_FILE = ".stack-timelines.jsonl"
+
+    def __init__(
+        self,
+        state_file: Path,
+        history_file: Path,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """
+        Initialize YAML state backend
+
+        Args:
+            state_file: State document (created if missing)
+            history_file: Active operation history segment (JSON lines)
+            flush_interval: Longest time a change stays in memory only
+                            (0 writes every change immediately)
+        """
+        self.state_file = Path(state_file)
+        self.history_file = Path(history_file)
+        self.history = HistoryLog(self.history_file)
+        self.timelines = HistoryLog(self.state_file.parent / self.TIMELINE_FILE)
+        self.flush_interval = flush_interval
+
+        # Serializes access to the in-memory document within this process
+        self._lock = threading.RLock()
+
+        self._state: Optional[Dict[str, Any]] = None
+        self._file_stamp: Optional[Tuple[int, int, int]] = None
+
+        # Changes applied in memory but not yet written (replayed after an external change)
+        self._pending: List[Callable[[Dict[str, Any]], Any]] = []
+        self._last_flush = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+        self._leases = LeaseManager(self.state_file.parent / ".leases", ttl=self.WRITE_LEASE_TTL)
+
+        _unflushed_backends.add(self)
+
+        if not self.state_file.exists():
+            self.save(initial_state())
+            logger.debug(f"Initialized state file: {self.state_file}")
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Identify the file's current version (None if it doesn't exist)"""
+        try:
+            stat = os.stat(self.state_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _read(self) -> Dict[str, Any]:
+        """Parse the document from disk"""
+        try:
+            return read_document(self.state_file) or initial_state()
+        except FileNotFoundError:
+            return initial_state()
+
+    def _current(self) -> Dict[str, Any]:
+        """Get the in-memory document, re-reading it if another process replaced the file"""
+        stamp = self._stamp()
+
+        if self._state is None or stamp != self._file_stamp:
+            if self._state is not None:
+                logger.debug(f"{self.state_file} changed on disk, reloading")
+
+            self._state = self._read()
+            self._file_stamp = stamp
+            for change in self._pending:
+                change(self._state)
+
+        return self._state
+
+    @contextmanager
+    def _write_lease(self) -> Iterator[None]:
+        """Keep other processes from writing the document meanwhile"""
+        try:
+            lease = self._leases.acquire("state-write", wait=self.WRITE_LEASE_TTL, heartbeat=False)
+        except (LeaseError, OSError) as e:
+            logger.warning(f"Writing {self.state_file.name} without the write lease: {e}")
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            lease.release()
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        """Write the document durably (temp file, fsync, rename)"""
+        state["generation"] = int(state.get("generation") or 0) + 1
+        data = dump_json(state)
+
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.state_file.name}-", dir=self.state_file.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            match_file_mode(tmp_path, self.state_file)
+            os.replace(tmp_path, self.state_file)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        _fsync_dir(self.state_file.parent)
+
+        self._file_stamp = self._stamp()
+        self._last_flush = time.monotonic()
+
+    def _flush_locked(self) -> None:
+        """Write pending changes (caller holds the lock)"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        with self._write_lease():
+            state = self._current()
+            state["last_updated"] = _now()
+            self._write(state)
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """Write pending changes now"""
+        with self._lock:
+            self._flush_locked()
+
+    def _schedule_flush(self) -> None:
+        """Write now if the last write is old enough, otherwise soon (caller holds the lock)"""
+        elapsed = time.monotonic() - self._last_flush
+
+        if elapsed >= self.flush_interval:
+            self._flush_locked()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_interval - elapsed, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            return copy.deepcopy(self._current())
+
+    def save(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+            self._state = copy.deepcopy(state)
+            self._pending.clear()
+            with self._write_lease():
+                self._write(self._state)
+
+    def _modify(self, change: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply a change to the in-memory document and schedule its write"""
+
+        def stamped(state: Dict[str, Any]) -> Any:
+            result = change(state)
+            state["last_updated"] = _now()
+            return result
+
+        with self._lock:
+            result = stamped(self._current())
+            self._pending.append(stamped)
+            self._schedule_flush()
+            return copy.deepcopy(result)
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return copy.deepcopy(self._current().get(key, default))
+
+    def update_value(self, key: str, update: Callable[[Any], Any]) -> Any:
+        def change(state: Dict[str, Any]) -> Any:
+            state[key] = update(copy.deepcopy(state.get(key)))
+            return state[key]
+
+        return self._modify(change)
+
+    def get_stack(self, stack_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy((self._current().get("stacks") or {}).get(stack_key))
+
+    def get_stacks(self, environment: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy({
+                key: record
+                for key, record in (self._current().get("stacks") or {}).items()
+                if environment is None or record.get("environment") == environment
+            })
+
+    def set_stack(self, stack_key: str, record: Dict[str, Any]) -> None:
+        record = copy.deepcopy(record)
+
+        def change(state: Dict[str, Any]) -> None:
+            if not state.get("stacks"):
+                state["stacks"] = {}
+            state["stacks"][stack_key] = record
+
+        self._modify(change)
+
+    def close(self) -> None:
+        self.flush()
+
+    def append_history(self, record: Dict[str, Any]) -> None:
+        self.history.append(record)
+
+    def read_history(
+        self,
+        limit: Optional[int] = None,
+        since: Union[str, datetime, None] = None,
+        operation: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        return self.history.read(limit, since, operation, status)
+
+    def append_timeline(self, entries: List[Dict[str, Any]]) -> None:
+        self.timelines.extend(entries)
+
+    def read_timeline(
+        self,
+        stack_key: Optional[str] = None,
+        operation_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        def where(entry: Dict[str, Any]) -> bool:
+            if operation_id is not None and entry.get("id") != operation_id:
+                return False
+            if stack_key is None:
+                return True
+            return f"{entry.get('stack')}-{entry.get('environment')}" == stack_key
+
+        return self.timelines.read(limit, where=where)
+
+
+class SqliteStateBackend(StateBackend):
+    """State and history in a SQLite database with row-level updates"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS stacks (
+            key TEXT PRIMARY KEY,
+            environment TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS stacks_by_environment ON stacks (environment);
+        CREATE TABLE IF NOT EXISTS history (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS history_by_time
+            ON history (json_extract(record, '$.timestamp'));
+        CREATE TABLE IF NOT EXISTS timelines (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            operation_id TEXT,
+            stack_key TEXT NOT NULL,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS timelines_by_stack ON timelines (stack_key, seq);
+        CREATE INDEX IF NOT EXISTS timelines_by_operation ON timelines (operation_id);
+    """
+
+    def __init__(self, db_path: Path, timeout: float = 30.0):
+        """
+        Initialize SQLite state backend
+
+        Args:
+            db_path: Database file (created if missing)
+            timeout: Seconds to wait for another writer's transaction
+        """
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+
+        # sqlite3 connections belong to the thread that opened them
+        self._local = threading.local()
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    (key, json.dumps(value))
+                    for key, value in initial_state().items()
+                    if key != "stacks"
+                ],
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                # Autocommit; write transactions are opened explicitly
+                conn = sqlite3.connect(str(self.db_path), timeout=self.timeout, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(self.SCHEMA)
+            except sqlite3.Error as e:
+                raise StateBackendError(f"Cannot open state database {self.db_path}: {e}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction (taking the write lock up front)"""
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_updated', ?)",
+                (json.dumps(_now()),),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def load(self) -> Dict[str, Any]:
+        conn = self._connection()
+        state = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+        state["stacks"] = {
+            key: json.loads(record) for key, record in conn.execute("SELECT key, record FROM stacks")
+        }
+        return state
+
+    def save(self, state: Dict[str, Any]) -> None:
+        stacks = state.get("stacks") or {}
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM meta")
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in state.items() if key != "stacks"],
+            )
+            conn.execute("DELETE FROM stacks")
+            conn.executemany(
+                "INSERT INTO stacks (key, environment, record) VALUES (?, ?, ?)",
+                [
+                    (key, record.get("environment"), json.dumps(record))
+                    for key, record in stacks.items()
+                ],
+            )
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def update_value(self, key: str, update: Callable[[Any], Any]) -> Any:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            value = update(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+        return value
+
+    def get_stack(self, stack_key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT record FROM stacks WHERE key = ?", (stack_key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_stacks(self, environment: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        conn = self._connection()
+        if environment is None:
+            rows = conn.execute("SELECT key, record FROM stacks")
+        else:
+            rows = conn.execute(
+                "SELECT key, record FROM stacks WHERE environment = ?", (environment,)
+            )
+        return {key: json.loads(record) for key, record in rows}
+
+    def set_stack(self, stack_key: str, record: Dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stacks (key, environment, record) VALUES (?, ?, ?)",
+                (stack_key, record.get("environment"), json.dumps(record)),
+            )
+
+    def append_history(self, record: Dict[str, Any]) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO history (record) VALUES (?)", (json.dumps(record),))
+
+    def read_history(
+        self,
+        limit: Optional[int] = None,
+        since: Union[str, datetime, None] = None,
+        operation: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        filters = []
+        params: List[Any] = []
+        since = since_key(since)
+        if since is not None:
+            filters.append("json_extract(record, '$.timestamp') >= ?")
+            params.append(since)
+        if operation is not None:
+            filters.append("json_extract(record, '$.operation') = ?")
+            params.append(operation)
+        if status is not None:
+            filters.append("json_extract(record, '$.status') = ?")
+            params.append(status)
+
+        where = f"WHERE {' AND '.join(filters)} " if filters else ""
+        rows = self._connection().execute(
+            f"SELECT record FROM history {where}ORDER BY seq DESC LIMIT ?",
+            (*params, -1 if limit is None else limit),
+        )
+        return [json.loads(record) for (record,) in rows]
+
+    def append_timeline(self, entries: List[Dict[str, Any]]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO timelines (operation_id, stack_key, record) VALUES (?, ?, ?)",
+                [
+                    (
+                        entry.get("id"),
+                        f"{entry.get('stack')}-{entry.get('environment')}",
+                        json.dumps(entry, separators=(",", ":")),
+                    )
+                    for entry in entries
+                ],
+            )
+
+    def read_timeline(
+        self,
+        stack_key: Optional[str] = None,
+        operation_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        filters = []
+        params: List[Any] = []
+        if stack_key is not None:
+            filters.append("stack_key = ?")
+            params.append(stack_key)
+        if operation_id is not None:
+            filters.append("operation_id = ?")
+            params.append(operation_id)
+
+        where = f"WHERE {' AND '.join(filters)} " if filters else ""
+        rows = self._connection().execute(
+            f"SELECT record FROM timelines {where}ORDER BY seq DESC LIMIT ?",
+            (*params, -1 if limit is None else limit),
+        )
+        return [json.loads(record) for (record,) in rows]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
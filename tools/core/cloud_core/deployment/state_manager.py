@@ -2,16 +2,31 @@
 State Manager
 
 Tracks deployment state, operation history, and stack status.
+
+State is kept by a StateBackend: the original YAML file by default, or a
+SQLite database with row-level updates (see state_backend).
 """
 
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 from enum import Enum
-import yaml
 import json
-
+import os
+import secrets
+import socket
+import time
+
+from .catalog import DeploymentCatalog
+from .history_log import HistoryLog
+from .lease import Lease, LeaseError, LeaseManager
+from .state_backend import (
+    StateBackend,
+    YamlStateBackend,
+    SqliteStateBackend,
+)
 from ..utils.logger import get_logger
+from ..utils.serialization import read_document, write_yaml
 
 logger = get_logger(__name__)
 
@@ -43,34 +58,119 @@ class StackStatus(Enum):
 class StateManager:
     """Manages deployment and stack state"""
 
-    def __init__(self, deployment_dir: Path):
+    STATE_FILE = ".deployment-state.yaml"
+    HISTORY_FILE = ".operation-history.jsonl"
+    DATABASE_FILE = ".deployment-state.db"
+
+    # Backend used for deployments without a state database
+    BACKEND_ENV_VAR = "CLOUD_STATE_BACKEND"
+
+    # Cross-process leases: one for whole-deployment operations, one per stack
+    LEASE_DIR = ".leases"
+    DEPLOYMENT_LEASE = "deployment"
+
+    def __init__(self, deployment_dir: Path, backend: Union[str, StateBackend, None] = None):
         """
         Initialize state manager
 
         Args:
             deployment_dir: Path to deployment directory
+            backend: "yaml", "sqlite" or a StateBackend instance. By default
+                     a deployment with a state database keeps using it, and
+                     others use $CLOUD_STATE_BACKEND (yaml if unset)
         """
         self.deployment_dir = Path(deployment_dir)
-        self.state_file = self.deployment_dir / ".deployment-state.yaml"
-        self.history_file = self.deployment_dir / ".operation-history.jsonl"
+        self.state_file = self.deployment_dir / self.STATE_FILE
+        self.history_file = self.deployment_dir / self.HISTORY_FILE
+        self.database_file = self.deployment_dir / self.DATABASE_FILE
 
-        # Initialize state file if it doesn't exist
-        if not self.state_file.exists():
-            self._initialize_state()
+        if isinstance(backend, StateBackend):
+            self.backend = backend
+        else:
+            self.backend = self._open_backend(backend)
 
-    def _initialize_state(self) -> None:
-        """Initialize state file"""
-        initial_state = {
-            "deployment_status": DeploymentStatus.INITIALIZED.value,
-            "last_updated": datetime.utcnow().isoformat() + "Z",
-            "stacks": {},
-            "current_operation": None,
-        }
+        self.leases = LeaseManager(self.deployment_dir / self.LEASE_DIR)
+
+        # Status rollup kept current in the deployments root's catalog (if any)
+        self.catalog = DeploymentCatalog.for_deployment(self.deployment_dir)
+        self._catalog_status: Optional[str] = None
+
+    def _open_backend(self, kind: Optional[str]) -> StateBackend:
+        """
+        Open the state backend of the deployment
 
-        with open(self.state_file, "w", encoding="utf-8") as f:
-            yaml.safe_dump(initial_state, f)
+        Args:
+            kind: "yaml", "sqlite", or None to choose automatically
 
-        logger.debug(f"Initialized state file: {self.state_file}")
+        Returns:
+            State backend
+
+        Raises:
+            ValueError: If the backend kind is unknown
+        """
+        if kind is None:
+            if self.database_file.exists():
+                kind = "sqlite"
+            else:
+                kind = os.environ.get(self.BACKEND_ENV_VAR) or "yaml"
+
+        if kind == "yaml":
+            return YamlStateBackend(self.state_file, self.history_file)
+
+        if kind != "sqlite":
+            raise ValueError(f"Unknown state backend '{kind}' (expected 'yaml' or 'sqlite')")
+
+        migrate = not self.database_file.exists() and self.state_file.exists()
+        backend = SqliteStateBackend(self.database_file)
+        if migrate:
+            # Carry an existing YAML state over into the new database
+            logger.info(f"Importing {self.state_file.name} into {self.database_file.name}")
+            self._import_into(backend, self.state_file, self.history_file)
+
+            timeline_file = self.deployment_dir / YamlStateBackend.TIMELINE_FILE
+            if timeline_file.exists():
+                backend.append_timeline(list(reversed(HistoryLog(timeline_file).read())))
+        return backend
+
+    @staticmethod
+    def _import_into(backend: StateBackend, state_file: Path, history_file: Optional[Path]) -> None:
+        """Load a YAML state file and JSONL history into a backend"""
+        state = read_document(state_file, default={})
+        state.setdefault("stacks", {})
+        backend.save(state)
+
+        if history_file:
+            for record in reversed(HistoryLog(Path(history_file)).read()):
+                backend.append_history(record)
+
+    def import_yaml(self, state_file: Path, history_file: Optional[Path] = None) -> None:
+        """
+        Replace the state with a YAML state file (and append its history)
+
+        Args:
+            state_file: State document in the `.deployment-state.yaml` format
+            history_file: Operation history in the `.operation-history.jsonl` format
+        """
+        self._import_into(self.backend, Path(state_file), history_file)
+
+    def export_yaml(self, state_file: Path, history_file: Optional[Path] = None) -> None:
+        """
+        Write the state (and history) in the YAML/JSONL file formats
+
+        Args:
+            state_file: State document to write
+            history_file: Operation history to write (skipped if None)
+        """
+        write_yaml(state_file, self.load_state())
+
+        if history_file:
+            with open(history_file, "w", encoding="utf-8") as f:
+                for record in reversed(self.backend.read_history()):
+                    f.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        """Write state changes still held in memory"""
+        self.backend.flush()
 
     def load_state(self) -> Dict[str, Any]:
         """
@@ -79,11 +179,7 @@ class StateManager:
         Returns:
             State dictionary
         """
-        if not self.state_file.exists():
-            self._initialize_state()
-
-        with open(self.state_file, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        return self.backend.load()
 
     def save_state(self, state: Dict[str, Any]) -> None:
         """
@@ -93,9 +189,7 @@ class StateManager:
             state: State dictionary
         """
         state["last_updated"] = datetime.utcnow().isoformat() + "Z"
-
-        with open(self.state_file, "w", encoding="utf-8") as f:
-            yaml.safe_dump(state, f, default_flow_style=False)
+        self.backend.save(state)
 
     def set_deployment_status(self, status: DeploymentStatus) -> None:
         """
@@ -104,9 +198,8 @@ class StateManager:
         Args:
             status: New status
         """
-        state = self.load_state()
-        state["deployment_status"] = status.value
-        self.save_state(state)
+        self.backend.set_value("deployment_status", status.value)
+        self._update_catalog()
 
         logger.info(f"Deployment status set to: {status.value}")
 
@@ -117,8 +210,7 @@ class StateManager:
         Returns:
             DeploymentStatus
         """
-        state = self.load_state()
-        status_str = state.get("deployment_status", "unknown")
+        status_str = self.backend.get_value("deployment_status", "unknown")
 
         try:
             return DeploymentStatus(status_str)
@@ -136,21 +228,55 @@ class StateManager:
             status: New status
             environment: Environment name
         """
-        state = self.load_state()
-
-        if "stacks" not in state:
-            state["stacks"] = {}
-
         stack_key = f"{stack_name}-{environment}"
 
-        state["stacks"][stack_key] = {
+        self.backend.set_stack(stack_key, {
             "stack_name": stack_name,
             "environment": environment,
             "status": status.value,
             "last_updated": datetime.utcnow().isoformat() + "Z",
-        }
+        })
+        self._update_catalog()
+
+    def get_rollup_status(self, environment: str = "dev") -> str:
+        """
+        Summarize the deployment's status from its own and its stacks' statuses
 
-        self.save_state(state)
+        Args:
+            environment: Environment whose stacks are summarized
+
+        Returns:
+            "deployed", "partial", "failed", "destroyed", or "initializing"
+        """
+        if self.get_deployment_status() == DeploymentStatus.DESTROYED:
+            return "destroyed"
+
+        stack_statuses = list(self.get_all_stack_statuses(environment).values())
+        if not stack_statuses:
+            return "initializing"
+
+        deployed_count = stack_statuses.count(StackStatus.DEPLOYED)
+        if deployed_count == len(stack_statuses):
+            return "deployed"
+        if deployed_count > 0:
+            return "partial"
+        if StackStatus.FAILED in stack_statuses:
+            return "failed"
+        return "initializing"
+
+    def _update_catalog(self) -> None:
+        """Write the status rollup to the catalog when it changed"""
+        if self.catalog is None:
+            return
+
+        try:
+            status = self.get_rollup_status()
+            if status != self._catalog_status:
+                self.catalog.set_status(self.deployment_dir, status)
+                self._catalog_status = status
+        except Exception as e:
+            # The catalog is an index; the state itself is already saved
+            logger.warning(f"Could not update deployment catalog: {e}")
 
     def get_stack_status(
         self, stack_name: str, environment: str = "dev"
@@ -165,10 +291,9 @@ class StateManager:
         Returns:
             StackStatus
         """
-        state = self.load_state()
         stack_key = f"{stack_name}-{environment}"
 
-        stack_state = state.get("stacks", {}).get(stack_key)
+        stack_state = self.backend.get_stack(stack_key)
 
         if not stack_state:
             return StackStatus.NOT_DEPLOYED
@@ -190,18 +315,16 @@ class StateManager:
         Returns:
             Dictionary of stack_name -> StackStatus
         """
-        state = self.load_state()
         result = {}
 
-        for stack_key, stack_state in state.get("stacks", {}).items():
-            if stack_state.get("environment") == environment:
-                stack_name = stack_state.get("stack_name")
-                status_str = stack_state.get("status", "not_deployed")
+        for stack_state in self.backend.get_stacks(environment).values():
+            stack_name = stack_state.get("stack_name")
+            status_str = stack_state.get("status", "not_deployed")
 
-                try:
-                    result[stack_name] = StackStatus(status_str)
-                except ValueError:
-                    result[stack_name] = StackStatus.NOT_DEPLOYED
+            try:
+                result[stack_name] = StackStatus(status_str)
+            except ValueError:
+                result[stack_name] = StackStatus.NOT_DEPLOYED
 
         return result
 
@@ -210,6 +333,8 @@ class StateManager:
         operation_type: str,
         status: str,
         details: Optional[Dict[str, Any]] = None,
+        operation_id: Optional[str] = None,
+        duration: Optional[float] = None,
     ) -> None:
         """
         Record an operation in history
@@ -218,6 +343,8 @@ class StateManager:
             operation_type: Type of operation (deploy, destroy, etc.)
             status: Status (started, completed, failed)
             details: Optional operation details
+            operation_id: ID of the operation the record belongs to (optional)
+            duration: Seconds the operation took (for its final record)
         """
         operation_record = {
             "timestamp": datetime.utcnow().isoformat() + "Z",
@@ -225,58 +352,77 @@ class StateManager:
             "status": status,
             "details": details or {},
         }
+        if operation_id:
+            operation_record["id"] = operation_id
+        if duration is not None:
+            operation_record["duration"] = round(duration, 3)
 
-        # Append to history file (JSONL format)
-        with open(self.history_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(operation_record) + "\n")
+        self.backend.append_history(operation_record)
 
         logger.debug(f"Recorded operation: {operation_type} - {status}")
 
-    def get_operation_history(self, limit: int = 50) -> List[Dict[str, Any]]:
+    def get_operation_history(
+        self,
+        limit: Optional[int] = 50,
+        since: Union[str, datetime, None] = None,
+        operation: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Get operation history
 
+        Reading starts at the most recent record and stops once enough have
+        matched, so old history doesn't make this slower.
+
         Args:
-            limit: Maximum number of records to return
+            limit: Maximum number of records to return (all if None)
+            since: Only records at or after this time (ISO 8601 string or datetime)
+            operation: Only records of this operation type (deploy, destroy, etc.)
+            status: Only records with this status (started, completed, failed, etc.)
 
         Returns:
             List of operation records (most recent first)
         """
-        if not self.history_file.exists():
-            return []
-
-        records = []
+        return self.backend.read_history(limit, since, operation, status)
 
-        with open(self.history_file, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    record = json.loads(line.strip())
-                    records.append(record)
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid history record: {line}")
+    @staticmethod
+    def generate_operation_id() -> str:
+        """
+        Generate a new operation ID
 
-        # Return most recent records
-        return list(reversed(records))[:limit]
+        Returns:
+            Operation ID (op-YYYYMMDDHHMMSS-xxxx), sortable by start time
+        """
+        return f"op-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(2)}"
 
     def start_operation(
         self, operation_type: str, details: Optional[Dict[str, Any]] = None
-    ) -> None:
+    ) -> str:
         """
         Mark operation as started
 
         Args:
             operation_type: Type of operation
             details: Operation details
+
+        Returns:
+            Operation ID
         """
-        state = self.load_state()
-        state["current_operation"] = {
+        operation_id = self.generate_operation_id()
+
+        self.backend.set_value("current_operation", {
+            "id": operation_id,
             "type": operation_type,
             "started_at": datetime.utcnow().isoformat() + "Z",
             "details": details or {},
-        }
-        self.save_state(state)
+            "owner": {"host": socket.gethostname(), "pid": os.getpid()},
+            "in_flight": [],
+        })
+        self.backend.flush()
+
+        self.record_operation(operation_type, "started", details, operation_id)
 
-        self.record_operation(operation_type, "started", details)
+        return operation_id
 
     def complete_operation(
         self, success: bool, details: Optional[Dict[str, Any]] = None
@@ -288,17 +434,33 @@ class StateManager:
             success: Whether operation succeeded
             details: Completion details
         """
-        state = self.load_state()
-        current_op = state.get("current_operation")
+        current_op = self.get_current_operation()
 
         if current_op:
             operation_type = current_op.get("type", "unknown")
             status = "completed" if success else "failed"
 
-            self.record_operation(operation_type, status, details)
-
-            state["current_operation"] = None
-            self.save_state(state)
+            self.record_operation(
+                operation_type,
+                status,
+                details,
+                current_op.get("id"),
+                self._elapsed_since(current_op.get("started_at")),
+            )
+
+            self.backend.set_value("current_operation", None)
+            self.backend.flush()
+
+    @staticmethod
+    def _elapsed_since(started_at: Optional[str]) -> Optional[float]:
+        """Seconds since a recorded start time (None if unknown)"""
+        if not started_at:
+            return None
+        try:
+            started = datetime.fromisoformat(started_at.rstrip("Z"))
+        except ValueError:
+            return None
+        return max(0.0, (datetime.utcnow() - started).total_seconds())
 
     def get_current_operation(self) -> Optional[Dict[str, Any]]:
         """
@@ -307,8 +469,284 @@ class StateManager:
         Returns:
             Current operation info, or None
         """
-        state = self.load_state()
-        return state.get("current_operation")
+        return self.backend.get_value("current_operation")
+
+    def mark_in_flight(self, stack_name: str, environment: str = "dev") -> None:
+        """
+        Record that a Pulumi process is running for a stack of the current operation
+
+        Args:
+            stack_name: Name of the stack
+            environment: Environment name
+        """
+        def mark(current_op: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if not current_op:
+                return current_op
+
+            in_flight = [
+                entry for entry in current_op.get("in_flight") or []
+                if (entry.get("stack_name"), entry.get("environment")) != (stack_name, environment)
+            ]
+            in_flight.append({
+                "stack_name": stack_name,
+                "environment": environment,
+                "started_at": datetime.utcnow().isoformat() + "Z",
+            })
+            current_op["in_flight"] = in_flight
+            return current_op
+
+        self.backend.update_value("current_operation", mark)
+
+    def clear_in_flight(self, stack_name: str, environment: str = "dev") -> None:
+        """
+        Record that a stack's Pulumi process has finished
+
+        Args:
+            stack_name: Name of the stack
+            environment: Environment name
+        """
+        def clear(current_op: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if current_op and current_op.get("in_flight"):
+                current_op["in_flight"] = [
+                    entry for entry in current_op["in_flight"]
+                    if (entry.get("stack_name"), entry.get("environment")) != (stack_name, environment)
+                ]
+            return current_op
+
+        self.backend.update_value("current_operation", clear)
+
+    @staticmethod
+    def is_owner_alive(owner: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check whether the process that started an operation is still running
+
+        Only processes on this host can be checked; owners on other hosts
+        (or operations recorded without an owner) are assumed alive.
+
+        Args:
+            owner: Owner record of an operation ({"host", "pid"})
+
+        Returns:
+            False only if the owner is known to be gone
+        """
+        if not owner or owner.get("host") != socket.gethostname():
+            return True
+
+        pid = owner.get("pid")
+        if not isinstance(pid, int) or pid <= 0:
+            return True
+        if pid == os.getpid():
+            return True
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            # e.g. running, but owned by another user
+            pass
+
+        return True
+
+    def get_interrupted_operation(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the current operation if the process running it died
+
+        Returns:
+            Current operation info (with "in_flight" stacks), or None if there
+            is no operation or its owner may still be running
+        """
+        current_op = self.get_current_operation()
+        if not current_op or self.is_owner_alive(current_op.get("owner")):
+            return None
+        return current_op
+
+    def close_interrupted_operation(self, details: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record the current operation as interrupted and clear it
+
+        Stacks that were in flight are marked failed, since their update
+        stopped part way.
+
+        Args:
+            details: Details to record (e.g. recovery results)
+        """
+        current_op = self.get_current_operation()
+        if not current_op:
+            return
+
+        self.record_operation(
+            current_op.get("type", "unknown"),
+            "interrupted",
+            details,
+            current_op.get("id"),
+            self._elapsed_since(current_op.get("started_at")),
+        )
+
+        for entry in current_op.get("in_flight") or []:
+            self.set_stack_status(entry.get("stack_name"), StackStatus.FAILED, entry.get("environment"))
+
+        self.backend.set_value("current_operation", None)
+        self.backend.flush()
+
+    def record_stack_timeline(
+        self,
+        entries: List[Dict[str, Any]],
+        environment: str,
+        operation_id: Optional[str] = None,
+        operation_type: Optional[str] = None,
+    ) -> None:
+        """
+        Store the per-stack timeline of an operation
+
+        Args:
+            entries: One entry per stack (StackExecution.timeline(): stack,
+                     layer, queued/started/ended, attempts, outcome, error)
+            environment: Environment the stacks ran in
+            operation_id: Operation the stacks ran in (default: current operation)
+            operation_type: Type of the operation (default: current operation's)
+        """
+        if operation_id is None or operation_type is None:
+            current_op = self.get_current_operation() or {}
+            operation_id = operation_id or current_op.get("id")
+            operation_type = operation_type or current_op.get("type")
+
+        recorded_at = datetime.utcnow().isoformat() + "Z"
+        self.backend.append_timeline([
+            {
+                "id": operation_id,
+                "operation": operation_type,
+                "environment": environment,
+                "timestamp": recorded_at,
+                **entry,
+            }
+            for entry in entries
+        ])
+
+    @staticmethod
+    def _with_durations(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Add wait (queued to started) and duration (started to ended) seconds"""
+        queued, started, ended = entry.get("queued"), entry.get("started"), entry.get("ended")
+        entry["wait"] = round(started - queued, 3) if queued and started else None
+        entry["duration"] = round(ended - started, 3) if started and ended else None
+        return entry
+
+    def get_stack_timeline(
+        self, stack_name: str, environment: str = "dev", limit: Optional[int] = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a stack's timeline over its recent operations
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            limit: Maximum number of operations (all if None)
+
+        Returns:
+            Timeline entries (id, operation, layer, queued/started/ended epoch
+            seconds, wait, duration, attempts, outcome, error), most recent first
+        """
+        entries = self.backend.read_timeline(stack_key=f"{stack_name}-{environment}", limit=limit)
+        return [self._with_durations(entry) for entry in entries]
+
+    def get_operation_timeline(self, operation_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the per-stack timeline of one operation
+
+        Args:
+            operation_id: Operation ID
+
+        Returns:
+            Timeline entries of the operation's stacks, in execution order
+        """
+        entries = self.backend.read_timeline(operation_id=operation_id)
+        entries = [self._with_durations(entry) for entry in reversed(entries)]
+        return sorted(
+            entries, key=lambda e: (e.get("layer") or 0, e.get("started") or float("inf"))
+        )
+
+    @staticmethod
+    def _stack_lease_name(stack_name: str, environment: str) -> str:
+        return f"stack-{stack_name}-{environment}"
+
+    def acquire_deployment_lease(self, operation: str, wait: float = 0) -> Lease:
+        """
+        Lock the whole deployment against other processes
+
+        Used by operations on all stacks (deploy, destroy, rollback). Fails
+        while another process holds the deployment lease or any stack lease.
+
+        Args:
+            operation: Operation the lease protects
+            wait: Seconds to wait for other holders
+
+        Returns:
+            Lease, renewed in the background until released
+
+        Raises:
+            LeaseError: If the deployment or one of its stacks is locked
+        """
+        deadline = time.monotonic() + wait
+
+        while True:
+            lease = self.leases.acquire(
+                self.DEPLOYMENT_LEASE, operation, wait=max(0.0, deadline - time.monotonic())
+            )
+
+            # Stack leases taken before ours still protect running operations
+            busy = self.leases.list_leases(prefix="stack-")
+            if not busy:
+                return lease
+
+            lease.release()
+            if time.monotonic() >= deadline:
+                holder = busy[0]
+                raise LeaseError(
+                    f"{holder['name']} is locked by pid {holder.get('pid')} on {holder.get('host')}"
+                    + (f" ({holder['operation']})" if holder.get("operation") else "")
+                )
+            time.sleep(LeaseManager.POLL_INTERVAL)
+
+    def acquire_stack_lease(
+        self, stack_name: str, environment: str, operation: str, wait: float = 0
+    ) -> Lease:
+        """
+        Lock one stack against other processes
+
+        Used by single-stack operations, so disjoint stacks can be changed
+        from separate processes at the same time. Fails while another
+        process holds the stack's lease or the deployment lease.
+
+        Args:
+            stack_name: Name of the stack
+            environment: Environment name
+            operation: Operation the lease protects
+            wait: Seconds to wait for other holders
+
+        Returns:
+            Lease, renewed in the background until released
+
+        Raises:
+            LeaseError: If the stack or the whole deployment is locked
+        """
+        deadline = time.monotonic() + wait
+        name = self._stack_lease_name(stack_name, environment)
+
+        while True:
+            lease = self.leases.acquire(name, operation, wait=max(0.0, deadline - time.monotonic()))
+
+            # A deployment lease taken before ours covers this stack too
+            holder = self.leases.holder(self.DEPLOYMENT_LEASE)
+            if not holder:
+                return lease
+
+            lease.release()
+            if time.monotonic() >= deadline:
+                raise LeaseError(
+                    f"Deployment is locked by pid {holder.get('pid')} on {holder.get('host')}"
+                    + (f" ({holder['operation']})" if holder.get("operation") else "")
+                )
+            time.sleep(LeaseManager.POLL_INTERVAL)
 
     def is_operation_in_progress(self) -> bool:
         """
@@ -3,6 +3,7 @@
 from .orchestrator import Orchestrator, OrchestrationPlan
 from .dependency_resolver import DependencyResolver, CircularDependencyError
 from .layer_calculator import LayerCalculator
+from .resource_budget import ResourceBudget
 from .execution_engine import (
     ExecutionEngine,
     ExecutionResult,
@@ -16,6 +17,7 @@ __all__ = [
     "DependencyResolver",
     "CircularDependencyError",
     "LayerCalculator",
+    "ResourceBudget",
     "ExecutionEngine",
     "ExecutionResult",
     "StackExecution",
@@ -11,6 +11,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 
+from ..utils.stack_output import OutputTail
+
 
 class StackStatus(Enum):
     """Status of stack execution"""
@@ -30,10 +32,15 @@ class StackExecution:
     stack_name: str
     layer: int
     status: StackStatus = StackStatus.PENDING
+    # When its layer started (the stack may then wait for a parallel slot)
+    queued_time: Optional[datetime] = None
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    attempts: int = 0
     error: Optional[str] = None
-    output: str = ""
+    # Last part of the stack's process output; the full output goes to its log file
+    output: OutputTail = field(default_factory=OutputTail)
+    resource_changes: Dict[str, int] = field(default_factory=dict)
 
     def duration_seconds(self) -> float:
         """Get execution duration in seconds"""
@@ -41,6 +48,31 @@ class StackExecution:
             return (self.end_time - self.start_time).total_seconds()
         return 0.0
 
+    def timeline(self) -> Dict[str, Any]:
+        """
+        Get the stack's timeline in the compact form stored in state
+
+        Returns:
+            Dictionary with stack, layer, queued/started/ended (epoch seconds,
+            None if not reached), attempts, outcome and error
+        """
+
+        def epoch(moment: Optional[datetime]) -> Optional[float]:
+            return round(moment.timestamp(), 3) if moment else None
+
+        entry = {
+            "stack": self.stack_name,
+            "layer": self.layer,
+            "queued": epoch(self.queued_time),
+            "started": epoch(self.start_time),
+            "ended": epoch(self.end_time),
+            "attempts": self.attempts,
+            "outcome": self.status.value,
+        }
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
 
 @dataclass
 class ExecutionResult:
@@ -193,6 +225,10 @@ class ExecutionEngine:
         # Create semaphore for parallel execution limit
         semaphore = asyncio.Semaphore(self.max_parallel)
 
+        queued_time = datetime.now()
+        for stack_name in layer_stacks:
+            self.executions[stack_name].queued_time = queued_time
+
         async def execute_with_semaphore(stack_name: str) -> bool:
             async with semaphore:
                 return await self._execute_stack(stack_name, stack_executor)
@@ -230,6 +266,7 @@ class ExecutionEngine:
         execution = self.executions[stack_name]
         execution.status = StackStatus.RUNNING
         execution.start_time = datetime.now()
+        execution.attempts += 1
 
         # Callback: Stack start
         if self.on_stack_start:
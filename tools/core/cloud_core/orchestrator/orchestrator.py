@@ -5,14 +5,23 @@ Main orchestration engine that coordinates deployment execution.
 Combines dependency resolution, layer calculation, and execution engine.
 """
 
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, AsyncIterator, TYPE_CHECKING
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import asyncio
 
 from .dependency_resolver import DependencyResolver, CircularDependencyError
 from .layer_calculator import LayerCalculator
 from .execution_engine import ExecutionEngine, ExecutionResult, StackStatus
+from .resource_budget import ResourceBudget
+from ..deployment.lease import LeaseError
 from ..utils.logger import get_logger
+from ..utils.stack_output import OutputTail, StackOutputLog
+
+if TYPE_CHECKING:
+    from ..deployment.lease import Lease
+    from ..deployment.state_manager import StateManager
 
 logger = get_logger(__name__)
 
@@ -63,6 +72,27 @@ class Orchestrator:
         self.on_stack_complete: Optional[Callable[[str, bool, Optional[str]], None]] = None
         self.on_layer_start: Optional[Callable[[int, List[str]], None]] = None
         self.on_layer_complete: Optional[Callable[[int, bool], None]] = None
+        self.on_resource_event: Optional[Callable[[str, Any], None]] = None
+
+        # Caps resource operations in flight across concurrent stacks (unlimited if None)
+        self.resource_budget: Optional[ResourceBudget] = None
+
+        # Per-stack process output: full log files here, last output_tail_bytes in memory
+        self.log_dir: Optional[Path] = None
+        self.output_tail_bytes = OutputTail.DEFAULT_MAX_BYTES
+
+        # Stacks with a Pulumi process in flight are recorded in the current
+        # operation so an interrupted run's locks can be recovered, and each
+        # stack's timeline is stored with the operation when the run ends
+        self.state_manager: Optional["StateManager"] = None
+        self.environment: Optional[str] = None
+
+        # Lease of the running operation; no stack starts once it is lost
+        self.lease: Optional["Lease"] = None
+
+        # Prepare stage (dependency installs, plugins, compilation) per stack
+        self.prepare_futures: Dict[str, Future] = {}
+        self._prepare_pool: Optional[ThreadPoolExecutor] = None
 
     def create_plan(
         self, stacks_config: Dict[str, dict], validate_manifest: bool = True
@@ -137,6 +167,16 @@ class Orchestrator:
         """
         logger.info(f"Executing orchestration plan with {plan.get_total_stacks()} stacks")
 
+        if self.state_manager and self.environment:
+            stack_executor = self._tracking_in_flight(stack_executor)
+
+        if self.lease:
+            stack_executor = self._checking_lease(stack_executor)
+
+        # Each stack waits only for its own prepare step, not the whole stage
+        if self.prepare_futures:
+            stack_executor = self._after_prepare(stack_executor)
+
         # Create execution engine with callbacks
         self.execution_engine = ExecutionEngine(
             max_parallel=self.max_parallel,
@@ -147,9 +187,15 @@ class Orchestrator:
         )
 
         # Execute
-        result = await self.execution_engine.execute_layers(
-            plan.layers, stack_executor, stop_on_error
-        )
+        try:
+            result = await self.execution_engine.execute_layers(
+                plan.layers, stack_executor, stop_on_error
+            )
+        finally:
+            self.cancel_prepare()
+
+        if self.state_manager and self.environment:
+            self._record_timeline(result)
 
         # Log summary
         logger.info(
@@ -162,6 +208,223 @@ class Orchestrator:
 
         return result
 
+    def start_prepare(
+        self,
+        plan: OrchestrationPlan,
+        prepare_func: Callable[[str], Any],
+        max_workers: int = 4,
+    ) -> Dict[str, Future]:
+        """
+        Start preparing every stack of a plan in the background
+
+        Stacks are submitted in layer order so early layers are ready first;
+        execute_plan() then overlaps deploying them with preparing the rest.
+
+        Args:
+            plan: Orchestration plan
+            prepare_func: Blocking function preparing one stack (install
+                          dependencies, plugins, compile); raises on failure
+            max_workers: Maximum stacks prepared concurrently
+
+        Returns:
+            Dictionary of stack name -> prepare future
+        """
+        self.cancel_prepare()
+
+        self._prepare_pool = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="prepare"
+        )
+        self.prepare_futures = {
+            stack_name: self._prepare_pool.submit(prepare_func, stack_name)
+            for layer in plan.layers
+            for stack_name in layer
+        }
+
+        logger.info(f"Preparing {len(self.prepare_futures)} stacks in the background")
+        return self.prepare_futures
+
+    async def wait_for_prepare(self, stack_name: str) -> Any:
+        """
+        Wait until a stack's prepare step has finished
+
+        Args:
+            stack_name: Name of the stack
+
+        Returns:
+            Result of the prepare function (None if the stack was not prepared)
+
+        Raises:
+            Exception: Whatever the prepare function raised
+        """
+        future = self.prepare_futures.get(stack_name)
+        if future is None:
+            return None
+        return await asyncio.wrap_future(future)
+
+    def cancel_prepare(self) -> None:
+        """Stop the prepare stage, dropping stacks that have not started"""
+        if self._prepare_pool:
+            self._prepare_pool.shutdown(wait=False, cancel_futures=True)
+            self._prepare_pool = None
+        self.prepare_futures = {}
+
+    def _after_prepare(self, stack_executor: Callable[[str], Any]) -> Callable[[str], Any]:
+        """
+        Wrap a stack executor so it first waits for the stack's prepare step
+
+        Args:
+            stack_executor: Async function to execute a single stack
+
+        Returns:
+            Async function with the same contract
+        """
+
+        async def execute(stack_name: str):
+            try:
+                await self.wait_for_prepare(stack_name)
+            except Exception as e:
+                logger.error(f"Preparing stack {stack_name} failed: {e}")
+                return False, f"Prepare failed: {e}"
+
+            return await stack_executor(stack_name)
+
+        return execute
+
+    def _tracking_in_flight(self, stack_executor: Callable[[str], Any]) -> Callable[[str], Any]:
+        """
+        Wrap a stack executor so the stack is recorded as in flight while it runs
+
+        Args:
+            stack_executor: Async function to execute a single stack
+
+        Returns:
+            Async function with the same contract
+        """
+
+        async def execute(stack_name: str):
+            self.state_manager.mark_in_flight(stack_name, self.environment)
+            try:
+                return await stack_executor(stack_name)
+            finally:
+                self.state_manager.clear_in_flight(stack_name, self.environment)
+
+        return execute
+
+    def _checking_lease(self, stack_executor: Callable[[str], Any]) -> Callable[[str], Any]:
+        """
+        Wrap a stack executor so the stack fails instead of starting once the lease is lost
+
+        Args:
+            stack_executor: Async function to execute a single stack
+
+        Returns:
+            Async function with the same contract
+        """
+
+        async def execute(stack_name: str):
+            try:
+                self.lease.check()
+            except LeaseError as e:
+                logger.error(f"Not starting stack {stack_name}: {e}")
+                return False, str(e)
+
+            return await stack_executor(stack_name)
+
+        return execute
+
+    def _record_timeline(self, result: ExecutionResult) -> None:
+        """Store each stack's timeline with the current operation"""
+        try:
+            self.state_manager.record_stack_timeline(
+                [execution.timeline() for execution in result.stack_executions.values()],
+                self.environment,
+            )
+        except Exception as e:
+            # The run itself is done; losing its timeline must not fail it
+            logger.warning(f"Could not record stack timelines: {e}")
+
+    @asynccontextmanager
+    async def reserve_resources(self, requested: Optional[int]) -> AsyncIterator[Optional[int]]:
+        """
+        Reserve a stack's resource parallelism from the resource budget
+
+        A stack without a `--parallel` value is charged the budget's
+        DEFAULT_SHARE and runs with what it was granted, so it never runs
+        unmetered next to budgeted stacks.
+
+        Args:
+            requested: `--parallel` value the stack would like (None for Pulumi's default)
+
+        Yields:
+            `--parallel` value to use; requested unchanged when there is no budget
+        """
+        if self.resource_budget is None:
+            yield requested
+            return
+
+        if requested is None:
+            requested = self.resource_budget.DEFAULT_SHARE
+
+        async with self.resource_budget.reserve(requested) as granted:
+            yield granted
+
+    def open_stack_log(self, stack_name: str, log_name: Optional[str] = None) -> StackOutputLog:
+        """
+        Open the output log of a stack
+
+        Output written to the log is appended to a file in log_dir (when set)
+        and kept, up to output_tail_bytes, on the stack's execution record.
+
+        Args:
+            stack_name: Name of the stack
+            log_name: Log file name (default: <stack_name>.log)
+
+        Returns:
+            StackOutputLog; close it (or use it as a context manager) when done
+        """
+        execution = (
+            self.execution_engine.executions.get(stack_name)
+            if self.execution_engine
+            else None
+        )
+
+        tail = OutputTail(self.output_tail_bytes)
+        if execution:
+            execution.output = tail
+
+        path = self.log_dir / (log_name or f"{stack_name}.log") if self.log_dir else None
+        return StackOutputLog(path, tail)
+
+    def resource_event_handler(self, stack_name: str) -> Callable[[Any], None]:
+        """
+        Get a callback feeding a stack's Pulumi resource events into the orchestrator
+
+        Completed resource operations are counted on the stack's execution
+        record and every event is forwarded to on_resource_event.
+
+        Args:
+            stack_name: Name of the stack the events belong to
+
+        Returns:
+            Callback accepting a ResourceEvent
+        """
+
+        def handle(event: Any) -> None:
+            execution = (
+                self.execution_engine.executions.get(stack_name)
+                if self.execution_engine
+                else None
+            )
+            if execution and event.kind == "completed" and event.op:
+                execution.resource_changes[event.op] = (
+                    execution.resource_changes.get(event.op, 0) + 1
+                )
+
+            if self.on_resource_event:
+                self.on_resource_event(stack_name, event)
+
+        return handle
+
     def execute_single_stack(
         self,
         stack_name: str,
@@ -0,0 +1,85 @@
+"""
+Resource Budget
+
+Caps the total number of Pulumi resource operations in flight across all
+stacks that deploy concurrently.
+
+Each stack reserves its `--parallel` value before it starts and releases
+it when it finishes. A stack that asks for more than is left gets what
+remains; when nothing is left it waits for another stack to finish.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResourceBudget:
+    """Shared budget of in-flight resource operations"""
+
+    # Charged to stacks without a `--parallel` value (ParallelismTuner.DEFAULT_PARALLEL)
+    DEFAULT_SHARE = 16
+
+    def __init__(self, total: int):
+        """
+        Initialize resource budget
+
+        Args:
+            total: Maximum resource operations in flight across all stacks
+        """
+        self.total = max(1, total)
+        self.in_use = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, requested: int) -> int:
+        """
+        Reserve part of the budget, waiting while it is exhausted
+
+        Args:
+            requested: Resource operations the stack would like to run
+
+        Returns:
+            Resource operations granted (between 1 and requested)
+        """
+        requested = max(1, requested)
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_use < self.total)
+            granted = min(requested, self.total - self.in_use)
+            self.in_use += granted
+
+        if granted < requested:
+            logger.debug(f"Resource budget: granted {granted} of {requested} requested")
+        return granted
+
+    async def release(self, granted: int) -> None:
+        """
+        Return a reservation to the budget
+
+        Args:
+            granted: Value returned by acquire()
+        """
+        async with self._condition:
+            self.in_use = max(0, self.in_use - granted)
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self, requested: int) -> AsyncIterator[int]:
+        """
+        Reserve part of the budget for the duration of a block
+
+        Args:
+            requested: Resource operations the stack would like to run
+
+        Yields:
+            Resource operations granted
+        """
+        granted = await self.acquire(requested)
+        try:
+            yield granted
+        finally:
+            await self.release(granted)
@@ -3,10 +3,21 @@
 from .pulumi_wrapper import PulumiWrapper, PulumiError
 from .stack_operations import StackOperations
 from .state_queries import StateQueries
+from .event_stream import ResourceEvent, EngineEventTracker
+from .preview_cache import PreviewCache, compute_preview_key
+from .parallelism import ParallelismTuner, count_throttle_errors
+from .pulumi_home import PulumiHomes
 
 __all__ = [
     "PulumiWrapper",
     "PulumiError",
     "StackOperations",
     "StateQueries",
+    "ResourceEvent",
+    "EngineEventTracker",
+    "PreviewCache",
+    "compute_preview_key",
+    "ParallelismTuner",
+    "count_throttle_errors",
+    "PulumiHomes",
 ]
@@ -0,0 +1,229 @@
+"""
+Engine Event Stream
+
+Incremental parsing of the Pulumi engine event log (--event-log).
+Turns raw engine events into resource-level progress events while keeping
+memory bounded regardless of how many resources a stack has.
+"""
+
+import json
+import re
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, TextIO
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Pulumi colorization directives embedded in diagnostic messages, e.g. <{%reset%}>
+_COLOR_DIRECTIVE = re.compile(r"<\{%[^%]*%\}>")
+
+
+@dataclass
+class ResourceEvent:
+    """Resource-level progress event derived from the engine event stream"""
+
+    kind: str  # started, completed, failed, diagnostic, summary
+    op: Optional[str] = None  # create, update, delete, replace, same, ...
+    urn: Optional[str] = None
+    resource_type: Optional[str] = None
+    message: Optional[str] = None
+    changes: Optional[Dict[str, int]] = None  # set on summary events
+
+    @property
+    def resource_name(self) -> Optional[str]:
+        """Logical resource name (last URN segment)"""
+        return self.urn.rsplit("::", 1)[-1] if self.urn else None
+
+
+class EngineEventTracker:
+    """
+    Consumes engine events one at a time and keeps an aggregated view
+
+    Only counters, the set of in-flight resources (bounded by the engine's
+    parallelism) and the most recent failures/errors are retained.
+    """
+
+    def __init__(
+        self,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        max_failures: int = 20,
+    ):
+        """
+        Initialize tracker
+
+        Args:
+            on_event: Callback receiving each ResourceEvent
+            max_failures: Number of failures and error messages to retain
+        """
+        self.on_event = on_event
+        self.changes: Dict[str, int] = {}
+        self.in_flight: Dict[str, str] = {}
+        self.failures: Deque[ResourceEvent] = deque(maxlen=max_failures)
+        self.errors: Deque[str] = deque(maxlen=max_failures)
+        self.summary: Optional[Dict[str, int]] = None
+        self.event_count = 0
+
+    def handle_line(self, line: str) -> Optional[ResourceEvent]:
+        """
+        Handle one line of the event log
+
+        Args:
+            line: JSON-encoded engine event
+
+        Returns:
+            ResourceEvent emitted for this line, if any
+        """
+        line = line.strip()
+        if not line:
+            return None
+
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping malformed engine event: {line[:200]}")
+            return None
+
+        return self.handle_event(event)
+
+    def handle_event(self, event: Dict[str, Any]) -> Optional[ResourceEvent]:
+        """
+        Handle one decoded engine event
+
+        Args:
+            event: Engine event dictionary
+
+        Returns:
+            ResourceEvent emitted for this event, if any
+        """
+        self.event_count += 1
+        resource_event = None
+
+        if "resourcePreEvent" in event:
+            metadata = event["resourcePreEvent"].get("metadata", {})
+            urn = metadata.get("urn")
+            op = metadata.get("op")
+            if urn:
+                self.in_flight[urn] = op
+            resource_event = ResourceEvent(
+                kind="started", op=op, urn=urn, resource_type=metadata.get("type")
+            )
+
+        elif "resOutputsEvent" in event:
+            metadata = event["resOutputsEvent"].get("metadata", {})
+            urn = metadata.get("urn")
+            op = metadata.get("op")
+            self.in_flight.pop(urn, None)
+            self.changes[op] = self.changes.get(op, 0) + 1
+            resource_event = ResourceEvent(
+                kind="completed", op=op, urn=urn, resource_type=metadata.get("type")
+            )
+
+        elif "resOpFailedEvent" in event:
+            metadata = event["resOpFailedEvent"].get("metadata", {})
+            urn = metadata.get("urn")
+            self.in_flight.pop(urn, None)
+            resource_event = ResourceEvent(
+                kind="failed",
+                op=metadata.get("op"),
+                urn=urn,
+                resource_type=metadata.get("type"),
+            )
+            self.failures.append(resource_event)
+
+        elif "diagnosticEvent" in event:
+            diagnostic = event["diagnosticEvent"]
+            if diagnostic.get("severity") == "error":
+                message = _COLOR_DIRECTIVE.sub("", diagnostic.get("message", "")).strip()
+                self.errors.append(message)
+                resource_event = ResourceEvent(
+                    kind="diagnostic", urn=diagnostic.get("urn"), message=message
+                )
+
+        elif "summaryEvent" in event:
+            self.summary = dict(event["summaryEvent"].get("resourceChanges") or {})
+            resource_event = ResourceEvent(kind="summary", changes=self.summary)
+
+        if resource_event and self.on_event:
+            try:
+                self.on_event(resource_event)
+            except Exception as e:
+                logger.warning(f"Resource event callback failed: {e}")
+
+        return resource_event
+
+    def first_error(self) -> Optional[str]:
+        """Get the first retained error message"""
+        return self.errors[0] if self.errors else None
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Get aggregated result
+
+        Returns:
+            Dictionary with resource changes, failures and errors
+        """
+        return {
+            "changes": self.summary if self.summary is not None else dict(self.changes),
+            "failed_resources": [f.urn for f in self.failures],
+            "errors": list(self.errors),
+        }
+
+
+class EventLogTailer:
+    """Reads complete lines appended to a growing event log file"""
+
+    def __init__(self, path: Path):
+        """
+        Initialize tailer
+
+        Args:
+            path: Event log path (may not exist yet)
+        """
+        self.path = Path(path)
+        self._file: Optional[TextIO] = None
+        self._partial = ""
+
+    def read_lines(self, final: bool = False) -> Iterator[str]:
+        """
+        Yield lines completed since the last call
+
+        Args:
+            final: Writer has finished, also yield a trailing unterminated line
+
+        Yields:
+            Complete event log lines
+        """
+        if self._file is None:
+            if not self.path.exists():
+                return
+            self._file = open(self.path, "r", encoding="utf-8")
+
+        while True:
+            chunk = self._file.readline()
+            if not chunk:
+                break
+            if not chunk.endswith("\n"):
+                # Writer is mid-line, keep it for the next call
+                self._partial += chunk
+                break
+            line, self._partial = self._partial + chunk, ""
+            yield line
+
+        if final and self._partial:
+            line, self._partial = self._partial, ""
+            yield line
+
+    def close(self) -> None:
+        """Close the underlying file"""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "EventLogTailer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,166 @@
+"""
+Parallelism Tuner
+
+Chooses Pulumi's per-stack `--parallel` value (resource operations in
+flight inside one stack).
+
+The value comes from the manifest when a stack sets `parallel`, otherwise
+from the stack's previous runs: it grows with the number of resources and
+is halved after a run that hit AWS API throttling, recovering gradually
+once runs are clean again.
+"""
+
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ..utils.logger import get_logger
+from ..utils.serialization import write_json
+
+logger = get_logger(__name__)
+
+# AWS error codes and messages that mean requests are being rate limited
+THROTTLE_PATTERN = re.compile(
+    r"Throttl|Rate exceeded|RequestLimitExceeded|TooManyRequests|SlowDown|"
+    r"RequestThrottled|ProvisionedThroughputExceeded",
+    re.IGNORECASE,
+)
+
+
+def count_throttle_errors(errors: Iterable[str]) -> int:
+    """
+    Count error messages caused by API throttling
+
+    Args:
+        errors: Error messages
+
+    Returns:
+        Number of throttling errors
+    """
+    return sum(1 for error in errors if error and THROTTLE_PATTERN.search(error))
+
+
+class ParallelismTuner:
+    """Per-stack `--parallel` values learned from earlier runs"""
+
+    HISTORY_FILE = ".parallelism-history.json"
+
+    # Used for stacks that have never run
+    DEFAULT_PARALLEL = 16
+    MIN_PARALLEL = 1
+    MAX_PARALLEL = 64
+
+    # One resource operation in flight per this many resources
+    RESOURCES_PER_SLOT = 4
+
+    def __init__(self, deployment_dir: Path):
+        """
+        Initialize parallelism tuner
+
+        Args:
+            deployment_dir: Path to deployment directory (history is stored there)
+        """
+        self.history_file = Path(deployment_dir) / self.HISTORY_FILE
+        self._history: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load run history (once)"""
+        if self._history is None:
+            try:
+                with open(self.history_file, "r", encoding="utf-8") as f:
+                    self._history = json.load(f)
+            except FileNotFoundError:
+                self._history = {}
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Ignoring unreadable parallelism history {self.history_file}: {e}")
+                self._history = {}
+        return self._history
+
+    def _save(self) -> None:
+        """Write run history atomically"""
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            write_json(self.history_file, self._history)
+        except OSError as e:
+            logger.warning(f"Could not write parallelism history {self.history_file}: {e}")
+
+    def _clamp(self, value: int) -> int:
+        return max(self.MIN_PARALLEL, min(self.MAX_PARALLEL, value))
+
+    def choose(self, stack_name: str, environment: str, override: Optional[int] = None) -> int:
+        """
+        Choose the `--parallel` value of a stack's next run
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            override: Value set in the manifest (takes precedence)
+
+        Returns:
+            Number of resource operations to run in parallel
+        """
+        if override:
+            return max(self.MIN_PARALLEL, override)
+
+        with self._lock:
+            last = self._load().get(f"{stack_name}-{environment}")
+
+        if not last:
+            return self.DEFAULT_PARALLEL
+
+        # Enough slots for the stack's size, rounded up
+        resources = last.get("resources")
+        target = (
+            self._clamp(-(-resources // self.RESOURCES_PER_SLOT))
+            if resources
+            else self.DEFAULT_PARALLEL
+        )
+        previous = last.get("parallel") or target
+
+        if last.get("throttled"):
+            return self._clamp(previous // 2)
+        if previous < target:
+            # Recover from earlier throttling gradually
+            return self._clamp(min(target, previous * 2))
+        return target
+
+    def record(
+        self,
+        stack_name: str,
+        environment: str,
+        parallel: int,
+        resources: Optional[int],
+        throttled: int,
+    ) -> None:
+        """
+        Record the outcome of a run
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            parallel: `--parallel` value the run used
+            resources: Number of resources in the stack (all operations,
+                       including same); None keeps the previous count
+            throttled: Number of throttling errors observed
+        """
+        key = f"{stack_name}-{environment}"
+
+        with self._lock:
+            history = self._load()
+            if resources is None:
+                resources = history.get(key, {}).get("resources")
+            history[key] = {
+                "parallel": parallel,
+                "resources": resources,
+                "throttled": throttled,
+            }
+            self._save()
+
+        if throttled:
+            logger.info(
+                f"{stack_name} hit {throttled} throttling error(s) at --parallel {parallel}; "
+                f"next run will use less"
+            )
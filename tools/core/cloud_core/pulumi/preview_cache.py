@@ -0,0 +1,120 @@
+"""
+Preview Cache
+
+Caches Pulumi preview results per stack so that repeated previews of
+unchanged stacks return without running Pulumi.
+
+A cached result is reused only when the stack code, its configuration and
+the state versions of the stack and its upstream dependencies all match.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..utils.logger import get_logger
+from ..utils.serialization import write_json
+
+logger = get_logger(__name__)
+
+
+def compute_preview_key(
+    code_fingerprint: str,
+    config: Dict[str, Any],
+    state_versions: Dict[str, Optional[str]],
+) -> str:
+    """
+    Compute the cache key of a stack preview
+
+    Args:
+        code_fingerprint: Fingerprint of the stack code
+        config: Stack configuration
+        state_versions: State version of the stack and each upstream stack
+
+    Returns:
+        SHA-256 hex digest identifying the preview inputs
+    """
+    payload = json.dumps(
+        {"code": code_fingerprint, "config": config, "state": state_versions},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PreviewCache:
+    """Per-stack preview results stored in the deployment directory"""
+
+    CACHE_DIR = ".preview-cache"
+
+    def __init__(self, deployment_dir: Path):
+        """
+        Initialize preview cache
+
+        Args:
+            deployment_dir: Path to deployment directory
+        """
+        self.cache_dir = Path(deployment_dir) / self.CACHE_DIR
+
+    def _entry_path(self, stack_name: str, environment: str) -> Path:
+        """Get the cache file of a stack"""
+        return self.cache_dir / f"{stack_name}-{environment}.json"
+
+    def get(self, stack_name: str, environment: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached preview result
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            key: Preview cache key
+
+        Returns:
+            Cached result, or None if missing or computed from other inputs
+        """
+        path = self._entry_path(stack_name, environment)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable preview cache entry {path}: {e}")
+            return None
+
+        if entry.get("key") != key:
+            return None
+
+        return entry.get("result")
+
+    def put(self, stack_name: str, environment: str, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a preview result
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            key: Preview cache key
+            result: Preview result (must be JSON serializable)
+        """
+        path = self._entry_path(stack_name, environment)
+        entry = {
+            "key": key,
+            "cached_at": datetime.now().isoformat(),
+            "result": result,
+        }
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            write_json(path, entry)
+        except OSError as e:
+            logger.warning(f"Could not write preview cache entry {path}: {e}")
+
+    def clear(self) -> None:
+        """Remove all cached previews"""
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink()
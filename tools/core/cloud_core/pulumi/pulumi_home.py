@@ -0,0 +1,136 @@
+"""
+Pulumi Homes
+
+Isolated `PULUMI_HOME` directories for concurrent Pulumi processes.
+
+By default every `pulumi` process shares `~/.pulumi` for credentials,
+workspace settings (the selected stack of each project) and plugin
+downloads, so many processes running at once contend on its locks and can
+leave a half-installed plugin behind. Here each worker thread gets its own
+home, and provider plugins live in one shared cache that is populated only
+through install_plugin and linked read-only into every worker home.
+"""
+
+import itertools
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PulumiHomes:
+    """Per-worker Pulumi homes sharing one plugin cache"""
+
+    PLUGINS_DIR = "plugins"
+
+    # Files of the user's Pulumi home linked into every worker home (login)
+    LINKED_FILES = ("credentials.json",)
+
+    def __init__(
+        self,
+        homes_dir: Path,
+        cache_home: Path,
+        user_home: Optional[Path] = None,
+        read_only_plugins: bool = True,
+    ):
+        """
+        Initialize Pulumi homes
+
+        Args:
+            homes_dir: Directory holding one home per worker
+            cache_home: Pulumi home owning the shared plugin cache
+                        (may be shared by deployments)
+            user_home: The user's own Pulumi home, for login credentials
+                       (default: $PULUMI_HOME or ~/.pulumi)
+            read_only_plugins: Keep workers from downloading plugins into the
+                               shared cache (plugins must be installed first)
+        """
+        self.homes_dir = Path(homes_dir).resolve()
+        self.cache_home = Path(cache_home).resolve()
+        self.user_home = Path(user_home or os.environ.get("PULUMI_HOME") or Path.home() / ".pulumi")
+        self.read_only_plugins = read_only_plugins
+
+        self._local = threading.local()
+        self._counter = itertools.count()
+
+    @property
+    def plugin_cache_dir(self) -> Path:
+        """Directory of the shared plugin cache"""
+        return self.cache_home / self.PLUGINS_DIR
+
+    def _link(self, link: Path, target: Path) -> None:
+        """Point link at target unless it already does"""
+        if link.is_symlink():
+            if Path(os.readlink(link)) == target:
+                return
+            link.unlink()
+        elif link.exists():
+            logger.warning(f"Not replacing {link} with a link to {target}")
+            return
+
+        try:
+            link.symlink_to(target, target_is_directory=target.is_dir())
+        except OSError as e:
+            logger.warning(f"Cannot link {link} to {target}: {e}")
+
+    def _prepare_home(self, home: Path) -> None:
+        """Create a home and link the plugin cache and credentials into it"""
+        home.mkdir(parents=True, exist_ok=True)
+        self.plugin_cache_dir.mkdir(parents=True, exist_ok=True)
+        if home != self.cache_home:
+            self._link(home / self.PLUGINS_DIR, self.plugin_cache_dir)
+
+        for name in self.LINKED_FILES:
+            source = self.user_home / name
+            if source.exists():
+                self._link(home / name, source.resolve())
+
+    def worker_home(self) -> Path:
+        """
+        Get the Pulumi home of the calling thread (created on first use)
+
+        Returns:
+            Path to the worker's Pulumi home
+        """
+        home = getattr(self._local, "home", None)
+        if home is None:
+            home = self.homes_dir / f"worker-{next(self._counter)}"
+            self._prepare_home(home)
+            self._local.home = home
+            logger.debug(f"Using Pulumi home {home} for {threading.current_thread().name}")
+        return home
+
+    def worker_env(self, base_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Get the environment of a Pulumi process run by the calling thread
+
+        Args:
+            base_env: Environment to extend (current environment if None)
+
+        Returns:
+            Environment with the worker's PULUMI_HOME
+        """
+        env = dict(base_env if base_env is not None else os.environ)
+        env["PULUMI_HOME"] = str(self.worker_home())
+        if self.read_only_plugins:
+            env["PULUMI_DISABLE_AUTOMATIC_PLUGIN_ACQUISITION"] = "true"
+        return env
+
+    def cache_env(self, base_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Get the environment of a Pulumi process installing into the plugin cache
+
+        Args:
+            base_env: Environment to extend (current environment if None)
+
+        Returns:
+            Environment with PULUMI_HOME set to the cache home
+        """
+        self._prepare_home(self.cache_home)
+        env = dict(base_env if base_env is not None else os.environ)
+        env["PULUMI_HOME"] = str(self.cache_home)
+        return env
@@ -5,15 +5,25 @@ Wraps Pulumi CLI and Automation API for stack operations.
 Simplified implementation that can be enhanced with full Automation API later.
 """
 
+import os
+import secrets
 import subprocess
 import json
 import shutil
-import time
+import tempfile
+import threading
 import yaml
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterable, Set, Tuple, Callable, Deque
 from contextlib import contextmanager
+from .event_stream import EngineEventTracker, EventLogTailer, ResourceEvent
+from .pulumi_home import PulumiHomes
+from ..build.node_store import BuildError
+from ..build.stack_builder import compile_stack, get_output_dir
 from ..utils.logger import get_logger
+from ..utils.serialization import dump_yaml, load_yaml
 
 logger = get_logger(__name__)
 
@@ -27,29 +37,197 @@ class PulumiError(Exception):
 class PulumiWrapper:
     """Wrapper for Pulumi operations"""
 
+    # Seconds between event log reads while a Pulumi process is running
+    EVENT_POLL_INTERVAL = 0.25
+
+    # Refresh steps that mean state already matches the cloud
+    NO_DRIFT_OPS = {"same", "read", "refresh"}
+
+    # Local file backend layout inside a deployment directory
+    LOCAL_STATE_DIR = ".pulumi-state"
+    LOCAL_PASSPHRASE_FILE = ".pulumi-passphrase"
+
+    # File backends scope stacks under this fixed organization name
+    LOCAL_ORGANIZATION = "organization"
+
     def __init__(
         self,
         organization: str,
         project: str,
         working_dir: Optional[Path] = None,
+        backend_url: Optional[str] = None,
+        passphrase_file: Optional[Path] = None,
+        homes: Optional[PulumiHomes] = None,
     ):
         """
         Initialize Pulumi wrapper
 
         Args:
-            organization: Pulumi organization name
+            organization: Pulumi organization name (ignored for file backends)
             project: Pulumi project name
             working_dir: Working directory for Pulumi operations
+            backend_url: State backend URL (e.g. file:///path); Pulumi Cloud if None
+            passphrase_file: Secrets passphrase file for passphrase-based backends
+            homes: Per-worker Pulumi homes with a shared plugin cache
+                   (the user's ~/.pulumi if None)
         """
-        self.organization = organization
+        self.backend_url = backend_url
+        self.organization = self.LOCAL_ORGANIZATION if self.is_local_backend else organization
         self.project = project
         self.working_dir = Path(working_dir) if working_dir else Path.cwd()
 
+        # Environment for Pulumi subprocesses (None inherits the caller's)
+        self._env = self._build_env(passphrase_file)
+        self.homes = homes
+
+        # Stack selected in each working directory (short stack name)
+        self._selected_stacks: Dict[str, str] = {}
+
+        # Stack inventory per (organization, project), loaded on demand:
+        # short stack name -> last update time (None if unknown)
+        self._stack_inventory: Dict[Tuple[str, str], Dict[str, Optional[str]]] = {}
+        self._inventory_lock = threading.Lock()
+
+        # Stack outputs per fully qualified stack name, dropped when the stack is updated
+        self._output_cache: Dict[str, Dict[str, Any]] = {}
+        self._outputs_lock = threading.Lock()
+
+        # One lock per stack source dir so concurrent deploys never compile it twice at once
+        self._compile_locks: Dict[str, threading.Lock] = {}
+        self._compile_locks_guard = threading.Lock()
+
+        # Plugins installed by this process, and one lock per plugin being installed
+        self._installed_plugins: Set[Tuple[str, str, str]] = set()
+        self._plugin_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._plugin_locks_guard = threading.Lock()
+
+    @classmethod
+    def for_deployment(
+        cls,
+        manifest: Dict[str, Any],
+        deployment_dir: Optional[Path] = None,
+        deployment_id: Optional[str] = None,
+    ) -> "PulumiWrapper":
+        """
+        Create a wrapper for a deployment's Pulumi project and state backend
+
+        The project is the composite DeploymentID-Organization-Project name.
+        With `pulumiBackend: local` in the manifest, state lives in a file
+        backend under the deployment directory and secrets use a passphrase.
+
+        Args:
+            manifest: Deployment manifest
+            deployment_dir: Path to deployment directory (required for local backend)
+            deployment_id: Deployment ID (defaults to manifest deployment_id)
+
+        Returns:
+            Configured PulumiWrapper
+
+        Raises:
+            PulumiError: If the backend is unknown or cannot be prepared
+        """
+        # Use pulumiOrg (Pulumi Cloud organization), NOT organization (deployment org)
+        pulumi_org = manifest.get("pulumiOrg", manifest.get("organization", ""))
+
+        # Build composite project name: DeploymentID-Organization-Project
+        composite_project = (
+            f"{manifest.get('deployment_id', deployment_id)}-"
+            f"{manifest.get('organization', '')}-{manifest.get('project', '')}"
+        )
+
+        backend = manifest.get("pulumiBackend", "cloud")
+        if backend == "cloud":
+            return cls(organization=pulumi_org, project=composite_project)
+
+        if backend != "local":
+            raise PulumiError(f"Unknown Pulumi backend '{backend}' (expected 'cloud' or 'local')")
+
+        if deployment_dir is None:
+            raise PulumiError("Local Pulumi backend requires a deployment directory")
+
+        deployment_dir = Path(deployment_dir).resolve()
+        state_dir = deployment_dir / cls.LOCAL_STATE_DIR
+
+        try:
+            state_dir.mkdir(parents=True, exist_ok=True)
+            passphrase_file = cls._ensure_passphrase_file(deployment_dir / cls.LOCAL_PASSPHRASE_FILE)
+        except OSError as e:
+            raise PulumiError(f"Could not prepare local Pulumi backend in {deployment_dir}: {e}")
+
+        return cls(
+            organization=pulumi_org,
+            project=composite_project,
+            backend_url=state_dir.as_uri(),
+            passphrase_file=passphrase_file,
+        )
+
+    @property
+    def is_local_backend(self) -> bool:
+        """Whether state is kept in a local file backend"""
+        return bool(self.backend_url and self.backend_url.startswith("file://"))
+
+    def _build_env(self, passphrase_file: Optional[Path]) -> Optional[Dict[str, str]]:
+        """
+        Build the environment for Pulumi subprocesses
+
+        Args:
+            passphrase_file: Secrets passphrase file (used unless a passphrase
+                             is already set in the environment)
+
+        Returns:
+            Environment dictionary, or None to inherit the current environment
+        """
+        if not self.backend_url:
+            return None
+
+        env = dict(os.environ)
+        env["PULUMI_BACKEND_URL"] = self.backend_url
+
+        if self.is_local_backend:
+            # No Pulumi Cloud round trips at all in local mode
+            env["PULUMI_SKIP_UPDATE_CHECK"] = "true"
+
+        has_passphrase = "PULUMI_CONFIG_PASSPHRASE" in env or "PULUMI_CONFIG_PASSPHRASE_FILE" in env
+        if passphrase_file and not has_passphrase:
+            env["PULUMI_CONFIG_PASSPHRASE_FILE"] = str(passphrase_file)
+
+        return env
+
+    def _command_env(self) -> Optional[Dict[str, str]]:
+        """Get the environment of a Pulumi process started by the calling thread"""
+        if self.homes:
+            return self.homes.worker_env(self._env)
+        return self._env
+
+    @staticmethod
+    def _ensure_passphrase_file(path: Path) -> Path:
+        """
+        Create a random secrets passphrase file if it doesn't exist
+
+        Args:
+            path: Passphrase file path
+
+        Returns:
+            Passphrase file path
+        """
+        if not path.exists():
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(secrets.token_urlsafe(32))
+            logger.info(f"Generated Pulumi secrets passphrase: {path}")
+
+        return path
+
+    def _secrets_provider_args(self) -> List[str]:
+        """Get the secrets provider arguments for new stacks"""
+        return ["--secrets-provider", "passphrase"] if self.is_local_backend else []
+
     def _run_command(
         self,
         cmd: List[str],
         cwd: Optional[Path] = None,
         capture_output: bool = True,
+        env: Optional[Dict[str, str]] = None,
     ) -> subprocess.CompletedProcess:
         """
         Run Pulumi CLI command
@@ -58,6 +236,7 @@ class PulumiWrapper:
             cmd: Command and arguments
             cwd: Working directory
             capture_output: Whether to capture output
+            env: Environment (default: the calling worker's, see _command_env)
 
         Returns:
             CompletedProcess result
@@ -67,12 +246,13 @@ class PulumiWrapper:
         """
         work_dir = cwd or self.working_dir
 
-        logger.debug(f"Running Pulumi command: {' '.join(cmd)} in {work_dir}")
+        logger.debug(f"Running Pulumi command: {self._format_command_for_log(cmd)} in {work_dir}")
 
         try:
             result = subprocess.run(
                 cmd,
                 cwd=str(work_dir),
+                env=env if env is not None else self._command_env(),
                 capture_output=capture_output,
                 text=True,
                 check=False,
@@ -89,24 +269,291 @@ class PulumiWrapper:
         except Exception as e:
             raise PulumiError(f"Error running Pulumi command: {e}")
 
+    def _run_streaming(
+        self,
+        cmd: List[str],
+        cwd: Optional[Path] = None,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a Pulumi engine command, parsing its event log while it runs
+
+        Raw CLI output never reaches the terminal so parallel stacks don't
+        interleave; progress is reported through on_event and the output is
+        handed line by line to on_output (or discarded). Only aggregated
+        counters and the tail of stderr are kept in memory.
+
+        Args:
+            cmd: Command and arguments (up, preview, destroy, refresh)
+            cwd: Working directory
+            on_event: Callback receiving each ResourceEvent
+            on_output: Callback receiving each stdout/stderr line (called from
+                       reader threads)
+
+        Returns:
+            Aggregated result (resource changes, failed resources, errors)
+
+        Raises:
+            PulumiError: If command fails
+        """
+        work_dir = cwd or self.working_dir
+        tracker = EngineEventTracker(on_event)
+        stderr_tail: Deque[str] = deque(maxlen=50)
+
+        with tempfile.TemporaryDirectory(prefix="pulumi-events-") as events_dir:
+            event_log = Path(events_dir) / "events.jsonl"
+            cmd = cmd + ["--event-log", str(event_log)]
+
+            logger.debug(f"Running Pulumi command: {self._format_command_for_log(cmd)} in {work_dir}")
+
+            try:
+                process = subprocess.Popen(
+                    cmd,
+                    cwd=str(work_dir),
+                    env=self._command_env(),
+                    stdout=subprocess.PIPE if on_output else subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    errors="replace",
+                )
+            except FileNotFoundError:
+                raise PulumiError("Pulumi CLI not found. Please install Pulumi.")
+
+            def drain_stdout() -> None:
+                for line in process.stdout:
+                    on_output(line)
+
+            def drain_stderr() -> None:
+                for line in process.stderr:
+                    stderr_tail.append(line)
+                    if on_output:
+                        on_output(line)
+
+            # Drain pipes concurrently so they never block the process
+            readers = [threading.Thread(target=drain_stderr, daemon=True)]
+            if on_output:
+                readers.append(threading.Thread(target=drain_stdout, daemon=True))
+            for reader in readers:
+                reader.start()
+
+            with EventLogTailer(event_log) as tailer:
+                while True:
+                    try:
+                        process.wait(timeout=self.EVENT_POLL_INTERVAL)
+                        finished = True
+                    except subprocess.TimeoutExpired:
+                        finished = False
+
+                    for line in tailer.read_lines(final=finished):
+                        tracker.handle_line(line)
+
+                    if finished:
+                        break
+
+            for reader in readers:
+                reader.join(timeout=5)
+
+        if process.returncode != 0:
+            error_msg = tracker.first_error() or "".join(stderr_tail).strip() or "Command failed"
+            raise PulumiError(f"Pulumi command failed: {error_msg}")
+
+        return {"returncode": process.returncode, **tracker.result()}
+
+    @staticmethod
+    def _format_command_for_log(cmd: List[str]) -> str:
+        """
+        Format a command for logging with secret values masked
+
+        Args:
+            cmd: Command and arguments
+
+        Returns:
+            Command string safe to log
+        """
+        masked = []
+        for i, arg in enumerate(cmd):
+            if i > 0 and cmd[i - 1] == "--secret" and "=" in arg:
+                arg = arg.split("=", 1)[0] + "=[secret]"
+            masked.append(arg)
+        return " ".join(masked)
+
+    def list_stacks(
+        self,
+        organization: Optional[str] = None,
+        project: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Set[str]:
+        """
+        Get the stack inventory of a project
+
+        The inventory is loaded with a single `pulumi stack ls --json` call
+        and cached per organization/project for the lifetime of the wrapper.
+
+        Args:
+            organization: Pulumi organization (defaults to wrapper organization)
+            project: Pulumi project (defaults to wrapper project)
+            refresh: Reload the inventory even if cached
+
+        Returns:
+            Set of short stack names in the project
+
+        Raises:
+            PulumiError: If the stack listing fails
+        """
+        return set(self.get_stack_versions(organization, project, refresh))
+
+    def get_stack_versions(
+        self,
+        organization: Optional[str] = None,
+        project: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Dict[str, Optional[str]]:
+        """
+        Get the last update time of every stack in a project
+
+        Shares the cached `pulumi stack ls --json` inventory with list_stacks().
+        The timestamp changes whenever a stack's state is updated, so it serves
+        as a cheap state version.
+
+        Args:
+            organization: Pulumi organization (defaults to wrapper organization)
+            project: Pulumi project (defaults to wrapper project)
+            refresh: Reload the inventory even if cached
+
+        Returns:
+            Dictionary of short stack name -> last update time (None if never updated)
+
+        Raises:
+            PulumiError: If the stack listing fails
+        """
+        key = (organization or self.organization, project or self.project)
+
+        with self._inventory_lock:
+            if not refresh and key in self._stack_inventory:
+                return dict(self._stack_inventory[key])
+
+        cmd = ["pulumi", "stack", "ls", "--json", "--all", "--project", key[1]]
+        if not self.is_local_backend:
+            cmd.extend(["--organization", key[0]])
+
+        result = self._run_command(cmd)
+
+        try:
+            entries = json.loads(result.stdout) if result.stdout else []
+        except json.JSONDecodeError as e:
+            raise PulumiError(f"Could not parse stack listing: {e}")
+
+        # Names are fully qualified (org/project/stack) with --all
+        stacks = {
+            entry["name"].split("/")[-1]: entry.get("lastUpdate")
+            for entry in entries
+            if entry.get("name")
+        }
+
+        with self._inventory_lock:
+            self._stack_inventory[key] = stacks
+
+        logger.debug(f"Loaded inventory for {key[0]}/{key[1]}: {len(stacks)} stack(s)")
+        return dict(stacks)
+
+    def invalidate_stack_inventory(self) -> None:
+        """Drop all cached stack inventories"""
+        with self._inventory_lock:
+            self._stack_inventory.clear()
+
+    def _remember_stack(self, stack_name: str) -> None:
+        """
+        Record a stack of this project in the cached inventory
+
+        Args:
+            stack_name: Short stack name
+        """
+        with self._inventory_lock:
+            stacks = self._stack_inventory.get((self.organization, self.project))
+            if stacks is not None:
+                stacks.setdefault(stack_name, None)
+
     def stack_exists(self, stack_name: str) -> bool:
         """
         Check if a Pulumi stack exists
 
         Args:
-            stack_name: Full stack name (org/project/stack-name)
+            stack_name: Full stack name (org/project/stack-name) or short
+                        stack name within the wrapper's project
 
         Returns:
             True if stack exists
         """
+        parts = stack_name.split("/")
+        organization = parts[0] if len(parts) == 3 else None
+        project = parts[1] if len(parts) == 3 else None
+
         try:
-            self._run_command(["pulumi", "stack", "ls", "--json"])
-            # Parse output to check if stack exists
-            # For now, simple implementation
-            return True  # Simplified
-        except PulumiError:
+            return parts[-1] in self.list_stacks(organization, project)
+        except PulumiError as e:
+            logger.warning(f"Could not list stacks: {e}")
             return False
 
+    def ensure_stacks(
+        self, stack_names: Iterable[str], max_workers: int = 8
+    ) -> List[str]:
+        """
+        Create all missing stacks of the project up front, in parallel
+
+        Intended to run at planning time so the per-stack critical path only
+        contains `select` and `up`.
+
+        Args:
+            stack_names: Short stack names that must exist
+            max_workers: Maximum number of concurrent `stack init` calls
+
+        Returns:
+            List of stack names that were created
+
+        Raises:
+            PulumiError: If any stack could not be created
+        """
+        existing = self.list_stacks()
+        missing = sorted(set(stack_names) - existing)
+
+        if not missing:
+            return []
+
+        logger.info(f"Creating {len(missing)} Pulumi stack(s): {', '.join(missing)}")
+
+        # stack init needs a Pulumi.yaml naming the project; it never runs the program
+        with tempfile.TemporaryDirectory(prefix="pulumi-init-") as scratch_dir:
+            scratch_dir = Path(scratch_dir)
+            with open(scratch_dir / "Pulumi.yaml", "w", encoding="utf-8") as f:
+                dump_yaml({"name": self.project, "runtime": "nodejs"}, f)
+
+            def create(stack_name: str) -> None:
+                self._run_command(
+                    [
+                        "pulumi", "stack", "init",
+                        f"{self.organization}/{self.project}/{stack_name}",
+                        "--no-select",
+                        *self._secrets_provider_args(),
+                    ],
+                    cwd=scratch_dir,
+                )
+                self._remember_stack(stack_name)
+
+            errors = []
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as pool:
+                futures = {pool.submit(create, name): name for name in missing}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except PulumiError as e:
+                        errors.append(f"{futures[future]}: {e}")
+
+        if errors:
+            raise PulumiError("Could not create stacks:\n" + "\n".join(errors))
+
+        return missing
+
     def select_stack(
         self, stack_name: str, create: bool = True, cwd: Optional[Path] = None
     ) -> None:
@@ -121,32 +568,23 @@ class PulumiWrapper:
         Raises:
             PulumiError: If operation fails
         """
-        full_stack_name = f"{self.organization}/{self.project}/{stack_name}"
-
-        try:
-            if create:
-                # Try to create stack (will fail if exists, which is okay)
-                try:
-                    self._run_command(
-                        ["pulumi", "stack", "init", full_stack_name],
-                        cwd=cwd,
-                    )
-                    logger.info(f"Created Pulumi stack: {full_stack_name}")
-                except PulumiError:
-                    # Stack probably exists, select it
-                    pass
-
-            # Select the stack
-            self._run_command(
-                ["pulumi", "stack", "select", full_stack_name],
-                cwd=cwd,
-            )
+        full_stack_name = self.qualify_stack_name(stack_name)
 
-            logger.info(f"Selected Pulumi stack: {full_stack_name}")
+        cmd = ["pulumi", "stack", "select", full_stack_name]
+        if create and not self.stack_exists(stack_name):
+            # Single call that creates the stack only if it is missing
+            cmd.append("--create")
+            cmd.extend(self._secrets_provider_args())
 
+        try:
+            self._run_command(cmd, cwd=cwd)
         except PulumiError as e:
             raise PulumiError(f"Error selecting stack {full_stack_name}: {e}")
 
+        self._remember_stack(stack_name)
+        self._selected_stacks[str(Path(cwd or self.working_dir))] = stack_name
+        logger.info(f"Selected Pulumi stack: {full_stack_name}")
+
     def set_config(
         self, key: str, value: str, secret: bool = False, cwd: Optional[Path] = None
     ) -> None:
@@ -170,31 +608,134 @@ class PulumiWrapper:
         logger.debug(f"Set Pulumi config: {key}")
 
     def set_all_config(
-        self, config: Dict[str, str], cwd: Optional[Path] = None
-    ) -> None:
+        self,
+        config: Dict[str, Any],
+        cwd: Optional[Path] = None,
+        secret_keys: Optional[Iterable[str]] = None,
+    ) -> int:
         """
-        Set multiple configuration values
+        Set multiple configuration values in a single Pulumi invocation
+
+        Uses `pulumi config set-all` so the whole batch (including secrets,
+        which Pulumi encrypts together) costs one subprocess. Plaintext keys
+        whose value already matches the stack's Pulumi.<stack>.yaml are
+        skipped. Secret values are stored encrypted and cannot be compared,
+        so they are always re-applied.
 
         Args:
             config: Dictionary of key -> value
-            cwd: Working directory
+            cwd: Working directory (stack directory)
+            secret_keys: Keys whose values should be stored as secrets
+                         (with or without namespace)
+
+        Returns:
+            Number of keys written
+
+        Raises:
+            PulumiError: If operation fails
         """
+        secret_keys = {self._qualify_config_key(key) for key in secret_keys or ()}
+        current = self._read_stack_config(cwd)
+
+        cmd = ["pulumi", "config", "set-all"]
+        changed = 0
+
         for key, value in config.items():
-            self.set_config(key, value, cwd=cwd)
+            value = self._format_config_value(value)
+
+            if self._qualify_config_key(key) in secret_keys:
+                cmd.extend(["--secret", f"{key}={value}"])
+            elif current.get(self._qualify_config_key(key)) != value:
+                cmd.extend(["--plaintext", f"{key}={value}"])
+            else:
+                continue
+
+            changed += 1
+
+        if not changed:
+            logger.debug("Pulumi config already up to date, nothing to write")
+            return 0
 
-    def preview(self, cwd: Optional[Path] = None, config_file: Optional[Path] = None) -> Dict[str, Any]:
+        self._run_command(cmd, cwd=cwd)
+        logger.debug(f"Set {changed} Pulumi config value(s) ({len(config) - changed} unchanged)")
+        return changed
+
+    def _read_stack_config(self, cwd: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Read the selected stack's config from Pulumi.<stack>.yaml
+
+        Args:
+            cwd: Working directory (stack directory)
+
+        Returns:
+            Dictionary of fully qualified key -> stored value (empty if unknown)
+        """
+        work_dir = Path(cwd or self.working_dir)
+        stack_name = self._selected_stacks.get(str(work_dir))
+
+        if not stack_name:
+            return {}
+
+        stack_config_file = work_dir / f"Pulumi.{stack_name}.yaml"
+        if not stack_config_file.exists():
+            return {}
+
+        try:
+            with open(stack_config_file, "r", encoding="utf-8") as f:
+                content = load_yaml(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            logger.warning(f"Could not read {stack_config_file}: {e}")
+            return {}
+
+        return content.get("config") or {}
+
+    def _qualify_config_key(self, key: str) -> str:
+        """
+        Qualify a config key with the project namespace, as Pulumi stores it
+
+        Args:
+            key: Config key, with or without namespace
+
+        Returns:
+            Namespaced key (namespace:key)
+        """
+        return key if ":" in key else f"{self.project}:{key}"
+
+    @staticmethod
+    def _format_config_value(value: Any) -> str:
+        """
+        Convert a config value to the string form Pulumi stores
+
+        Args:
+            value: Config value
+
+        Returns:
+            String value (JSON for non-string values)
+        """
+        if isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+    def preview(
+        self,
+        cwd: Optional[Path] = None,
+        config_file: Optional[Path] = None,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        parallel: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         Run pulumi preview
 
         Args:
             cwd: Working directory
             config_file: Path to config file (relative to cwd or absolute)
+            on_event: Callback for resource-level progress; enables event streaming
+            on_output: Callback for each line of CLI output; enables event streaming
+            parallel: Resource operations to run in parallel (Pulumi default if None)
 
         Returns:
-            Preview result summary
-
-        Raises:
-            PulumiError: If preview fails
+            Preview result summary with resource changes per operation
         """
         logger.info("Running Pulumi preview")
 
@@ -202,19 +743,57 @@ class PulumiWrapper:
             cmd = ["pulumi", "preview", "--json", "--non-interactive"]
             if config_file:
                 cmd.extend(["--config-file", str(config_file)])
+            if parallel:
+                cmd.extend(["--parallel", str(parallel)])
 
-                result = self._run_command(cmd, cwd=cwd)
+            if on_event or on_output:
+                cmd.remove("--json")
+                return {"success": True, **self._run_streaming(cmd, cwd, on_event, on_output)}
 
-                # Parse JSON output (simplified)
-                # Real implementation would parse the JSON streaming output
-                return {"success": True, "output": result.stdout}
+            result = self._run_command(cmd, cwd=cwd)
+
+            return {
+                "success": True,
+                "changes": self._parse_preview_changes(result.stdout),
+                "output": result.stdout,
+            }
 
         except PulumiError as e:
             logger.error(f"Preview failed: {e}")
             return {"success": False, "error": str(e)}
 
+    @staticmethod
+    def _parse_preview_changes(output: str) -> Dict[str, int]:
+        """
+        Extract resource changes from `pulumi preview --json` output
+
+        Args:
+            output: Preview JSON document
+
+        Returns:
+            Dictionary of operation -> resource count (empty if not parseable)
+        """
+        try:
+            document = json.loads(output) if output else {}
+        except json.JSONDecodeError:
+            logger.debug("Preview output is not JSON, no change summary available")
+            return {}
+
+        if not isinstance(document, dict):
+            return {}
+
+        return dict(document.get("changeSummary") or {})
+
     def up(
-        self, cwd: Optional[Path] = None, yes: bool = True, config_file: Optional[Path] = None
+        self,
+        cwd: Optional[Path] = None,
+        yes: bool = True,
+        config_file: Optional[Path] = None,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        parallel: Optional[int] = None,
+        targets: Optional[List[str]] = None,
+        refresh: bool = False,
     ) -> Dict[str, Any]:
         """
         Deploy stack (pulumi up)
@@ -223,6 +802,11 @@ class PulumiWrapper:
             cwd: Working directory
             yes: Auto-approve changes
             config_file: Path to config file (relative to cwd or absolute)
+            on_event: Callback for resource-level progress; enables event streaming
+            on_output: Callback for each line of CLI output; enables event streaming
+            parallel: Resource operations to run in parallel (Pulumi default if None)
+            targets: Only update these resource URNs (all resources if None)
+            refresh: Refresh state from the cloud before updating
 
         Returns:
             Deployment result summary
@@ -237,8 +821,17 @@ class PulumiWrapper:
             cmd.append("--yes")
         if config_file:
             cmd.extend(["--config-file", str(config_file)])
+        if parallel:
+            cmd.extend(["--parallel", str(parallel)])
+        if refresh:
+            cmd.append("--refresh")
+        for urn in targets or []:
+            cmd.extend(["--target", urn])
 
         try:
+            if on_event or on_output:
+                return {"success": True, **self._run_streaming(cmd, cwd, on_event, on_output)}
+
             result = self._run_command(cmd, cwd=cwd, capture_output=False)
 
             return {"success": True, "returncode": result.returncode}
@@ -246,9 +839,18 @@ class PulumiWrapper:
         except PulumiError as e:
             logger.error(f"Deployment failed: {e}")
             raise
+        finally:
+            # Outputs may have changed even if the update failed part-way
+            self._invalidate_selected_outputs(cwd)
 
     def destroy(
-        self, cwd: Optional[Path] = None, yes: bool = True
+        self,
+        cwd: Optional[Path] = None,
+        yes: bool = True,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        parallel: Optional[int] = None,
+        targets: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
         Destroy stack (pulumi destroy)
@@ -256,6 +858,11 @@ class PulumiWrapper:
         Args:
             cwd: Working directory
             yes: Auto-approve destruction
+            on_event: Callback for resource-level progress; enables event streaming
+            on_output: Callback for each line of CLI output; enables event streaming
+            parallel: Resource operations to run in parallel (Pulumi default if None)
+            targets: Only destroy these resource URNs and their dependents
+                     (whole stack if None)
 
         Returns:
             Destruction result summary
@@ -268,8 +875,17 @@ class PulumiWrapper:
         cmd = ["pulumi", "destroy", "--non-interactive"]
         if yes:
             cmd.append("--yes")
+        if parallel:
+            cmd.extend(["--parallel", str(parallel)])
+        if targets:
+            for urn in targets:
+                cmd.extend(["--target", urn])
+            cmd.append("--target-dependents")
 
         try:
+            if on_event or on_output:
+                return {"success": True, **self._run_streaming(cmd, cwd, on_event, on_output)}
+
             result = self._run_command(cmd, cwd=cwd, capture_output=False)
 
             return {"success": True, "returncode": result.returncode}
@@ -277,20 +893,37 @@ class PulumiWrapper:
         except PulumiError as e:
             logger.error(f"Destruction failed: {e}")
             raise
+        finally:
+            self._invalidate_selected_outputs(cwd)
 
-    def refresh(self, cwd: Optional[Path] = None) -> Dict[str, Any]:
+    def refresh(self, cwd: Optional[Path] = None, preview_only: bool = False) -> Dict[str, Any]:
         """
         Refresh stack state (pulumi refresh)
 
         Args:
             cwd: Working directory
+            preview_only: Only report differences between state and the cloud
+                          (state is left unchanged)
 
         Returns:
-            Refresh result
+            Refresh result; with preview_only also the resource changes and the
+            list of drifted resources
 
         Raises:
             PulumiError: If refresh fails
         """
+        if preview_only:
+            logger.info("Running Pulumi refresh (preview only)")
+            result = self._run_command(
+                ["pulumi", "refresh", "--preview-only", "--json", "--non-interactive"],
+                cwd=cwd,
+            )
+            return {
+                "success": True,
+                "changes": self._parse_preview_changes(result.stdout),
+                "drifted": self._parse_drifted_resources(result.stdout),
+            }
+
         logger.info("Running Pulumi refresh")
 
         try:
@@ -304,6 +937,104 @@ class PulumiWrapper:
         except PulumiError as e:
             logger.error(f"Refresh failed: {e}")
             raise
+        finally:
+            self._invalidate_selected_outputs(cwd)
+
+    @staticmethod
+    def _parse_drifted_resources(output: str) -> List[Dict[str, str]]:
+        """
+        Extract drifted resources from `pulumi refresh --preview-only --json` output
+
+        Args:
+            output: Refresh preview JSON document
+
+        Returns:
+            List of {"urn", "type", "op"} for resources whose state differs
+            from the cloud (empty if not parseable)
+        """
+        try:
+            document = json.loads(output) if output else {}
+        except json.JSONDecodeError:
+            logger.debug("Refresh output is not JSON, no drift details available")
+            return []
+
+        if not isinstance(document, dict):
+            return []
+
+        drifted = []
+        for step in document.get("steps") or []:
+            op = step.get("op")
+            if op in PulumiWrapper.NO_DRIFT_OPS:
+                continue
+
+            urn = step.get("urn", "")
+            state = step.get("oldState") or step.get("newState") or {}
+            # URN format: urn:pulumi:<stack>::<project>::<type>::<name>
+            parts = urn.split("::")
+            resource_type = state.get("type") or (parts[2] if len(parts) >= 4 else "")
+
+            drifted.append({"urn": urn, "type": resource_type, "op": op})
+
+        return drifted
+
+    def cancel_update(self, stack_name: str) -> None:
+        """
+        Cancel a stack's in-progress update and release its lock (pulumi cancel)
+
+        Args:
+            stack_name: Short or fully qualified stack name
+
+        Raises:
+            PulumiError: If the cancel fails
+        """
+        self._run_command(
+            ["pulumi", "cancel", "--yes", "--stack", self.qualify_stack_name(stack_name)]
+        )
+
+    def export_stack(self, stack_name: str) -> str:
+        """
+        Export a stack's state (pulumi stack export)
+
+        Secrets stay encrypted, so the export can only be imported back into
+        a stack using the same secrets provider.
+
+        Args:
+            stack_name: Short or fully qualified stack name
+
+        Returns:
+            Deployment state as a JSON document
+
+        Raises:
+            PulumiError: If the export fails
+        """
+        result = self._run_command(
+            ["pulumi", "stack", "export", "--stack", self.qualify_stack_name(stack_name)]
+        )
+        return result.stdout
+
+    def import_stack(self, stack_name: str, state: str) -> None:
+        """
+        Replace a stack's state (pulumi stack import)
+
+        Args:
+            stack_name: Short or fully qualified stack name
+            state: Deployment state as returned by export_stack
+
+        Raises:
+            PulumiError: If the import fails
+        """
+        qualified = self.qualify_stack_name(stack_name)
+
+        with tempfile.TemporaryDirectory(prefix="pulumi-import-") as tmp_dir:
+            state_file = Path(tmp_dir) / "state.json"
+            state_file.write_text(state, encoding="utf-8")
+
+            try:
+                self._run_command(
+                    ["pulumi", "stack", "import", "--stack", qualified, "--file", str(state_file)]
+                )
+            finally:
+                self.invalidate_stack_outputs(qualified)
 
     def get_stack_output(
         self, stack_name: str, output_key: str
@@ -311,6 +1042,9 @@ class PulumiWrapper:
         """
         Get a specific stack output value
 
+        Served from the per-stack output cache, so resolving many keys of the
+        same stack costs a single Pulumi call.
+
         Args:
             stack_name: Full stack name (org/project/stack-name)
             output_key: Output key to retrieve
@@ -318,46 +1052,112 @@ class PulumiWrapper:
         Returns:
             Output value, or None if not found
         """
-        try:
-            result = self._run_command(
-                [
-                    "pulumi",
-                    "stack",
-                    "output",
-                    output_key,
-                    "--stack",
-                    stack_name,
-                    "--json",
-                ]
-            )
+        outputs = self.get_all_stack_outputs(stack_name)
 
-            return json.loads(result.stdout) if result.stdout else None
-
-        except (PulumiError, json.JSONDecodeError) as e:
-            logger.warning(f"Could not get output {output_key} from {stack_name}: {e}")
+        if output_key not in outputs:
+            logger.warning(f"Output {output_key} not found in {stack_name}")
             return None
 
-    def get_all_stack_outputs(self, stack_name: str) -> Dict[str, Any]:
+        return outputs[output_key]
+
+    def get_all_stack_outputs(self, stack_name: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Get all stack outputs
 
+        Fetched with one `pulumi stack output --json --show-secrets` call and
+        cached until the stack is updated through this wrapper.
+
         Args:
             stack_name: Full stack name (org/project/stack-name)
+            refresh: Bypass the cache
 
         Returns:
             Dictionary of all outputs
         """
+        stack_name = self.qualify_stack_name(stack_name)
+
+        with self._outputs_lock:
+            if not refresh and stack_name in self._output_cache:
+                return dict(self._output_cache[stack_name])
+
         try:
             result = self._run_command(
-                ["pulumi", "stack", "output", "--stack", stack_name, "--json"]
+                ["pulumi", "stack", "output", "--stack", stack_name, "--json", "--show-secrets"]
             )
 
-            return json.loads(result.stdout) if result.stdout else {}
+            outputs = json.loads(result.stdout) if result.stdout else {}
 
         except (PulumiError, json.JSONDecodeError) as e:
             logger.warning(f"Could not get outputs from {stack_name}: {e}")
             return {}
 
+        with self._outputs_lock:
+            self._output_cache[stack_name] = outputs
+
+        return dict(outputs)
+
+    def prefetch_stack_outputs(
+        self, stack_names: Iterable[str], max_workers: int = 8
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch outputs of several upstream stacks concurrently
+
+        Args:
+            stack_names: Full stack names (org/project/stack-name)
+            max_workers: Maximum number of concurrent Pulumi calls
+
+        Returns:
+            Dictionary of stack name -> outputs
+        """
+        stack_names = list(dict.fromkeys(stack_names))
+        if not stack_names:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stack_names)))) as pool:
+            results = pool.map(self.get_all_stack_outputs, stack_names)
+            return dict(zip(stack_names, results))
+
+    def invalidate_stack_outputs(self, stack_name: Optional[str] = None) -> None:
+        """
+        Drop cached outputs
+
+        Args:
+            stack_name: Stack whose outputs changed (all stacks if None)
+        """
+        with self._outputs_lock:
+            if stack_name is None:
+                self._output_cache.clear()
+            else:
+                self._output_cache.pop(self.qualify_stack_name(stack_name), None)
+
+    def qualify_stack_name(self, stack_name: str) -> str:
+        """
+        Qualify a short stack name with the wrapper's organization and project
+
+        The one place fully qualified stack names are built: output caching,
+        cache invalidation and stack references all key on its result.
+
+        Args:
+            stack_name: Short or fully qualified stack name
+
+        Returns:
+            Fully qualified stack name (org/project/stack-name)
+        """
+        if "/" in stack_name:
+            return stack_name
+        return f"{self.organization}/{self.project}/{stack_name}"
+
+    def _invalidate_selected_outputs(self, cwd: Optional[Path] = None) -> None:
+        """
+        Drop cached outputs of the stack selected in a working directory
+
+        Args:
+            cwd: Working directory the stack was updated from
+        """
+        stack_name = self._selected_stacks.get(str(Path(cwd or self.working_dir)))
+        # Unknown stack: drop everything rather than risk serving stale outputs
+        self.invalidate_stack_outputs(stack_name)
+
     def check_pulumi_available(self) -> bool:
         """
         Check if Pulumi CLI is available
@@ -375,80 +1175,97 @@ class PulumiWrapper:
         except (FileNotFoundError, subprocess.CalledProcessError):
             return False
 
-    def _backup_pulumi_yaml(self, stack_dir: Path) -> Optional[Path]:
+    def install_plugin(self, kind: str, name: str, version: str) -> bool:
         """
-        Backup original Pulumi.yaml
+        Install a Pulumi plugin (once per process)
+
+        Concurrent calls for the same plugin wait for a single install. With
+        per-worker homes the plugin goes into their shared plugin cache.
 
         Args:
-            stack_dir: Stack directory containing Pulumi.yaml
+            kind: Plugin kind (e.g. "resource")
+            name: Plugin name (e.g. "aws")
+            version: Plugin version
 
         Returns:
-            Path to backup file, or None if no backup created
+            True if the plugin was installed by this call, False if already done
+
+        Raises:
+            PulumiError: If the install fails
         """
-        pulumi_yaml = stack_dir / "Pulumi.yaml"
-        if not pulumi_yaml.exists():
-            logger.warning(f"No Pulumi.yaml found in {stack_dir}")
-            return None
+        key = (kind, name, version.lstrip("v"))
 
-        backup_path = stack_dir / f"Pulumi.yaml.backup.{self.project}"
+        with self._plugin_locks_guard:
+            if key in self._installed_plugins:
+                return False
+            lock = self._plugin_locks.setdefault(key, threading.Lock())
 
-        # Clean up stale backup from previous run
-        if backup_path.exists():
-            logger.warning(f"Found stale backup {backup_path}, removing")
-            backup_path.unlink()
+        with lock:
+            if key in self._installed_plugins:
+                return False
 
-        # Retry up to 3 times with exponential backoff
-        for attempt in range(3):
-            try:
-                shutil.copy2(pulumi_yaml, backup_path)
-                logger.debug(f"Backed up Pulumi.yaml to {backup_path}")
-                return backup_path
-            except (PermissionError, IOError) as e:
-                if attempt < 2:
-                    wait_time = 2 ** attempt  # 1s, 2s
-                    logger.warning(f"Backup failed, retrying in {wait_time}s: {e}")
-                    time.sleep(wait_time)
-                else:
-                    raise PulumiError(f"Cannot backup Pulumi.yaml after 3 attempts: {e}")
+            logger.info(f"Installing Pulumi {kind} plugin {name} v{key[2]}")
+            # Pulumi skips the download when the plugin is already in its cache
+            env = self.homes.cache_env(self._env) if self.homes else None
+            self._run_command(["pulumi", "plugin", "install", kind, name, key[2]], env=env)
 
-        return None
+            with self._plugin_locks_guard:
+                self._installed_plugins.add(key)
 
-    def _restore_pulumi_yaml(self, stack_dir: Path, backup_path: Optional[Path]) -> None:
+        return True
+
+    def compile_program(self, stack_dir: Path) -> Optional[Path]:
         """
-        Restore original Pulumi.yaml from backup
+        Compile a TypeScript stack to JavaScript ahead of time
+
+        Compilation is skipped when the sources match the last build (see
+        compile_stack), so repeated deploys of an unchanged stack cost only
+        a source hash.
 
         Args:
-            stack_dir: Stack directory
-            backup_path: Path to backup file
+            stack_dir: Stack source directory (dependencies must be installed)
+
+        Returns:
+            Directory with the compiled program, or None if the stack must run
+            as TypeScript (not a TypeScript stack, or compilation failed)
         """
-        if not backup_path or not backup_path.exists():
-            return
+        stack_dir = Path(stack_dir).resolve()
+        if not (stack_dir / "tsconfig.json").exists():
+            return None
 
-        pulumi_yaml = stack_dir / "Pulumi.yaml"
+        with self._compile_locks_guard:
+            lock = self._compile_locks.setdefault(str(stack_dir), threading.Lock())
 
-        # Retry up to 3 times
-        for attempt in range(3):
+        with lock:
             try:
-                shutil.move(str(backup_path), str(pulumi_yaml))
-                logger.debug(f"Restored Pulumi.yaml from backup")
-                return
-            except (PermissionError, IOError) as e:
-                if attempt < 2:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Restore failed, retrying in {wait_time}s: {e}")
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"Cannot restore Pulumi.yaml after 3 attempts: {e}")
-                    # Don't raise - we're in cleanup, best effort
+                if compile_stack(stack_dir):
+                    logger.info(f"Compiled {stack_dir.name} to JavaScript")
+            except BuildError as e:
+                logger.warning(f"Precompiling {stack_dir.name} failed, running TypeScript: {e}")
+                return None
+
+        return get_output_dir(stack_dir)
 
-    def _generate_pulumi_yaml(self, stack_dir: Path, manifest: Dict[str, Any], deployment_dir: Optional[Path] = None) -> None:
+    def _generate_pulumi_yaml(
+        self,
+        workspace_dir: Path,
+        stack_dir: Path,
+        manifest: Dict[str, Any],
+        program_dir: Optional[Path] = None,
+    ) -> None:
         """
         Generate deployment-specific Pulumi.yaml with composite project naming
 
+        The generated file lives in the workspace and points the runtime at the
+        shared stack sources through `main`, so the stack directory is never
+        modified.
+
         Args:
-            stack_dir: Stack directory path
+            workspace_dir: Workspace directory to write Pulumi.yaml into
+            stack_dir: Shared stack source directory
             manifest: Deployment manifest with organization, project, deployment_id
-            deployment_dir: Optional deployment directory to store authoritative copy
+            program_dir: Precompiled JavaScript program; when set, `main` points
+                         at it and the nodejs runtime's TypeScript support is off
         """
         # Build composite project name: DeploymentID-Organization-Project
         deployment_id = manifest.get("deployment_id", "")
@@ -456,65 +1273,136 @@ class PulumiWrapper:
         project = manifest.get("project", "")
         composite_project = f"{deployment_id}-{organization}-{project}"
 
-        logger.info(f"Generating Pulumi.yaml with composite project: {composite_project}")
-
-        pulumi_yaml = stack_dir / "Pulumi.yaml"
-
-        # Read original to preserve runtime and description
+        # Read original to preserve runtime, description and other settings
         original_content = {}
-        if pulumi_yaml.exists():
+        original_yaml = stack_dir / "Pulumi.yaml"
+        if original_yaml.exists():
             try:
-                with open(pulumi_yaml, 'r') as f:
-                    original_content = yaml.safe_load(f) or {}
+                with open(original_yaml, "r", encoding="utf-8") as f:
+                    original_content = load_yaml(f) or {}
             except Exception as e:
                 logger.warning(f"Could not read original Pulumi.yaml: {e}")
 
-        # Generate new content with deployment project name
-        new_content = {
-            'name': composite_project,  # Use composite project name
-            'runtime': original_content.get('runtime', 'nodejs'),
-            'description': original_content.get('description', f'Deployment {composite_project} stack'),
-        }
+        runtime = original_content.get("runtime", "nodejs")
+
+        if program_dir is not None:
+            program_dir = Path(program_dir).resolve()
+            # Compiled output already is JavaScript, skip ts-node transpilation
+            if isinstance(runtime, dict):
+                runtime = dict(runtime)
+                runtime["options"] = {**(runtime.get("options") or {}), "typescript": False}
+            else:
+                runtime = {"name": runtime, "options": {"typescript": False}}
+        else:
+            program_dir = (stack_dir / original_content.get("main", ".")).resolve()
+            runtime = self._with_stack_tsconfig(runtime, stack_dir)
 
-        # Write deployment-specific Pulumi.yaml
         try:
-            with open(pulumi_yaml, 'w') as f:
-                yaml.safe_dump(new_content, f, default_flow_style=False)
-            logger.info(f"Generated Pulumi.yaml with composite project: {composite_project}")
-        except Exception as e:
+            main = os.path.relpath(program_dir, workspace_dir.resolve())
+        except ValueError:
+            # Different drive on Windows, relative path impossible
+            main = str(program_dir)
+
+        new_content = dict(original_content)
+        new_content.update({
+            "name": composite_project,  # Use composite project name
+            "runtime": runtime,
+            "description": original_content.get("description", f"Deployment {composite_project} stack"),
+            "main": Path(main).as_posix(),
+        })
+
+        pulumi_yaml = workspace_dir / "Pulumi.yaml"
+        try:
+            rendered = dump_yaml(new_content, default_flow_style=False)
+            if pulumi_yaml.exists() and pulumi_yaml.read_text(encoding="utf-8") == rendered:
+                return
+            pulumi_yaml.write_text(rendered, encoding="utf-8")
+            logger.debug(f"Generated Pulumi.yaml with composite project: {composite_project}")
+        except OSError as e:
             raise PulumiError(f"Cannot generate Pulumi.yaml: {e}")
 
+    @staticmethod
+    def _with_stack_tsconfig(runtime: Any, stack_dir: Path) -> Any:
+        """
+        Point the nodejs runtime at the stack's tsconfig.json
+
+        Pulumi looks for tsconfig.json in the project directory, which for a
+        generated workspace isn't the stack directory. The `tsconfig` runtime
+        option (what the language host passes on as PULUMI_NODEJS_TSCONFIG_PATH)
+        is set to the stack's file; a relative path the stack already
+        configures is resolved against the stack directory.
+
+        Args:
+            runtime: `runtime` of the stack's Pulumi.yaml (name or mapping)
+            stack_dir: Stack source directory
+
+        Returns:
+            Runtime with the tsconfig option (unchanged if the stack has none)
+        """
+        name = runtime.get("name") if isinstance(runtime, dict) else runtime
+        if name != "nodejs":
+            return runtime
+
+        options = dict((runtime.get("options") or {}) if isinstance(runtime, dict) else {})
+        tsconfig = stack_dir / options.get("tsconfig", "tsconfig.json")
+        if not tsconfig.is_file():
+            return runtime
+
+        options["tsconfig"] = str(tsconfig.resolve())
+        runtime = dict(runtime) if isinstance(runtime, dict) else {"name": runtime}
+        runtime["options"] = options
+        return runtime
+
     @contextmanager
-    def deployment_context(self, stack_dir: Path, manifest: Dict[str, Any], deployment_dir: Optional[Path] = None):
+    def deployment_context(
+        self,
+        stack_dir: Path,
+        manifest: Dict[str, Any],
+        deployment_dir: Optional[Path] = None,
+        environment: Optional[str] = None,
+        precompiled: bool = False,
+    ):
         """
-        Context manager for deployment-specific Pulumi.yaml
+        Context manager providing an isolated workspace for a stack
 
-        This ensures that Pulumi operations use the correct project name
-        by temporarily replacing Pulumi.yaml in the stack directory.
+        Each deployment/stack/environment gets its own directory holding a
+        generated Pulumi.yaml (and Pulumi's per-stack config files), so
+        concurrent deployments and environments never share or rewrite the
+        stack source directory. Run Pulumi operations with the yielded
+        workspace as working directory.
 
         Usage:
-            with pulumi_wrapper.deployment_context(stack_dir, manifest, deployment_dir):
-                # Pulumi operations here
-                pulumi_wrapper.select_stack(...)
-                pulumi_wrapper.up(...)
+            with pulumi_wrapper.deployment_context(stack_dir, manifest, deployment_dir, "dev") as workspace:
+                pulumi_wrapper.select_stack(..., cwd=workspace)
+                pulumi_wrapper.up(cwd=workspace)
 
         Args:
             stack_dir: Stack directory path
             manifest: Deployment manifest with organization, project, deployment_id
-            deployment_dir: Optional deployment directory to store authoritative copy
+            deployment_dir: Deployment directory to keep the workspace in
+                            (a temporary workspace is used if omitted)
+            environment: Environment, keeps environments of a stack apart
+            precompiled: Compile the stack to JavaScript and run the compiled
+                         program instead of transpiling TypeScript on every run
 
         Yields:
-            None - Context for operations
+            Path to the workspace directory
         """
-        backup_path = None
-        try:
-            # Backup and generate
-            backup_path = self._backup_pulumi_yaml(stack_dir)
-            self._generate_pulumi_yaml(stack_dir, manifest, deployment_dir)
-            logger.debug("Generated deployment-specific Pulumi.yaml")
+        stack_dir = Path(stack_dir)
+        workspace_name = f"{stack_dir.name}-{environment}" if environment else stack_dir.name
 
-            yield
+        if deployment_dir:
+            workspace_dir = Path(deployment_dir) / ".workspaces" / workspace_name
+            workspace_dir.mkdir(parents=True, exist_ok=True)
+            temporary = False
+        else:
+            workspace_dir = Path(tempfile.mkdtemp(prefix=f"{workspace_name}-"))
+            temporary = True
 
+        try:
+            program_dir = self.compile_program(stack_dir) if precompiled else None
+            self._generate_pulumi_yaml(workspace_dir, stack_dir, manifest, program_dir)
+            yield workspace_dir
         finally:
-            # Always restore original
-            self._restore_pulumi_yaml(stack_dir, backup_path)
+            if temporary:
+                shutil.rmtree(workspace_dir, ignore_errors=True)
@@ -5,9 +5,13 @@ Higher-level stack operations built on PulumiWrapper.
 """
 
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable, List, Callable
 from .pulumi_wrapper import PulumiWrapper, PulumiError
+from .event_stream import ResourceEvent
+from .parallelism import ParallelismTuner, count_throttle_errors
+from ..deployment.checkpoint_store import diff_snapshots
 from ..utils.logger import get_logger
+from ..utils.serialization import read_yaml
 
 logger = get_logger(__name__)
 
@@ -15,14 +19,59 @@ logger = get_logger(__name__)
 class StackOperations:
     """Higher-level stack operations"""
 
-    def __init__(self, pulumi_wrapper: PulumiWrapper):
+    def __init__(
+        self,
+        pulumi_wrapper: PulumiWrapper,
+        parallelism: Optional[ParallelismTuner] = None,
+    ):
         """
         Initialize stack operations
 
         Args:
             pulumi_wrapper: PulumiWrapper instance
+            parallelism: Tuner choosing and learning per-stack `--parallel`
+                         values (Pulumi's default is used if None)
         """
         self.pulumi = pulumi_wrapper
+        self.parallelism = parallelism
+
+    def choose_parallelism(
+        self, stack_name: str, environment: str, override: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Choose the `--parallel` value of a stack
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            override: Value set for the stack in the manifest
+
+        Returns:
+            Resource operations to run in parallel, or None for Pulumi's default
+        """
+        if self.parallelism:
+            return self.parallelism.choose(stack_name, environment, override)
+        return override
+
+    def provision_stacks(
+        self, stack_names: Iterable[str], environment: str, max_workers: int = 8
+    ) -> List[str]:
+        """
+        Create any missing Pulumi stacks for a deployment in one batch
+
+        Args:
+            stack_names: Stack names from the orchestration plan
+            environment: Environment
+            max_workers: Maximum number of concurrent stack creations
+
+        Returns:
+            List of Pulumi stack names that were created
+
+        Raises:
+            PulumiError: If stacks could not be listed or created
+        """
+        pulumi_stack_names = [f"{name}-{environment}" for name in stack_names]
+        return self.pulumi.ensure_stacks(pulumi_stack_names, max_workers=max_workers)
 
     def deploy_stack(
         self,
@@ -33,6 +82,10 @@ class StackOperations:
         config: Dict[str, str],
         preview_only: bool = False,
         config_file: Optional[Path] = None,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        parallel: Optional[int] = None,
+        secret_keys: Optional[Iterable[str]] = None,
     ) -> tuple[bool, Optional[str]]:
         """
         Deploy a stack
@@ -45,6 +98,11 @@ class StackOperations:
             config: Configuration values
             preview_only: If True, only preview changes
             config_file: Path to config file (optional)
+            on_event: Callback for resource-level progress events (optional)
+            on_output: Callback for each line of Pulumi output (optional)
+            parallel: Resource operations to run in parallel (see choose_parallelism)
+            secret_keys: Config keys stored as Pulumi secrets
+                         (see ConfigGenerator.get_secret_keys)
 
         Returns:
             Tuple of (success, error_message)
@@ -59,32 +117,103 @@ class StackOperations:
             # Set configuration - load from config_file if provided, otherwise use config dict
             if config_file:
                 # Load config from YAML file
-                import yaml
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    file_config = yaml.safe_load(f) or {}
-                self.pulumi.set_all_config(file_config, cwd=stack_dir)
+                file_config = read_yaml(config_file, default={})
+                self.pulumi.set_all_config(file_config, cwd=stack_dir, secret_keys=secret_keys)
             else:
-                self.pulumi.set_all_config(config, cwd=stack_dir)
+                self.pulumi.set_all_config(config, cwd=stack_dir, secret_keys=secret_keys)
 
             if preview_only:
                 # Preview only (don't pass config_file, config is already set)
-                result = self.pulumi.preview(cwd=stack_dir)
+                result = self.pulumi.preview(cwd=stack_dir, on_event=on_event, on_output=on_output)
                 return result.get("success", False), result.get("error")
             else:
                 # Deploy (don't pass config_file, config is already set)
-                result = self.pulumi.up(cwd=stack_dir, yes=True)
+                result = self.pulumi.up(
+                    cwd=stack_dir, yes=True, on_event=on_event, on_output=on_output, parallel=parallel
+                )
+                self._record_parallelism(
+                    stack_name, environment, parallel,
+                    sum(result.get("changes", {}).values()) or None,
+                    result.get("errors", []),
+                )
                 return result.get("success", False), None
 
         except PulumiError as e:
             logger.error(f"Error deploying stack {stack_name}: {e}")
+            if not preview_only:
+                self._record_parallelism(stack_name, environment, parallel, None, [str(e)])
             return False, str(e)
 
+    def _record_parallelism(
+        self,
+        stack_name: str,
+        environment: str,
+        parallel: Optional[int],
+        resources: Optional[int],
+        errors: Iterable[str],
+    ) -> None:
+        """Feed the outcome of an update back into the parallelism tuner"""
+        if self.parallelism and parallel:
+            self.parallelism.record(
+                stack_name, environment, parallel, resources, count_throttle_errors(errors)
+            )
+
+    def preview_stack(
+        self,
+        stack_name: str,
+        environment: str,
+        stack_dir: Path,
+        config: Dict[str, Any],
+        secret_keys: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Preview a stack and report its resource changes
+
+        Safe to run concurrently for different stacks as long as each stack
+        uses its own working directory. Stacks that were never deployed are
+        not created in the backend; they are reported with deployed=False
+        and no changes.
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            stack_dir: Path to stack working directory
+            config: Configuration values
+            secret_keys: Config keys stored as Pulumi secrets
+
+        Returns:
+            Dictionary with success, deployed, changes (operation -> count) and error
+        """
+        pulumi_stack_name = f"{stack_name}-{environment}"
+
+        try:
+            if pulumi_stack_name not in self.pulumi.list_stacks():
+                logger.info(f"Stack {pulumi_stack_name} not yet deployed, skipping preview")
+                return {"success": True, "deployed": False, "changes": {}, "error": None}
+
+            self.pulumi.select_stack(pulumi_stack_name, create=False, cwd=stack_dir)
+            self.pulumi.set_all_config(config, cwd=stack_dir, secret_keys=secret_keys)
+
+            result = self.pulumi.preview(cwd=stack_dir)
+            return {
+                "success": result.get("success", False),
+                "deployed": True,
+                "changes": result.get("changes", {}),
+                "error": result.get("error"),
+            }
+
+        except PulumiError as e:
+            logger.error(f"Error previewing stack {stack_name}: {e}")
+            return {"success": False, "deployed": True, "changes": {}, "error": str(e)}
+
     def destroy_stack(
         self,
         deployment_id: str,
         stack_name: str,
         environment: str,
         stack_dir: Path,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
     ) -> tuple[bool, Optional[str]]:
         """
         Destroy a stack
@@ -94,6 +223,8 @@ class StackOperations:
             stack_name: Stack name
             environment: Environment
             stack_dir: Path to stack directory
+            on_event: Callback for resource-level progress events (optional)
+            on_output: Callback for each line of Pulumi output (optional)
 
         Returns:
             Tuple of (success, error_message)
@@ -105,7 +236,7 @@ class StackOperations:
             self.pulumi.select_stack(pulumi_stack_name, create=False, cwd=stack_dir)
 
             # Destroy
-            result = self.pulumi.destroy(cwd=stack_dir, yes=True)
+            result = self.pulumi.destroy(cwd=stack_dir, yes=True, on_event=on_event, on_output=on_output)
             return result.get("success", False), None
 
         except PulumiError as e:
@@ -141,3 +272,126 @@ class StackOperations:
         except PulumiError as e:
             logger.error(f"Error refreshing stack {stack_name}: {e}")
             return False, str(e)
+
+    def detect_drift(
+        self,
+        stack_name: str,
+        environment: str,
+        stack_dir: Path,
+    ) -> Dict[str, Any]:
+        """
+        Compare a stack's state with the cloud without changing anything
+
+        Safe to run concurrently for different stacks as long as each stack
+        uses its own working directory.
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            stack_dir: Path to stack working directory
+
+        Returns:
+            Dictionary with success, drifted (list of resources), changes
+            (operation -> count) and error
+        """
+        pulumi_stack_name = f"{stack_name}-{environment}"
+
+        try:
+            self.pulumi.select_stack(pulumi_stack_name, create=False, cwd=stack_dir)
+
+            result = self.pulumi.refresh(cwd=stack_dir, preview_only=True)
+            return {
+                "success": result.get("success", False),
+                "drifted": result.get("drifted", []),
+                "changes": result.get("changes", {}),
+                "error": None,
+            }
+
+        except PulumiError as e:
+            logger.error(f"Error checking drift of stack {stack_name}: {e}")
+            return {"success": False, "drifted": [], "changes": {}, "error": str(e)}
+
+    def rollback_stack(
+        self,
+        stack_name: str,
+        environment: str,
+        stack_dir: Path,
+        snapshot: str,
+        config: Optional[Dict[str, Any]] = None,
+        secret_keys: Optional[Iterable[str]] = None,
+        on_event: Optional[Callable[[ResourceEvent], None]] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Return a stack to a state checkpoint
+
+        Pulumi restores resources by running a program against the current
+        state, so stack_dir must hold the program that produced the
+        checkpoint (see check_checkpoint_code()), and config must be the
+        config it was deployed with; it is applied before anything runs. Only resources that differ
+        from the checkpoint are touched: resources created since are
+        destroyed, and resources changed or deleted since are reconciled
+        with a targeted up. Nothing is refreshed beforehand. The stack is
+        exported again afterwards and every resource that still differs
+        from the checkpoint is reported.
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+            stack_dir: Path to stack working directory
+            snapshot: Checkpoint state (JSON from `pulumi stack export`)
+            config: Config values recorded with the checkpoint (kept as is if None)
+            secret_keys: Config keys stored as Pulumi secrets
+            on_event: Callback for resource-level progress events (optional)
+            on_output: Callback for each line of Pulumi output (optional)
+
+        Returns:
+            Tuple of (success, error_message); success is False if any
+            resource was not restored
+        """
+        pulumi_stack_name = f"{stack_name}-{environment}"
+
+        try:
+            self.pulumi.select_stack(pulumi_stack_name, create=False, cwd=stack_dir)
+            if config is not None:
+                self.pulumi.set_all_config(config, cwd=stack_dir, secret_keys=secret_keys)
+
+            diff = diff_snapshots(self.pulumi.export_stack(pulumi_stack_name), snapshot)
+            logger.info(
+                f"Rolling back {stack_name}: {len(diff['added'])} added, "
+                f"{len(diff['changed'])} changed, {len(diff['removed'])} removed"
+            )
+
+            if not any(diff.values()):
+                return True, None
+
+            if diff["added"]:
+                self.pulumi.destroy(
+                    cwd=stack_dir, yes=True, on_event=on_event, on_output=on_output,
+                    targets=diff["added"],
+                )
+
+            targets = diff["changed"] + diff["removed"]
+            if targets:
+                self.pulumi.up(
+                    cwd=stack_dir, yes=True, on_event=on_event, on_output=on_output,
+                    targets=targets,
+                )
+
+            # Recreated resources get new IDs, so only inputs must match the checkpoint
+            remaining = diff_snapshots(
+                self.pulumi.export_stack(pulumi_stack_name), snapshot, outputs=False
+            )
+            unrestored = remaining["added"] + remaining["changed"] + remaining["removed"]
+            if unrestored:
+                for urn in unrestored:
+                    logger.warning(f"Not restored in {stack_name}: {urn}")
+                names = ", ".join(urn.rsplit("::", 1)[-1] for urn in unrestored)
+                return False, f"{len(unrestored)} resource(s) not restored: {names}"
+
+            return True, None
+
+        except (PulumiError, ValueError) as e:
+            # ValueError: an export that is not valid JSON
+            logger.error(f"Error rolling back stack {stack_name}: {e}")
+            return False, str(e)
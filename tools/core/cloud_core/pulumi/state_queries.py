@@ -30,7 +30,7 @@ class StateQueries:
         Get specific output from a stack
 
         Args:
-            deployment_id: Deployment ID
+            deployment_id: Deployment ID (included in composite project name)
             stack_name: Stack name
             environment: Environment
             output_key: Output key
@@ -38,10 +38,7 @@ class StateQueries:
         Returns:
             Output value, or None if not found
         """
-        full_stack_name = (
-            f"{self.pulumi.organization}/{self.pulumi.project}/"
-            f"{deployment_id}-{stack_name}-{environment}"
-        )
+        full_stack_name = self._full_stack_name(stack_name, environment)
 
         return self.pulumi.get_stack_output(full_stack_name, output_key)
 
@@ -52,16 +49,29 @@ class StateQueries:
         Get all outputs from a stack
 
         Args:
-            deployment_id: Deployment ID
+            deployment_id: Deployment ID (included in composite project name)
             stack_name: Stack name
             environment: Environment
 
         Returns:
             Dictionary of all outputs
         """
-        full_stack_name = (
-            f"{self.pulumi.organization}/{self.pulumi.project}/"
-            f"{deployment_id}-{stack_name}-{environment}"
-        )
+        full_stack_name = self._full_stack_name(stack_name, environment)
 
         return self.pulumi.get_all_stack_outputs(full_stack_name)
+
+    def _full_stack_name(self, stack_name: str, environment: str) -> str:
+        """
+        Get the fully qualified Pulumi stack name
+
+        Matches StackOperations naming: the deployment ID is part of the
+        composite project, so the stack itself is {stack_name}-{environment}.
+
+        Args:
+            stack_name: Stack name
+            environment: Environment
+
+        Returns:
+            Full stack name: {org}/{project}/{stack_name}-{environment}
+        """
+        return f"{self.pulumi.organization}/{self.pulumi.project}/{stack_name}-{environment}"
@@ -3,6 +3,7 @@
 from .placeholder_resolver import (
     PlaceholderResolver,
     create_deployment_resolver,
+    create_stack_config_resolver,
 )
 from .stack_reference_resolver import (
     StackReferenceResolver,
@@ -13,6 +14,7 @@ from .aws_query_resolver import AWSQueryResolver
 __all__ = [
     "PlaceholderResolver",
     "create_deployment_resolver",
+    "create_stack_config_resolver",
     "StackReferenceResolver",
     "create_resolver_with_pulumi",
     "AWSQueryResolver",
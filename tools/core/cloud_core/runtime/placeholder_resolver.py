@@ -16,6 +16,7 @@ Supported placeholders (using ${...} syntax):
 
 import re
 from typing import Dict, Any, Optional, Callable
+from .stack_reference_resolver import create_resolver_with_pulumi
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -282,3 +283,54 @@ def create_deployment_resolver(deployment_context: Dict[str, Any]) -> Placeholde
     resolver.register_resolver("env", env_resolver)
 
     return resolver
+
+
+def create_stack_config_resolver(
+    manifest: Dict[str, Any],
+    environment: str,
+    stack_config: Dict[str, Any],
+    pulumi_wrapper: Any,
+) -> Optional[PlaceholderResolver]:
+    """
+    Create a resolver for the placeholders in one stack's configuration
+
+    Outputs of every stack referenced through ${stack.<name>.<output>} are
+    fetched concurrently up front (see PulumiWrapper.prefetch_stack_outputs);
+    the wrapper drops a stack's cached outputs when it updates that stack, so
+    a stack deployed earlier in the same run is read fresh.
+
+    Args:
+        manifest: Deployment manifest
+        environment: Environment being deployed
+        stack_config: Stack's `config` section from the manifest
+        pulumi_wrapper: PulumiWrapper of the deployment
+
+    Returns:
+        Resolver, or None if the configuration has no placeholders
+    """
+    resolver = create_deployment_resolver({
+        **{key: value for key, value in manifest.items() if not isinstance(value, (dict, list))},
+        **manifest.get("environments", {}).get(environment, {}),
+        "id": manifest.get("deployment_id"),
+        "environment": environment,
+    })
+
+    placeholders = resolver.get_placeholders(stack_config)
+    if not placeholders:
+        return None
+
+    referenced = sorted({
+        placeholder.split(".")[1]
+        for placeholder in placeholders
+        if placeholder.startswith("stack.") and placeholder.count(".") >= 2
+    })
+    stack_references = create_resolver_with_pulumi(
+        deployment_id=manifest.get("deployment_id", ""),
+        environment=environment,
+        organization=manifest.get("organization", ""),
+        project=manifest.get("project", ""),
+        pulumi_wrapper=pulumi_wrapper,
+        upstream_stacks=referenced,
+    )
+    resolver.register_resolver("stack", stack_references.resolve)
+    return resolver
@@ -5,7 +5,7 @@ Resolves cross-stack references by querying Pulumi state.
 Handles placeholders like: {{stack.network.vpcId}}, {{stack.security.sgId}}
 """
 
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, List
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -20,6 +20,8 @@ class StackReferenceResolver:
         environment: str,
         organization: str,
         project: str,
+        qualify_stack_name: Optional[Callable[[str], str]] = None,
+        cache_results: bool = True,
     ):
         """
         Initialize stack reference resolver
@@ -27,13 +29,19 @@ class StackReferenceResolver:
         Args:
             deployment_id: Deployment ID
             environment: Environment name (dev/stage/prod)
-            organization: Organization name (for Pulumi stack name)
-            project: Project name (for Pulumi stack name)
+            organization: Organization name
+            project: Project name
+            qualify_stack_name: Function turning "<stack>-<env>" into the full
+                                Pulumi stack name (PulumiWrapper.qualify_stack_name)
+            cache_results: Keep resolved values in this resolver; off when the
+                           query function has its own, invalidated, cache
         """
         self.deployment_id = deployment_id
         self.environment = environment
         self.organization = organization
         self.project = project
+        self.qualify_stack_name = qualify_stack_name
+        self.cache_results = cache_results
 
         # Cache for resolved values
         self.cache: Dict[str, Any] = {}
@@ -86,13 +94,30 @@ class StackReferenceResolver:
         # Query Pulumi state
         value = self._query_stack_output(stack_name, output_key)
 
-        if value is not None:
+        if value is not None and self.cache_results:
             # Cache the result
             self.cache[placeholder] = value
             logger.debug(f"Resolved {placeholder} = {value}")
 
         return value
 
+    def get_pulumi_stack_name(self, stack_name: str) -> str:
+        """
+        Get the Pulumi stack name of a stack of this deployment
+
+        Stacks are named "<stack>-<environment>" inside the deployment's
+        composite project; qualifying that name is left to the Pulumi wrapper
+        so stack references and its output cache agree on stack names.
+
+        Args:
+            stack_name: Name of the stack (e.g., "network")
+
+        Returns:
+            Stack name, fully qualified if a qualify_stack_name function is set
+        """
+        name = f"{stack_name}-{self.environment}"
+        return self.qualify_stack_name(name) if self.qualify_stack_name else name
+
     def _query_stack_output(self, stack_name: str, output_key: str) -> Optional[Any]:
         """
         Query Pulumi stack for output value
@@ -108,12 +133,7 @@ class StackReferenceResolver:
             logger.error("Pulumi query function not configured")
             return None
 
-        # Construct full Pulumi stack name
-        # Format: {org}/{project}/{deployment_id}-{stack_name}-{environment}
-        pulumi_stack_name = (
-            f"{self.organization}/{self.project}/"
-            f"{self.deployment_id}-{stack_name}-{self.environment}"
-        )
+        pulumi_stack_name = self.get_pulumi_stack_name(stack_name)
 
         try:
             # Query using injected function
@@ -140,10 +160,7 @@ class StackReferenceResolver:
             logger.error("Pulumi query function not configured")
             return {}
 
-        pulumi_stack_name = (
-            f"{self.organization}/{self.project}/"
-            f"{self.deployment_id}-{stack_name}-{self.environment}"
-        )
+        pulumi_stack_name = self.get_pulumi_stack_name(stack_name)
 
         try:
             # Query all outputs (passing None as output_key convention)
@@ -173,8 +190,8 @@ class StackReferenceResolver:
 
         count = 0
         for output_key, value in outputs.items():
-            placeholder = f"stack.{stack_name}.{output_key}"
-            self.cache[placeholder] = value
+            if self.cache_results:
+                self.cache[f"stack.{stack_name}.{output_key}"] = value
             count += 1
 
         logger.debug(f"Preloaded {count} outputs from stack {stack_name}")
@@ -218,16 +235,23 @@ def create_resolver_with_pulumi(
     organization: str,
     project: str,
     pulumi_wrapper: Any,  # Type will be PulumiWrapper from pulumi module
+    upstream_stacks: Optional[List[str]] = None,
 ) -> StackReferenceResolver:
     """
     Create stack reference resolver with Pulumi wrapper
 
+    Outputs are fetched once per stack and cached by the wrapper, so any
+    number of references to the same stack cost a single Pulumi call. The
+    resolver keeps no cache of its own: the wrapper drops a stack's outputs
+    whenever it updates that stack.
+
     Args:
         deployment_id: Deployment ID
         environment: Environment
         organization: Organization name
         project: Project name
         pulumi_wrapper: PulumiWrapper instance
+        upstream_stacks: Stacks whose outputs are fetched concurrently up front
 
     Returns:
         Configured StackReferenceResolver
@@ -237,6 +261,8 @@ def create_resolver_with_pulumi(
         environment=environment,
         organization=organization,
         project=project,
+        qualify_stack_name=pulumi_wrapper.qualify_stack_name,
+        cache_results=False,
     )
 
     # Create query function that uses Pulumi wrapper
@@ -256,4 +282,9 @@ def create_resolver_with_pulumi(
 
     resolver.set_pulumi_query_func(query_func)
 
+    if upstream_stacks:
+        pulumi_wrapper.prefetch_stack_outputs(
+            [resolver.get_pulumi_stack_name(stack) for stack in upstream_stacks]
+        )
+
     return resolver
@@ -6,11 +6,12 @@ Generates deployment manifests from templates with placeholder substitution.
 
 from pathlib import Path
 from typing import Dict, Any, Optional
-import yaml
 from datetime import datetime
 
 from .template_manager import TemplateManager
 from ..utils.logger import get_logger
+from ..utils.manifest_cache import manifest_cache
+from ..utils.serialization import dump_yaml, sidecar_path
 
 logger = get_logger(__name__)
 
@@ -210,8 +211,7 @@ class ManifestGenerator:
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(manifest, f, default_flow_style=False, sort_keys=False)
+        manifest_cache.write(output_path, manifest)
 
         logger.info(f"Saved manifest to {output_path}")
 
@@ -262,7 +262,7 @@ class ManifestGenerator:
         with tempfile.NamedTemporaryFile(
             mode="w", suffix=".yaml", delete=False
         ) as tf:
-            yaml.safe_dump(manifest, tf)
+            dump_yaml(manifest, tf)
             temp_path = Path(tf.name)
 
         try:
@@ -276,4 +276,6 @@ class ManifestGenerator:
 
             return is_valid
         finally:
+            manifest_cache.invalidate(temp_path)
+            sidecar_path(temp_path).unlink(missing_ok=True)
             temp_path.unlink()
@@ -10,6 +10,7 @@ from typing import Dict, List, Optional, Any
 import yaml
 
 from ..utils.logger import get_logger
+from ..utils.serialization import read_yaml, write_yaml
 
 logger = get_logger(__name__)
 
@@ -106,8 +107,7 @@ class StackTemplateManager:
             )
 
         try:
-            with open(template_path, "r", encoding="utf-8") as f:
-                template_data = yaml.safe_load(f)
+            template_data = read_yaml(template_path)
 
             if not template_data:
                 raise StackTemplateValidationError(
@@ -336,13 +336,7 @@ class StackTemplateManager:
         self.config_root.mkdir(parents=True, exist_ok=True)
 
         # Write template
-        with open(template_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(
-                template_data,
-                f,
-                default_flow_style=False,
-                sort_keys=False
-            )
+        write_yaml(template_path, template_data, sort_keys=False)
 
         logger.info(f"Saved stack template: {stack_name}")
         return template_path
@@ -9,6 +9,7 @@ from typing import Dict, List, Optional, Any
 import yaml
 
 from ..utils.logger import get_logger
+from ..utils.serialization import read_yaml, write_yaml
 from ..utils.path_utils import get_templates_dir
 
 logger = get_logger(__name__)
@@ -113,8 +114,7 @@ class TemplateManager:
             raise TemplateNotFoundError(f"Template '{template_name}' not found")
 
         try:
-            with open(template_path, "r", encoding="utf-8") as f:
-                template_data = yaml.safe_load(f)
+            template_data = read_yaml(template_path)
 
             if not template_data:
                 raise TemplateValidationError(f"Template '{template_name}' is empty")
@@ -264,8 +264,7 @@ class TemplateManager:
             )
 
         # Write template
-        with open(template_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(template_data, f, default_flow_style=False, sort_keys=False)
+        write_yaml(template_path, template_data, sort_keys=False)
 
         logger.info(f"Created custom template: {template_name}")
         return template_path
@@ -2,5 +2,36 @@
 
 from .name_sanitizer import sanitize_name, sanitize_org_and_project
 from .aws_error_handler import AWSErrorHandler, AWSLimitError
+from .stack_output import OutputTail, StackOutputLog, stack_log_name
+from .fingerprint import IGNORED_DIRS, fingerprint_code
+from .manifest_cache import ManifestCache, manifest_cache
+from .serialization import (
+    dump_json,
+    dump_yaml,
+    load_yaml,
+    read_document,
+    read_yaml,
+    write_json,
+    write_yaml,
+)
 
-__all__ = ["sanitize_name", "sanitize_org_and_project", "AWSErrorHandler", "AWSLimitError"]
+__all__ = [
+    "sanitize_name",
+    "sanitize_org_and_project",
+    "AWSErrorHandler",
+    "AWSLimitError",
+    "OutputTail",
+    "StackOutputLog",
+    "stack_log_name",
+    "IGNORED_DIRS",
+    "fingerprint_code",
+    "ManifestCache",
+    "manifest_cache",
+    "dump_json",
+    "dump_yaml",
+    "load_yaml",
+    "read_document",
+    "read_yaml",
+    "write_json",
+    "write_yaml",
+]
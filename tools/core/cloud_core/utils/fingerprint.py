@@ -0,0 +1,56 @@
+"""
+Code Fingerprint
+
+Content hash of a stack's source tree, shared by everything that needs to
+know whether a stack's code changed (build skipping, preview caching,
+checkpoints).
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable
+
+# Directories that never affect what a Pulumi program does: installed
+# packages, build output, VCS and Pulumi metadata, and documentation
+IGNORED_DIRS = frozenset({
+    "node_modules",
+    "node_modules.staging",
+    "bin",
+    "dist",
+    ".git",
+    ".pulumi",
+    "__pycache__",
+    "docs",
+})
+
+
+def fingerprint_code(stack_dir: Path, ignore: Iterable[str] = ()) -> str:
+    """
+    Compute a content fingerprint of a stack's source tree
+
+    Args:
+        stack_dir: Stack source directory
+        ignore: Additional directory names to skip (e.g. a build output dir)
+
+    Returns:
+        SHA-256 hex digest over relative paths and file contents
+    """
+    stack_dir = Path(stack_dir)
+    ignored = IGNORED_DIRS | set(ignore)
+    digest = hashlib.sha256()
+
+    for root, dirs, files in os.walk(stack_dir):
+        # Sort in place so the walk order (and the digest) is deterministic
+        dirs[:] = sorted(d for d in dirs if d not in ignored)
+
+        for name in sorted(files):
+            path = Path(root) / name
+            digest.update(path.relative_to(stack_dir).as_posix().encode("utf-8"))
+            digest.update(b"\0")
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+
+    return digest.hexdigest()
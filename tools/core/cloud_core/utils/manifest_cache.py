@@ -0,0 +1,232 @@
+"""
+Manifest Cache
+
+Process-wide cache of parsed deployment manifests.
+
+A manifest is parsed once and handed out as a read-only view until the
+file changes on disk, which is noticed from its inode, mtime and size.
+Writes through the cache store the new content without parsing it again.
+Edits are made on a mutable copy inside edit() and written once at the end.
+"""
+
+import copy
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .logger import get_logger
+from .serialization import read_yaml, write_yaml
+
+logger = get_logger(__name__)
+
+
+def _read_only(*args: Any, **kwargs: Any) -> None:
+    raise TypeError("Manifest views are read-only (use ManifestCache.edit to change a manifest)")
+
+
+class FrozenDict(dict):
+    """Read-only dictionary of a manifest view"""
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+
+class FrozenList(list):
+    """Read-only list of a manifest view"""
+
+    __setitem__ = __delitem__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+    __iadd__ = __imul__ = _read_only
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> list:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (thaw(self),))
+
+
+def freeze(value: Any) -> Any:
+    """
+    Make a read-only view of parsed YAML
+
+    Args:
+        value: Parsed YAML value
+
+    Returns:
+        Value with every dict and list replaced by a read-only one
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """
+    Make a mutable copy of a (possibly read-only) value
+
+    Args:
+        value: Value (e.g. a manifest view)
+
+    Returns:
+        Copy made of plain dicts and lists
+    """
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return copy.deepcopy(value)
+
+
+class ManifestCache:
+    """Parsed manifests keyed on path, validated by inode, mtime and size"""
+
+    # Manifests kept (least recently used are dropped first)
+    MAX_ENTRIES = 64
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        """
+        Initialize manifest cache
+
+        Args:
+            max_entries: Number of manifests kept
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Path, Tuple[Tuple[int, int, int], FrozenDict]]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Serialize edits of the same file without blocking readers or other files
+        self._edit_locks: Dict[Path, threading.RLock] = {}
+
+        # Number of times a file was actually parsed (for diagnostics and tests)
+        self.parses = 0
+
+    @staticmethod
+    def _key(path: Path) -> Path:
+        return Path(os.path.abspath(path))
+
+    @staticmethod
+    def _stamp(path: Path) -> Tuple[int, int, int]:
+        """Identify the file's current version (raises FileNotFoundError)"""
+        stat = os.stat(path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _store(self, key: Path, stamp: Tuple[int, int, int], manifest: FrozenDict) -> None:
+        self._entries[key] = (stamp, manifest)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, path: Path) -> FrozenDict:
+        """
+        Get a read-only view of a manifest (parsed only if the file changed)
+
+        Args:
+            path: Manifest file
+
+        Returns:
+            Read-only manifest (empty if the file is empty)
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            yaml.YAMLError: If the file isn't valid YAML
+        """
+        key = self._key(path)
+
+        with self._lock:
+            stamp = self._stamp(key)
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            manifest = freeze(read_yaml(key, default={}))
+            self.parses += 1
+            logger.debug(f"Parsed manifest {key}")
+
+            self._store(key, stamp, manifest)
+            return manifest
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """
+        Get a mutable copy of a manifest (for callers that change it)
+
+        Args:
+            path: Manifest file
+
+        Returns:
+            Manifest dictionary
+        """
+        return thaw(self.get(path))
+
+    def write(self, path: Path, manifest: Dict[str, Any]) -> None:
+        """
+        Write a manifest atomically and cache it without parsing it back
+
+        Args:
+            path: Manifest file
+            manifest: Manifest (a view or a plain dictionary)
+        """
+        key = self._key(path)
+        with self._lock:
+            write_yaml(key, thaw(manifest), sort_keys=False)
+            self._store(key, self._stamp(key), freeze(thaw(manifest)))
+
+    @contextmanager
+    def edit(self, path: Path) -> Iterator[Dict[str, Any]]:
+        """
+        Change a manifest, writing it once when the block ends
+
+        Nothing is written if the block raises or leaves the manifest unchanged.
+        Edits of the same file wait for each other; reads and edits of other
+        files go on while the block runs.
+
+        Args:
+            path: Manifest file
+
+        Yields:
+            Mutable manifest dictionary
+        """
+        key = self._key(path)
+        with self._lock:
+            edit_lock = self._edit_locks.setdefault(key, threading.RLock())
+
+        with edit_lock:
+            original = self.get(key)
+            manifest = thaw(original)
+            yield manifest
+            if manifest != original:
+                self.write(key, manifest)
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """
+        Drop cached manifests
+
+        Args:
+            path: Manifest file to drop (all if None)
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(path), None)
+
+
+# Shared by everything in the process that reads manifests
+manifest_cache = ManifestCache()
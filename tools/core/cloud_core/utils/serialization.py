@@ -0,0 +1,292 @@
+"""
+Serialization
+
+Central reading and writing of YAML and JSON documents.
+
+- YAML goes through libyaml's CSafeLoader/CSafeDumper when PyYAML was built
+  with it, falling back to the pure-Python SafeLoader/SafeDumper.
+- Large YAML files read with read_yaml() get a binary sidecar next to them
+  (`.<name>.pickle`) holding the parsed document and a hash of the file's
+  content. Later reads (also from other processes) load the sidecar
+  instead of parsing, as long as the hash still matches. Sidecars hold
+  plain YAML types only and are loaded with an unpickler that refuses
+  anything else.
+- Files only the platform itself reads (such as deployment state) are
+  written as JSON, which is far faster to parse. JSON is valid YAML, so
+  they keep their names and stay readable by YAML tools; read_document()
+  still accepts older files written as YAML.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import yaml
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# libyaml bindings when available
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Files smaller than this are parsed directly; the C loader beats the extra sidecar read
+SIDECAR_MIN_BYTES = 4096
+
+SIDECAR_SUFFIX = ".pickle"
+_SIDECAR_MAGIC = b"CLOUDYAML1\n"
+_DIGEST_SIZE = 32
+
+# Mode of new files under the process umask (read once; os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+# Classes a sidecar may contain besides builtins (what safe YAML loads into)
+_SIDECAR_CLASSES = {
+    ("datetime", "date"): datetime.date,
+    ("datetime", "datetime"): datetime.datetime,
+    ("datetime", "timedelta"): datetime.timedelta,
+    ("datetime", "timezone"): datetime.timezone,
+}
+
+
+def load_yaml(stream: Any) -> Any:
+    """
+    Parse a YAML document (drop-in for yaml.safe_load)
+
+    Args:
+        stream: YAML text, bytes or a file object
+
+    Returns:
+        Parsed document
+    """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def dump_yaml(data: Any, stream: Any = None, **kwargs: Any) -> Optional[str]:
+    """
+    Serialize a document as YAML (drop-in for yaml.safe_dump)
+
+    Args:
+        data: Document
+        stream: File object to write to (returns the text if None)
+        **kwargs: yaml.dump options (default_flow_style, sort_keys, ...)
+
+    Returns:
+        YAML text if no stream was given
+    """
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+def match_file_mode(tmp_path: Any, target: Path) -> None:
+    """
+    Give a temp file the permissions of the file it is about to replace
+
+    tempfile.mkstemp() creates files readable by the owner only, and
+    os.replace() keeps that mode; without this every rewrite would drop
+    group and other access.
+
+    Args:
+        tmp_path: Temp file
+        target: File it replaces (new files get the umask default)
+    """
+    try:
+        mode = os.stat(target).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+    os.chmod(tmp_path, mode)
+
+
+def _digest(content: bytes) -> bytes:
+    return hashlib.blake2b(content, digest_size=_DIGEST_SIZE).digest()
+
+
+def sidecar_path(path: Path) -> Path:
+    """
+    Get the sidecar cache file of a YAML file
+
+    Args:
+        path: YAML file
+
+    Returns:
+        Path of `.<name>.pickle` next to the file
+    """
+    path = Path(path)
+    return path.with_name(f".{path.name}{SIDECAR_SUFFIX}")
+
+
+class _SidecarUnpickler(pickle.Unpickler):
+    """Unpickler limited to the types safe YAML loads into"""
+
+    def find_class(self, module: str, name: str) -> Any:
+        cls = _SIDECAR_CLASSES.get((module, name))
+        if cls is None:
+            raise pickle.UnpicklingError(f"Unexpected class in YAML cache: {module}.{name}")
+        return cls
+
+
+def _read_sidecar(path: Path, digest: bytes) -> Any:
+    """Load a sidecar's document (raises LookupError if it's missing or stale)"""
+    try:
+        with open(sidecar_path(path), "rb") as f:
+            header = f.read(len(_SIDECAR_MAGIC) + _DIGEST_SIZE)
+            if header != _SIDECAR_MAGIC + digest:
+                raise LookupError("stale")
+            return _SidecarUnpickler(f).load()
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError) as e:
+        raise LookupError(str(e)) from e
+
+
+def _write_sidecar(path: Path, digest: bytes, document: Any) -> None:
+    """Store a parsed document next to its file (skipped if the directory isn't writable)"""
+    target = sidecar_path(path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{target.name}-", dir=target.parent)
+    except OSError as e:
+        logger.debug(f"Not caching {path.name}: {e}")
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_SIDECAR_MAGIC + digest)
+            pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+        match_file_mode(tmp_path, target)
+        os.replace(tmp_path, target)
+    except (OSError, pickle.PicklingError) as e:
+        Path(tmp_path).unlink(missing_ok=True)
+        logger.debug(f"Not caching {path.name}: {e}")
+
+
+def read_yaml(path: Path, default: Any = None, cache: bool = True) -> Any:
+    """
+    Read a YAML file, using its sidecar cache when it's current
+
+    Args:
+        path: YAML file
+        default: Returned if the file is empty
+        cache: Use (and create) the sidecar for files of SIDECAR_MIN_BYTES or more
+
+    Returns:
+        Parsed document
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        yaml.YAMLError: If the file isn't valid YAML
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        content = f.read()
+
+    if not cache or len(content) < SIDECAR_MIN_BYTES:
+        document = load_yaml(content)
+        return default if document is None else document
+
+    digest = _digest(content)
+    try:
+        document = _read_sidecar(path, digest)
+    except LookupError:
+        document = load_yaml(content)
+        _write_sidecar(path, digest, document)
+
+    return default if document is None else document
+
+
+def _atomic_write(path: Path, data: str, durable: bool = False) -> None:
+    """Replace a file's content through a temp file and rename"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        match_file_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def write_yaml(path: Path, data: Any, durable: bool = False, **kwargs: Any) -> None:
+    """
+    Write a YAML file atomically
+
+    Args:
+        path: YAML file
+        data: Document
+        durable: fsync the file before renaming it into place
+        **kwargs: yaml.dump options (default_flow_style, sort_keys, ...)
+    """
+    kwargs.setdefault("default_flow_style", False)
+    _atomic_write(path, dump_yaml(data, **kwargs), durable)
+
+
+def dump_json(data: Any) -> str:
+    """
+    Serialize a machine-only document as JSON
+
+    Args:
+        data: Document
+
+    Returns:
+        JSON text (indented, keys sorted, values JSON can't hold as strings)
+    """
+    return json.dumps(data, indent=1, sort_keys=True, default=str) + "\n"
+
+
+def write_json(path: Path, data: Any, durable: bool = False) -> None:
+    """
+    Write a machine-only document as JSON, atomically
+
+    Args:
+        path: File to write
+        data: Document
+        durable: fsync the file before renaming it into place
+    """
+    _atomic_write(path, dump_json(data), durable)
+
+
+def load_document(text: str) -> Any:
+    """
+    Parse a machine-only document written as JSON, or as YAML by older versions
+
+    Args:
+        text: File content
+
+    Returns:
+        Parsed document
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return load_yaml(text)
+
+
+def read_document(path: Path, default: Any = None) -> Any:
+    """
+    Read a machine-only document written as JSON (or YAML by older versions)
+
+    Args:
+        path: File to read
+        default: Returned if the file is empty
+
+    Returns:
+        Parsed document
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if not text.strip():
+        return default
+    document = load_document(text)
+    return default if document is None else document
@@ -0,0 +1,166 @@
+"""
+Stack Output
+
+Bounded capture of Pulumi process output.
+
+The full output of each stack goes to a log file as it arrives; only the
+last few kilobytes are kept in memory for error reporting, so memory use
+does not depend on how verbose a stack's providers are.
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Optional, TextIO
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def stack_log_name(deployment_id: str, stack_name: str, environment: str, operation: str) -> str:
+    """
+    Get the log file name of one stack operation
+
+    Args:
+        deployment_id: Deployment ID
+        stack_name: Stack name
+        environment: Environment
+        operation: Operation type (deploy, destroy, etc.)
+
+    Returns:
+        File name matching the patterns used by `cloud logs`
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{deployment_id}-{stack_name}-{environment}-{operation}_{timestamp}.log"
+
+
+class OutputTail:
+    """Thread-safe ring buffer keeping the last max_bytes of text output"""
+
+    DEFAULT_MAX_BYTES = 64 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize output tail
+
+        Args:
+            max_bytes: Maximum UTF-8 size of the retained output
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> None:
+        """
+        Append output, dropping the oldest output beyond max_bytes
+
+        Args:
+            text: Output text
+        """
+        data = text.encode("utf-8", errors="replace")
+
+        with self._lock:
+            self.total_bytes += len(data)
+
+            if len(data) >= self.max_bytes:
+                self._chunks.clear()
+                self._chunks.append(data[-self.max_bytes:])
+                self._size = self.max_bytes
+                return
+
+            self._chunks.append(data)
+            self._size += len(data)
+
+            while self._size > self.max_bytes:
+                excess = self._size - self.max_bytes
+                oldest = self._chunks[0]
+                if len(oldest) <= excess:
+                    self._chunks.popleft()
+                    self._size -= len(oldest)
+                else:
+                    self._chunks[0] = oldest[excess:]
+                    self._size -= excess
+
+    def getvalue(self) -> str:
+        """Get the retained output"""
+        with self._lock:
+            data = b"".join(self._chunks)
+        # A multi-byte character may have been cut at the start of the buffer
+        return data.decode("utf-8", errors="ignore")
+
+    @property
+    def truncated(self) -> bool:
+        """Whether older output has been dropped"""
+        return self.total_bytes > self._size
+
+    def clear(self) -> None:
+        """Drop all retained output"""
+        with self._lock:
+            self._chunks.clear()
+            self._size = 0
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __str__(self) -> str:
+        return self.getvalue()
+
+
+class StackOutputLog:
+    """Writes a stack's process output to a log file and an in-memory tail"""
+
+    def __init__(self, path: Optional[Path] = None, tail: Optional[OutputTail] = None):
+        """
+        Initialize stack output log
+
+        Args:
+            path: Log file (appended to; parent created on demand). No file if None
+            tail: Ring buffer receiving the same output (a new one if None)
+        """
+        self.path = Path(path) if path else None
+        self.tail = tail if tail is not None else OutputTail()
+        self._file: Optional[TextIO] = None
+        self._lock = threading.Lock()
+
+        if self.path:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Line buffered so `cloud logs` sees output while the stack runs
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            except OSError as e:
+                logger.warning(f"Cannot open stack log {self.path}, keeping output tail only: {e}")
+
+    def write(self, text: str) -> None:
+        """
+        Record output (safe to call from several reader threads)
+
+        Args:
+            text: Output text, typically one line
+        """
+        self.tail.write(text)
+
+        with self._lock:
+            if self._file:
+                try:
+                    self._file.write(text)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Writing stack log {self.path} failed: {e}")
+                    self._file = None
+
+    def close(self) -> None:
+        """Close the log file"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "StackOutputLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
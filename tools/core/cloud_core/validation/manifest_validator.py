@@ -9,6 +9,8 @@ from typing import Dict, List, Optional, Any
 import yaml
 from pydantic import BaseModel, Field, ValidationError
 
+from ..utils.manifest_cache import manifest_cache
+
 
 class StackConfig(BaseModel):
     """Stack configuration in manifest"""
@@ -17,6 +19,9 @@ class StackConfig(BaseModel):
     layer: int = Field(..., ge=1, le=10, description="Execution layer (1-10)")
     dependencies: List[str] = Field(default_factory=list, description="Stack dependencies")
     config: Dict[str, Any] = Field(default_factory=dict, description="Stack-specific configuration")
+    parallel: Optional[int] = Field(
+        default=None, ge=1, le=256, description="Pulumi --parallel override (auto-tuned if unset)"
+    )
 
 
 class EnvironmentConfig(BaseModel):
@@ -36,6 +41,9 @@ class DeploymentManifest(BaseModel):
     project: str = Field(..., min_length=1, description="Project name")
     domain: str = Field(..., description="Primary domain")
     template: str = Field(default="custom", description="Template name (optional)")
+    pulumiBackend: str = Field(
+        default="cloud", pattern=r"^(cloud|local)$", description="Pulumi state backend"
+    )
 
     environments: Dict[str, EnvironmentConfig] = Field(
         ..., description="Environment configurations"
@@ -80,8 +88,7 @@ class ManifestValidator:
 
         # Load YAML
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            data = manifest_cache.get(path)
         except yaml.YAMLError as e:
             self.errors.append(f"YAML syntax error: {e}")
             return False
@@ -141,8 +148,7 @@ class ManifestValidator:
 
         # Load YAML
         try:
-            with open(manifest_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            data = manifest_cache.get(manifest_path)
         except yaml.YAMLError as e:
             self.errors.append(f"YAML syntax error: {e}")
             return False
@@ -0,0 +1 @@
+"""Tests for stack build pipeline"""
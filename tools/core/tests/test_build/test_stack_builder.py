@@ -0,0 +1,166 @@
+"""Tests for StackBuilder and NodeModulesStore"""
+
+import json
+import os
+import sys
+import pytest
+from pathlib import Path
+from cloud_core.build import (
+    NodeModulesStore,
+    StackBuilder,
+    BuildError,
+    install_key,
+    source_hash,
+)
+
+
+# Emulates `npm ci|install` (writes node_modules) and `npm run build` (writes bin/);
+# every invocation is appended to calls.log next to this script
+FAKE_NPM = """
+import os, sys
+from pathlib import Path
+with open(Path(__file__).parent / "calls.log", "a") as log:
+    log.write(" ".join(sys.argv[1:3]) + "\\n")
+if sys.argv[1] in ("ci", "install"):
+    pkg = Path("node_modules/left-pad")
+    pkg.mkdir(parents=True)
+    (pkg / "index.js").write_text("module.exports = 1;")
+    Path("node_modules/.bin").mkdir()
+    os.symlink("../left-pad/index.js", "node_modules/.bin/left-pad")
+elif sys.argv[1:3] == ["run", "build"]:
+    if Path("fail-build").exists():
+        sys.exit(1)
+    Path("bin").mkdir(exist_ok=True)
+    Path("bin/index.js").write_text("compiled")
+"""
+
+
+@pytest.fixture
+def fake_npm(tmp_path):
+    """npm replacement recording its calls"""
+    script = tmp_path / "fake_npm.py"
+    script.write_text(FAKE_NPM)
+    return [sys.executable, str(script)]
+
+
+def _calls(tmp_path):
+    log = tmp_path / "calls.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def _make_stack(stacks_root, name, deps=None):
+    stack_dir = stacks_root / name
+    stack_dir.mkdir(parents=True)
+    (stack_dir / "index.ts").write_text(f"export const name = '{name}';")
+    (stack_dir / "package.json").write_text(json.dumps({
+        "name": name,
+        "scripts": {"build": "tsc"},
+        "dependencies": deps or {"left-pad": "^1.0.0"},
+    }))
+    (stack_dir / "tsconfig.json").write_text(json.dumps({"compilerOptions": {"outDir": "bin"}}))
+    return stack_dir
+
+
+@pytest.fixture
+def stacks_root(tmp_path):
+    """Stacks root with two stacks sharing dependencies and one differing"""
+    root = tmp_path / "stacks"
+    _make_stack(root, "network")
+    _make_stack(root, "security")
+    _make_stack(root, "dns", deps={"left-pad": "^2.0.0"})
+    return root
+
+
+def test_install_key_ignores_package_name(stacks_root):
+    """Test stacks with the same dependencies share an install key"""
+    assert install_key(stacks_root / "network") == install_key(stacks_root / "security")
+    assert install_key(stacks_root / "network") != install_key(stacks_root / "dns")
+
+
+def test_install_key_prefers_lockfile(stacks_root):
+    """Test the lockfile determines the key when present"""
+    before = install_key(stacks_root / "network")
+    (stacks_root / "network" / "package-lock.json").write_text('{"lockfileVersion": 3}')
+
+    assert install_key(stacks_root / "network").startswith("lock-")
+    assert install_key(stacks_root / "network") != before
+
+
+def test_store_install_and_link(stacks_root, tmp_path, fake_npm):
+    """Test an install is shared through hardlinks and content-addressed objects"""
+    store = NodeModulesStore(tmp_path / "store")
+    key = install_key(stacks_root / "network")
+
+    store.install(key, stacks_root / "network", fake_npm)
+    store.install(key, stacks_root / "security", fake_npm)
+
+    assert _calls(tmp_path) == ["install --no-audit"]
+
+    assert store.link(key, stacks_root / "network") is True
+    assert store.link(key, stacks_root / "network") is False
+    store.link(key, stacks_root / "security")
+
+    a = stacks_root / "network" / "node_modules" / "left-pad" / "index.js"
+    b = stacks_root / "security" / "node_modules" / "left-pad" / "index.js"
+    assert os.path.samefile(a, b)
+    assert a.stat().st_nlink >= 3  # object + install + two stacks
+    assert (stacks_root / "network" / "node_modules" / ".bin" / "left-pad").is_symlink()
+    assert store.linked_key(stacks_root / "network") == key
+
+
+def test_store_link_missing_install(stacks_root, tmp_path):
+    """Test linking an install that was never made fails clearly"""
+    store = NodeModulesStore(tmp_path / "store")
+
+    with pytest.raises(BuildError):
+        store.link("pkg-missing", stacks_root / "network")
+
+
+def test_build_cold_then_warm(stacks_root, tmp_path, fake_npm):
+    """Test a warm build reuses installs and skips unchanged compiles"""
+    builder = StackBuilder(stacks_root, tmp_path / "store", max_workers=2, npm_command=fake_npm)
+    names = ["network", "security", "dns"]
+
+    cold = builder.build(names)
+
+    assert [r.stack for r in cold] == names
+    assert all(r.success for r in cold)
+    assert sorted(_calls(tmp_path)).count("install --no-audit") == 2
+    assert _calls(tmp_path).count("run build") == 3
+
+    (tmp_path / "calls.log").unlink()
+    warm = builder.build(names)
+
+    assert all(r.success and r.install_reused and r.build_skipped for r in warm)
+    assert _calls(tmp_path) == []
+
+    # Only the edited stack recompiles
+    (stacks_root / "dns" / "index.ts").write_text("export const changed = true;")
+    results = {r.stack: r for r in builder.build(names)}
+
+    assert not results["dns"].build_skipped
+    assert results["network"].build_skipped
+    assert _calls(tmp_path) == ["run build"]
+
+
+def test_build_reports_failures(stacks_root, tmp_path, fake_npm):
+    """Test invalid stacks and failed compiles are reported per stack"""
+    (stacks_root / "security" / "fail-build").write_text("")
+    builder = StackBuilder(stacks_root, tmp_path / "store", max_workers=2, npm_command=fake_npm)
+
+    results = {r.stack: r for r in builder.build(["network", "security", "missing"])}
+
+    assert results["network"].success
+    assert results["security"].npm_install and not results["security"].success
+    assert results["missing"].errors == ["Directory does not exist"]
+
+
+def test_source_hash_ignores_build_output(stacks_root):
+    """Test compiled output does not change the source hash"""
+    stack_dir = stacks_root / "network"
+    before = source_hash(stack_dir)
+
+    (stack_dir / "bin").mkdir()
+    (stack_dir / "bin" / "index.js").write_text("compiled")
+
+    assert source_hash(stack_dir) == before
@@ -0,0 +1,138 @@
+"""Tests for StackPreparer"""
+
+import json
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+from cloud_core.build import (
+    NodeModulesStore,
+    StackPreparer,
+    find_required_plugins,
+)
+
+
+# Emulates `npm ci|install` by installing a Pulumi provider package
+FAKE_NPM = """
+import json, sys
+from pathlib import Path
+with open(Path(__file__).parent / "calls.log", "a") as log:
+    log.write(" ".join(sys.argv[1:3]) + "\\n")
+pkg = Path("node_modules/@pulumi/aws")
+pkg.mkdir(parents=True)
+(pkg / "package.json").write_text(json.dumps({
+    "name": "@pulumi/aws",
+    "version": "6.0.0",
+    "pulumi": {"resource": True, "name": "aws", "version": "6.0.0"},
+}))
+"""
+
+
+@pytest.fixture
+def fake_npm(tmp_path):
+    """npm replacement recording its calls"""
+    script = tmp_path / "fake_npm.py"
+    script.write_text(FAKE_NPM)
+    return [sys.executable, str(script)]
+
+
+def _make_stack(stacks_root, name):
+    stack_dir = stacks_root / name
+    stack_dir.mkdir(parents=True)
+    (stack_dir / "package.json").write_text(json.dumps({
+        "name": name,
+        "dependencies": {"@pulumi/aws": "^6.0.0"},
+    }))
+    return stack_dir
+
+
+def _preparer(tmp_path, fake_npm, precompile=True):
+    pulumi = Mock()
+    pulumi.compile_program.side_effect = lambda stack_dir: stack_dir / "bin"
+    preparer = StackPreparer(
+        tmp_path / "stacks",
+        pulumi,
+        store=NodeModulesStore(tmp_path / "store"),
+        npm_command=fake_npm,
+        precompile=precompile,
+    )
+    return preparer, pulumi
+
+
+def test_find_required_plugins(tmp_path):
+    """Test resource plugins are read from installed Pulumi packages"""
+    pulumi_dir = tmp_path / "node_modules" / "@pulumi"
+    (pulumi_dir / "aws").mkdir(parents=True)
+    (pulumi_dir / "aws" / "package.json").write_text(json.dumps({
+        "version": "6.1.0",
+        "pulumi": {"resource": True, "name": "aws"},
+    }))
+    (pulumi_dir / "pulumi").mkdir()
+    (pulumi_dir / "pulumi" / "package.json").write_text(json.dumps({"version": "3.0.0"}))
+    (pulumi_dir / "random").mkdir()
+    (pulumi_dir / "random" / "package.json").write_text("{broken")
+
+    assert find_required_plugins(tmp_path) == [("aws", "6.1.0")]
+
+
+def test_prepare_installs_links_and_compiles(tmp_path, fake_npm):
+    """Test a stack gets dependencies, plugins and a compiled program"""
+    stack_dir = _make_stack(tmp_path / "stacks", "network")
+    preparer, pulumi = _preparer(tmp_path, fake_npm)
+
+    result = preparer.prepare("network")
+
+    assert result.dependencies_linked
+    assert (stack_dir / "node_modules" / "@pulumi" / "aws" / "package.json").exists()
+    assert result.plugins == ["aws@6.0.0"]
+    pulumi.install_plugin.assert_called_once_with("resource", "aws", "6.0.0")
+    assert result.program_dir == stack_dir / "bin"
+
+
+def test_prepare_shares_install_between_stacks(tmp_path, fake_npm):
+    """Test stacks with the same dependencies install them once"""
+    _make_stack(tmp_path / "stacks", "network")
+    _make_stack(tmp_path / "stacks", "database")
+    preparer, _ = _preparer(tmp_path, fake_npm, precompile=False)
+
+    preparer.prepare("network")
+    result = preparer.prepare("database")
+
+    assert result.dependencies_linked
+    assert result.program_dir is None
+    assert (tmp_path / "calls.log").read_text().splitlines() == ["install --no-audit"]
+
+
+def test_prepare_keeps_manual_node_modules(tmp_path, fake_npm):
+    """Test a node_modules installed outside the store is left alone"""
+    stack_dir = _make_stack(tmp_path / "stacks", "network")
+    (stack_dir / "node_modules").mkdir()
+    preparer, _ = _preparer(tmp_path, fake_npm)
+
+    result = preparer.prepare("network")
+
+    assert not result.dependencies_linked
+    assert not (tmp_path / "calls.log").exists()
+
+
+def test_prepare_plugin_failure_is_not_fatal(tmp_path, fake_npm):
+    """Test plugin install errors are left for Pulumi to handle"""
+    _make_stack(tmp_path / "stacks", "network")
+    preparer, pulumi = _preparer(tmp_path, fake_npm)
+    pulumi.install_plugin.side_effect = RuntimeError("offline")
+
+    result = preparer.prepare("network")
+
+    assert result.plugins == []
+    pulumi.compile_program.assert_called_once()
+
+
+def test_prepare_skips_non_node_stack(tmp_path, fake_npm):
+    """Test stacks without package.json are not prepared"""
+    (tmp_path / "stacks" / "legacy").mkdir(parents=True)
+    preparer, pulumi = _preparer(tmp_path, fake_npm)
+
+    result = preparer.prepare("legacy")
+
+    assert not result.dependencies_linked
+    pulumi.compile_program.assert_not_called()
@@ -0,0 +1,76 @@
+"""Tests for the deployment catalog"""
+
+import shutil
+
+import pytest
+import yaml
+
+from cloud_core.deployment.catalog import DeploymentCatalog
+from cloud_core.deployment.deployment_manager import DeploymentManager
+from cloud_core.deployment.state_manager import DeploymentStatus, StackStatus, StateManager
+
+
+@pytest.fixture
+def deployments_root(tmp_path):
+    """Create a deployments root with two deployments"""
+    root = tmp_path / "deploy"
+    for deployment_id, project, created_at in [
+        ("D1AAAAA", "web", "2025-01-01T00:00:00Z"),
+        ("D2BBBBB", "api", "2025-02-01T00:00:00Z"),
+    ]:
+        deployment_dir = root / f"{deployment_id}-Acme-{project}"
+        deployment_dir.mkdir(parents=True)
+        with open(deployment_dir / ".deployment-metadata.yaml", "w") as f:
+            yaml.safe_dump(
+                {
+                    "deployment_id": deployment_id,
+                    "organization": "Acme",
+                    "project": project,
+                    "created_at": created_at,
+                },
+                f,
+            )
+    return root
+
+
+def test_list_reads_catalog(deployments_root, monkeypatch):
+    """Test indexed deployments are listed without reading their files"""
+    manager = DeploymentManager(deployments_root)
+    assert [d["deployment_id"] for d in manager.list_deployments()] == ["D2BBBBB", "D1AAAAA"]
+
+    monkeypatch.setattr(
+        manager, "get_deployment_metadata", lambda path: pytest.fail(f"read {path}")
+    )
+    assert [d["project"] for d in manager.list_deployments(project="web")] == ["web"]
+    assert manager.get_status_counts() == {"initializing": 2}
+
+
+def test_state_changes_update_catalog(deployments_root):
+    """Test StateManager keeps the catalog's status rollup current"""
+    manager = DeploymentManager(deployments_root)
+    manager.list_deployments()
+
+    state_manager = StateManager(deployments_root / "D1AAAAA-Acme-web")
+    state_manager.set_stack_status("network", StackStatus.DEPLOYED, "dev")
+    state_manager.set_stack_status("compute", StackStatus.FAILED, "dev")
+    assert [d["deployment_id"] for d in manager.list_deployments(status="partial")] == ["D1AAAAA"]
+
+    state_manager.set_deployment_status(DeploymentStatus.DESTROYED)
+    assert [d["deployment_id"] for d in manager.list_deployments(include_destroyed=False)] == [
+        "D2BBBBB"
+    ]
+    assert manager.get_status_counts() == {"destroyed": 1, "initializing": 1}
+
+
+def test_catalog_reconciles_and_rebuilds(deployments_root):
+    """Test directories changed behind the catalog's back are picked up"""
+    manager = DeploymentManager(deployments_root)
+    manager.list_deployments()
+
+    shutil.rmtree(deployments_root / "D2BBBBB-Acme-api")
+    (deployments_root / "D3CCCCC-Acme-batch").mkdir()
+    assert sorted(d["deployment_id"] for d in manager.list_deployments()) == ["D1AAAAA", "D3CCCCC"]
+
+    (deployments_root / DeploymentCatalog.CATALOG_FILE).unlink()
+    assert manager.rebuild_catalog() == 2
+    assert not (deployments_root / "D1AAAAA-Acme-web" / StateManager.STATE_FILE).exists()
@@ -0,0 +1,134 @@
+"""Tests for CheckpointStore"""
+
+import json
+import pytest
+from unittest.mock import Mock
+from cloud_core.deployment.checkpoint_store import (
+    CheckpointStore,
+    CheckpointError,
+    capture_checkpoint,
+    check_checkpoint_code,
+    diff_snapshots,
+)
+from cloud_core.utils.fingerprint import fingerprint_code
+
+
+def _state(*resources):
+    return json.dumps({
+        "version": 3,
+        "deployment": {
+            "resources": [
+                {"urn": "urn:pulumi:dev::proj::pulumi:pulumi:Stack::proj-dev", "type": "pulumi:pulumi:Stack"},
+                *resources,
+            ]
+        },
+    })
+
+
+def _resource(name, outputs=None, type_="aws:s3/bucket:Bucket"):
+    return {
+        "urn": f"urn:pulumi:dev::proj::{type_}::{name}",
+        "type": type_,
+        "inputs": {"name": name},
+        "outputs": outputs or {"name": name},
+    }
+
+
+def test_snapshots_are_deduplicated(tmp_path):
+    """Test identical states are stored once regardless of formatting"""
+    store = CheckpointStore(tmp_path)
+    state = _state(_resource("assets"))
+
+    first = store.put_snapshot(state)
+    second = store.put_snapshot(json.dumps(json.loads(state), indent=4))
+
+    assert first == second
+    assert len(list(store.objects_dir.glob("*/*.json.gz"))) == 1
+    assert json.loads(store.get_snapshot(first)) == json.loads(state)
+
+
+def test_invalid_snapshot_rejected(tmp_path):
+    """Test exports that are not JSON are rejected"""
+    with pytest.raises(CheckpointError):
+        CheckpointStore(tmp_path).put_snapshot("error: stack not found")
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    """Test checkpoints are saved, listed by environment and removed"""
+    store = CheckpointStore(tmp_path)
+    shared = store.put_snapshot(_state(_resource("assets")))
+    only_dev = store.put_snapshot(_state(_resource("logs")))
+
+    store.save_checkpoint("op-1", "deploy", "dev", {"network": shared, "storage": only_dev})
+    store.save_checkpoint("op-2", "deploy", "prod", {"network": shared})
+
+    assert store.get_checkpoint("op-1")["stacks"] == {"network": shared, "storage": only_dev}
+    assert store.get_checkpoint("op-missing") is None
+    assert [c["operation_id"] for c in store.list_checkpoints("dev")] == ["op-1"]
+
+    store.remove_checkpoint("op-1")
+
+    assert store.get_checkpoint("op-1") is None
+    assert store.get_snapshot(shared)
+    with pytest.raises(CheckpointError):
+        store.get_snapshot(only_dev)
+
+
+def test_capture_checkpoint_skips_missing_stacks(tmp_path):
+    """Test stacks that cannot be exported are left out"""
+    store = CheckpointStore(tmp_path)
+    pulumi = Mock()
+    pulumi.export_stack.side_effect = lambda name: (
+        _state(_resource("vpc")) if name == "network-dev" else (_ for _ in ()).throw(Exception("no stack"))
+    )
+
+    checkpoint = capture_checkpoint(store, pulumi, "op-1", "deploy", "dev", ["network", "database"])
+
+    assert list(checkpoint["stacks"]) == ["network"]
+    assert store.get_checkpoint("op-1")["operation"] == "deploy"
+
+
+def test_checkpoint_records_deployed_code(tmp_path):
+    """Test checkpoints carry the code and config each stack was deployed with"""
+    stacks_root = tmp_path / "stacks"
+    (stacks_root / "network").mkdir(parents=True)
+    (stacks_root / "network" / "index.ts").write_text("export const v = 1;")
+    (stacks_root / "database").mkdir()
+
+    store = CheckpointStore(tmp_path)
+    store.record_deployment(
+        "network", "dev", fingerprint_code(stacks_root / "network"),
+        {"test-project:dbPassword": "hunter2"}, secret_keys=["dbPassword"],
+    )
+    pulumi = Mock()
+    pulumi.export_stack.return_value = _state(_resource("vpc"))
+
+    checkpoint = capture_checkpoint(store, pulumi, "op-1", "deploy", "dev", ["network", "database"])
+
+    assert list(checkpoint["code"]) == ["network"]
+    assert checkpoint["config"] == {
+        "network": {"values": {"test-project:dbPassword": "hunter2"}, "secret_keys": ["dbPassword"]}
+    }
+    assert check_checkpoint_code(checkpoint, stacks_root) == {"changed": [], "unknown": ["database"]}
+
+    (stacks_root / "network" / "index.ts").write_text("export const v = 2;")
+    assert check_checkpoint_code(checkpoint, stacks_root)["changed"] == ["network"]
+
+
+def test_diff_snapshots():
+    """Test resources are classified as added, changed or removed"""
+    target = _state(_resource("kept"), _resource("modified"), _resource("deleted"))
+    current = _state(
+        _resource("kept"),
+        _resource("modified", outputs={"name": "modified", "tags": {"a": "b"}}),
+        _resource("created"),
+        _resource("default", type_="pulumi:providers:aws"),
+    )
+
+    diff = diff_snapshots(current, target)
+
+    assert diff == {
+        "added": ["urn:pulumi:dev::proj::aws:s3/bucket:Bucket::created"],
+        "changed": ["urn:pulumi:dev::proj::aws:s3/bucket:Bucket::modified"],
+        "removed": ["urn:pulumi:dev::proj::aws:s3/bucket:Bucket::deleted"],
+    }
@@ -248,6 +248,44 @@ def test_save_manifest(deployment_manager):
     assert updated_manifest["test_key"] == "test_value"
 
 
+def test_find_deployment_dir_uses_index(deployment_manager, temp_deployments_root, monkeypatch):
+    """Test known deployments are resolved without scanning the root"""
+    deployment_dir = deployment_manager.create_deployment(
+        template_name="standard-template",
+        organization="TestOrg",
+        project="test-project",
+        domain="example.com",
+        deployment_id="D1TEST1"
+    )
+
+    # A fresh manager resolves from the catalog, a cached one from memory
+    fresh = DeploymentManager(temp_deployments_root)
+    for manager in (deployment_manager, fresh):
+        monkeypatch.setattr(manager, "_scan_deployment_dirs", lambda _: pytest.fail("scanned"))
+        assert manager.get_deployment_dir("D1TEST1") == deployment_dir
+        assert manager.get_deployment_dir("D1TEST1") == deployment_dir
+
+    # Removed behind the managers' backs
+    import shutil
+    shutil.rmtree(deployment_dir)
+    monkeypatch.undo()
+    assert deployment_manager.get_deployment_dir("D1TEST1") is None
+    assert fresh.get_deployment_dir("D1TEST1") is None
+
+
+def test_find_deployment_dir_ambiguous(temp_deployments_root):
+    """Test an ID shared by several directories resolves deterministically"""
+    for name in ["D1TEST1-Zeta-web", "D1TEST1-Acme-web", "D1TEST10-Acme-web", "*-Acme-web"]:
+        (temp_deployments_root / name).mkdir()
+
+    for _ in range(2):
+        manager = DeploymentManager(temp_deployments_root)
+        assert manager.get_deployment_dir("D1TEST1").name == "D1TEST1-Acme-web"
+
+    assert DeploymentManager(temp_deployments_root).get_deployment_dir("*").name == "*-Acme-web"
+    assert DeploymentManager(temp_deployments_root).get_deployment_dir("D1TEST") is None
+
+
 def test_delete_deployment(deployment_manager):
     """Test deleting deployment"""
     deployment_dir = deployment_manager.create_deployment(
@@ -0,0 +1,92 @@
+"""Tests for the rotating operation history"""
+
+import gzip
+
+from cloud_core.deployment.history_log import HistoryLog
+from cloud_core.deployment.state_manager import StateManager
+
+
+def _record(n, operation="deploy", status="completed"):
+    return {
+        "timestamp": f"2025-01-01T00:{n // 60:02d}:{n % 60:02d}Z",
+        "operation": operation,
+        "status": status,
+        "details": {"n": n},
+    }
+
+
+def test_history_rotates_into_compressed_segments(tmp_path):
+    """Test a full active segment is compressed and indexed"""
+    log = HistoryLog(tmp_path / ".operation-history.jsonl", segment_bytes=1000)
+
+    for n in range(100):
+        log.append(_record(n))
+
+    segments = sorted(tmp_path.glob(".operation-history.*.jsonl.gz"))
+    assert segments
+    with gzip.open(segments[0], "rt") as f:
+        assert '"n":0' in f.readline()
+
+    active = tmp_path / ".operation-history.jsonl"
+    index = log.rebuild_index()
+    assert sum(entry["records"] for entry in index["segments"].values()) + (
+        len(active.read_text().splitlines()) if active.exists() else 0
+    ) == 100
+
+    records = log.read()
+    assert [r["details"]["n"] for r in records] == list(range(99, -1, -1))
+    assert [r["details"]["n"] for r in log.read(limit=3)] == [99, 98, 97]
+
+
+def test_history_filters(tmp_path):
+    """Test since, operation and status filters across segments"""
+    log = HistoryLog(tmp_path / ".operation-history.jsonl", segment_bytes=2000)
+
+    for n in range(120):
+        log.append(_record(n, "destroy" if n % 10 == 0 else "deploy", "failed" if n == 5 else "completed"))
+
+    destroys = log.read(operation="destroy")
+    assert [r["details"]["n"] for r in destroys] == list(range(110, -1, -10))
+    assert [r["details"]["n"] for r in log.read(status="failed")] == [5]
+    assert [r["details"]["n"] for r in log.read(since="2025-01-01T00:01:55Z")] == [119, 118, 117, 116, 115]
+    assert [r["details"]["n"] for r in log.read(limit=2, operation="destroy", since="2025-01-01T00:01:00Z")] == [
+        110,
+        100,
+    ]
+
+
+def test_history_skips_segments_by_index(tmp_path, monkeypatch):
+    """Test reading recent records doesn't open old segments"""
+    log = HistoryLog(tmp_path / ".operation-history.jsonl", segment_bytes=1000)
+    for n in range(200):
+        log.append(_record(n))
+
+    opened = []
+    original = log._read_segment
+    monkeypatch.setattr(log, "_read_segment", lambda path: opened.append(path) or original(path))
+
+    log.append(_record(200))
+
+    assert [r["details"]["n"] for r in log.read(limit=1)] == [200]
+    assert log.read(operation="destroy") == []
+    assert len(log.read(since="2025-01-01T00:03:15Z")) == 6
+
+    newest = max(tmp_path.glob(".operation-history.*.jsonl.gz"))
+    assert set(opened) <= {newest}
+
+
+def test_state_manager_history_survives_rotation(tmp_path, monkeypatch):
+    """Test StateManager reads and migrates history spread over segments"""
+    monkeypatch.setattr(HistoryLog, "DEFAULT_SEGMENT_BYTES", 500)
+    manager = StateManager(tmp_path, backend="yaml")
+
+    for n in range(30):
+        manager.record_operation("deploy" if n % 2 else "destroy", "completed", {"n": n})
+
+    assert list(tmp_path.glob(".operation-history.*.jsonl.gz"))
+    assert [r["details"]["n"] for r in manager.get_operation_history(limit=3, operation="destroy")] == [28, 26, 24]
+
+    manager.backend.close()
+    migrated = StateManager(tmp_path, backend="sqlite")
+    assert len(migrated.get_operation_history(limit=None)) == 30
+    assert [r["details"]["n"] for r in migrated.get_operation_history(limit=2, operation="deploy")] == [29, 27]
@@ -0,0 +1,86 @@
+"""Tests for leases"""
+
+import json
+import time
+
+import pytest
+
+from cloud_core.deployment.lease import LeaseError, LeaseManager
+from cloud_core.deployment.state_manager import StateManager
+
+
+def test_lease_is_exclusive(tmp_path):
+    """Test a held lease can't be acquired again until released"""
+    leases = LeaseManager(tmp_path)
+
+    with leases.acquire("deployment", "deploy", heartbeat=False):
+        with pytest.raises(LeaseError, match="deploy"):
+            leases.acquire("deployment", "destroy")
+        assert leases.holder("deployment")["operation"] == "deploy"
+
+    assert leases.holder("deployment") is None
+    leases.acquire("deployment", heartbeat=False).release()
+
+
+def test_stale_lease_is_taken_over(tmp_path):
+    """Test a lease without a recent heartbeat can be taken over"""
+    leases = LeaseManager(tmp_path, ttl=60)
+    stale = leases.acquire("stack-network-dev", heartbeat=False)
+
+    record = dict(stale.record, heartbeat_at=time.time() - 120)
+    (tmp_path / "stack-network-dev.lease").write_text(json.dumps(record))
+
+    lease = leases.acquire("stack-network-dev", heartbeat=False)
+    assert lease.token != stale.token
+
+    # The previous holder can no longer release or renew it
+    stale.release()
+    assert leases.holder("stack-network-dev")["token"] == lease.token
+    assert leases.renew(stale) is False
+    lease.release()
+
+
+def test_heartbeat_renews_lease(tmp_path):
+    """Test the heartbeat keeps a lease fresh"""
+    leases = LeaseManager(tmp_path, ttl=0.3)
+
+    with leases.acquire("deployment"):
+        time.sleep(0.5)
+        assert leases.holder("deployment") is not None
+
+
+def test_deployment_and_stack_leases(tmp_path):
+    """Test disjoint stacks can be leased together but not with the whole deployment"""
+    first = StateManager(tmp_path)
+    second = StateManager(tmp_path)
+
+    network = first.acquire_stack_lease("network", "dev", "deploy-stack")
+    database = second.acquire_stack_lease("database", "dev", "deploy-stack")
+
+    with pytest.raises(LeaseError):
+        second.acquire_stack_lease("network", "dev", "deploy-stack")
+    with pytest.raises(LeaseError, match="stack-"):
+        second.acquire_deployment_lease("deploy")
+
+    network.release()
+    database.release()
+
+    with first.acquire_deployment_lease("deploy"):
+        with pytest.raises(LeaseError, match="Deployment is locked"):
+            second.acquire_stack_lease("network", "dev", "deploy-stack")
+
+
+def test_lost_lease_fails_check(tmp_path):
+    """Test a lease taken over by another holder is flagged as lost"""
+    leases = LeaseManager(tmp_path, ttl=0.3)
+
+    with leases.acquire("deployment") as lease:
+        lease.check()
+
+        record = dict(lease.record, token="another-holder")
+        (tmp_path / "deployment.lease").write_text(json.dumps(record))
+        time.sleep(0.5)
+
+        assert lease.lost
+        with pytest.raises(LeaseError, match="taken over"):
+            lease.check()
@@ -0,0 +1,56 @@
+"""Tests for lock recovery"""
+
+import subprocess
+import sys
+from unittest.mock import Mock
+
+from cloud_core.deployment.lock_recovery import find_stale_stacks, recover_stale_locks
+from cloud_core.deployment.state_manager import StateManager
+from cloud_core.pulumi.pulumi_wrapper import PulumiWrapper, PulumiError
+
+
+def _interrupt(state_manager):
+    """Make the current operation look like its process died"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+
+    state = state_manager.load_state()
+    state["current_operation"]["owner"]["pid"] = process.pid
+    state_manager.save_state(state)
+
+
+def test_no_interrupted_operation(tmp_path):
+    """Test nothing is recovered while the owner is alive"""
+    state_manager = StateManager(tmp_path)
+    state_manager.start_operation("deploy", {"environment": "dev"})
+    state_manager.mark_in_flight("network", "dev")
+    pulumi_wrapper = Mock(spec=PulumiWrapper)
+
+    assert find_stale_stacks(state_manager) == []
+    assert recover_stale_locks(state_manager, pulumi_wrapper) is None
+    pulumi_wrapper.cancel_update.assert_not_called()
+
+
+def test_recover_stale_locks(tmp_path):
+    """Test stacks left in flight are cancelled and the operation is closed"""
+    state_manager = StateManager(tmp_path)
+    state_manager.start_operation("deploy", {"environment": "dev"})
+    state_manager.mark_in_flight("network", "dev")
+    state_manager.mark_in_flight("database", "dev")
+    _interrupt(state_manager)
+
+    def cancel_update(stack_name):
+        if stack_name == "database-dev":
+            raise PulumiError("no update in progress")
+
+    pulumi_wrapper = Mock(spec=PulumiWrapper)
+    pulumi_wrapper.cancel_update.side_effect = cancel_update
+
+    assert [entry["stack_name"] for entry in find_stale_stacks(state_manager)] == ["network", "database"]
+
+    result = recover_stale_locks(state_manager, pulumi_wrapper)
+
+    assert result["recovered"] == ["network"]
+    assert "no update in progress" in result["failed"]["database"]
+    assert state_manager.get_current_operation() is None
+    assert state_manager.get_operation_history(limit=1)[0]["status"] == "interrupted"
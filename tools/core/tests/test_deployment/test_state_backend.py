@@ -0,0 +1,200 @@
+"""Tests for state backends"""
+
+import sqlite3
+import threading
+
+import pytest
+import yaml
+
+from cloud_core.deployment.state_backend import SqliteStateBackend, YamlStateBackend
+from cloud_core.deployment.state_manager import StateManager, DeploymentStatus, StackStatus
+
+
+@pytest.fixture(params=["yaml", "sqlite"])
+def state_manager(request, tmp_path):
+    """Create a StateManager on each backend"""
+    return StateManager(tmp_path, backend=request.param)
+
+
+def test_backend_round_trip(state_manager):
+    """Test the StateManager API behaves the same on every backend"""
+    operation_id = state_manager.start_operation("deploy", {"environment": "dev"})
+    state_manager.set_deployment_status(DeploymentStatus.DEPLOYING)
+    state_manager.set_stack_status("network", StackStatus.DEPLOYED, "dev")
+    state_manager.set_stack_status("network", StackStatus.FAILED, "stage")
+    state_manager.complete_operation(True)
+
+    assert state_manager.get_deployment_status() == DeploymentStatus.DEPLOYING
+    assert state_manager.get_all_stack_statuses("dev") == {"network": StackStatus.DEPLOYED}
+    assert state_manager.get_stack_status("network", "stage") == StackStatus.FAILED
+    assert state_manager.get_current_operation() is None
+
+    history = state_manager.get_operation_history()
+    assert [record["status"] for record in history] == ["completed", "started"]
+    assert history[0]["id"] == operation_id
+    assert len(state_manager.get_operation_history(limit=1)) == 1
+
+
+def test_stack_timeline_queries(state_manager):
+    """Test timelines are queryable by stack and by operation on every backend"""
+    for n, operation_id in enumerate(["op-1", "op-2"]):
+        state_manager.record_stack_timeline(
+            [
+                {"stack": "network", "layer": 1, "queued": 100.0 + n, "started": 101.0 + n,
+                 "ended": 110.0 + n, "attempts": 1, "outcome": "success"},
+                {"stack": "compute", "layer": 2, "queued": 110.0, "started": None,
+                 "ended": None, "attempts": 0, "outcome": "skipped"},
+            ],
+            "dev",
+            operation_id,
+            "deploy",
+        )
+
+    network = state_manager.get_stack_timeline("network", "dev")
+    assert [entry["id"] for entry in network] == ["op-2", "op-1"]
+    assert network[0]["wait"] == 1.0
+    assert network[0]["duration"] == 9.0
+    assert state_manager.get_stack_timeline("network", "prod") == []
+    assert len(state_manager.get_stack_timeline("network", "dev", limit=1)) == 1
+
+    operation = state_manager.get_operation_timeline("op-1")
+    assert [entry["stack"] for entry in operation] == ["network", "compute"]
+    assert operation[1]["duration"] is None
+
+
+def test_sqlite_concurrent_stack_updates(tmp_path):
+    """Test concurrent writers don't lose each other's updates"""
+    state_manager = StateManager(tmp_path, backend="sqlite")
+
+    def deploy(index: int) -> None:
+        state_manager.set_stack_status(f"stack{index}", StackStatus.DEPLOYED, "dev")
+        state_manager.record_operation("deploy-stack", "completed", {"stack": index})
+
+    threads = [threading.Thread(target=deploy, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(state_manager.get_all_stack_statuses("dev")) == 20
+    assert len(state_manager.get_operation_history(limit=100)) == 20
+
+
+def test_sqlite_uses_wal(tmp_path):
+    """Test the database runs in WAL mode"""
+    backend = SqliteStateBackend(tmp_path / "state.db")
+    backend.set_value("deployment_status", "deployed")
+
+    conn = sqlite3.connect(str(tmp_path / "state.db"))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+    backend.close()
+
+
+def test_sqlite_imports_existing_yaml_state(tmp_path):
+    """Test switching a YAML deployment to SQLite keeps its state and history"""
+    yaml_manager = StateManager(tmp_path)
+    yaml_manager.start_operation("deploy", {"environment": "dev"})
+    yaml_manager.set_stack_status("network", StackStatus.DEPLOYED, "dev")
+    yaml_manager.complete_operation(True)
+
+    sqlite_manager = StateManager(tmp_path, backend="sqlite")
+    assert isinstance(sqlite_manager.backend, SqliteStateBackend)
+    assert sqlite_manager.get_stack_status("network", "dev") == StackStatus.DEPLOYED
+    assert [r["status"] for r in sqlite_manager.get_operation_history()] == ["completed", "started"]
+
+    # Once a database exists it is used by default
+    assert isinstance(StateManager(tmp_path).backend, SqliteStateBackend)
+
+
+def test_export_and_import_yaml(tmp_path):
+    """Test state can be exported to and imported from the YAML formats"""
+    source = StateManager(tmp_path / "source", backend=SqliteStateBackend(tmp_path / "source.db"))
+    source.set_stack_status("network", StackStatus.DEPLOYED, "dev")
+    source.record_operation("deploy", "completed")
+
+    state_file = tmp_path / "exported.yaml"
+    history_file = tmp_path / "exported.jsonl"
+    source.export_yaml(state_file, history_file)
+
+    with open(state_file, "r", encoding="utf-8") as f:
+        assert yaml.safe_load(f)["stacks"]["network-dev"]["status"] == "deployed"
+
+    (tmp_path / "target").mkdir()
+    target = StateManager(tmp_path / "target")
+    target.import_yaml(state_file, history_file)
+
+    assert isinstance(target.backend, YamlStateBackend)
+    assert target.get_stack_status("network", "dev") == StackStatus.DEPLOYED
+    assert target.get_operation_history()[0]["status"] == "completed"
+
+
+def test_unknown_backend(tmp_path):
+    """Test an unknown backend name is rejected"""
+    with pytest.raises(ValueError):
+        StateManager(tmp_path, backend="etcd")
+
+
+def _on_disk(state_file):
+    with open(state_file, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def test_yaml_writes_behind(tmp_path):
+    """Test changes are coalesced in memory until flushed"""
+    backend = YamlStateBackend(tmp_path / "state.yaml", tmp_path / "history.jsonl", flush_interval=60)
+    generation = _on_disk(backend.state_file)["generation"]
+
+    for i in range(5):
+        backend.set_stack(f"stack{i}-dev", {"stack_name": f"stack{i}", "environment": "dev"})
+
+    assert len(backend.get_stacks("dev")) == 5
+    assert _on_disk(backend.state_file)["stacks"] == {}
+
+    backend.flush()
+
+    on_disk = _on_disk(backend.state_file)
+    assert len(on_disk["stacks"]) == 5
+    assert on_disk["generation"] == generation + 1
+    assert not list(tmp_path.glob(".state.yaml-*"))
+
+
+def test_yaml_reads_from_memory(tmp_path):
+    """Test getters don't re-parse the file"""
+    from unittest.mock import patch
+
+    state_manager = StateManager(tmp_path)
+    state_manager.set_stack_status("network", StackStatus.DEPLOYED, "dev")
+
+    with patch.object(state_manager.backend, "_read") as read:
+        state_manager.get_deployment_summary("dev")
+        state_manager.get_stack_status("network", "dev")
+        read.assert_not_called()
+
+
+def test_yaml_merges_external_changes(tmp_path):
+    """Test pending changes are applied on top of another process's write"""
+    first = YamlStateBackend(tmp_path / "state.yaml", tmp_path / "history.jsonl", flush_interval=60)
+    second = YamlStateBackend(tmp_path / "state.yaml", tmp_path / "history.jsonl", flush_interval=0)
+
+    first.set_stack("network-dev", {"stack_name": "network", "environment": "dev"})
+    second.set_stack("database-dev", {"stack_name": "database", "environment": "dev"})
+
+    # The other process's change is seen without a flush of our own
+    assert set(first.get_stacks()) == {"network-dev", "database-dev"}
+
+    first.flush()
+    assert set(_on_disk(first.state_file)["stacks"]) == {"network-dev", "database-dev"}
+
+
+def test_yaml_operation_boundaries_flush(tmp_path):
+    """Test starting and completing operations writes state immediately"""
+    state_manager = StateManager(tmp_path, backend=YamlStateBackend(
+        tmp_path / ".deployment-state.yaml", tmp_path / ".operation-history.jsonl", flush_interval=60
+    ))
+
+    operation_id = state_manager.start_operation("deploy", {"environment": "dev"})
+    assert _on_disk(state_manager.state_file)["current_operation"]["id"] == operation_id
+
+    state_manager.complete_operation(True)
+    assert _on_disk(state_manager.state_file)["current_operation"] is None
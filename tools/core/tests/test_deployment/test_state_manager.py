@@ -239,6 +239,19 @@ def test_state_manager_complete_operation_failure(temp_deployment_dir):
     assert history[0]["details"]["error"] == "Deployment failed"
 
 
+def test_state_manager_complete_operation_records_id_and_duration(temp_deployment_dir):
+    """Test the final record of an operation carries its ID and duration"""
+    manager = StateManager(temp_deployment_dir)
+
+    operation_id = manager.start_operation("deploy")
+    manager.complete_operation(success=True)
+
+    completed, started = manager.get_operation_history(limit=2)
+    assert completed["id"] == started["id"] == operation_id
+    assert completed["duration"] >= 0
+    assert "duration" not in started
+
+
 def test_state_manager_empty_operation_history(temp_deployment_dir):
     """Test getting history when no operations recorded"""
     manager = StateManager(temp_deployment_dir)
@@ -268,3 +281,73 @@ def test_state_manager_get_all_stacks_empty(temp_deployment_dir):
     statuses = manager.get_all_stack_statuses("dev")
 
     assert statuses == {}
+
+
+def test_state_manager_operation_ids(temp_deployment_dir):
+    """Test operations get an ID shared by their history records"""
+    manager = StateManager(temp_deployment_dir)
+
+    operation_id = manager.start_operation("deploy", {"environment": "dev"})
+
+    assert operation_id.startswith("op-")
+    assert manager.get_current_operation()["id"] == operation_id
+
+    manager.complete_operation(success=True)
+
+    history = manager.get_operation_history(limit=2)
+    assert [record["id"] for record in history] == [operation_id, operation_id]
+    assert [record["status"] for record in history] == ["completed", "started"]
+
+
+def _dead_pid():
+    """Get the PID of a process that has exited"""
+    import subprocess
+    import sys
+
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_state_manager_in_flight_stacks(temp_deployment_dir):
+    """Test stacks in flight are tracked in the current operation"""
+    state_manager = StateManager(temp_deployment_dir)
+    state_manager.start_operation("deploy", {"environment": "dev"})
+
+    state_manager.mark_in_flight("network", "dev")
+    state_manager.mark_in_flight("database", "dev")
+    state_manager.clear_in_flight("network", "dev")
+
+    in_flight = state_manager.get_current_operation()["in_flight"]
+    assert [entry["stack_name"] for entry in in_flight] == ["database"]
+
+    # Our own process is alive
+    assert state_manager.get_interrupted_operation() is None
+
+
+def test_state_manager_interrupted_operation(temp_deployment_dir):
+    """Test an operation whose process died is reported and can be closed"""
+    state_manager = StateManager(temp_deployment_dir)
+    operation_id = state_manager.start_operation("deploy", {"environment": "dev"})
+    state_manager.mark_in_flight("network", "dev")
+
+    state = state_manager.load_state()
+    state["current_operation"]["owner"]["pid"] = _dead_pid()
+    state_manager.save_state(state)
+
+    interrupted = state_manager.get_interrupted_operation()
+    assert interrupted["id"] == operation_id
+
+    state_manager.close_interrupted_operation({"recovered": ["network"]})
+
+    assert state_manager.get_current_operation() is None
+    assert state_manager.get_stack_status("network", "dev") == StackStatus.FAILED
+    history = state_manager.get_operation_history(limit=1)
+    assert history[0]["status"] == "interrupted"
+    assert history[0]["id"] == operation_id
+
+
+def test_state_manager_owner_on_other_host_assumed_alive():
+    """Test owners that cannot be checked are assumed alive"""
+    assert StateManager.is_owner_alive(None) is True
+    assert StateManager.is_owner_alive({"host": "some-other-host.invalid", "pid": 1}) is True
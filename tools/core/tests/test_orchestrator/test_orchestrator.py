@@ -384,3 +384,269 @@ def test_orchestrator_callbacks():
     assert len(callback_data["stack_completes"]) == 1
     assert len(callback_data["layer_starts"]) == 1
     assert len(callback_data["layer_completes"]) == 1
+
+
+def test_resource_event_handler():
+    """Test resource events are counted per stack and forwarded"""
+    from cloud_core.pulumi.event_stream import ResourceEvent
+
+    orchestrator = Orchestrator()
+    forwarded = []
+    orchestrator.on_resource_event = lambda stack, event: forwarded.append((stack, event.kind))
+
+    stacks_config = {
+        "network": {
+            "enabled": True,
+            "dependencies": [],
+            "layer": 1
+        }
+    }
+
+    plan = orchestrator.create_plan(stacks_config)
+
+    async def stack_executor(stack_name: str):
+        handle = orchestrator.resource_event_handler(stack_name)
+        handle(ResourceEvent(kind="started", op="create", urn="urn:a"))
+        handle(ResourceEvent(kind="completed", op="create", urn="urn:a"))
+        handle(ResourceEvent(kind="completed", op="same", urn="urn:b"))
+        return (True, None)
+
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    assert result.stack_executions["network"].resource_changes == {"create": 1, "same": 1}
+    assert forwarded == [
+        ("network", "started"),
+        ("network", "completed"),
+        ("network", "completed"),
+    ]
+
+
+def test_execute_plan_waits_for_own_prepare():
+    """Test each stack waits only for its own prepare step"""
+    import threading
+
+    orchestrator = Orchestrator()
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+        "database": {"enabled": True, "dependencies": ["network"], "layer": 2},
+    })
+
+    database_gate = threading.Event()
+    prepared = []
+    deployed = []
+
+    def prepare(stack_name: str):
+        if stack_name == "database":
+            # Not ready until network has deployed
+            assert database_gate.wait(timeout=5)
+        prepared.append(stack_name)
+        return stack_name
+
+    async def stack_executor(stack_name: str):
+        assert stack_name in prepared
+        deployed.append(stack_name)
+        if stack_name == "network":
+            database_gate.set()
+        return (True, None)
+
+    futures = orchestrator.start_prepare(plan, prepare, max_workers=2)
+    assert set(futures) == {"network", "database"}
+
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    assert result.success
+    assert deployed == ["network", "database"]
+    assert orchestrator.prepare_futures == {}
+
+
+def test_execute_plan_prepare_failure():
+    """Test a failed prepare step fails only that stack's deploy"""
+    orchestrator = Orchestrator()
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+    })
+
+    def prepare(stack_name: str):
+        raise RuntimeError("npm ci failed")
+
+    async def stack_executor(stack_name: str):
+        raise AssertionError("stack should not deploy")
+
+    orchestrator.start_prepare(plan, prepare)
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    assert not result.success
+    assert result.failed_stacks == 1
+    assert "npm ci failed" in result.stack_executions["network"].error
+
+
+def test_resource_budget_limits_threaded_deploys():
+    """Test stacks deploying in worker threads share the resource budget"""
+    import threading
+    from cloud_core.orchestrator.resource_budget import ResourceBudget
+
+    orchestrator = Orchestrator(max_parallel=2)
+    orchestrator.resource_budget = ResourceBudget(4)
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+        "dns": {"enabled": True, "dependencies": [], "layer": 1},
+    })
+
+    # Each blocking deploy waits for the other, so both must run at once
+    both_running = threading.Barrier(2, timeout=5)
+    granted = {}
+    in_use = []
+
+    def deploy(parallel):
+        both_running.wait()
+        in_use.append(orchestrator.resource_budget.in_use)
+        return (True, None)
+
+    async def stack_executor(stack_name: str):
+        async with orchestrator.reserve_resources(3) as parallel:
+            granted[stack_name] = parallel
+            return await asyncio.to_thread(deploy, parallel)
+
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    assert result.success
+    assert sorted(granted.values()) == [1, 3]
+    assert in_use == [4, 4]
+    assert orchestrator.resource_budget.in_use == 0
+
+
+def test_reserve_resources_charges_default_share():
+    """Test a stack without a --parallel value is still charged to the budget"""
+    from cloud_core.orchestrator.resource_budget import ResourceBudget
+
+    async def run():
+        orchestrator = Orchestrator()
+        assert await _reserve(orchestrator, None) is None
+
+        orchestrator.resource_budget = ResourceBudget(40)
+        async with orchestrator.reserve_resources(None) as parallel:
+            return parallel, orchestrator.resource_budget.in_use
+
+    assert asyncio.run(run()) == (16, 16)
+
+
+async def _reserve(orchestrator, requested):
+    async with orchestrator.reserve_resources(requested) as parallel:
+        return parallel
+
+
+def test_open_stack_log(tmp_path):
+    """Test stack output is logged to a file and tailed on the execution record"""
+    orchestrator = Orchestrator()
+    orchestrator.log_dir = tmp_path / "logs"
+    orchestrator.output_tail_bytes = 16
+
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+    })
+
+    async def stack_executor(stack_name: str):
+        with orchestrator.open_stack_log(stack_name) as log:
+            for i in range(100):
+                log.write(f"line {i}\n")
+        return (False, "failed")
+
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    execution = result.stack_executions["network"]
+    assert execution.output.getvalue() == "line 98\nline 99\n"
+    log_lines = (tmp_path / "logs" / "network.log").read_text().splitlines()
+    assert len(log_lines) == 100
+
+
+def test_execute_plan_tracks_in_flight(tmp_path):
+    """Test stacks are recorded in flight only while they run"""
+    from cloud_core.deployment.state_manager import StateManager
+
+    state_manager = StateManager(tmp_path)
+    state_manager.start_operation("deploy", {"environment": "dev"})
+
+    orchestrator = Orchestrator()
+    orchestrator.state_manager = state_manager
+    orchestrator.environment = "dev"
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+    })
+
+    seen = []
+
+    async def stack_executor(stack_name: str):
+        seen.extend(entry["stack_name"] for entry in state_manager.get_current_operation()["in_flight"])
+        return (True, None)
+
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    assert result.success
+    assert seen == ["network"]
+    assert state_manager.get_current_operation()["in_flight"] == []
+
+
+def test_execute_plan_records_stack_timeline(tmp_path):
+    """Test each stack's timeline is stored with the current operation"""
+    from cloud_core.deployment.state_manager import StateManager
+
+    state_manager = StateManager(tmp_path)
+    operation_id = state_manager.start_operation("deploy", {"environment": "dev"})
+
+    orchestrator = Orchestrator()
+    orchestrator.state_manager = state_manager
+    orchestrator.environment = "dev"
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+        "database": {"enabled": True, "dependencies": ["network"], "layer": 2},
+        "compute": {"enabled": True, "dependencies": ["database"], "layer": 3},
+    })
+
+    async def stack_executor(stack_name: str):
+        return (stack_name != "database", "boom" if stack_name == "database" else None)
+
+    asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+
+    timeline = state_manager.get_operation_timeline(operation_id)
+    assert [(e["stack"], e["outcome"], e["attempts"]) for e in timeline] == [
+        ("network", "success", 1),
+        ("database", "failed", 1),
+        ("compute", "skipped", 0),
+    ]
+    assert timeline[0]["queued"] <= timeline[0]["started"] <= timeline[0]["ended"]
+    assert timeline[0]["duration"] is not None
+    assert timeline[1]["error"] == "boom"
+    assert timeline[2]["started"] is None and timeline[2]["duration"] is None
+
+    history = state_manager.get_stack_timeline("network", "dev")
+    assert history[0]["id"] == operation_id
+    assert history[0]["operation"] == "deploy"
+
+
+def test_execute_plan_stops_when_lease_lost(tmp_path):
+    """Test no further stack starts once the operation's lease is lost"""
+    from cloud_core.deployment.lease import LeaseManager
+
+    lease = LeaseManager(tmp_path).acquire("deployment", heartbeat=False)
+
+    orchestrator = Orchestrator()
+    orchestrator.lease = lease
+    plan = orchestrator.create_plan({
+        "network": {"enabled": True, "dependencies": [], "layer": 1},
+        "database": {"enabled": True, "dependencies": ["network"], "layer": 2},
+    })
+
+    started = []
+
+    async def stack_executor(stack_name: str):
+        started.append(stack_name)
+        # Another process takes the deployment over while network deploys
+        lease.lost = True
+        return (True, None)
+
+    result = asyncio.run(orchestrator.execute_plan(plan, stack_executor))
+    lease.release()
+
+    assert not result.success
+    assert started == ["network"]
+    assert "taken over" in result.error_message
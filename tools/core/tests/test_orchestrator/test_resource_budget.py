@@ -0,0 +1,35 @@
+"""Tests for ResourceBudget"""
+
+import asyncio
+
+from cloud_core.orchestrator.resource_budget import ResourceBudget
+
+
+def test_grants_what_is_left():
+    """Test requests beyond the remaining budget are trimmed"""
+
+    async def run():
+        budget = ResourceBudget(10)
+        first = await budget.acquire(8)
+        second = await budget.acquire(8)
+        return first, second, budget.in_use
+
+    assert asyncio.run(run()) == (8, 2, 10)
+
+
+def test_waits_while_exhausted():
+    """Test a reservation waits until another one is released"""
+    order = []
+
+    async def stack(name, budget, delay):
+        async with budget.reserve(4) as granted:
+            order.append((name, granted))
+            await asyncio.sleep(delay)
+
+    async def run():
+        budget = ResourceBudget(4)
+        await asyncio.gather(stack("a", budget, 0.05), stack("b", budget, 0))
+        return budget.in_use
+
+    assert asyncio.run(run()) == 0
+    assert order == [("a", 4), ("b", 4)]
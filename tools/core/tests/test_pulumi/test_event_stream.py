@@ -0,0 +1,177 @@
+"""Tests for engine event stream parsing"""
+
+import json
+import sys
+import pytest
+from cloud_core.pulumi.event_stream import (
+    EngineEventTracker,
+    EventLogTailer,
+)
+from cloud_core.pulumi.pulumi_wrapper import PulumiWrapper, PulumiError
+
+
+VPC_URN = "urn:pulumi:dev::proj::aws:ec2/vpc:Vpc::main-vpc"
+
+
+def _pre(op, urn=VPC_URN):
+    return {"resourcePreEvent": {"metadata": {"op": op, "urn": urn, "type": "aws:ec2/vpc:Vpc"}}}
+
+
+def _outputs(op, urn=VPC_URN):
+    return {"resOutputsEvent": {"metadata": {"op": op, "urn": urn, "type": "aws:ec2/vpc:Vpc"}}}
+
+
+def test_tracker_resource_lifecycle():
+    """Test started/completed events are emitted and counted"""
+    events = []
+    tracker = EngineEventTracker(on_event=events.append)
+
+    tracker.handle_event(_pre("create"))
+    assert VPC_URN in tracker.in_flight
+
+    tracker.handle_event(_outputs("create"))
+
+    assert [e.kind for e in events] == ["started", "completed"]
+    assert events[1].op == "create"
+    assert events[1].resource_name == "main-vpc"
+    assert tracker.changes == {"create": 1}
+    assert tracker.in_flight == {}
+
+
+def test_tracker_failure_and_diagnostic():
+    """Test failures and error diagnostics are retained"""
+    tracker = EngineEventTracker()
+
+    tracker.handle_event(_pre("update"))
+    tracker.handle_event({"resOpFailedEvent": {"metadata": {"op": "update", "urn": VPC_URN}}})
+    tracker.handle_event({"diagnosticEvent": {
+        "severity": "error",
+        "message": "<{%reset%}>creating VPC: VpcLimitExceeded<{%reset%}>\n",
+        "urn": VPC_URN,
+    }})
+    tracker.handle_event({"diagnosticEvent": {"severity": "info", "message": "ignored"}})
+
+    result = tracker.result()
+
+    assert result["failed_resources"] == [VPC_URN]
+    assert result["errors"] == ["creating VPC: VpcLimitExceeded"]
+    assert tracker.first_error() == "creating VPC: VpcLimitExceeded"
+
+
+def test_tracker_summary_event():
+    """Test summary event provides final resource changes"""
+    events = []
+    tracker = EngineEventTracker(on_event=events.append)
+
+    tracker.handle_event({"summaryEvent": {"resourceChanges": {"create": 2, "same": 5}}})
+
+    assert tracker.result()["changes"] == {"create": 2, "same": 5}
+    assert events[0].kind == "summary"
+
+
+def test_tracker_memory_bounded():
+    """Test retained failures do not grow with stack size"""
+    tracker = EngineEventTracker(max_failures=5)
+
+    for i in range(1000):
+        urn = f"{VPC_URN}-{i}"
+        tracker.handle_event(_pre("create", urn))
+        tracker.handle_event({"resOpFailedEvent": {"metadata": {"op": "create", "urn": urn}}})
+
+    assert len(tracker.failures) == 5
+    assert tracker.in_flight == {}
+    assert tracker.event_count == 2000
+
+
+def test_tracker_ignores_malformed_lines():
+    """Test malformed and blank lines are skipped"""
+    tracker = EngineEventTracker()
+
+    assert tracker.handle_line("") is None
+    assert tracker.handle_line("{not json") is None
+    assert tracker.handle_line(json.dumps(_outputs("create"))).kind == "completed"
+
+
+def test_tracker_callback_errors_do_not_propagate():
+    """Test a failing callback does not break parsing"""
+    def broken(event):
+        raise RuntimeError("boom")
+
+    tracker = EngineEventTracker(on_event=broken)
+
+    assert tracker.handle_event(_outputs("create")) is not None
+    assert tracker.changes == {"create": 1}
+
+
+def test_tailer_incremental_reads(tmp_path):
+    """Test tailer yields only complete lines across reads"""
+    log = tmp_path / "events.jsonl"
+    tailer = EventLogTailer(log)
+
+    assert list(tailer.read_lines()) == []
+
+    with open(log, "w") as f:
+        f.write('{"a": 1}\n{"b":')
+        f.flush()
+        assert list(tailer.read_lines()) == ['{"a": 1}\n']
+
+        f.write(' 2}\n{"c": 3}')
+        f.flush()
+        assert list(tailer.read_lines()) == ['{"b": 2}\n']
+        assert list(tailer.read_lines(final=True)) == ['{"c": 3}']
+
+    tailer.close()
+
+
+FAKE_PULUMI = """
+import json, sys
+log = sys.argv[sys.argv.index("--event-log") + 1]
+urn = "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::assets"
+with open(log, "w") as f:
+    f.write(json.dumps({"resourcePreEvent": {"metadata": {"op": "create", "urn": urn}}}) + "\\n")
+    f.write(json.dumps({"resOutputsEvent": {"metadata": {"op": "create", "urn": urn}}}) + "\\n")
+    if "--fail" in sys.argv:
+        f.write(json.dumps({"diagnosticEvent": {"severity": "error", "message": "bucket exists"}}) + "\\n")
+        sys.exit(1)
+    f.write(json.dumps({"summaryEvent": {"resourceChanges": {"create": 1}}}) + "\\n")
+print("raw output that should not reach the terminal")
+"""
+
+
+@pytest.fixture
+def fake_pulumi(tmp_path):
+    """Script emulating a Pulumi engine command writing an event log"""
+    script = tmp_path / "fake_pulumi.py"
+    script.write_text(FAKE_PULUMI)
+    return [sys.executable, str(script)]
+
+
+def test_run_streaming_success(fake_pulumi, tmp_path):
+    """Test streaming run reports events and aggregated changes"""
+    wrapper = PulumiWrapper("test-org", "test-project", working_dir=tmp_path)
+    events = []
+
+    result = wrapper._run_streaming(fake_pulumi, on_event=events.append)
+
+    assert result["returncode"] == 0
+    assert result["changes"] == {"create": 1}
+    assert [e.kind for e in events] == ["started", "completed", "summary"]
+
+
+def test_run_streaming_failure(fake_pulumi, tmp_path):
+    """Test streaming run surfaces the engine error message"""
+    wrapper = PulumiWrapper("test-org", "test-project", working_dir=tmp_path)
+
+    with pytest.raises(PulumiError, match="bucket exists"):
+        wrapper._run_streaming(fake_pulumi + ["--fail"], on_event=lambda e: None)
+
+
+def test_run_streaming_captures_output(fake_pulumi, tmp_path):
+    """Test raw output is handed to on_output instead of being discarded"""
+    wrapper = PulumiWrapper("test-org", "test-project", working_dir=tmp_path)
+    lines = []
+
+    result = wrapper._run_streaming(fake_pulumi, on_output=lines.append)
+
+    assert result["changes"] == {"create": 1}
+    assert lines == ["raw output that should not reach the terminal\n"]
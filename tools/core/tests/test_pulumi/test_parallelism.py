@@ -0,0 +1,56 @@
+"""Tests for ParallelismTuner"""
+
+from cloud_core.pulumi.parallelism import ParallelismTuner, count_throttle_errors
+
+
+def test_count_throttle_errors():
+    """Test throttling errors are recognized"""
+    errors = [
+        "error: ThrottlingException: Rate exceeded",
+        "error: RequestLimitExceeded",
+        "error: AccessDenied",
+        "",
+    ]
+
+    assert count_throttle_errors(errors) == 2
+
+
+def test_choose_default_and_override(tmp_path):
+    """Test stacks without history use the default and overrides win"""
+    tuner = ParallelismTuner(tmp_path)
+
+    assert tuner.choose("network", "dev") == ParallelismTuner.DEFAULT_PARALLEL
+    assert tuner.choose("network", "dev", override=5) == 5
+
+
+def test_choose_from_resource_count(tmp_path):
+    """Test parallelism follows the stack size"""
+    tuner = ParallelismTuner(tmp_path)
+    tuner.record("network", "dev", parallel=16, resources=40, throttled=0)
+
+    assert tuner.choose("network", "dev") == 10
+
+    tuner.record("network", "dev", parallel=10, resources=1000, throttled=0)
+    assert tuner.choose("network", "dev") == 20  # recovers by doubling
+    tuner.record("network", "dev", parallel=20, resources=1000, throttled=0)
+    tuner.record("network", "dev", parallel=40, resources=1000, throttled=0)
+    assert tuner.choose("network", "dev") == ParallelismTuner.MAX_PARALLEL
+
+
+def test_choose_halves_after_throttling(tmp_path):
+    """Test a throttled run halves the next run's parallelism"""
+    tuner = ParallelismTuner(tmp_path)
+    tuner.record("network", "dev", parallel=16, resources=200, throttled=3)
+
+    assert tuner.choose("network", "dev") == 8
+
+
+def test_record_keeps_resources_and_persists(tmp_path):
+    """Test unknown resource counts keep the previous count across instances"""
+    tuner = ParallelismTuner(tmp_path)
+    tuner.record("network", "dev", parallel=16, resources=40, throttled=0)
+    tuner.record("network", "dev", parallel=10, resources=None, throttled=0)
+
+    reloaded = ParallelismTuner(tmp_path)
+    assert reloaded.choose("network", "dev") == 10
+    assert reloaded.choose("network", "stage") == ParallelismTuner.DEFAULT_PARALLEL
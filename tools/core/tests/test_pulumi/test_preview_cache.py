@@ -0,0 +1,46 @@
+"""Tests for PreviewCache"""
+
+from cloud_core.pulumi.preview_cache import PreviewCache, compute_preview_key
+
+
+def test_preview_key_inputs():
+    """Test key changes with config and upstream state versions"""
+    key = compute_preview_key("abc", {"p:region": "us-east-1"}, {"network": "t1"})
+
+    assert key == compute_preview_key("abc", {"p:region": "us-east-1"}, {"network": "t1"})
+    assert key != compute_preview_key("abc", {"p:region": "us-west-2"}, {"network": "t1"})
+    assert key != compute_preview_key("abc", {"p:region": "us-east-1"}, {"network": "t2"})
+    assert key != compute_preview_key("abd", {"p:region": "us-east-1"}, {"network": "t1"})
+
+
+def test_cache_roundtrip(tmp_path):
+    """Test cached results are returned only for the same key"""
+    cache = PreviewCache(tmp_path)
+    result = {"success": True, "changes": {"create": 1}, "error": None}
+
+    assert cache.get("network", "dev", "k1") is None
+
+    cache.put("network", "dev", "k1", result)
+
+    assert cache.get("network", "dev", "k1") == result
+    assert cache.get("network", "dev", "k2") is None
+    assert cache.get("network", "prod", "k1") is None
+
+
+def test_cache_ignores_corrupt_entry(tmp_path):
+    """Test unreadable entries are treated as misses"""
+    cache = PreviewCache(tmp_path)
+    cache.cache_dir.mkdir()
+    (cache.cache_dir / "network-dev.json").write_text("{broken")
+
+    assert cache.get("network", "dev", "k1") is None
+
+
+def test_cache_clear(tmp_path):
+    """Test clearing removes cached previews"""
+    cache = PreviewCache(tmp_path)
+    cache.put("network", "dev", "k1", {"success": True})
+
+    cache.clear()
+
+    assert cache.get("network", "dev", "k1") is None
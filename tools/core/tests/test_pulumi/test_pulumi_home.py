@@ -0,0 +1,41 @@
+"""Tests for PulumiHomes"""
+
+import threading
+
+from cloud_core.pulumi.pulumi_home import PulumiHomes
+
+
+def test_worker_home_per_thread(tmp_path):
+    """Test each thread gets its own home linked to the shared plugin cache"""
+    user_home = tmp_path / "user"
+    user_home.mkdir()
+    (user_home / "credentials.json").write_text("{}")
+    homes = PulumiHomes(tmp_path / "homes", tmp_path / "cache", user_home=user_home)
+
+    main_home = homes.worker_home()
+    assert homes.worker_home() == main_home
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(homes.worker_home()))
+    thread.start()
+    thread.join()
+
+    assert other[0] != main_home
+    for home in (main_home, other[0]):
+        assert (home / "plugins").resolve() == homes.plugin_cache_dir
+        assert (home / "credentials.json").read_text() == "{}"
+
+
+def test_worker_and_cache_env(tmp_path):
+    """Test worker processes use their home and installs use the cache home"""
+    homes = PulumiHomes(tmp_path / "homes", tmp_path / "cache", user_home=tmp_path / "user")
+
+    worker_env = homes.worker_env({"PATH": "/bin"})
+    assert worker_env["PATH"] == "/bin"
+    assert worker_env["PULUMI_HOME"] == str(homes.worker_home())
+    assert worker_env["PULUMI_DISABLE_AUTOMATIC_PLUGIN_ACQUISITION"] == "true"
+
+    cache_env = homes.cache_env({"PATH": "/bin"})
+    assert cache_env["PULUMI_HOME"] == str(homes.cache_home)
+    assert homes.plugin_cache_dir.is_dir()
+    assert not homes.plugin_cache_dir.is_symlink()
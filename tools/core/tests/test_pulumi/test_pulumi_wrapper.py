@@ -1,9 +1,12 @@
 """Tests for PulumiWrapper"""
 
+import json
 import pytest
+import yaml
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 from cloud_core.pulumi.pulumi_wrapper import PulumiWrapper, PulumiError
+from cloud_core.pulumi.pulumi_home import PulumiHomes
 
 
 @pytest.fixture
@@ -45,6 +48,105 @@ def test_select_stack_with_create(mock_run, pulumi_wrapper):
     assert mock_run.call_count >= 1
 
 
+STACK_LS_OUTPUT = (
+    '[{"name": "test-org/test-project/network-dev", "current": false},'
+    ' {"name": "test-org/test-project/security-dev", "current": false}]'
+)
+
+
+@patch('subprocess.run')
+def test_get_stack_versions(mock_run, pulumi_wrapper):
+    """Test stack versions come from the shared inventory listing"""
+    mock_run.return_value = Mock(
+        returncode=0,
+        stdout='[{"name": "test-org/test-project/network-dev", "lastUpdate": "2025-01-01T00:00:00Z"},'
+               ' {"name": "test-org/test-project/security-dev"}]',
+        stderr=""
+    )
+
+    versions = pulumi_wrapper.get_stack_versions()
+
+    assert versions == {"network-dev": "2025-01-01T00:00:00Z", "security-dev": None}
+    assert pulumi_wrapper.list_stacks() == {"network-dev", "security-dev"}
+    assert mock_run.call_count == 1
+
+
+@patch('subprocess.run')
+def test_list_stacks_cached(mock_run, pulumi_wrapper):
+    """Test stack inventory is loaded once per project"""
+    mock_run.return_value = Mock(returncode=0, stdout=STACK_LS_OUTPUT, stderr="")
+
+    first = pulumi_wrapper.list_stacks()
+    second = pulumi_wrapper.list_stacks()
+
+    assert first == {"network-dev", "security-dev"}
+    assert second == first
+    assert mock_run.call_count == 1
+
+
+@patch('subprocess.run')
+def test_stack_exists(mock_run, pulumi_wrapper):
+    """Test stack existence uses the inventory"""
+    mock_run.return_value = Mock(returncode=0, stdout=STACK_LS_OUTPUT, stderr="")
+
+    assert pulumi_wrapper.stack_exists("network-dev") is True
+    assert pulumi_wrapper.stack_exists("test-org/test-project/security-dev") is True
+    assert pulumi_wrapper.stack_exists("dns-dev") is False
+    assert mock_run.call_count == 1
+
+
+@patch('subprocess.run')
+def test_select_existing_stack_single_call(mock_run, pulumi_wrapper):
+    """Test selecting a known stack does not try to create it"""
+    mock_run.return_value = Mock(returncode=0, stdout=STACK_LS_OUTPUT, stderr="")
+    pulumi_wrapper.list_stacks()
+    mock_run.reset_mock()
+
+    pulumi_wrapper.select_stack("network-dev", create=True)
+
+    assert mock_run.call_count == 1
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:3] == ["pulumi", "stack", "select"]
+    assert "--create" not in cmd
+
+
+@patch('subprocess.run')
+def test_select_missing_stack_creates(mock_run, pulumi_wrapper):
+    """Test selecting an unknown stack creates it in the same call"""
+    mock_run.return_value = Mock(returncode=0, stdout=STACK_LS_OUTPUT, stderr="")
+    pulumi_wrapper.list_stacks()
+    mock_run.reset_mock()
+
+    pulumi_wrapper.select_stack("dns-dev", create=True)
+
+    cmd = mock_run.call_args[0][0]
+    assert "--create" in cmd
+    assert pulumi_wrapper.stack_exists("dns-dev") is True
+
+
+@patch('subprocess.run')
+def test_ensure_stacks_creates_only_missing(mock_run, pulumi_wrapper):
+    """Test bulk provisioning creates missing stacks only"""
+    mock_run.return_value = Mock(returncode=0, stdout=STACK_LS_OUTPUT, stderr="")
+
+    created = pulumi_wrapper.ensure_stacks(["network-dev", "dns-dev", "storage-dev"])
+
+    assert created == ["dns-dev", "storage-dev"]
+    init_calls = [c[0][0] for c in mock_run.call_args_list if c[0][0][:3] == ["pulumi", "stack", "init"]]
+    assert len(init_calls) == 2
+    assert all("--no-select" in cmd for cmd in init_calls)
+    assert pulumi_wrapper.stack_exists("storage-dev") is True
+
+
+@patch('subprocess.run')
+def test_ensure_stacks_nothing_missing(mock_run, pulumi_wrapper):
+    """Test bulk provisioning is a no-op when all stacks exist"""
+    mock_run.return_value = Mock(returncode=0, stdout=STACK_LS_OUTPUT, stderr="")
+
+    assert pulumi_wrapper.ensure_stacks(["network-dev"]) == []
+    assert mock_run.call_count == 1
+
+
 @patch('subprocess.run')
 def test_set_config(mock_run, pulumi_wrapper):
     """Test setting configuration"""
@@ -55,6 +157,75 @@ def test_set_config(mock_run, pulumi_wrapper):
     assert mock_run.called
 
 
+@patch('subprocess.run')
+def test_set_all_config_single_invocation(mock_run, pulumi_wrapper):
+    """Test setting many config values spawns one set-all process"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+
+    written = pulumi_wrapper.set_all_config(
+        {"vpcCidr": "10.0.0.0/16", "azCount": 3, "dbPassword": "hunter2"},
+        secret_keys=["dbPassword"],
+    )
+
+    assert written == 3
+    assert mock_run.call_count == 1
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:3] == ["pulumi", "config", "set-all"]
+    assert "vpcCidr=10.0.0.0/16" in cmd
+    assert "azCount=3" in cmd
+    assert cmd[cmd.index("dbPassword=hunter2") - 1] == "--secret"
+
+
+@patch('subprocess.run')
+def test_set_all_config_skips_unchanged(mock_run, pulumi_wrapper, tmp_path):
+    """Test only keys that differ from Pulumi.<stack>.yaml are written"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    (tmp_path / "Pulumi.network-dev.yaml").write_text(
+        "config:\n"
+        "  test-project:vpcCidr: 10.0.0.0/16\n"
+        "  aws:region: us-east-1\n"
+    )
+
+    pulumi_wrapper.select_stack("network-dev", create=False)
+    mock_run.reset_mock()
+
+    written = pulumi_wrapper.set_all_config({
+        "vpcCidr": "10.0.0.0/16",
+        "aws:region": "us-east-1",
+        "environment": "dev",
+    })
+
+    assert written == 1
+    cmd = mock_run.call_args[0][0]
+    assert "environment=dev" in cmd
+    assert "vpcCidr=10.0.0.0/16" not in cmd
+
+
+@patch('subprocess.run')
+def test_set_all_config_nothing_changed(mock_run, pulumi_wrapper, tmp_path):
+    """Test no process is spawned when config is already up to date"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    (tmp_path / "Pulumi.network-dev.yaml").write_text(
+        "config:\n  test-project:vpcCidr: 10.0.0.0/16\n"
+    )
+
+    pulumi_wrapper.select_stack("network-dev", create=False)
+    mock_run.reset_mock()
+
+    assert pulumi_wrapper.set_all_config({"vpcCidr": "10.0.0.0/16"}) == 0
+    assert not mock_run.called
+
+
+def test_format_command_for_log_masks_secrets():
+    """Test secret values are masked in logged commands"""
+    cmd = ["pulumi", "config", "set-all", "--secret", "dbPassword=hunter2"]
+
+    logged = PulumiWrapper._format_command_for_log(cmd)
+
+    assert "hunter2" not in logged
+    assert "dbPassword=[secret]" in logged
+
+
 @patch('subprocess.run')
 def test_preview(mock_run, pulumi_wrapper):
     """Test preview operation"""
@@ -70,6 +241,23 @@ def test_preview(mock_run, pulumi_wrapper):
     assert mock_run.called
 
 
+@patch('subprocess.run')
+def test_preview_without_config_file(mock_run, pulumi_wrapper):
+    """Test preview runs Pulumi and reports changes without a config file"""
+    mock_run.return_value = Mock(
+        returncode=0,
+        stdout='{"steps": [], "changeSummary": {"create": 2, "same": 3}}',
+        stderr=""
+    )
+
+    result = pulumi_wrapper.preview()
+
+    assert result["success"] is True
+    assert result["changes"] == {"create": 2, "same": 3}
+    assert mock_run.call_args[0][0][:2] == ["pulumi", "preview"]
+    assert "--config-file" not in mock_run.call_args[0][0]
+
+
 @patch('subprocess.run')
 def test_up(mock_run, pulumi_wrapper):
     """Test up operation"""
@@ -97,7 +285,7 @@ def test_get_stack_output(mock_run, pulumi_wrapper):
     """Test getting stack output"""
     mock_run.return_value = Mock(
         returncode=0,
-        stdout='"test-value"',
+        stdout='{"outputKey": "test-value"}',
         stderr=""
     )
 
@@ -107,6 +295,71 @@ def test_get_stack_output(mock_run, pulumi_wrapper):
     assert mock_run.called
 
 
+@patch('subprocess.run')
+def test_stack_outputs_fetched_once(mock_run, pulumi_wrapper):
+    """Test all outputs of a stack come from a single cached call"""
+    mock_run.return_value = Mock(
+        returncode=0, stdout='{"vpcId": "vpc-1", "subnetIds": ["a", "b"]}', stderr=""
+    )
+
+    assert pulumi_wrapper.get_stack_output("test-org/test-project/net-dev", "vpcId") == "vpc-1"
+    assert pulumi_wrapper.get_stack_output("net-dev", "subnetIds") == ["a", "b"]
+    assert pulumi_wrapper.get_stack_output("net-dev", "missing") is None
+
+    assert mock_run.call_count == 1
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:3] == ["pulumi", "stack", "output"]
+    assert "--show-secrets" in cmd
+    assert "test-org/test-project/net-dev" in cmd
+
+
+@patch('subprocess.run')
+def test_stack_outputs_failure_not_cached(mock_run, pulumi_wrapper):
+    """Test failed output queries are retried on next access"""
+    mock_run.side_effect = [
+        Mock(returncode=1, stdout="", stderr="no stack"),
+        Mock(returncode=0, stdout='{"vpcId": "vpc-1"}', stderr=""),
+    ]
+
+    assert pulumi_wrapper.get_all_stack_outputs("net-dev") == {}
+    assert pulumi_wrapper.get_all_stack_outputs("net-dev") == {"vpcId": "vpc-1"}
+
+
+@patch('subprocess.run')
+def test_stack_outputs_invalidated_after_up(mock_run, pulumi_wrapper, tmp_path):
+    """Test updating a stack drops only that stack's cached outputs"""
+    mock_run.return_value = Mock(returncode=0, stdout='{"vpcId": "vpc-1"}', stderr="")
+    pulumi_wrapper.get_all_stack_outputs("net-dev")
+    pulumi_wrapper.get_all_stack_outputs("db-dev")
+
+    pulumi_wrapper.select_stack("net-dev", create=False, cwd=tmp_path)
+    pulumi_wrapper.up(cwd=tmp_path)
+
+    mock_run.reset_mock()
+    pulumi_wrapper.get_all_stack_outputs("db-dev")
+    assert mock_run.call_count == 0
+
+    pulumi_wrapper.get_all_stack_outputs("net-dev")
+    assert mock_run.call_count == 1
+
+
+@patch('subprocess.run')
+def test_prefetch_stack_outputs(mock_run, pulumi_wrapper):
+    """Test upstream outputs are prefetched and then served from cache"""
+    mock_run.side_effect = lambda cmd, **kwargs: Mock(
+        returncode=0, stdout=json.dumps({"name": cmd[4]}), stderr=""
+    )
+
+    outputs = pulumi_wrapper.prefetch_stack_outputs(["net-dev", "db-dev", "net-dev"])
+
+    assert outputs["net-dev"] == {"name": "test-org/test-project/net-dev"}
+    assert set(outputs) == {"net-dev", "db-dev"}
+    assert mock_run.call_count == 2
+
+    pulumi_wrapper.get_stack_output("db-dev", "name")
+    assert mock_run.call_count == 2
+
+
 @patch('subprocess.run')
 def test_pulumi_command_failure(mock_run, pulumi_wrapper):
     """Test Pulumi command failure"""
@@ -128,3 +381,330 @@ def test_check_pulumi_available(pulumi_wrapper):
     except:
         # If Pulumi not installed, that's okay for tests
         pass
+
+
+@pytest.fixture
+def deployment_manifest():
+    """Minimal manifest for composite project naming"""
+    return {
+        "deployment_id": "D1TEST1",
+        "organization": "TestOrg",
+        "project": "test-project",
+    }
+
+
+def test_deployment_context_isolated_workspace(pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test workspace gets its own Pulumi.yaml and source stays untouched"""
+    stack_dir = tmp_path / "stacks" / "network"
+    stack_dir.mkdir(parents=True)
+    original = "name: network\nruntime: nodejs\ndescription: Network stack\n"
+    (stack_dir / "Pulumi.yaml").write_text(original)
+    deployment_dir = tmp_path / "deploy" / "D1TEST1-TestOrg-test-project"
+
+    with pulumi_wrapper.deployment_context(stack_dir, deployment_manifest, deployment_dir, "dev") as workspace:
+        assert workspace == deployment_dir / ".workspaces" / "network-dev"
+        content = yaml.safe_load((workspace / "Pulumi.yaml").read_text())
+        assert content["name"] == "D1TEST1-TestOrg-test-project"
+        assert content["runtime"] == "nodejs"
+        assert content["description"] == "Network stack"
+        assert (workspace / content["main"]).resolve() == stack_dir.resolve()
+        assert (stack_dir / "Pulumi.yaml").read_text() == original
+
+    assert (stack_dir / "Pulumi.yaml").read_text() == original
+    assert list(stack_dir.iterdir()) == [stack_dir / "Pulumi.yaml"]
+
+
+def test_deployment_context_separates_environments(pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test environments of the same stack use different workspaces"""
+    stack_dir = tmp_path / "network"
+    stack_dir.mkdir()
+    deployment_dir = tmp_path / "deployment"
+
+    with pulumi_wrapper.deployment_context(stack_dir, deployment_manifest, deployment_dir, "dev") as dev_ws:
+        with pulumi_wrapper.deployment_context(stack_dir, deployment_manifest, deployment_dir, "prod") as prod_ws:
+            assert dev_ws != prod_ws
+            assert (dev_ws / "Pulumi.yaml").exists()
+            assert (prod_ws / "Pulumi.yaml").exists()
+
+
+def test_deployment_context_temporary_workspace(pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test a temporary workspace is removed when no deployment dir is given"""
+    stack_dir = tmp_path / "network"
+    stack_dir.mkdir()
+
+    with pulumi_wrapper.deployment_context(stack_dir, deployment_manifest) as workspace:
+        assert (workspace / "Pulumi.yaml").exists()
+
+    assert not workspace.exists()
+
+
+def _make_ts_stack(root, runtime="nodejs"):
+    stack_dir = root / "network"
+    stack_dir.mkdir(parents=True)
+    (stack_dir / "Pulumi.yaml").write_text(yaml.safe_dump({"name": "network", "runtime": runtime}))
+    (stack_dir / "tsconfig.json").write_text('{"compilerOptions": {"outDir": "bin"}}')
+    return stack_dir
+
+
+@patch('cloud_core.pulumi.pulumi_wrapper.compile_stack', return_value=True)
+def test_deployment_context_precompiled(mock_compile, pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test precompiled mode runs the compiled JavaScript without TypeScript"""
+    stack_dir = _make_ts_stack(tmp_path)
+
+    with pulumi_wrapper.deployment_context(
+        stack_dir, deployment_manifest, tmp_path / "deployment", "dev", precompiled=True
+    ) as workspace:
+        content = yaml.safe_load((workspace / "Pulumi.yaml").read_text())
+
+    mock_compile.assert_called_once_with(stack_dir.resolve())
+    assert content["runtime"] == {"name": "nodejs", "options": {"typescript": False}}
+    assert (workspace / content["main"]).resolve() == (stack_dir / "bin").resolve()
+
+
+@patch('cloud_core.pulumi.pulumi_wrapper.compile_stack', return_value=False)
+def test_deployment_context_precompiled_keeps_runtime_options(mock_compile, pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test existing runtime options survive when TypeScript is disabled"""
+    stack_dir = _make_ts_stack(
+        tmp_path, runtime={"name": "nodejs", "options": {"packagemanager": "npm"}}
+    )
+
+    with pulumi_wrapper.deployment_context(
+        stack_dir, deployment_manifest, tmp_path / "deployment", "dev", precompiled=True
+    ) as workspace:
+        content = yaml.safe_load((workspace / "Pulumi.yaml").read_text())
+
+    assert content["runtime"]["options"] == {"packagemanager": "npm", "typescript": False}
+
+
+@patch('cloud_core.pulumi.pulumi_wrapper.compile_stack')
+def test_deployment_context_precompile_failure_falls_back(mock_compile, pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test a failed compile falls back to running TypeScript sources"""
+    from cloud_core.build import BuildError
+    mock_compile.side_effect = BuildError("tsc not found")
+    stack_dir = _make_ts_stack(tmp_path)
+
+    with pulumi_wrapper.deployment_context(
+        stack_dir, deployment_manifest, tmp_path / "deployment", "dev", precompiled=True
+    ) as workspace:
+        content = yaml.safe_load((workspace / "Pulumi.yaml").read_text())
+
+    assert content["runtime"] == {
+        "name": "nodejs",
+        "options": {"tsconfig": str((stack_dir / "tsconfig.json").resolve())},
+    }
+    assert (workspace / content["main"]).resolve() == stack_dir.resolve()
+
+
+def test_deployment_context_uses_stack_tsconfig(pulumi_wrapper, tmp_path, deployment_manifest):
+    """Test TypeScript workspaces compile with the stack's own tsconfig.json"""
+    stack_dir = _make_ts_stack(
+        tmp_path, runtime={"name": "nodejs", "options": {"tsconfig": "tsconfig.json", "nodeargs": "-r x"}}
+    )
+
+    with pulumi_wrapper.deployment_context(
+        stack_dir, deployment_manifest, tmp_path / "deployment", "dev"
+    ) as workspace:
+        content = yaml.safe_load((workspace / "Pulumi.yaml").read_text())
+
+    assert not (workspace / "tsconfig.json").exists()
+    assert content["runtime"]["options"] == {
+        "tsconfig": str((stack_dir / "tsconfig.json").resolve()),
+        "nodeargs": "-r x",
+    }
+
+
+LOCAL_MANIFEST = {
+    "deployment_id": "D1TEST1",
+    "organization": "acme",
+    "project": "web",
+    "pulumiOrg": "acme-pulumi",
+    "pulumiBackend": "local",
+}
+
+
+def test_for_deployment_cloud_backend(tmp_path):
+    """Test cloud deployments use Pulumi Cloud and the composite project"""
+    manifest = {**LOCAL_MANIFEST, "pulumiBackend": "cloud"}
+
+    wrapper = PulumiWrapper.for_deployment(manifest, tmp_path)
+
+    assert wrapper.organization == "acme-pulumi"
+    assert wrapper.project == "D1TEST1-acme-web"
+    assert wrapper.is_local_backend is False
+    assert wrapper._env is None
+    assert not (tmp_path / PulumiWrapper.LOCAL_STATE_DIR).exists()
+
+
+def test_for_deployment_local_backend(tmp_path, monkeypatch):
+    """Test local deployments keep state and passphrase in the deployment dir"""
+    monkeypatch.delenv("PULUMI_CONFIG_PASSPHRASE", raising=False)
+    monkeypatch.delenv("PULUMI_CONFIG_PASSPHRASE_FILE", raising=False)
+
+    wrapper = PulumiWrapper.for_deployment(LOCAL_MANIFEST, tmp_path)
+
+    state_dir = tmp_path / PulumiWrapper.LOCAL_STATE_DIR
+    passphrase_file = tmp_path / PulumiWrapper.LOCAL_PASSPHRASE_FILE
+
+    assert wrapper.is_local_backend
+    assert wrapper.organization == PulumiWrapper.LOCAL_ORGANIZATION
+    assert state_dir.is_dir()
+    assert wrapper._env["PULUMI_BACKEND_URL"] == state_dir.resolve().as_uri()
+    assert wrapper._env["PULUMI_CONFIG_PASSPHRASE_FILE"] == str(passphrase_file.resolve())
+    assert (passphrase_file.stat().st_mode & 0o777) == 0o600
+
+    # The passphrase is stable across runs
+    passphrase = passphrase_file.read_text()
+    PulumiWrapper.for_deployment(LOCAL_MANIFEST, tmp_path)
+    assert passphrase_file.read_text() == passphrase
+
+
+def test_for_deployment_keeps_existing_passphrase(tmp_path, monkeypatch):
+    """Test a passphrase from the environment takes precedence"""
+    monkeypatch.setenv("PULUMI_CONFIG_PASSPHRASE", "from-env")
+
+    wrapper = PulumiWrapper.for_deployment(LOCAL_MANIFEST, tmp_path)
+
+    assert "PULUMI_CONFIG_PASSPHRASE_FILE" not in wrapper._env
+
+
+def test_for_deployment_unknown_backend(tmp_path):
+    """Test unknown backends are rejected"""
+    with pytest.raises(PulumiError, match="Unknown Pulumi backend"):
+        PulumiWrapper.for_deployment({**LOCAL_MANIFEST, "pulumiBackend": "s3"}, tmp_path)
+
+
+@patch('subprocess.run')
+def test_local_backend_commands(mock_run, tmp_path):
+    """Test local backend commands carry the backend env and passphrase secrets"""
+    wrapper = PulumiWrapper.for_deployment(LOCAL_MANIFEST, tmp_path)
+    mock_run.return_value = Mock(returncode=0, stdout="[]", stderr="")
+
+    wrapper.select_stack("network-dev", cwd=tmp_path)
+
+    ls_cmd = mock_run.call_args_list[0][0][0]
+    select_cmd = mock_run.call_args_list[1][0][0]
+
+    assert "--organization" not in ls_cmd
+    assert select_cmd[:4] == [
+        "pulumi", "stack", "select", "organization/D1TEST1-acme-web/network-dev"
+    ]
+    assert select_cmd[-2:] == ["--secrets-provider", "passphrase"]
+    assert mock_run.call_args[1]["env"]["PULUMI_BACKEND_URL"].startswith("file://")
+
+
+@patch("subprocess.run")
+def test_install_plugin_once(mock_run):
+    """Test each plugin is installed once per process"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    wrapper = PulumiWrapper("test-org", "test-project")
+
+    assert wrapper.install_plugin("resource", "aws", "v6.0.0") is True
+    assert wrapper.install_plugin("resource", "aws", "6.0.0") is False
+
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0] == ["pulumi", "plugin", "install", "resource", "aws", "6.0.0"]
+
+
+@patch("subprocess.run")
+def test_refresh_preview_only(mock_run):
+    """Test preview-only refresh reports drifted resources without touching outputs"""
+    bucket = "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::assets"
+    mock_run.return_value = Mock(
+        returncode=0,
+        stdout=json.dumps({
+            "steps": [
+                {"op": "same", "urn": "urn:pulumi:dev::proj::aws:ec2/vpc:Vpc::main"},
+                {"op": "update", "urn": bucket, "oldState": {"type": "aws:s3/bucket:Bucket"}},
+                {"op": "delete", "urn": "urn:pulumi:dev::proj::aws:sqs/queue:Queue::jobs"},
+            ],
+            "changeSummary": {"same": 1, "update": 1, "delete": 1},
+        }),
+        stderr="",
+    )
+    wrapper = PulumiWrapper("test-org", "test-project")
+    wrapper._output_cache["test-org/test-project/network-dev"] = {"vpcId": "vpc-1"}
+
+    result = wrapper.refresh(preview_only=True)
+
+    assert mock_run.call_args[0][0] == [
+        "pulumi", "refresh", "--preview-only", "--json", "--non-interactive"
+    ]
+    assert result["changes"] == {"same": 1, "update": 1, "delete": 1}
+    assert result["drifted"] == [
+        {"urn": bucket, "type": "aws:s3/bucket:Bucket", "op": "update"},
+        {"urn": "urn:pulumi:dev::proj::aws:sqs/queue:Queue::jobs", "type": "aws:sqs/queue:Queue", "op": "delete"},
+    ]
+    assert wrapper._output_cache
+
+
+@patch("subprocess.run")
+def test_export_import_stack(mock_run):
+    """Test stack export and import use the qualified stack name"""
+    mock_run.return_value = Mock(returncode=0, stdout='{"version": 3}', stderr="")
+    wrapper = PulumiWrapper("test-org", "test-project")
+    wrapper._output_cache["test-org/test-project/network-dev"] = {"vpcId": "vpc-1"}
+
+    assert wrapper.export_stack("network-dev") == '{"version": 3}'
+    assert mock_run.call_args[0][0] == [
+        "pulumi", "stack", "export", "--stack", "test-org/test-project/network-dev"
+    ]
+
+    wrapper.import_stack("network-dev", '{"version": 3}')
+
+    cmd = mock_run.call_args[0][0]
+    assert cmd[:5] == ["pulumi", "stack", "import", "--stack", "test-org/test-project/network-dev"]
+    assert cmd[5] == "--file"
+    assert wrapper._output_cache == {}
+
+
+@patch("subprocess.run")
+def test_targeted_up_and_destroy(mock_run):
+    """Test targets are passed to up and destroy"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    wrapper = PulumiWrapper("test-org", "test-project")
+
+    wrapper.up(targets=["urn:a", "urn:b"], refresh=True)
+    assert mock_run.call_args[0][0][-5:] == ["--refresh", "--target", "urn:a", "--target", "urn:b"]
+
+    wrapper.destroy(targets=["urn:a"])
+    assert mock_run.call_args[0][0][-3:] == ["--target", "urn:a", "--target-dependents"]
+
+
+@patch('subprocess.run')
+def test_parallel_flag(mock_run):
+    """Test --parallel is passed to up and destroy"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    wrapper = PulumiWrapper("test-org", "test-project")
+
+    wrapper.up(parallel=8)
+    assert mock_run.call_args[0][0][-2:] == ["--parallel", "8"]
+
+    wrapper.destroy(parallel=4)
+    assert "--parallel" in mock_run.call_args[0][0]
+
+
+@patch('subprocess.run')
+def test_isolated_homes(mock_run, tmp_path):
+    """Test commands run in the worker home and plugins install into the cache"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    homes = PulumiHomes(tmp_path / "homes", tmp_path / "cache", user_home=tmp_path / "user")
+    wrapper = PulumiWrapper("test-org", "test-project", homes=homes)
+
+    wrapper.up()
+    assert mock_run.call_args.kwargs["env"]["PULUMI_HOME"] == str(homes.worker_home())
+
+    wrapper.install_plugin("resource", "aws", "v6.0.0")
+    assert mock_run.call_args.kwargs["env"]["PULUMI_HOME"] == str(homes.cache_home)
+
+
+@patch('subprocess.run')
+def test_cancel_update(mock_run):
+    """Test cancel releases the lock of a qualified stack"""
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+    wrapper = PulumiWrapper("test-org", "test-project")
+
+    wrapper.cancel_update("network-dev")
+
+    assert mock_run.call_args[0][0] == [
+        "pulumi", "cancel", "--yes", "--stack", "test-org/test-project/network-dev"
+    ]
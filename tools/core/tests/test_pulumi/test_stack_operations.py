@@ -5,6 +5,7 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 from cloud_core.pulumi.stack_operations import StackOperations
 from cloud_core.pulumi.pulumi_wrapper import PulumiWrapper, PulumiError
+from cloud_core.pulumi.parallelism import ParallelismTuner
 
 
 @pytest.fixture
@@ -25,6 +26,18 @@ def test_stack_operations_init(mock_pulumi_wrapper):
     assert operations.pulumi is mock_pulumi_wrapper
 
 
+def test_provision_stacks(stack_operations, mock_pulumi_wrapper):
+    """Test provisioning maps stack names to Pulumi stack names"""
+    mock_pulumi_wrapper.ensure_stacks.return_value = ["security-dev"]
+
+    created = stack_operations.provision_stacks(["network", "security"], "dev")
+
+    assert created == ["security-dev"]
+    mock_pulumi_wrapper.ensure_stacks.assert_called_once_with(
+        ["network-dev", "security-dev"], max_workers=8
+    )
+
+
 def test_deploy_stack_success(stack_operations, mock_pulumi_wrapper, tmp_path):
     """Test deploying stack successfully"""
     mock_pulumi_wrapper.select_stack.return_value = None
@@ -44,7 +57,7 @@ def test_deploy_stack_success(stack_operations, mock_pulumi_wrapper, tmp_path):
     assert success is True
     assert error is None
     mock_pulumi_wrapper.select_stack.assert_called_once()
-    mock_pulumi_wrapper.set_all_config.assert_called_once_with(config, cwd=tmp_path)
+    mock_pulumi_wrapper.set_all_config.assert_called_once_with(config, cwd=tmp_path, secret_keys=None)
     mock_pulumi_wrapper.up.assert_called_once()
 
 
@@ -204,7 +217,7 @@ def test_deploy_with_empty_config(stack_operations, mock_pulumi_wrapper, tmp_pat
     )
 
     assert success is True
-    mock_pulumi_wrapper.set_all_config.assert_called_once_with({}, cwd=tmp_path)
+    mock_pulumi_wrapper.set_all_config.assert_called_once_with({}, cwd=tmp_path, secret_keys=None)
 
 
 def test_deploy_creates_stack_if_not_exists(stack_operations, mock_pulumi_wrapper, tmp_path):
@@ -263,3 +276,218 @@ def test_preview_returns_error_on_failure(stack_operations, mock_pulumi_wrapper,
 
     assert success is False
     assert error == "Preview failed"
+
+
+def test_preview_stack(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test previewing a stack reports its resource changes"""
+    mock_pulumi_wrapper.preview.return_value = {
+        "success": True,
+        "changes": {"create": 1},
+        "output": "{}",
+    }
+
+    mock_pulumi_wrapper.list_stacks.return_value = {"network-dev"}
+
+    result = stack_operations.preview_stack("network", "dev", tmp_path, {"key": "value"})
+
+    assert result == {"success": True, "deployed": True, "changes": {"create": 1}, "error": None}
+    mock_pulumi_wrapper.select_stack.assert_called_once_with("network-dev", create=False, cwd=tmp_path)
+    mock_pulumi_wrapper.set_all_config.assert_called_once_with(
+        {"key": "value"}, cwd=tmp_path, secret_keys=None
+    )
+
+
+def test_preview_stack_error(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test preview errors are returned instead of raised"""
+    mock_pulumi_wrapper.list_stacks.side_effect = PulumiError("no access")
+
+    result = stack_operations.preview_stack("network", "dev", tmp_path, {})
+
+    assert result["success"] is False
+    assert result["error"] == "no access"
+
+
+def test_preview_stack_not_deployed(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test previewing a never-deployed stack doesn't create it"""
+    mock_pulumi_wrapper.list_stacks.return_value = {"dns-dev"}
+
+    result = stack_operations.preview_stack("network", "dev", tmp_path, {})
+
+    assert result == {"success": True, "deployed": False, "changes": {}, "error": None}
+    mock_pulumi_wrapper.select_stack.assert_not_called()
+    mock_pulumi_wrapper.preview.assert_not_called()
+
+
+def test_detect_drift(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test drift detection runs a preview-only refresh"""
+    drifted = [{"urn": "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::assets", "type": "aws:s3/bucket:Bucket", "op": "update"}]
+    mock_pulumi_wrapper.refresh.return_value = {
+        "success": True,
+        "changes": {"update": 1, "same": 4},
+        "drifted": drifted,
+    }
+
+    result = stack_operations.detect_drift("network", "dev", tmp_path)
+
+    assert result["success"] is True
+    assert result["drifted"] == drifted
+    mock_pulumi_wrapper.select_stack.assert_called_once_with("network-dev", create=False, cwd=tmp_path)
+    mock_pulumi_wrapper.refresh.assert_called_once_with(cwd=tmp_path, preview_only=True)
+
+
+def test_detect_drift_error(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test drift errors are returned instead of raised"""
+    mock_pulumi_wrapper.refresh.side_effect = PulumiError("expired credentials")
+
+    result = stack_operations.detect_drift("network", "dev", tmp_path)
+
+    assert result["success"] is False
+    assert result["drifted"] == []
+    assert result["error"] == "expired credentials"
+
+
+def test_rollback_stack(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test rollback destroys new resources and reconciles changed ones without refreshing"""
+    added = "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::new"
+    changed = "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::old"
+    snapshot = '{"deployment": {"resources": [{"urn": "%s", "type": "aws:s3/bucket:Bucket", "inputs": {"v": 1}}]}}' % changed
+    current = (
+        '{"deployment": {"resources": ['
+        '{"urn": "%s", "type": "aws:s3/bucket:Bucket", "inputs": {"v": 2}},'
+        '{"urn": "%s", "type": "aws:s3/bucket:Bucket"}]}}' % (changed, added)
+    )
+    mock_pulumi_wrapper.export_stack.side_effect = [current, snapshot]
+
+    success, error = stack_operations.rollback_stack("network", "dev", tmp_path, snapshot)
+
+    assert (success, error) == (True, None)
+    assert mock_pulumi_wrapper.destroy.call_args.kwargs["targets"] == [added]
+    assert mock_pulumi_wrapper.up.call_args.kwargs["targets"] == [changed]
+    assert "refresh" not in mock_pulumi_wrapper.up.call_args.kwargs
+    mock_pulumi_wrapper.import_stack.assert_not_called()
+    mock_pulumi_wrapper.refresh.assert_not_called()
+
+
+def test_rollback_stack_reports_unrestored(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test resources still differing after the rollback are reported as a failure"""
+    changed = "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::assets"
+    snapshot = '{"deployment": {"resources": [{"urn": "%s", "type": "aws:s3/bucket:Bucket", "inputs": {"v": 1}}]}}' % changed
+    current = snapshot.replace('"v": 1', '"v": 2')
+    # The program wants the current values, so the up changes nothing
+    mock_pulumi_wrapper.export_stack.side_effect = [current, current]
+
+    success, error = stack_operations.rollback_stack("network", "dev", tmp_path, snapshot)
+
+    assert success is False
+    assert error == "1 resource(s) not restored: assets"
+
+
+def test_rollback_stack_restores_config(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test the checkpoint's config is applied before reconciling"""
+    changed = "urn:pulumi:dev::proj::aws:s3/bucket:Bucket::assets"
+    snapshot = '{"deployment": {"resources": [{"urn": "%s", "type": "aws:s3/bucket:Bucket", "inputs": {"v": 1}}]}}' % changed
+    current = snapshot.replace('"v": 1', '"v": 2')
+    mock_pulumi_wrapper.export_stack.side_effect = [current, snapshot]
+    calls = []
+    mock_pulumi_wrapper.set_all_config.side_effect = lambda *args, **kwargs: calls.append("config")
+    mock_pulumi_wrapper.up.side_effect = lambda **kwargs: calls.append("up")
+
+    success, _ = stack_operations.rollback_stack(
+        "network", "dev", tmp_path, snapshot,
+        config={"proj:versioning": "false"}, secret_keys=["dbPassword"],
+    )
+
+    assert success is True
+    mock_pulumi_wrapper.set_all_config.assert_called_once_with(
+        {"proj:versioning": "false"}, cwd=tmp_path, secret_keys=["dbPassword"]
+    )
+    assert calls == ["config", "up"]
+
+
+def test_rollback_stack_unchanged(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test rolling back to the current state touches nothing"""
+    snapshot = '{"deployment": {"resources": []}}'
+    mock_pulumi_wrapper.export_stack.return_value = snapshot
+
+    success, _ = stack_operations.rollback_stack("network", "dev", tmp_path, snapshot)
+
+    assert success is True
+    mock_pulumi_wrapper.destroy.assert_not_called()
+    mock_pulumi_wrapper.up.assert_not_called()
+    mock_pulumi_wrapper.import_stack.assert_not_called()
+
+
+def test_rollback_stack_error(stack_operations, mock_pulumi_wrapper, tmp_path):
+    """Test rollback errors are returned instead of raised"""
+    mock_pulumi_wrapper.export_stack.side_effect = PulumiError("stack is locked")
+
+    success, error = stack_operations.rollback_stack("network", "dev", tmp_path, "{}")
+
+    assert success is False
+    assert error == "stack is locked"
+
+
+def test_deploy_stack_records_parallelism(mock_pulumi_wrapper, tmp_path):
+    """Test deploys pass --parallel and feed the outcome back to the tuner"""
+    tuner = ParallelismTuner(tmp_path)
+    operations = StackOperations(mock_pulumi_wrapper, parallelism=tuner)
+    mock_pulumi_wrapper.up.return_value = {
+        "success": True,
+        "changes": {"same": 30, "create": 10},
+        "errors": ["error: ThrottlingException: Rate exceeded"],
+    }
+
+    parallel = operations.choose_parallelism("network", "dev")
+    success, _ = operations.deploy_stack(
+        "D1TEST1", "network", "dev", tmp_path, {}, parallel=parallel
+    )
+
+    assert success is True
+    assert mock_pulumi_wrapper.up.call_args.kwargs["parallel"] == ParallelismTuner.DEFAULT_PARALLEL
+    assert operations.choose_parallelism("network", "dev") == ParallelismTuner.DEFAULT_PARALLEL // 2
+    assert operations.choose_parallelism("network", "dev", override=3) == 3
+
+
+@patch('subprocess.run')
+def test_deploy_stack_secrets_reach_set_all(mock_run, tmp_path):
+    """Test template inputs marked secret are written with --secret"""
+    from cloud_core.deployment.config_generator import ConfigGenerator
+    from cloud_core.templates.stack_template_manager import StackTemplateManager
+
+    mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
+
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "database.yaml").write_text(
+        "name: database\n"
+        "parameters:\n"
+        "  inputs:\n"
+        "    dbPassword: {type: string, secret: true}\n"
+        "    dbName: {type: string, secret: false}\n"
+    )
+    config_gen = ConfigGenerator(tmp_path / "deploy", StackTemplateManager(templates))
+    assert config_gen.get_secret_keys("database") == ["dbPassword"]
+    assert config_gen.get_secret_keys("network") == []
+
+    config_file = tmp_path / "database.dev.yaml"
+    config_file.write_text(
+        'test-project:dbPassword: "hunter2"\n'
+        'test-project:dbName: "app"\n'
+    )
+
+    wrapper = PulumiWrapper("test-org", "test-project", working_dir=tmp_path)
+    StackOperations(wrapper).deploy_stack(
+        deployment_id="D1TEST1",
+        stack_name="database",
+        environment="dev",
+        stack_dir=tmp_path,
+        config={},
+        config_file=config_file,
+        secret_keys=config_gen.get_secret_keys("database"),
+    )
+
+    set_all = next(
+        call[0][0] for call in mock_run.call_args_list if call[0][0][:3] == ["pulumi", "config", "set-all"]
+    )
+    assert set_all[set_all.index("test-project:dbPassword=hunter2") - 1] == "--secret"
+    assert set_all[set_all.index("test-project:dbName=app") - 1] == "--plaintext"
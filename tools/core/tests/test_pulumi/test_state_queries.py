@@ -40,7 +40,7 @@ def test_get_output(state_queries, mock_pulumi_wrapper):
 
     assert result == "test-value"
     mock_pulumi_wrapper.get_stack_output.assert_called_once_with(
-        "TestOrg/test-project/D1TEST1-network-dev",
+        "TestOrg/test-project/network-dev",
         "vpcId"
     )
 
@@ -69,7 +69,7 @@ def test_get_all_outputs(state_queries, mock_pulumi_wrapper):
 
     assert result == {"key1": "value1", "key2": "value2"}
     mock_pulumi_wrapper.get_all_stack_outputs.assert_called_once_with(
-        "TestOrg/test-project/D1TEST1-network-dev"
+        "TestOrg/test-project/network-dev"
     )
 
 
@@ -97,7 +97,7 @@ def test_full_stack_name_format(state_queries, mock_pulumi_wrapper):
 
     # Verify the full stack name format
     call_args = mock_pulumi_wrapper.get_stack_output.call_args[0]
-    assert call_args[0] == "TestOrg/test-project/D2PROD9-database-production"
+    assert call_args[0] == "TestOrg/test-project/database-production"
 
 
 def test_multiple_environments(state_queries, mock_pulumi_wrapper):
@@ -110,8 +110,8 @@ def test_multiple_environments(state_queries, mock_pulumi_wrapper):
 
     # Verify both were called with correct stack names
     calls = mock_pulumi_wrapper.get_stack_output.call_args_list
-    assert calls[0][0][0] == "TestOrg/test-project/D1TEST1-network-dev"
-    assert calls[1][0][0] == "TestOrg/test-project/D1TEST1-network-prod"
+    assert calls[0][0][0] == "TestOrg/test-project/network-dev"
+    assert calls[1][0][0] == "TestOrg/test-project/network-prod"
 
 
 def test_multiple_stacks(state_queries, mock_pulumi_wrapper):
@@ -124,5 +124,21 @@ def test_multiple_stacks(state_queries, mock_pulumi_wrapper):
 
     # Verify both were called with correct stack names
     calls = mock_pulumi_wrapper.get_stack_output.call_args_list
-    assert calls[0][0][0] == "TestOrg/test-project/D1TEST1-network-dev"
-    assert calls[1][0][0] == "TestOrg/test-project/D1TEST1-database-dev"
+    assert calls[0][0][0] == "TestOrg/test-project/network-dev"
+    assert calls[1][0][0] == "TestOrg/test-project/database-dev"
+
+
+def test_stack_name_matches_local_backend():
+    """Test names resolve against a wrapper using the local file backend"""
+    wrapper = PulumiWrapper(
+        organization="TestOrg",
+        project="D1TEST1-acme-web",
+        backend_url="file:///tmp/state",
+    )
+    wrapper.get_stack_output = MagicMock(return_value="vpc-1")
+
+    StateQueries(wrapper).get_output("D1TEST1", "network", "dev", "vpcId")
+
+    wrapper.get_stack_output.assert_called_once_with(
+        "organization/D1TEST1-acme-web/network-dev", "vpcId"
+    )
@@ -1,7 +1,10 @@
 """Tests for StackReferenceResolver"""
 
+import json
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
+from cloud_core.pulumi.pulumi_wrapper import PulumiWrapper
+from cloud_core.runtime.placeholder_resolver import create_stack_config_resolver
 from cloud_core.runtime.stack_reference_resolver import (
     StackReferenceResolver,
     create_resolver_with_pulumi,
@@ -213,10 +216,16 @@ def test_is_stack_reference():
 
 
 def test_pulumi_stack_name_format():
-    """Test that Pulumi stack name is correctly formatted"""
-    resolver = StackReferenceResolver("D1TEST1", "dev", "TestOrg", "test-project")
+    """Test stacks are named <stack>-<env> and qualified by the injected function"""
+    resolver = StackReferenceResolver(
+        "D1TEST1", "dev", "TestOrg", "test-project",
+        qualify_stack_name=lambda name: f"TestOrg/D1TEST1-TestOrg-test-project/{name}",
+    )
 
-    expected_stack_name = "TestOrg/test-project/D1TEST1-network-dev"
+    expected_stack_name = "TestOrg/D1TEST1-TestOrg-test-project/network-dev"
+    assert StackReferenceResolver("D1TEST1", "dev", "TestOrg", "p").get_pulumi_stack_name(
+        "network"
+    ) == "network-dev"
 
     captured_stack_name = None
 
@@ -294,6 +303,26 @@ def test_create_resolver_with_pulumi_all_outputs():
     assert outputs["subnetId"] == "subnet-67890"
 
 
+def test_create_resolver_with_pulumi_prefetches_upstream():
+    """Test upstream stack outputs are prefetched in one batch"""
+    mock_pulumi_wrapper = Mock()
+    mock_pulumi_wrapper.qualify_stack_name.side_effect = lambda name: f"TestOrg/D1TEST1-TestOrg-test-project/{name}"
+
+    create_resolver_with_pulumi(
+        deployment_id="D1TEST1",
+        environment="dev",
+        organization="TestOrg",
+        project="test-project",
+        pulumi_wrapper=mock_pulumi_wrapper,
+        upstream_stacks=["network", "security"],
+    )
+
+    mock_pulumi_wrapper.prefetch_stack_outputs.assert_called_once_with([
+        "TestOrg/D1TEST1-TestOrg-test-project/network-dev",
+        "TestOrg/D1TEST1-TestOrg-test-project/security-dev",
+    ])
+
+
 def test_create_resolver_with_pulumi_error_handling():
     """Test error handling in created resolver"""
     mock_pulumi_wrapper = Mock()
@@ -365,3 +394,57 @@ def test_preload_empty_stack():
 
     assert count == 0
     assert len(resolver.cache) == 0
+
+
+@patch('subprocess.run')
+def test_stack_reference_sees_updated_outputs(mock_run, tmp_path):
+    """Test updating a stack through the wrapper invalidates what references resolve to"""
+    wrapper = PulumiWrapper("TestOrg", "D1TEST1-TestOrg-test-project", working_dir=tmp_path)
+    outputs = {"vpcId": "vpc-1"}
+
+    def run(cmd, **kwargs):
+        stdout = json.dumps(outputs) if cmd[:3] == ["pulumi", "stack", "output"] else ""
+        return Mock(returncode=0, stdout=stdout, stderr="")
+
+    mock_run.side_effect = run
+    resolver = create_resolver_with_pulumi(
+        "D1TEST1", "dev", "TestOrg", "test-project", wrapper, upstream_stacks=["network"]
+    )
+    assert resolver.resolve("stack.network.vpcId") == "vpc-1"
+
+    wrapper.select_stack("network-dev", create=False)
+    outputs["vpcId"] = "vpc-2"
+    wrapper._invalidate_selected_outputs()
+
+    assert resolver.resolve("stack.network.vpcId") == "vpc-2"
+    fetches = [c for c in mock_run.call_args_list if c[0][0][:3] == ["pulumi", "stack", "output"]]
+    assert len(fetches) == 2
+    assert "TestOrg/D1TEST1-TestOrg-test-project/network-dev" in fetches[0][0][0]
+
+
+def test_stack_config_resolver_prefetches_references():
+    """Test a stack's config placeholders are resolved from prefetched upstream outputs"""
+    wrapper = Mock()
+    wrapper.qualify_stack_name.side_effect = lambda name: f"TestOrg/proj/{name}"
+    wrapper.get_stack_output.side_effect = lambda stack, key: {"vpcId": "vpc-1", "sgId": "sg-1"}[key]
+    manifest = {
+        "deployment_id": "D1TEST1",
+        "organization": "TestOrg",
+        "project": "test-project",
+        "environments": {"dev": {"region": "us-west-2"}},
+    }
+
+    assert create_stack_config_resolver(manifest, "dev", {"cidr": "10.0.0.0/16"}, wrapper) is None
+
+    resolver = create_stack_config_resolver(
+        manifest, "dev",
+        {"vpc": "${stack.network.vpcId}", "sg": "${stack.security.sgId}", "region": "${env.region}"},
+        wrapper,
+    )
+    wrapper.prefetch_stack_outputs.assert_called_once_with(
+        ["TestOrg/proj/network-dev", "TestOrg/proj/security-dev"]
+    )
+    assert resolver.resolve({"vpc": "${stack.network.vpcId}", "region": "${env.region}"}) == {
+        "vpc": "vpc-1",
+        "region": "us-west-2",
+    }
@@ -0,0 +1,46 @@
+"""Tests for the code fingerprint"""
+
+import pytest
+from cloud_core.utils.fingerprint import fingerprint_code
+
+
+@pytest.fixture
+def stack_dir(tmp_path):
+    """Create a minimal stack source tree"""
+    stack_dir = tmp_path / "network"
+    (stack_dir / "src").mkdir(parents=True)
+    (stack_dir / "index.ts").write_text("export const a = 1;")
+    (stack_dir / "src" / "vpc.ts").write_text("export const vpc = 1;")
+    return stack_dir
+
+
+def test_fingerprint_changes_with_source(stack_dir):
+    """Test fingerprint tracks source content"""
+    before = fingerprint_code(stack_dir)
+    assert fingerprint_code(stack_dir) == before
+
+    (stack_dir / "src" / "vpc.ts").write_text("export const vpc = 2;")
+
+    assert fingerprint_code(stack_dir) != before
+
+
+def test_fingerprint_ignores_dependencies(stack_dir):
+    """Test installed packages and build output do not affect fingerprint"""
+    before = fingerprint_code(stack_dir)
+
+    (stack_dir / "node_modules" / "pkg").mkdir(parents=True)
+    (stack_dir / "node_modules" / "pkg" / "index.js").write_text("x")
+    (stack_dir / "bin").mkdir()
+    (stack_dir / "bin" / "index.js").write_text("y")
+
+    assert fingerprint_code(stack_dir) == before
+
+
+def test_fingerprint_ignores_docs(stack_dir):
+    """Test documentation does not affect fingerprint"""
+    before = fingerprint_code(stack_dir)
+
+    (stack_dir / "docs").mkdir()
+    (stack_dir / "docs" / "README.md").write_text("# Network")
+
+    assert fingerprint_code(stack_dir) == before
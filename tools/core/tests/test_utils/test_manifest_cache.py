@@ -0,0 +1,133 @@
+"""Tests for the process-wide manifest cache"""
+
+import copy
+import os
+import threading
+
+import pytest
+import yaml
+
+from cloud_core.utils.manifest_cache import ManifestCache
+
+
+MANIFEST = {
+    "deployment_id": "D1TEST1",
+    "stacks": {"network": {"enabled": True, "layer": 1, "dependencies": []}},
+}
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    """Write a small manifest"""
+    path = tmp_path / "deployment-manifest.yaml"
+    path.write_text(yaml.safe_dump(MANIFEST, sort_keys=False))
+    return path
+
+
+def test_manifest_parsed_once(manifest_path):
+    """Test repeated reads share one parse until the file changes"""
+    cache = ManifestCache()
+
+    first = cache.get(manifest_path)
+    assert cache.get(manifest_path) is first
+    assert first == MANIFEST
+    assert cache.parses == 1
+
+    manifest_path.write_text(yaml.safe_dump({**MANIFEST, "deployment_id": "D1OTHER"}))
+    assert cache.get(manifest_path)["deployment_id"] == "D1OTHER"
+    assert cache.parses == 2
+
+
+def test_views_are_read_only(manifest_path):
+    """Test views reject changes and copies of them are mutable"""
+    cache = ManifestCache()
+    view = cache.get(manifest_path)
+
+    with pytest.raises(TypeError):
+        view["stacks"]["network"]["enabled"] = False
+    with pytest.raises(TypeError):
+        view["stacks"]["network"]["dependencies"].append("dns")
+
+    mutable = copy.deepcopy(view)
+    mutable["stacks"]["network"]["enabled"] = False
+    assert type(mutable) is dict
+
+    loaded = cache.load(manifest_path)
+    loaded["stacks"].pop("network")
+    assert "network" in cache.get(manifest_path)["stacks"]
+
+
+def test_edit_writes_once(manifest_path, monkeypatch):
+    """Test an edit block writes only at its end and only on change"""
+    cache = ManifestCache()
+    writes = []
+    original = cache.write
+    monkeypatch.setattr(cache, "write", lambda *args: writes.append(args) or original(*args))
+
+    with cache.edit(manifest_path) as manifest:
+        manifest["stacks"]["network"]["layer"] = 2
+        manifest["stacks"]["dns"] = {"enabled": True}
+    assert len(writes) == 1
+
+    with cache.edit(manifest_path):
+        pass
+    assert len(writes) == 1
+
+    # Written content is cached without being parsed back
+    assert cache.get(manifest_path)["stacks"]["dns"] == {"enabled": True}
+    assert cache.parses == 1
+    assert yaml.safe_load(manifest_path.read_text())["stacks"]["network"]["layer"] == 2
+
+
+def test_edit_discarded_on_error(manifest_path):
+    """Test nothing is written when the edit block raises"""
+    cache = ManifestCache()
+    stamp = os.stat(manifest_path).st_mtime_ns
+
+    with pytest.raises(KeyError):
+        with cache.edit(manifest_path) as manifest:
+            manifest["deployment_id"] = "D1OTHER"
+            raise KeyError("stack")
+
+    assert os.stat(manifest_path).st_mtime_ns == stamp
+    assert cache.get(manifest_path)["deployment_id"] == "D1TEST1"
+
+
+def test_edit_blocks_only_same_file(manifest_path, tmp_path):
+    """Test an open edit block doesn't hold up reads or edits of other files"""
+    cache = ManifestCache()
+    other_path = tmp_path / "other-manifest.yaml"
+    other_path.write_text(yaml.safe_dump(MANIFEST, sort_keys=False))
+    done = []
+
+    def other_thread():
+        done.append(cache.get(manifest_path)["deployment_id"])
+        with cache.edit(other_path) as manifest:
+            manifest["deployment_id"] = "D1OTHER"
+        done.append(cache.get(other_path)["deployment_id"])
+
+    with cache.edit(manifest_path) as manifest:
+        manifest["stacks"]["network"]["layer"] = 2
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join(timeout=5)
+
+    assert done == ["D1TEST1", "D1OTHER"]
+    assert cache.get(manifest_path)["stacks"]["network"]["layer"] == 2
+
+
+def test_concurrent_edits_keep_all_changes(manifest_path):
+    """Test edits of the same file from several threads don't overwrite each other"""
+    cache = ManifestCache()
+
+    def add_stack(name):
+        with cache.edit(manifest_path) as manifest:
+            manifest["stacks"][name] = {"enabled": True}
+
+    threads = [threading.Thread(target=add_stack, args=(f"stack{n}",)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache.get(manifest_path)["stacks"]) == 9
@@ -0,0 +1,105 @@
+"""Tests for the serialization layer"""
+
+import os
+import pickle
+
+import pytest
+import yaml
+
+from cloud_core.deployment.state_backend import YamlStateBackend
+from cloud_core.utils import serialization
+from cloud_core.utils.serialization import (
+    NEW_FILE_MODE,
+    read_document,
+    read_yaml,
+    sidecar_path,
+    write_json,
+    write_yaml,
+)
+
+
+@pytest.fixture
+def large_yaml(tmp_path):
+    """Write a YAML file big enough to get a sidecar"""
+    path = tmp_path / "template.yaml"
+    document = {f"stack{n}": {"enabled": True, "layer": n, "dependencies": []} for n in range(200)}
+    write_yaml(path, document)
+    return path, document
+
+
+def test_read_yaml_uses_sidecar(large_yaml, monkeypatch):
+    """Test a parsed document is reused from its sidecar while the file is unchanged"""
+    path, document = large_yaml
+
+    assert read_yaml(path) == document
+    assert sidecar_path(path).exists()
+
+    monkeypatch.setattr(serialization, "load_yaml", lambda stream: pytest.fail("parsed again"))
+    assert read_yaml(path) == document
+
+
+def test_sidecar_invalidated_by_content(large_yaml):
+    """Test a changed file is parsed again and its sidecar replaced"""
+    path, document = large_yaml
+    read_yaml(path)
+
+    document["stack0"]["enabled"] = False
+    write_yaml(path, document)
+    assert read_yaml(path)["stack0"]["enabled"] is False
+
+    # A sidecar with unexpected classes is ignored rather than loaded
+    digest = sidecar_path(path).read_bytes()[: len(serialization._SIDECAR_MAGIC) + 32]
+    sidecar_path(path).write_bytes(digest + pickle.dumps(pytest.fail))
+    assert read_yaml(path)["stack1"]["layer"] == 1
+
+
+def test_small_files_have_no_sidecar(tmp_path):
+    """Test small documents are parsed directly"""
+    path = tmp_path / ".deployment-metadata.yaml"
+    write_yaml(path, {"deployment_id": "D1TEST1"})
+
+    assert read_yaml(path) == {"deployment_id": "D1TEST1"}
+    assert not sidecar_path(path).exists()
+
+    empty = tmp_path / "empty.yaml"
+    empty.write_text("")
+    assert read_yaml(empty, default={}) == {}
+
+
+def test_state_written_as_json(tmp_path):
+    """Test state is stored as JSON and older YAML state is still read"""
+    state_file = tmp_path / ".deployment-state.yaml"
+    state_file.write_text("status: deployed\nstacks:\n  network: {status: deployed}\n")
+
+    backend = YamlStateBackend(state_file, tmp_path / ".operation-history.jsonl", flush_interval=0)
+    state = backend.load()
+    assert state["stacks"]["network"]["status"] == "deployed"
+
+    state["status"] = "partial"
+    backend.save(state)
+
+    text = state_file.read_text()
+    assert text.lstrip().startswith("{")
+    assert read_document(state_file)["status"] == "partial"
+    assert yaml.safe_load(text)["stacks"]["network"]["status"] == "deployed"
+
+
+def test_rewrites_keep_file_mode(tmp_path):
+    """Test atomic rewrites keep the replaced file's permissions"""
+    path = tmp_path / "deployment-manifest.yaml"
+    write_yaml(path, {"deployment_id": "D1TEST1"})
+    assert os.stat(path).st_mode & 0o777 == NEW_FILE_MODE
+
+    os.chmod(path, 0o644)
+    write_yaml(path, {"deployment_id": "D1OTHER"})
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+    state_file = tmp_path / ".deployment-state.yaml"
+    state_file.write_text("{}")
+    os.chmod(state_file, 0o640)
+    write_json(state_file, {"status": "deployed"}, durable=True)
+    assert os.stat(state_file).st_mode & 0o777 == 0o640
+
+    backend = YamlStateBackend(state_file, tmp_path / ".operation-history.jsonl", flush_interval=0)
+    backend.save({"status": "partial"})
+    assert os.stat(state_file).st_mode & 0o777 == 0o640
@@ -0,0 +1,88 @@
+"""Tests for stack output capture"""
+
+import threading
+from cloud_core.utils.stack_output import OutputTail, StackOutputLog, stack_log_name
+
+
+def test_output_tail_keeps_last_bytes():
+    """Test the tail never holds more than max_bytes"""
+    tail = OutputTail(max_bytes=10)
+
+    tail.write("0123456")
+    tail.write("789abc")
+
+    assert tail.getvalue() == "3456789abc"
+    assert len(tail) == 10
+    assert tail.truncated
+    assert tail.total_bytes == 13
+
+
+def test_output_tail_large_write():
+    """Test a single write larger than the buffer keeps its end"""
+    tail = OutputTail(max_bytes=4)
+
+    tail.write("hello world")
+
+    assert str(tail) == "orld"
+
+
+def test_output_tail_multibyte_boundary():
+    """Test a character cut at the buffer start is dropped, not garbled"""
+    tail = OutputTail(max_bytes=4)
+
+    tail.write("aé")
+    tail.write("bcd")
+
+    assert tail.getvalue() == "bcd"
+
+
+def test_output_tail_concurrent_writes():
+    """Test writes from several threads stay bounded"""
+    tail = OutputTail(max_bytes=100)
+
+    def write():
+        for _ in range(1000):
+            tail.write("line\n")
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(tail) == 100
+    assert tail.total_bytes == 4 * 1000 * 5
+
+
+def test_stack_output_log_writes_file_and_tail(tmp_path):
+    """Test output goes to the log file in full and to the tail bounded"""
+    path = tmp_path / "logs" / "network.log"
+
+    with StackOutputLog(path, OutputTail(max_bytes=8)) as log:
+        log.write("first line\n")
+        log.write("second\n")
+
+    assert path.read_text() == "first line\nsecond\n"
+    assert log.tail.getvalue() == "\nsecond\n"
+
+    # Writes after close only reach the tail
+    log.write("late\n")
+    assert path.read_text() == "first line\nsecond\n"
+
+
+def test_stack_output_log_without_file():
+    """Test a log without a path only keeps the tail"""
+    log = StackOutputLog()
+    log.write("output\n")
+    log.close()
+
+    assert log.path is None
+    assert log.tail.getvalue() == "output\n"
+
+
+def test_stack_log_name():
+    """Test log names match the `cloud logs` stack filter"""
+    name = stack_log_name("D1ABC23", "network", "dev", "deploy")
+
+    assert name.startswith("D1ABC23-network-dev-deploy_")
+    assert name.endswith(".log")
@@ -2,12 +2,21 @@
 """
 Build all Pulumi stacks
 Architecture 3.1 - Session 2.1 Verification
+
+Stacks are built in parallel worker processes. Dependencies are installed
+once per distinct lockfile into a shared content-addressed store and
+hardlinked into each stack; stacks whose sources are unchanged skip tsc.
 """
 
-import subprocess
+import argparse
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Tuple
+
+# Make cloud_core importable when run from a source checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "core"))
+
+from cloud_core.build import StackBuilder, BuildResult  # noqa: E402
 
 # Stack root (relative to workspace root)
 import os
@@ -35,109 +44,48 @@ STACKS = [
 ]
 
 
-def run_command(cmd: List[str], cwd: Path) -> Tuple[int, str, str]:
-    """Run a command and return exit code, stdout, stderr"""
-    try:
-        result = subprocess.run(
-            cmd,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=300,
-        )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return -1, "", "Command timed out"
-    except Exception as e:
-        return -1, "", str(e)
-
-
-def build_stack(stack_name: str) -> Dict[str, any]:
-    """Build a single stack"""
-    stack_dir = STACKS_ROOT / stack_name
-
-    print(f"\nBuilding stack: {stack_name}")
-    print(f"  Directory: {stack_dir}")
-
-    result = {
-        "stack": stack_name,
-        "npm_install": False,
-        "npm_build": False,
-        "errors": [],
-    }
-
-    # Check if directory exists
-    if not stack_dir.exists():
-        result["errors"].append("Directory does not exist")
-        return result
-
-    # Check if index.ts exists at root
-    if not (stack_dir / "index.ts").exists():
-        result["errors"].append("index.ts not found at root")
-        return result
-
-    # Check if package.json exists
-    if not (stack_dir / "package.json").exists():
-        result["errors"].append("package.json not found")
-        return result
-
-    # npm install
-    print("  Running npm install...")
-    exit_code, stdout, stderr = run_command(["npm", "install"], stack_dir)
-
-    if exit_code == 0:
-        result["npm_install"] = True
-        print("  [OK] npm install")
-    else:
-        result["errors"].append(f"npm install failed: {stderr}")
-        print(f"  [ERROR] npm install failed")
-        return result
-
-    # npm run build (TypeScript compilation)
-    print("  Running npm run build...")
-    exit_code, stdout, stderr = run_command(["npm", "run", "build"], stack_dir)
-
-    if exit_code == 0:
-        result["npm_build"] = True
-        print("  [OK] npm run build")
-    else:
-        # Check if it's just missing script (some stacks may not have build script)
-        if "Missing script" in stderr or "Missing script" in stdout:
-            # Try tsc directly
-            print("  No build script, trying tsc directly...")
-            exit_code, stdout, stderr = run_command(["npx", "tsc"], stack_dir)
-            if exit_code == 0:
-                result["npm_build"] = True
-                print("  [OK] tsc compilation")
-            else:
-                result["errors"].append(f"TypeScript compilation failed: {stderr}")
-                print(f"  [ERROR] TypeScript compilation failed")
-        else:
-            result["errors"].append(f"npm run build failed: {stderr}")
-            print(f"  [ERROR] npm run build failed")
+def print_result(result: BuildResult) -> None:
+    """Print the outcome of one stack as it finishes"""
+    if not result.success:
+        print(f"  [ERROR] {result.stack}")
+        return
 
-    return result
+    install = "reused" if result.install_reused else "installed"
+    build = "up to date" if result.build_skipped else "compiled"
+    print(f"  [OK] {result.stack} (dependencies {install}, {build}, {result.duration:.1f}s)")
 
 
 def main():
     """Build all stacks"""
+    parser = argparse.ArgumentParser(description="Build Pulumi stacks in parallel")
+    parser.add_argument("stacks", nargs="*", help="Stacks to build (default: all)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="Worker processes (default: number of CPU cores)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Recompile stacks even if their sources are unchanged",
+    )
+    parser.add_argument(
+        "--store", type=Path, default=None,
+        help="Shared node_modules store (default: <cloud>/.build-cache)",
+    )
+    args = parser.parse_args()
+
+    stacks = args.stacks or STACKS
+
     print("=" * 70)
     print("Building All Pulumi Stacks - Architecture 3.1")
     print("=" * 70)
 
-    results = []
-    for stack in STACKS:
-        try:
-            result = build_stack(stack)
-            results.append(result)
-        except Exception as e:
-            print(f"  [ERROR] Exception: {e}")
-            results.append({
-                "stack": stack,
-                "npm_install": False,
-                "npm_build": False,
-                "errors": [str(e)],
-            })
+    builder = StackBuilder(STACKS_ROOT, store_root=args.store, max_workers=args.jobs)
+    print(f"  Stacks: {len(stacks)}, workers: {builder.max_workers}")
+    print(f"  Store: {builder.store.root}\n")
+
+    started = time.monotonic()
+    results = builder.build(stacks, force=args.force, on_result=print_result)
+    elapsed = time.monotonic() - started
 
     # Summary
     print("\n" + "=" * 70)
@@ -148,19 +96,20 @@ def main():
     failed = 0
 
     for result in results:
-        stack = result["stack"]
-        if result["npm_install"] and result["npm_build"]:
-            print(f"[OK] {stack}")
+        if result.success:
+            print(f"[OK] {result.stack}")
             successful += 1
         else:
-            print(f"[FAIL] {stack}")
-            for error in result["errors"]:
+            print(f"[FAIL] {result.stack}")
+            for error in result.errors:
                 print(f"  - {error}")
             failed += 1
 
     print(f"\nResults:")
-    print(f"  Successful: {successful}/{len(STACKS)}")
-    print(f"  Failed: {failed}/{len(STACKS)}")
+    print(f"  Successful: {successful}/{len(stacks)}")
+    print(f"  Failed: {failed}/{len(stacks)}")
+    print(f"  Compiled: {sum(1 for r in results if r.npm_build and not r.build_skipped)}")
+    print(f"  Elapsed: {elapsed:.1f}s")
 
     if failed == 0:
         print("\n[SUCCESS] All stacks built successfully!")